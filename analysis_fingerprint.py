@@ -0,0 +1,96 @@
+# analysis_fingerprint.py — the metrics an LLM analysis was written from, and when they've moved
+# ============================================================
+# The fingerprint stores each metric's raw value at analysis time. A refresh compares today's
+# values against those, metric by metric: the texts only need regenerating once some metric
+# has moved by its tolerance (RSI by 5 pts, ROI 24h by 2 pts, market cap by ~26%...) or a
+# sign-tracked metric (MACD cross, histogram, volume trend) has crossed zero. Widen tolerances
+# (LUNA_FP_STEPS="rsi=10,roi_24h=5") to re-pay for fewer coins.
+# ============================================================
+from __future__ import annotations
+import hashlib, json, math, os
+from typing import Any, Dict, List, Mapping, Optional
+
+VERSION = 2
+
+# metric -> tolerance: an absolute change, "sign" = which side of zero, "log:x" = |log10(new/old)|
+DEFAULT_STEPS: Dict[str, Any] = {
+    "rsi": 5.0,
+    "macd_cross": "sign",      # macd_line - macd_signal
+    "macd_hist": "sign",
+    "bb_width": 0.02,
+    "volume_trend": "sign",
+    "adx14": 5.0,
+    "stoch_k": 10.0,
+    "fear_greed": 10.0,
+    "sentiment_24h": "sign",
+    "roi_24h": 2.0,
+    "roi_7d": 5.0,
+    "roi_30d": 10.0,
+    "market_cap": "log:0.1",   # ~26% moves
+    "liquidity": "log:0.2",
+}
+
+def steps_from_env(raw: Optional[str] = None) -> Dict[str, Any]:
+    out = dict(DEFAULT_STEPS)
+    for part in (raw if raw is not None else os.getenv("LUNA_FP_STEPS") or "").split(","):
+        k, _, v = part.partition("=")
+        k, v = k.strip(), v.strip()
+        if not k or not v: continue
+        try:
+            out[k] = float(v)
+        except ValueError:
+            out[k] = v
+    return out
+
+def _num(x) -> Optional[float]:
+    try:
+        v = float(x)
+        return None if math.isnan(v) or math.isinf(v) else v
+    except (TypeError, ValueError):
+        return None
+
+def features(snap: Mapping[str, Any]) -> Dict[str, Optional[float]]:
+    """Flat metric values from ai_analysis' snapshot ({"latest": {...}, "roi": {...}})."""
+    lt, roi = snap.get("latest") or {}, snap.get("roi") or {}
+    ml, ms = _num(lt.get("macd_line")), _num(lt.get("macd_signal"))
+    out = {k: _num(lt.get(k)) for k in ("rsi", "macd_hist", "bb_width", "volume_trend", "adx14", "stoch_k",
+                                         "fear_greed", "sentiment_24h", "market_cap", "liquidity")}
+    out["macd_cross"] = (ml - ms) if ml is not None and ms is not None else None
+    for h in ("24h", "7d", "30d"):
+        out[f"roi_{h}"] = _num(roi.get(h))
+    return out
+
+def _sign(v: float) -> int:
+    return (v > 0) - (v < 0)
+
+def changed(old: Optional[float], new: Optional[float], step: Any) -> bool:
+    """True once `new` is `step` or more away from `old` (appearing / disappearing counts)."""
+    if old is None or new is None:
+        return (old is None) != (new is None)
+    if step == "sign":
+        return _sign(old) != _sign(new)
+    if isinstance(step, str) and step.startswith("log:"):
+        if old <= 0 or new <= 0:
+            return _sign(old) != _sign(new)
+        return abs(math.log10(new / old)) >= float(step[4:])
+    return abs(new - old) >= float(step) if step else new != old
+
+def fingerprint(snap: Mapping[str, Any], steps: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+    """{"version", "hash", "values", "steps_hash"}: the metric values this analysis describes."""
+    steps = steps or DEFAULT_STEPS
+    feats = features(snap)
+    values = {k: feats.get(k) for k in sorted(steps) if k in feats}
+    blob = json.dumps(values, sort_keys=True, separators=(",", ":"))
+    return {"version": VERSION,
+            "hash": hashlib.sha1(blob.encode()).hexdigest()[:16],
+            "steps_hash": hashlib.sha1(json.dumps(steps, sort_keys=True, default=str).encode()).hexdigest()[:8],
+            "values": values}
+
+def moved(old: Optional[Mapping[str, Any]], new: Mapping[str, Any],
+          steps: Optional[Mapping[str, Any]] = None) -> List[str]:
+    """Metrics that moved past their tolerance since `old` (["*"] when it is missing or incomparable)."""
+    if not old or old.get("version") != new["version"] or old.get("steps_hash") != new["steps_hash"]:
+        return ["*"]
+    steps = steps or DEFAULT_STEPS
+    ov, nv = old.get("values") or {}, new["values"]
+    return [k for k in nv if changed(ov.get(k), nv[k], steps.get(k))]
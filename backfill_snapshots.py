@@ -1,9 +1,11 @@
 # backfill_snapshots.py  —  Daily snapshots for 30d/1y/ATH + analysis updates
-import os, json, time, math, requests
+import os, json, time, math
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+import http_cache  # closed candles come from disk on reruns (LUNA_HTTP_CACHE=record|replay for offline runs)
+
 ROOT = Path(__file__).parent.resolve()
 DATA_DIR = ROOT / "luna_cache" / "data"
 COINS_DIR = DATA_DIR / "coins"
@@ -48,7 +50,7 @@ def fetch_cc_histoday(symbol: str, limit: int = 400, to_ts: int | None = None):
     }
     if to_ts: params["toTs"] = to_ts
     if CC_KEY: params["api_key"] = CC_KEY
-    r = requests.get(CC_HISTO, params=params, headers=HEADERS, timeout=TIMEOUT)
+    r = http_cache.get(CC_HISTO, params=params, headers=HEADERS, timeout=TIMEOUT)
     r.raise_for_status()
     j = r.json()
     # Structure: {"Data":{"Data":[{"time":..., "close":...}, ...]}}
@@ -72,7 +74,7 @@ def fetch_cc_histoday_paged(symbol: str, days_needed: int, max_pages: int = 5):
 
 def fetch_gecko_daily(coin_id: str):
     url = GECKO_CHART.format(id=coin_id)
-    r = requests.get(url, timeout=TIMEOUT)
+    r = http_cache.get(url, timeout=TIMEOUT)
     if r.status_code != 200:
         return []
     # structure: {"prices":[[ms, price], ...], ...}
@@ -230,7 +232,7 @@ def main(workers=6):
                     print(f"  …{ok}/{len(coins)} done")
             except Exception as e:
                 print(f"[WARN] {c}: {e}")
-    print(f"[Luna Backfill] Done at {now_utc().strftime('UTC %Y-%m-%d %H:%M')}")
+    print(f"[Luna Backfill] Done at {now_utc().strftime('UTC %Y-%m-%d %H:%M')} — {http_cache.summary()}")
 
 if __name__ == "__main__":
     main()
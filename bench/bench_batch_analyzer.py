@@ -0,0 +1,100 @@
+# bench/bench_batch_analyzer.py — overnight analyzer throughput against the stub LLM endpoint
+# ============================================================
+# Synthetic coin CSVs go in a temp cache dir and luna_batch_analyzer runs against
+# vendor_stub.py's OpenAI stand-in (OPENAI_BASE_URL), once per --concurrency setting:
+#
+#   python bench/bench_batch_analyzer.py                               # 200 coins, 1 vs 8 in flight
+#   python bench/bench_batch_analyzer.py --coins 500 --llm-ms 1500 --p429 0.03 --concurrency 1,4,16
+#   python bench/bench_batch_analyzer.py --rerun-moved 0.1     # then a nightly rerun where 10% of coins moved
+#   python bench/bench_batch_analyzer.py --batch-size 1,8      # one coin per request vs 8 per request
+# ============================================================
+from __future__ import annotations
+import argparse, json, os, sys, tempfile, time
+from argparse import Namespace
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+import vendor_stub  # noqa: E402
+
+def write_coins(coins_dir: Path, n: int, bars: int = 24 * 60, seed: int = 7) -> None:
+    coins_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range(end=pd.Timestamp.now(tz="UTC").floor("h"), periods=bars, freq="h")
+    for i in range(n):
+        c = 10 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+        pd.DataFrame({
+            "timestamp": ts, "close": c, "volume": rng.random(bars) * 1e6, "market_cap": c * 1e8,
+            "rsi": rng.uniform(20, 80, bars), "macd_line": rng.normal(0, 1, bars), "macd_signal": rng.normal(0, 1, bars),
+            "macd_hist": rng.normal(0, 0.5, bars), "bb_upper": c * 1.05, "bb_lower": c * 0.95, "bb_width": rng.uniform(0.02, 0.2, bars),
+            "volume_trend": rng.normal(0, 1, bars), "adx14": rng.uniform(10, 50, bars),
+        }).to_csv(coins_dir / f"bench-coin-{i:04d}.csv", index=False)
+
+def move_coins(coins_dir: Path, share: float, seed: int = 11) -> int:
+    """Push the last bar's RSI/MACD of `share` of the coins across their bands; returns how many."""
+    paths = sorted(coins_dir.glob("*.csv"))
+    picked = np.random.default_rng(seed).choice(len(paths), int(round(share * len(paths))), replace=False)
+    for i in picked:
+        df = pd.read_csv(paths[i])
+        df.loc[df.index[-1], "rsi"] = (df["rsi"].iloc[-1] + 25) % 100
+        df.loc[df.index[-1], "macd_line"] = -df["macd_line"].iloc[-1] - 1
+        df.to_csv(paths[i], index=False)
+    return len(picked)
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Batch analyzer throughput benchmark")
+    ap.add_argument("--coins", type=int, default=200)
+    ap.add_argument("--concurrency", default="1,8", help="comma list of in-flight limits to compare")
+    ap.add_argument("--rpm", type=int, default=3000)
+    ap.add_argument("--tpm", type=int, default=0)
+    ap.add_argument("--llm-ms", type=float, default=800.0, help="stub completion latency")
+    ap.add_argument("--jitter-ms", type=float, default=200.0)
+    ap.add_argument("--p429", type=float, default=0.0)
+    ap.add_argument("--batch-size", default="1", help="comma list of coins-per-request to compare")
+    ap.add_argument("--rerun-moved", type=float, default=None,
+                    help="after the runs, move this share of coins and rerun once without --force")
+    ap.add_argument("--json", help="write result rows to this file")
+    a = ap.parse_args()
+
+    faults = vendor_stub.Faults(0, a.jitter_ms, a.p429, per_vendor_latency={"openai": a.llm_ms}, seed=1)
+    _, stub_url = vendor_stub.start(0, faults)
+    data_dir = Path(tempfile.mkdtemp(prefix="luna_bench_batch_"))
+    write_coins(data_dir / "coins", a.coins)
+    os.environ.update(LUNA_CACHE_DIR=str(data_dir), OPENAI_BASE_URL=f"{stub_url}/openai/v1", OPENAI_API_KEY="stub")
+    import luna_batch_analyzer as lba  # noqa: E402 — must follow the env setup above
+
+    def run(label: str, conc: int, force: bool, k: int = 1) -> dict:
+        args = Namespace(shuffle=False, start=0, resume=False, max=0, force=force, stale=0, no_openai=False,
+                         rpm=a.rpm, tpm=a.tpm, concurrency=conc, workers=0, unchanged="refresh", fp_max_age=None,
+                         batch_size=k, queue="bench", lease_sec=600, max_attempts=3, retry_failed=False)
+        t0 = time.perf_counter()
+        lba.run_batch(args)
+        dt = time.perf_counter() - t0
+        st = lba._LLM.stats()  # a fresh dispatcher per run, so these are this run's calls
+        return {"run": label, "in_flight": conc, "batch": k, "coins": a.coins, "sec": round(dt, 1),
+                "coins_per_min": round(a.coins / dt * 60, 1), "llm_calls": st["calls"], "llm_tokens": st["tokens"],
+                "retries": st["retries"], "rate_limited": st["rate_limited"], "failed": st["failed"]}
+
+    concs = [int(c) for c in a.concurrency.split(",") if c.strip()]
+    ks = [int(k) for k in a.batch_size.split(",") if k.strip()]
+    rows: List[dict] = [run("force", c, True, k) for c in concs for k in ks]
+    if a.rerun_moved is not None:
+        n = move_coins(data_dir / "coins", a.rerun_moved)
+        rows.append(run(f"rerun ({n} moved)", concs[-1], False, ks[-1]))
+
+    cols = list(rows[0])
+    w = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in cols}
+    print("  ".join(c.ljust(w[c]) for c in cols))
+    for r in rows:
+        print("  ".join(str(r[c]).ljust(w[c]) for c in cols))
+    if a.json:
+        Path(a.json).write_text(json.dumps(rows, indent=2), encoding="utf-8")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+# bench/bench_decoders.py — vendor payload decode benchmark: row-by-row (old) vs decoders.py (columnar)
+# ============================================================
+# Synthetic payloads shaped like each vendor's response are decoded by the previous
+# per-row code (copied verbatim below as REFERENCE) and by decoders.py; we report best-of-N
+# wall time per (vendor, size) and check both produce the same frame.
+#
+#   python bench/bench_decoders.py                        # 500 .. 100k rows
+#   python bench/bench_decoders.py --sizes 1e3,1e6 --repeat 3 --json bench/results/decoders.json
+#   python bench/bench_decoders.py --dirty 0.01           # 1% malformed / missing values
+# ============================================================
+from __future__ import annotations
+import argparse, json, sys, time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+import decoders  # noqa: E402
+
+# ---------- synthetic payloads ----------
+def _walk(n: int, rng) -> np.ndarray:
+    return 100.0 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+
+def payloads(n: int, dirty: float, seed: int = 7) -> Dict[str, object]:
+    rng = np.random.default_rng(seed)
+    t0 = 1_700_000_000
+    ts = t0 + 60 * np.arange(n)
+    c = _walk(n, rng)
+    bad = rng.random(n) < dirty
+    gt = [[int(t), float(x), float(x * 1.001), float(x * 0.999), float(x), float(v)]
+          for t, x, v in zip(ts, c, rng.random(n) * 1e4)]
+    cc = [{"time": int(t), "open": float(x), "high": float(x * 1.001), "low": float(x * 0.999), "close": float(x),
+           "volumefrom": float(v), "volumeto": float(v * x)} for t, x, v in zip(ts, c, rng.random(n) * 1e3)]
+    be = [{"unixTime": int(t), "value": float(x)} for t, x in zip(ts, c)]
+    cg = {"prices": [[int(t) * 1000, float(x)] for t, x in zip(ts, c)],
+          "total_volumes": [[int(t) * 1000, float(v)] for t, v in zip(ts, rng.random(n) * 1e6)],
+          "market_caps": [[int(t) * 1000, float(x * 1e7)] for t, x in zip(ts, c)]}
+    for i in np.flatnonzero(bad):  # the odd null/string value vendors do send
+        cc[i]["close"] = None
+        gt[i][4] = str(gt[i][4])
+        be[i]["value"] = None
+        cg["total_volumes"][i][1] = None
+    if n > 10:  # vendors drop points independently per series
+        del cg["market_caps"][n // 2]
+    return {"gt": gt, "cc": cc, "birdeye": be, "cg": cg}
+
+# ---------- previous implementations (reference) ----------
+def ref_gt(rows) -> pd.DataFrame:
+    recs = []
+    for row in rows:
+        if not isinstance(row, (list,tuple)) or len(row) < 6: continue
+        ts_raw = int(row[0])
+        ts = pd.to_datetime(ts_raw if ts_raw < 10**12 else ts_raw/1000, unit="s", utc=True, errors="coerce")
+        recs.append({
+            "timestamp": ts,
+            "open": float(row[1]), "high": float(row[2]), "low": float(row[3]), "close": float(row[4]),
+            "volume": float(row[5]),
+        })
+    if not recs: return pd.DataFrame()
+    return pd.DataFrame.from_records(recs).dropna(subset=["timestamp"]).sort_values("timestamp")
+
+def ref_cc(raw) -> pd.DataFrame:
+    df = pd.DataFrame(raw)
+    if "time" in df.columns:
+        df["timestamp"] = pd.to_datetime(df["time"], unit="s", utc=True, errors="coerce")
+    for c in ["open","high","low","close","volumefrom","volumeto"]:
+        if c in df.columns: df[c] = pd.to_numeric(df[c], errors="coerce")
+    df["volume"] = df["volumeto"] if "volumeto" in df.columns else pd.NA
+    cols = ["timestamp","open","high","low","close","volume"]
+    return df[cols].dropna(subset=["timestamp"]).sort_values("timestamp")
+
+def ref_birdeye(items) -> pd.DataFrame:
+    recs = []
+    for it in items:
+        ts = pd.to_datetime(int(it.get("unixTime") or 0), unit="s", utc=True, errors="coerce")
+        close = float(it.get("value") or 0)
+        if not ts or close <= 0: continue
+        recs.append({"timestamp": ts, "open": close, "high": close, "low": close, "close": close, "volume": 0.0})
+    return pd.DataFrame.from_records(recs).dropna(subset=["timestamp"]).sort_values("timestamp")
+
+def ref_cg(js) -> pd.DataFrame:
+    px   = js.get("prices") or []
+    vols = js.get("total_volumes") or []
+    caps = js.get("market_caps") or []
+    dp = pd.DataFrame(px, columns=["ts","close"])
+    dp["timestamp"] = pd.to_datetime(dp["ts"], unit="ms", utc=True, errors="coerce")
+    dp["close"] = pd.to_numeric(dp["close"], errors="coerce")
+    if vols:
+        dv = pd.DataFrame(vols, columns=["ts","v"])
+        dv["timestamp"] = pd.to_datetime(dv["ts"], unit="ms", utc=True, errors="coerce")
+        dv["volume"] = pd.to_numeric(dv["v"], errors="coerce")
+        dp = dp.merge(dv[["timestamp","volume"]], on="timestamp", how="left")
+    if caps:
+        dc = pd.DataFrame(caps, columns=["ts","mc"])
+        dc["timestamp"] = pd.to_datetime(dc["ts"], unit="ms", utc=True, errors="coerce")
+        dc["market_cap"] = pd.to_numeric(dc["mc"], errors="coerce")
+        dp = dp.merge(dc[["timestamp","market_cap"]], on="timestamp", how="left")
+    return dp[["timestamp","close","volume","market_cap"]].dropna(subset=["timestamp"]).sort_values("timestamp")
+
+# ---------- columnar (as server.py calls them) ----------
+def new_birdeye(items) -> pd.DataFrame:
+    cols = decoders.columns_of(items, ["unixTime", "value"])
+    ns, close = decoders.epoch_ns(cols["unixTime"]), cols["value"]
+    ok = np.isfinite(close) & (close > 0)
+    return decoders.frame(ns, {"open": close, "high": close, "low": close, "close": close,
+                               "volume": np.zeros(len(close))}, mask=ok)
+
+CC_FIELDS = {"open": "open", "high": "high", "low": "low", "close": "close", "volume": "volumeto"}
+
+IMPLS: Dict[str, Dict[str, Callable]] = {
+    "gt":      {"ref": ref_gt,      "new": decoders.rows_ohlcv},
+    "cc":      {"ref": ref_cc,      "new": lambda raw: decoders.records_ohlcv(raw, CC_FIELDS, "time")},
+    "birdeye": {"ref": ref_birdeye, "new": new_birdeye},
+    "cg":      {"ref": ref_cg,      "new": lambda js: decoders.cg_market_chart(js)[["timestamp","close","volume","market_cap"]]},
+}
+
+# ---------- runner ----------
+def best_of(fn: Callable, arg, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def same(a: pd.DataFrame, b: pd.DataFrame) -> str:
+    a, b = a.reset_index(drop=True), b.reset_index(drop=True)
+    if list(a.columns) != list(b.columns): return f"columns {list(a.columns)} != {list(b.columns)}"
+    if len(a) != len(b): return f"rows {len(a)} != {len(b)}"
+    if not (a["timestamp"].astype("int64").to_numpy() == b["timestamp"].astype("int64").to_numpy()).all():
+        return "timestamps differ"
+    for c in a.columns[1:]:
+        x, y = a[c].to_numpy(dtype="float64"), b[c].to_numpy(dtype="float64")
+        if not np.array_equal(x, y, equal_nan=True): return f"{c} differs"
+    return "ok"
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Vendor payload decoder benchmark")
+    ap.add_argument("--sizes", default="500,5e3,5e4,1e5")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--dirty", type=float, default=0.0, help="fraction of rows with null/string values")
+    ap.add_argument("--only", default="", help="comma list of vendors")
+    ap.add_argument("--json", help="write result rows to this file")
+    a = ap.parse_args()
+
+    sizes = [int(float(s)) for s in a.sizes.split(",") if s.strip()]
+    vendors = [v for v in (a.only.split(",") if a.only else IMPLS) if v in IMPLS]
+    rows: List[dict] = []
+    for n in sizes:
+        p = payloads(n, a.dirty)
+        for v in vendors:
+            ref, new = IMPLS[v]["ref"], IMPLS[v]["new"]
+            try:
+                parity = same(ref(p[v]), new(p[v]))
+            except Exception as e:
+                parity = f"ref failed: {type(e).__name__}"
+            t_ref = best_of(lambda x: _safe(ref, x), p[v], a.repeat)
+            t_new = best_of(new, p[v], a.repeat)
+            rows.append({"vendor": v, "rows": n, "ref_ms": round(t_ref * 1000, 2), "new_ms": round(t_new * 1000, 2),
+                         "speedup": round(t_ref / t_new, 1) if t_new else None, "parity": parity})
+
+    cols = ["vendor", "rows", "ref_ms", "new_ms", "speedup", "parity"]
+    w = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in cols}
+    print("  ".join(c.ljust(w[c]) for c in cols))
+    for r in rows:
+        print("  ".join(str(r[c]).ljust(w[c]) for c in cols))
+    if a.json:
+        Path(a.json).parent.mkdir(parents=True, exist_ok=True)
+        Path(a.json).write_text(json.dumps(rows, indent=2), encoding="utf-8")
+    return 0 if all(r["parity"] == "ok" or r["parity"].startswith("ref failed") for r in rows) else 1
+
+def _safe(fn, x):
+    try:
+        return fn(x)
+    except Exception:
+        return None
+
+if __name__ == "__main__":
+    sys.exit(main())
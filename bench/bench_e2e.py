@@ -0,0 +1,201 @@
+# bench/bench_e2e.py — end-to-end latency benchmark for /analyze, /expand_json and /api/luna
+# ============================================================
+# Runs the app against bench/vendor_stub.py so results don't depend on live vendors.
+#
+#   python bench/bench_e2e.py                                # in-process app + stub, defaults
+#   python bench/bench_e2e.py --symbols 40 --threads 4 --latency-ms 120 --p429 0.02
+#   python bench/bench_e2e.py --url http://127.0.0.1:8000    # a running gunicorn (start it with LUNA_STUB_URL)
+#
+# Cases:
+#   cold   first request per symbol, empty frame cache
+#   warm   same symbols again, frames + summaries cached
+#   stale  same symbols with every coverage sidecar aged past its TTL (incremental refetch)
+# ============================================================
+from __future__ import annotations
+import argparse, json, os, sys, tempfile, threading, time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+import vendor_stub  # noqa: E402
+
+TICKERS = ["ETH", "BTC", "SOL", "LINK", "UNI", "AAVE", "ARB", "OP", "AVAX", "MATIC", "DOGE", "PEPE",
+           "LDO", "MKR", "CRV", "SNX", "INJ", "TIA", "SEI", "SUI", "APT", "NEAR", "ATOM", "DOT"]
+TIMEFRAMES = ["1h", "4h", "12h", "24h", "7d", "30d"]
+TILE_KEYS = ["RSI", "MACD", "PRICE", "OBV", "ATR", "ADX"]
+
+def symbols(n: int, addr_share: float) -> List[str]:
+    n_addr = int(round(n * addr_share))
+    out = [TICKERS[i % len(TICKERS)] + ("" if i < len(TICKERS) else str(i)) for i in range(n - n_addr)]
+    out += [vendor_stub._addr_for(f"bench-token-{i}") for i in range(n_addr)]
+    return out
+
+# ---------- clients ----------
+class _Client:
+    """Same call shape for Flask's test client (in-process) and a real HTTP server."""
+    def __init__(self, url: Optional[str], app=None):
+        self.url = url.rstrip("/") if url else None
+        self.app = app
+        self._local = threading.local()
+
+    def _tc(self):
+        c = getattr(self._local, "c", None)
+        if c is None:
+            c = self._local.c = (requests.Session() if self.url else self.app.test_client())
+        return c
+
+    def call(self, method: str, path: str, ip: str, params=None, body=None) -> int:
+        h = {"X-Forwarded-For": ip}  # distinct client per request so allow_rate() doesn't throttle the bench
+        c = self._tc()
+        if self.url:
+            r = c.request(method, self.url + path, params=params, json=body, headers=h, timeout=300)
+            return r.status_code
+        if method == "GET":
+            return c.get(path, query_string=params, headers=h).status_code
+        return c.post(path, json=body, headers=h).status_code
+
+# ---------- runner ----------
+def _pct(xs: List[float], q: float) -> float:
+    return float(np.percentile(xs, q)) * 1000.0 if xs else float("nan")
+
+def run_case(name: str, client: _Client, syms: List[str], threads: int, endpoints: List[str]) -> List[dict]:
+    jobs: List[Tuple[str, Callable[[int], int]]] = []
+    for i, s in enumerate(syms):
+        tf = TIMEFRAMES[i % len(TIMEFRAMES)]
+        ip = f"10.{i // 250}.{i % 250}.{len(name)}"
+        if "analyze" in endpoints:
+            jobs.append(("/analyze", lambda k, s=s, tf=tf, ip=ip:
+                         client.call("GET", "/analyze", f"{ip}", {"query": s, "tf": tf})))
+        if "expand_json" in endpoints:
+            key = TILE_KEYS[i % len(TILE_KEYS)]
+            jobs.append(("/expand_json", lambda k, s=s, tf=tf, ip=ip, key=key:
+                         client.call("GET", "/expand_json", f"{ip}.1", {"symbol": s, "tf": tf, "key": key})))
+        if "luna" in endpoints:
+            jobs.append(("/api/luna", lambda k, s=s, tf=tf, ip=ip:
+                         client.call("POST", "/api/luna", f"{ip}.2", body={"symbol": s, "tf": tf, "text": "what happened in the past 24h?"})))
+
+    lat: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+
+    def one(job):
+        ep, fn = job
+        t0 = time.perf_counter()
+        try:
+            status = fn(0)
+        except Exception:
+            status = 599
+        dt = time.perf_counter() - t0
+        with lock:
+            lat.setdefault(ep, []).append(dt)
+            if status >= 400:
+                errors[ep] = errors.get(ep, 0) + 1
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        list(ex.map(one, jobs))
+    wall = time.perf_counter() - t0
+
+    rows = []
+    for ep, xs in sorted(lat.items()):
+        rows.append({"case": name, "endpoint": ep, "n": len(xs), "errors": errors.get(ep, 0),
+                     "p50_ms": round(_pct(xs, 50), 1), "p95_ms": round(_pct(xs, 95), 1),
+                     "p99_ms": round(_pct(xs, 99), 1), "rps": round(len(xs) / wall, 2) if wall else None})
+    allx = [x for xs in lat.values() for x in xs]
+    rows.append({"case": name, "endpoint": "*", "n": len(allx), "errors": sum(errors.values()),
+                 "p50_ms": round(_pct(allx, 50), 1), "p95_ms": round(_pct(allx, 95), 1),
+                 "p99_ms": round(_pct(allx, 99), 1), "rps": round(len(allx) / wall, 2) if wall else None})
+    return rows
+
+def age_coverage(cache_dir: Path, seconds: float) -> int:
+    """Push every coverage sidecar's fetched_at back by `seconds` so the next hydrate sees stale data."""
+    n = 0
+    for p in cache_dir.rglob("*.json"):
+        try:
+            js = json.loads(p.read_text(encoding="utf-8"))
+        except Exception:
+            continue
+        if not isinstance(js, dict) or "fetched_at" not in js:
+            continue
+        try:
+            ts = datetime.fromisoformat(str(js["fetched_at"]))
+        except ValueError:
+            continue
+        js["fetched_at"] = (ts - timedelta(seconds=seconds)).isoformat()
+        p.write_text(json.dumps(js), encoding="utf-8")
+        n += 1
+    return n
+
+def print_table(rows: List[dict]) -> None:
+    cols = ["case", "endpoint", "n", "errors", "p50_ms", "p95_ms", "p99_ms", "rps"]
+    w = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in cols}
+    print("  ".join(c.ljust(w[c]) for c in cols))
+    for r in rows:
+        print("  ".join(str(r[c]).ljust(w[c]) for c in cols))
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="End-to-end latency benchmark (offline, via vendor stub)")
+    ap.add_argument("--url", help="benchmark a running server instead of an in-process app")
+    ap.add_argument("--symbols", type=int, default=12)
+    ap.add_argument("--addr-share", type=float, default=0.25, help="fraction of symbols given as 0x addresses")
+    ap.add_argument("--threads", type=int, default=4)
+    ap.add_argument("--cases", default="cold,warm,stale")
+    ap.add_argument("--endpoints", default="analyze,expand_json,luna")
+    ap.add_argument("--latency-ms", type=float, default=40.0)
+    ap.add_argument("--jitter-ms", type=float, default=20.0)
+    ap.add_argument("--vendor-latency", default="")
+    ap.add_argument("--p429", type=float, default=0.0)
+    ap.add_argument("--ptimeout", type=float, default=0.0)
+    ap.add_argument("--stale-age", type=float, default=7 * 86400, help="seconds to age coverage by for the stale case")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--json", help="also write the result rows to this file")
+    a = ap.parse_args()
+
+    syms = symbols(a.symbols, a.addr_share)
+    endpoints = [e.strip() for e in a.endpoints.split(",") if e.strip()]
+    cases = [c.strip() for c in a.cases.split(",") if c.strip()]
+
+    cache_dir: Optional[Path] = None
+    if a.url:
+        client = _Client(a.url)
+        if "stale" in cases:
+            print("note: 'stale' needs the server's cache dir; skipped with --url", file=sys.stderr)
+            cases = [c for c in cases if c != "stale"]
+    else:
+        faults = vendor_stub.Faults(a.latency_ms, a.jitter_ms, a.p429, a.ptimeout, timeout_sec=2.0,
+                                    per_vendor_latency=vendor_stub._parse_vendor_latency(a.vendor_latency), seed=a.seed)
+        _, stub_url = vendor_stub.start(0, faults)
+        cache_dir = Path(tempfile.mkdtemp(prefix="luna_bench_"))
+        os.environ["LUNA_STUB_URL"] = stub_url
+        os.environ["LUNA_CACHE_DIR"] = str(cache_dir)
+        os.environ.setdefault("OPENAI_API_KEY", "")
+        t0 = time.perf_counter()
+        import server  # noqa: E402 — must follow the env setup above
+        print(f"app import {1000 * (time.perf_counter() - t0):.0f} ms; stub {stub_url}; cache {cache_dir}")
+        client = _Client(None, server.app)
+
+    rows: List[dict] = []
+    for case in cases:
+        if case == "stale" and cache_dir is not None:
+            import server
+            server.WRITER.flush()
+            print(f"aged {age_coverage(cache_dir, a.stale_age)} coverage files")
+        elif case == "warm" and cache_dir is not None:
+            import server
+            server.WRITER.flush()
+        rows += run_case(case, client, syms, a.threads, endpoints)
+
+    print_table(rows)
+    if a.json:
+        Path(a.json).write_text(json.dumps(rows, indent=2), encoding="utf-8")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
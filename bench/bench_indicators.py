@@ -0,0 +1,312 @@
+# bench/bench_indicators.py — indicator-kernel micro-benchmark + numeric parity across implementations
+# ============================================================
+# Every place that computes RSI/MACD/Bollinger is registered in IMPLS below and run on the
+# same synthetic OHLCV frames. For each (impl, size) we record best-of-N wall time and
+# tracemalloc peak; a separate parity pass compares shared columns against the reference,
+# once at a normal price level and once at micro-cap prices (PARITY_LEVELS), where the RSI
+# loss floor dominates real per-bar moves.
+#
+#   python bench/bench_indicators.py                              # 1k .. 1M bars
+#   python bench/bench_indicators.py --sizes 1e3,1e5,5e6 --repeat 3 --budget-sec 30
+#   python bench/bench_indicators.py --only server,features --history bench/results/indicators.jsonl
+#
+# Implementations slower than --budget-sec at one size are skipped for larger sizes
+# (enrich_with_metrics' row-wise apply would otherwise run for many minutes at 5M bars).
+# ============================================================
+from __future__ import annotations
+import argparse, gc, importlib, importlib.util, json, os, subprocess, sys, tempfile, time, tracemalloc, warnings
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+sys.path.insert(0, str(ROOT))
+# importing server must not touch the real cache
+os.environ.setdefault("LUNA_CACHE_DIR", tempfile.mkdtemp(prefix="luna_bench_ind_"))
+
+PARITY_COLS = ["rsi", "macd_line", "macd_signal", "macd_hist", "bb_mid", "bb_upper", "bb_lower", "bb_width", "obv"]
+ALIASES = {"bb_middle": "bb_mid"}
+REFERENCE = "pandas"
+PARITY_LEVELS = (100.0, 2e-8)
+
+# ---------- synthetic frames ----------
+def make_frame(n: int, seed: int = 42, price: float = 100.0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range(end=pd.Timestamp("2025-01-01", tz="UTC"), periods=n, freq="min")
+    close = price * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.001, n)) * close
+    df = pd.DataFrame({
+        "timestamp": ts,
+        "open": open_,
+        "high": np.maximum(open_, close) + spread,
+        "low": np.minimum(open_, close) - spread,
+        "close": close,
+        "volume": rng.lognormal(10, 1, n),
+    })
+    df["market_cap"] = df["close"] * 1e7
+    df["price"] = df["close"]
+    return df
+
+# ---------- implementations ----------
+def _pandas(df):
+    """Plain-pandas compute_indicators as it stood before indicators.py; the parity baseline."""
+    out = df.copy()
+    ema = lambda s, span: s.ewm(span=span, adjust=False).mean()
+    delta = out["close"].diff()
+    up, dn = delta.clip(lower=0.0), -delta.clip(upper=0.0)
+    rs = up.ewm(span=14, adjust=False).mean() / dn.replace(0, 1e-9).ewm(span=14, adjust=False).mean()
+    out["rsi"] = 100 - (100 / (1 + rs))
+    out["macd_line"] = ema(out["close"], 12) - ema(out["close"], 26)
+    out["macd_signal"] = ema(out["macd_line"], 9)
+    out["macd_hist"] = out["macd_line"] - out["macd_signal"]
+    ma20, std20 = out["close"].rolling(20).mean(), out["close"].rolling(20).std()
+    out["bb_mid"], out["bb_upper"], out["bb_lower"] = ma20, ma20 + 2*std20, ma20 - 2*std20
+    out["bb_width"] = ((out["bb_upper"] - out["bb_lower"]) / ma20.replace(0, np.nan) * 100).fillna(0)
+    hi, lo, cl = out["high"].fillna(out["close"]), out["low"].fillna(out["close"]), out["close"]
+    plus_dm = (hi.diff().where(hi.diff() > lo.diff(), 0.0)).clip(lower=0)
+    minus_dm = (lo.diff().where(lo.diff() > hi.diff(), 0.0)).clip(lower=0).abs()
+    tr = pd.concat([(hi-lo), (hi-cl.shift()).abs(), (lo-cl.shift()).abs()], axis=1).max(axis=1)
+    atr = tr.rolling(14).mean()
+    plus_di = 100 * (plus_dm.rolling(14).mean() / atr.replace(0, np.nan))
+    minus_di = 100 * (minus_dm.rolling(14).mean() / atr.replace(0, np.nan))
+    dx = (100 * (plus_di - minus_di).abs() / (plus_di+minus_di).replace(0, np.nan)).fillna(0)
+    out["adx14"] = dx.rolling(14).mean()
+    out["obv"] = (np.sign(out["close"].diff()).fillna(0) * out["volume"].fillna(0)).cumsum()
+    out["atr14"] = tr.rolling(14, min_periods=1).mean()
+    out["alt_momentum"] = ema(out["close"], 10) - ema(out["close"], 30)
+    return out
+
+def _pandas_floor_after(df):
+    """luna_engine.features / on_demand_refresh floored the *smoothed* loss, not each bar."""
+    out = _pandas(df)
+    delta = out["close"].diff()
+    up, dn = delta.clip(lower=0.0), -delta.clip(upper=0.0)
+    rs = up.ewm(span=14, adjust=False).mean() / dn.ewm(span=14, adjust=False).mean().replace(0, 1e-9)
+    out["rsi"] = 100 - (100 / (1 + rs))
+    return out
+
+def _library(df):
+    return importlib.import_module("indicators").compute(df)
+
+def _library_one(df):
+    return importlib.import_module("indicators").compute(df, ["rsi"])
+
+def _server(df):
+    return importlib.import_module("server").compute_indicators(df)
+
+def _features(df):
+    return importlib.import_module("luna_engine.features").compute_features(df)[1]
+
+def _load_file(name: str, rel: str):
+    """luna_agent.py shadows the luna_agent/ directory, so its modules are loaded by path."""
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, ROOT / rel)
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        sys.modules[name] = mod
+    return sys.modules[name]
+
+def _metrics(df):
+    return _load_file("luna_agent_metrics", "luna_agent/metrics.py").enrich_with_metrics(df)
+
+def _on_demand(df):
+    return importlib.import_module("on_demand_refresh")._compute_indicators(df)
+
+def _stable(df):
+    return importlib.import_module("server_stable").ensure_derived(df)
+
+def _coin_csv(df):
+    return importlib.import_module("build_coin_csv").add_indicators(df)
+
+IMPLS: Dict[str, Tuple[str, Callable[[pd.DataFrame], pd.DataFrame]]] = {
+    "pandas":    ("pre-library compute_indicators (pandas)", _pandas),
+    "pandas_fa": ("pre-library features/on_demand RSI (floor after smoothing)", _pandas_floor_after),
+    "library":   ("indicators.compute (all columns)", _library),
+    "lib_rsi":   ("indicators.compute(cols=['rsi'])", _library_one),
+    "server":    ("server.compute_indicators", _server),
+    "features":  ("luna_engine.features.compute_features", _features),
+    "metrics":   ("luna_agent.metrics.enrich_with_metrics", _metrics),
+    "on_demand": ("on_demand_refresh._compute_indicators", _on_demand),
+    "stable":    ("server_stable.ensure_derived", _stable),
+    "coin_csv":  ("build_coin_csv.add_indicators", _coin_csv),
+}
+# callers whose pre-library code had different semantics are checked against their own baseline
+REFERENCE_FOR = {"features": "pandas_fa", "on_demand": "pandas_fa"}
+
+# ---------- measurement ----------
+def _cold() -> None:
+    """Drop memoized indicator columns so every run measures the kernels, not the memo."""
+    mod = sys.modules.get("indicators")
+    if mod is not None:
+        mod.MEMO.clear()
+
+def time_once(fn, df) -> Tuple[float, pd.DataFrame]:
+    _cold()
+    gc.collect()
+    t0 = time.perf_counter()
+    out = fn(df)
+    return time.perf_counter() - t0, out
+
+def peak_mem(fn, df) -> int:
+    _cold()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn(df)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def parity(ref: pd.DataFrame, got: pd.DataFrame, warmup: int, rtol: float) -> Dict[str, dict]:
+    """Per shared column: max abs/rel error after `warmup` rows and NaN-pattern mismatches."""
+    got = got.rename(columns=ALIASES)
+    res = {}
+    for c in PARITY_COLS:
+        if c not in ref.columns or c not in got.columns: continue
+        a = pd.to_numeric(ref[c], errors="coerce").to_numpy(dtype="float64")[warmup:]
+        b = pd.to_numeric(got[c], errors="coerce").to_numpy(dtype="float64")[warmup:]
+        if len(a) != len(b):
+            res[c] = {"ok": False, "note": f"length {len(b)} != {len(a)}"}
+            continue
+        both = np.isfinite(a) & np.isfinite(b)
+        nan_mismatch = int((np.isfinite(a) != np.isfinite(b)).sum())
+        diff = np.abs(a[both] - b[both])
+        scale = np.maximum(np.abs(a[both]), 1e-12)
+        max_abs = float(diff.max()) if diff.size else 0.0
+        max_rel = float((diff / scale).max()) if diff.size else 0.0
+        res[c] = {"ok": bool(max_rel <= rtol and nan_mismatch == 0),
+                  "max_abs": max_abs, "max_rel": max_rel, "nan_mismatch": nan_mismatch}
+    return res
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+def _fmt_bytes(n: Optional[int]) -> str:
+    if n is None: return "-"
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024: return f"{n:.0f}{unit}"
+        n /= 1024
+    return f"{n:.1f}TB"
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Indicator kernel benchmark + parity")
+    ap.add_argument("--sizes", default="1e3,1e4,1e5,1e6", help="comma list of bar counts (5e6 for the full sweep)")
+    ap.add_argument("--only", default="", help="comma list of impl names (default: all)")
+    ap.add_argument("--repeat", type=int, default=3, help="timing runs per cell; best is reported")
+    ap.add_argument("--budget-sec", type=float, default=20.0, help="skip larger sizes once an impl exceeds this")
+    ap.add_argument("--no-mem", action="store_true", help="skip the tracemalloc pass")
+    ap.add_argument("--parity-bars", type=int, default=5000)
+    ap.add_argument("--warmup", type=int, default=60, help="leading rows excluded from parity (min_periods differ)")
+    ap.add_argument("--rtol", type=float, default=1e-6)
+    ap.add_argument("--json", help="write results to this file")
+    ap.add_argument("--history", help="append one JSON line per run (git rev + results) to this file")
+    a = ap.parse_args()
+
+    warnings.simplefilter("ignore")
+    sizes = [int(float(s)) for s in a.sizes.split(",") if s.strip()]
+    names = [n for n in (a.only.split(",") if a.only else IMPLS) if n in IMPLS]
+
+    # import everything up front so module import cost doesn't land in the first timing
+    usable: List[str] = []
+    for n in names:
+        try:
+            IMPLS[n][1](make_frame(64))
+            usable.append(n)
+        except Exception as e:
+            print(f"skip {n}: {type(e).__name__}: {e}", file=sys.stderr)
+
+    # ---- parity ----
+    # a column must match its baseline at every price level; the worst level is reported
+    par: Dict[str, Dict[str, dict]] = {}
+    ref_cols: set = set()
+    for level in PARITY_LEVELS:
+        pdf = make_frame(a.parity_bars, price=level)
+        refs: Dict[str, pd.DataFrame] = {}
+        for n in usable:
+            rn = REFERENCE_FOR.get(n, REFERENCE)
+            if n in (REFERENCE, "pandas_fa") or rn not in usable:
+                continue
+            if rn not in refs:
+                _cold()
+                refs[rn] = IMPLS[rn][1](pdf)
+                ref_cols |= {c for c in PARITY_COLS if c in refs[rn].columns}
+            _cold()
+            for c, v in parity(refs[rn], IMPLS[n][1](pdf), a.warmup, a.rtol).items():
+                prev = par.setdefault(n, {}).get(c)
+                if prev is None or (prev["ok"], prev.get("max_rel", 0)) > (v["ok"], v.get("max_rel", 0)) \
+                        or (prev["ok"] == v["ok"] and v.get("max_rel", 0) > prev.get("max_rel", 0)):
+                    par[n][c] = dict(v, price=level)
+
+    # ---- timing + memory ----
+    rows: List[dict] = []
+    over_budget = set()
+    for size in sizes:
+        df = make_frame(size)
+        for n in usable:
+            row = {"impl": n, "bars": size, "best_s": None, "peak_bytes": None, "status": "ok"}
+            if n in over_budget:
+                row["status"] = "skipped"
+                rows.append(row)
+                continue
+            try:
+                best = min(time_once(IMPLS[n][1], df)[0] for _ in range(max(1, a.repeat)))
+                row["best_s"] = round(best, 4)
+                row["bars_per_s"] = round(size / best) if best else None
+                if not a.no_mem:
+                    row["peak_bytes"] = peak_mem(IMPLS[n][1], df)
+                if best > a.budget_sec:
+                    over_budget.add(n)
+            except MemoryError:
+                row["status"] = "oom"; over_budget.add(n)
+            except Exception as e:
+                row["status"] = f"error: {type(e).__name__}"
+            rows.append(row)
+        del df
+        gc.collect()
+
+    # ---- report ----
+    print(f"{'impl':<10} {'bars':>9} {'best_s':>9} {'bars/s':>12} {'peak':>9}  status")
+    for r in rows:
+        bs = "-" if r["best_s"] is None else f"{r['best_s']:.4f}"
+        bps = "-" if not r.get("bars_per_s") else f"{r['bars_per_s']:,}"
+        print(f"{r['impl']:<10} {r['bars']:>9} {bs:>9} {bps:>12} {_fmt_bytes(r['peak_bytes']):>9}  {r['status']}")
+
+    if par:
+        levels = ", ".join(f"{p:g}" for p in PARITY_LEVELS)
+        print(f"\nparity vs {REFERENCE} ({a.parity_bars} bars at price {levels}, warmup {a.warmup}, rtol {a.rtol:g})")
+        for n, cols in par.items():
+            bad = [f"{c}@{v.get('price', '-'):g}(rel {v.get('max_rel', float('nan')):.2e}, nan {v.get('nan_mismatch', '-')})"
+                   for c, v in cols.items() if not v["ok"]]
+            print(f"  {n:<10} {len(cols) - len(bad)}/{len(cols)} match" + (f"  differs: {', '.join(bad)}" if bad else ""))
+
+    # fastest implementation per size among those producing every reference column, all matching
+    n_ref = len(ref_cols)
+    correct = {REFERENCE, "pandas_fa"} | {n for n, cols in par.items()
+                             if len(cols) == n_ref and all(v["ok"] for v in cols.values())}
+    print()
+    for size in sizes:
+        cand = [r for r in rows if r["bars"] == size and r["impl"] in correct and r["best_s"] is not None]
+        if cand:
+            w = min(cand, key=lambda r: r["best_s"])
+            print(f"fastest correct @ {size:>9} bars: {w['impl']} ({w['best_s']:.4f}s)")
+
+    result = {"ts": time.time(), "rev": _git_rev(), "python": sys.version.split()[0],
+              "numpy": np.__version__, "pandas": pd.__version__, "rows": rows, "parity": par}
+    if a.json:
+        Path(a.json).write_text(json.dumps(result, indent=2), encoding="utf-8")
+    if a.history:
+        Path(a.history).parent.mkdir(parents=True, exist_ok=True)
+        with open(a.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
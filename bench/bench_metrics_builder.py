@@ -0,0 +1,72 @@
+# bench/bench_metrics_builder.py — metrics_builder: serial vs process pool, and incremental reruns
+# ============================================================
+# Writes synthetic CryptoCompare-style historical/*.json (indent=2, like the pullers) into a
+# temp LUNA_CACHE_DIR and runs the real CLI:
+#   force --workers 1, force --workers N, a no-op rerun, and a rerun after touching some
+#   files (same bytes) and appending a bar to others.
+#
+#   python bench/bench_metrics_builder.py                     # 400 files x 2000 daily bars
+#   python bench/bench_metrics_builder.py --files 2000 --workers 8
+# ============================================================
+from __future__ import annotations
+import argparse, json, os, subprocess, sys, tempfile, time
+from pathlib import Path
+
+import numpy as np
+
+HERE = Path(__file__).resolve().parent
+BUILDER = HERE.parent / "metrics_builder.py"
+
+def write_history(src: Path, n: int, bars: int, seed: int = 5) -> None:
+    src.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    t0 = int(time.time()) // 86400 * 86400 - bars * 86400
+    for i in range(n):
+        c = 5 * np.exp(np.cumsum(rng.normal(0, 0.04, bars)))
+        data = [{"time": t0 + k * 86400, "high": float(c[k] * 1.02), "low": float(c[k] * 0.98), "open": float(c[k]),
+                 "volumefrom": float(rng.random() * 1e5), "volumeto": float(rng.random() * 1e6), "close": float(c[k]),
+                 "conversionType": "direct", "conversionSymbol": ""} for k in range(bars)]
+        payload = {"coin_id": f"coin-{i}", "symbol": f"C{i:04d}", "records": bars,
+                   "source": "cryptocompare_histoday_full", "last_updated": "", "data": data}
+        (src / f"C{i:04d}.json").write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+def run(env: dict, *flags: str) -> tuple:
+    t = time.perf_counter()
+    out = subprocess.run([sys.executable, str(BUILDER), *flags], env=env, capture_output=True, text=True, check=True).stdout
+    summary = next((l for l in out.splitlines() if l.startswith("Processed")), "")
+    return time.perf_counter() - t, summary
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="metrics_builder benchmark")
+    ap.add_argument("--files", type=int, default=400)
+    ap.add_argument("--bars", type=int, default=2000)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--touch", type=float, default=0.1, help="share of files re-saved with identical bytes")
+    ap.add_argument("--change", type=float, default=0.05, help="share of files that get one more bar")
+    a = ap.parse_args()
+
+    data_dir = Path(tempfile.mkdtemp(prefix="luna_bench_metrics_"))
+    src = data_dir / "historical"
+    write_history(src, a.files, a.bars)
+    env = dict(os.environ, LUNA_CACHE_DIR=str(data_dir), PYTHONPATH=str(BUILDER.parent))
+
+    rows = [("force, 1 worker",) + run(env, "--force", "--workers", "1"),
+            (f"force, {a.workers} workers",) + run(env, "--force", "--workers", str(a.workers)),
+            ("rerun, nothing changed",) + run(env, "--workers", str(a.workers))]
+    files = sorted(src.glob("*.json"))
+    touched, changed = files[:int(a.touch * len(files))], files[-int(a.change * len(files)) or len(files):]
+    for f in touched:
+        f.write_bytes(f.read_bytes())
+    for f in changed:
+        j = json.loads(f.read_text(encoding="utf-8"))
+        j["data"].append(dict(j["data"][-1], time=j["data"][-1]["time"] + 86400, close=j["data"][-1]["close"] * 1.01))
+        f.write_text(json.dumps(j, indent=2), encoding="utf-8")
+    rows.append((f"rerun, {len(touched)} touched + {len(changed)} changed",) + run(env, "--workers", str(a.workers)))
+
+    w = max(len(r[0]) for r in rows)
+    for label, sec, summary in rows:
+        print(f"{label.ljust(w)}  {sec:7.2f}s   {summary}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+# bench/bench_panel.py — --no-openai refresh: coin-by-coin queue vs the vectorized panel
+# ============================================================
+# Synthetic coin CSVs (plus a few awkward ones: NaN last bars, missing columns, no timestamp,
+# empty) go in a temp cache dir; both paths run with --force and their analysis JSONs are
+# compared field by field (the run's own timestamps and data age excluded).
+#
+#   python bench/bench_panel.py                     # 1000 coins x 60 days of hourly bars
+#   python bench/bench_panel.py --coins 5000 --skip-per-coin
+# ============================================================
+from __future__ import annotations
+import argparse, json, os, re, shutil, sys, tempfile, time
+from argparse import Namespace
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+from bench_batch_analyzer import write_coins  # noqa: E402
+
+def add_awkward(coins_dir: Path) -> None:
+    paths = sorted(coins_dir.glob("*.csv"))
+    df = pd.read_csv(paths[0]); df.loc[df.index[-1], ["rsi", "macd_line", "bb_width"]] = np.nan
+    df.to_csv(paths[0], index=False)
+    df = pd.read_csv(paths[1]).drop(columns=["bb_width", "volume_trend"]).rename(columns={"close": "price"})
+    df.to_csv(paths[1], index=False)
+    pd.read_csv(paths[2]).drop(columns=["timestamp"]).to_csv(coins_dir / "zz-no-timestamp.csv", index=False)
+    (coins_dir / "zz-empty.csv").write_text("timestamp,close\n", encoding="utf-8")
+
+def strip(p: dict) -> dict:
+    p = dict(p); p.pop("last_updated", None)
+    p["luna_paragraph"] = re.sub(r"~\d+ min old", "~N min old", p.get("luna_paragraph") or "")  # the clock moved on
+    p["fingerprint"] = {k: v for k, v in (p.get("fingerprint") or {}).items() if k != "analyzed_at"}
+    return p
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Rule-based analyzer: per-coin vs panel")
+    ap.add_argument("--coins", type=int, default=1000)
+    ap.add_argument("--days", type=int, default=60)
+    ap.add_argument("--chunk", type=int, default=500)
+    ap.add_argument("--skip-per-coin", action="store_true")
+    a = ap.parse_args()
+
+    data_dir = Path(tempfile.mkdtemp(prefix="luna_bench_panel_"))
+    write_coins(data_dir / "coins", a.coins, bars=24 * a.days)
+    add_awkward(data_dir / "coins")
+    os.environ["LUNA_CACHE_DIR"] = str(data_dir)
+    import luna_batch_analyzer as lba  # noqa: E402 — must follow the env setup above
+    lba.safe_print = lambda *x, **k: None
+
+    def run(no_panel: bool) -> float:
+        args = Namespace(shuffle=False, start=0, resume=False, max=0, force=True, stale=0, no_openai=True,
+                         no_panel=no_panel, panel_chunk=a.chunk, rpm=0, tpm=0, concurrency=4, workers=0,
+                         unchanged="refresh", fp_max_age=None, batch_size=1, queue="bench", lease_sec=600,
+                         max_attempts=1, retry_failed=False)
+        t0 = time.perf_counter()
+        lba.run_batch(args)
+        return time.perf_counter() - t0
+
+    n = a.coins + 2
+    if not a.skip_per_coin:
+        dt = run(True)
+        print(f"per-coin  {n} coins  {dt:7.2f}s  {n / dt:8.0f} coins/s")
+        shutil.copytree(data_dir / "analysis", data_dir / "analysis_per_coin")
+    dt = run(False)
+    print(f"panel     {n} coins  {dt:7.2f}s  {n / dt:8.0f} coins/s")
+    if a.skip_per_coin: return 0
+
+    ref, got = data_dir / "analysis_per_coin", data_dir / "analysis"
+    names = sorted(p.name for p in ref.glob("*.json"))
+    diff = [f for f in names if strip(json.loads((ref / f).read_text("utf-8"))) != strip(json.loads((got / f).read_text("utf-8")))]
+    extra = sorted(set(p.name for p in got.glob("*.json")) - set(names))
+    print(f"compared {len(names)} payloads: {len(diff)} differ {diff[:5]}, {len(extra)} only in panel {extra[:5]}")
+    return 1 if diff or extra else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
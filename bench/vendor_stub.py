@@ -0,0 +1,292 @@
+# bench/vendor_stub.py — local stand-in for every upstream API server.py talks to
+# ============================================================
+# Serves DexScreener, GeckoTerminal, CryptoCompare, CoinGecko, Birdeye, Solscan, EVM
+# JSON-RPC and OpenAI chat completions under path prefixes, so the app runs fully offline:
+#
+#   python bench/vendor_stub.py --port 8765 --latency-ms 80 --jitter-ms 40 --p429 0.02
+#   LUNA_STUB_URL=http://127.0.0.1:8765 gunicorn server:app ...
+#   OPENAI_BASE_URL=http://127.0.0.1:8765/openai/v1 python luna_batch_analyzer.py --all
+#
+# Responses come from recorded fixtures in bench/fixtures/<vendor>/<key>.json when
+# present, otherwise from a deterministic synthetic generator (same symbol -> same
+# series). With --record, fixture misses are fetched from the real vendor and saved.
+# ============================================================
+from __future__ import annotations
+import argparse, hashlib, json, random, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import numpy as np
+import requests
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+REAL_BASES = {
+    "cc": "https://min-api.cryptocompare.com",
+    "cg": "https://api.coingecko.com",
+    "ds": "https://api.dexscreener.com",
+    "gt": "https://api.geckoterminal.com",
+    "birdeye": "https://public-api.birdeye.so",
+    "solscan": "https://api.solscan.io",
+}
+CHAINS = ["solana","ethereum","base","arbitrum","bsc","polygon","optimism","avalanche",
+          "fantom","linea","zksync","blast","sui","ton","pulsechain"]
+
+class Faults:
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, p429=0.0, ptimeout=0.0, timeout_sec=25.0,
+                 per_vendor_latency: Optional[Dict[str, float]] = None, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.p429 = p429
+        self.ptimeout = ptimeout
+        self.timeout_sec = timeout_sec
+        self.per_vendor_latency = per_vendor_latency or {}
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+
+    def roll(self, vendor: str) -> Tuple[float, Optional[str]]:
+        with self.lock:
+            self.counts[vendor] = self.counts.get(vendor, 0) + 1
+            base = self.per_vendor_latency.get(vendor, self.latency_ms)
+            delay = max(0.0, base + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+            r = self.rng.random()
+        if r < self.ptimeout: return self.timeout_sec, "timeout"
+        if r < self.ptimeout + self.p429: return delay, "429"
+        return delay, None
+
+# ---------- synthetic payloads ----------
+_BAR = {"minute": 60, "hour": 3600, "day": 86400}
+
+def _seed(*parts) -> int:
+    return int(hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:8], 16)
+
+def _series(key: str, step: int, n: int, end: Optional[int] = None):
+    """Deterministic OHLCV random walk on a grid aligned to `step`, ending at `end` (now)."""
+    end = (int(end or time.time()) // step) * step
+    ts = end - step * np.arange(n - 1, -1, -1, dtype=np.int64)
+    # anchor each bar to an absolute grid index so overlapping requests agree
+    idx = ts // step
+    rng = np.random.default_rng(_seed(key, step))
+    base = 0.5 + (_seed(key) % 5000) / 100.0
+    drift = np.sin(idx / 97.0) * 0.02 + np.cos(idx / 13.0) * 0.005
+    noise = (np.sin(idx * 12.9898 + (_seed(key) % 1000)) * 43758.5453) % 1.0 - 0.5
+    close = base * np.exp(drift + noise * 0.01)
+    open_ = np.roll(close, 1); open_[0] = close[0]
+    spread = np.abs(noise) * 0.01 * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    vol = (1e5 + rng.random(n) * 1e6)
+    return ts, open_, high, low, close, vol
+
+def _addr_for(sym: str) -> str:
+    return "0x" + hashlib.sha1(sym.encode()).hexdigest()[:40]
+
+def _pair(addr: str, chain: str = "ethereum") -> dict:
+    sym = addr[2:6].upper()
+    return {
+        "chainId": chain, "dexId": "uniswap", "pairAddress": "0x" + hashlib.sha1(("pair" + addr).encode()).hexdigest()[:40],
+        "baseToken": {"address": addr, "symbol": sym, "name": f"Bench {sym}", "decimals": 18},
+        "quoteToken": {"address": "0x" + "c" * 40, "symbol": "WETH", "name": "Wrapped Ether"},
+        "liquidity": {"usd": 250_000.0}, "volume": {"h24": 120_000.0},
+        "marketCap": 12_000_000.0, "fdv": 15_000_000.0,
+    }
+
+def synth(vendor: str, path: str, q: Dict[str, str], body: Optional[dict]) -> Tuple[int, Any]:
+    now = int(time.time())
+    if vendor == "cc":
+        if path.endswith("/price"):
+            return 200, {"USD": 1.0}
+        kind = {"histominute": "minute", "histohour": "hour", "histoday": "day"}.get(path.rsplit("/", 1)[-1])
+        if not kind: return 404, {"Response": "Error", "Message": "unknown"}
+        step = _BAR[kind] * int(q.get("aggregate", 1) or 1)
+        n = min(int(q.get("limit", 100)) + 1, 2001)
+        ts, o, h, l, c, v = _series("cc:" + q.get("fsym", "X"), step, n, now)
+        rows = [{"time": int(t), "open": a, "high": b, "low": d, "close": e, "volumefrom": f / e, "volumeto": f}
+                for t, a, b, d, e, f in zip(ts.tolist(), o.tolist(), h.tolist(), l.tolist(), c.tolist(), v.tolist())]
+        return 200, {"Response": "Success", "Data": {"Data": rows}}
+    if vendor == "cg":
+        if path.endswith("/ping"): return 200, {"gecko_says": "(V3) To the Moon!"}
+        if path.endswith("/coins/list"):
+            return 200, [{"id": f"bench-{i}", "symbol": f"bch{i}", "name": f"Bench {i}", "platforms": {}} for i in range(50)]
+        if "/market_chart" in path:
+            days = int(q.get("days", 30) or 30)
+            step = 86400 if days > 90 else 3600
+            ts, _, _, _, c, v = _series("cg:" + path, step, int(days * 86400 / step), now)
+            ms = (ts * 1000).tolist()
+            return 200, {"prices": [list(x) for x in zip(ms, c.tolist())],
+                         "total_volumes": [list(x) for x in zip(ms, v.tolist())],
+                         "market_caps": [list(x) for x in zip(ms, (c * 1e7).tolist())]}
+        return 404, {"error": "not found"}
+    if vendor == "ds":
+        if path.startswith("/token-pairs/v1/"):
+            _, _, _, chain, addr = path.split("/", 4)
+            return 200, ([_pair(addr.lower(), chain)] if chain == "ethereum" else [])
+        if path.endswith("/latest/dex/search"):
+            term = q.get("q", "")
+            addr = term.lower() if term.lower().startswith("0x") else _addr_for(term)
+            return 200, {"pairs": [_pair(addr)]}
+        return 404, {}
+    if vendor == "gt":
+        if "/ohlcv/" in path:
+            tf = path.rsplit("/", 1)[-1]
+            step = _BAR.get(tf, 3600) * int(q.get("aggregate", 1) or 1)
+            n = min(int(q.get("limit", 100)), 1000)
+            ts, o, h, l, c, v = _series("gt:" + path.split("/ohlcv/")[0], step, n, now)
+            rows = [list(r) for r in zip(ts.tolist(), o.tolist(), h.tolist(), l.tolist(), c.tolist(), v.tolist())][::-1]
+            return 200, {"data": {"attributes": {"ohlcv_list": rows}}}
+        if path.endswith("/pools"):
+            return 200, {"data": [{"id": "eth_0x" + "a" * 40, "attributes": {"volume_usd": {"h24": "1000"}}}]}
+        return 200, {"data": {}}
+    if vendor == "birdeye":
+        step = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600, "4h": 14400, "1d": 86400}.get(q.get("type", "1h"), 3600)
+        t0, t1 = int(q.get("time_from", now - 86400)), int(q.get("time_to", now))
+        ts, _, _, _, c, _ = _series("be:" + q.get("address", ""), step, max(1, min(1000, (t1 - t0) // step)), t1)
+        return 200, {"data": {"items": [{"unixTime": int(t), "value": x} for t, x in zip(ts.tolist(), c.tolist())]}}
+    if vendor == "solscan":
+        return 200, {"data": {"decimals": 9, "supply": str(10**9 * 10**9)}}
+    if vendor == "openai" and path.endswith("/chat/completions"):
+        return 200, _chat_completion(body or {})
+    if vendor == "rpc":
+        data = (((body or {}).get("params") or [{}])[0] or {}).get("data", "")
+        val = 18 if data == "0x313ce567" else 10**9 * 10**18
+        return 200, {"jsonrpc": "2.0", "id": (body or {}).get("id", 1), "result": hex(val)}
+    return 404, {}
+
+_TOOLS = ["RSI", "MACD", "BANDS", "VOL", "MCAP", "LIQUIDITY", "SENTIMENT", "FEAR_GREED", "WHALE_ACTIVITY"]
+
+def _analysis(seed: int) -> dict:
+    rng = random.Random(seed)
+    regime = rng.choice(["bullish", "bearish", "sideways"])
+    return {"overview": {"summary": f"Stub read: {regime} structure, confirm with volume.",
+                         "bullets": [f"point {i}" for i in range(3)], "regime": regime},
+            "tool_blurbs": {t: f"{t} looks {rng.choice(['firm', 'soft', 'flat'])} on this window today." for t in _TOOLS},
+            "tool_details": {t: f"{t} detail sentence one. Sentence two." for t in _TOOLS}}
+
+def _chat_completion(body: dict) -> dict:
+    prompt = "".join(str(m.get("content") or "") for m in body.get("messages") or [])
+    try:  # batched prompts carry {"coins": {coin_id: metrics}}; answer keyed by coin id
+        coins = json.loads(prompt.split("```json", 1)[1].split("```", 1)[0]).get("coins")
+    except (IndexError, ValueError, AttributeError):
+        coins = None
+    reply = {cid: _analysis(_seed(cid, json.dumps(m))) for cid, m in coins.items()} if isinstance(coins, dict) \
+        else _analysis(_seed(prompt))
+    content = json.dumps(reply)
+    p_tok, c_tok = len(prompt) // 4, len(content) // 4
+    return {"id": f"chatcmpl-stub{_seed(prompt) % 10**8}", "object": "chat.completion", "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": p_tok, "completion_tokens": c_tok, "total_tokens": p_tok + c_tok}}
+
+# ---------- fixtures ----------
+def fixture_key(vendor: str, path: str, q: Dict[str, str]) -> Path:
+    norm = path + "?" + urlencode(sorted(q.items()))
+    return FIXTURES / vendor / (hashlib.sha1(norm.encode()).hexdigest()[:16] + ".json")
+
+def load_fixture(vendor: str, path: str, q: Dict[str, str]) -> Optional[Tuple[int, Any]]:
+    p = fixture_key(vendor, path, q)
+    if not p.exists(): return None
+    js = json.loads(p.read_text(encoding="utf-8"))
+    return int(js.get("status", 200)), js.get("body")
+
+def record_fixture(vendor: str, path: str, q: Dict[str, str]) -> Optional[Tuple[int, Any]]:
+    real = REAL_BASES.get(vendor)
+    if not real: return None
+    try:
+        r = requests.get(real + path, params=q, timeout=20)
+        body = r.json()
+    except Exception:
+        return None
+    p = fixture_key(vendor, path, q)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_text(json.dumps({"url": real + path, "params": q, "status": r.status_code, "body": body}), encoding="utf-8")
+    return r.status_code, body
+
+# ---------- HTTP ----------
+def make_handler(faults: Faults, record: bool = False):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *a):  # keep benchmark output clean
+            pass
+
+        def _serve(self, body: Optional[dict]):
+            u = urlsplit(self.path)
+            parts = u.path.lstrip("/").split("/", 1)
+            vendor, path = parts[0], "/" + (parts[1] if len(parts) > 1 else "")
+            if vendor == "rpc":
+                path = "/"
+            q = dict(parse_qsl(u.query))
+            delay, fault = faults.roll(vendor)
+            time.sleep(delay)
+            if fault == "timeout":
+                return self._send(504, {"error": "stub timeout"})
+            if fault == "429":
+                return self._send(429, {"error": "rate limit", "Message": "You are over your rate limit"},
+                                  {"Retry-After": "1"})
+            hit = load_fixture(vendor, path, q) or (record_fixture(vendor, path, q) if record else None)
+            status, payload = hit if hit else synth(vendor, path, q, body)
+            self._send(status, payload)
+
+        def _send(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            try:
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def do_GET(self):
+            self._serve(None)
+
+        def do_POST(self):
+            n = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(n) or b"{}")
+            except Exception:
+                body = {}
+            self._serve(body)
+    return Handler
+
+def start(port: int = 0, faults: Optional[Faults] = None, record: bool = False) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the stub on a daemon thread; returns (server, base_url)."""
+    srv = ThreadingHTTPServer(("127.0.0.1", port), make_handler(faults or Faults(), record))
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, name="vendor-stub", daemon=True).start()
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}"
+
+def _parse_vendor_latency(s: str) -> Dict[str, float]:
+    out = {}
+    for tok in (s or "").split(","):
+        if "=" in tok:
+            k, v = tok.split("=", 1)
+            out[k.strip()] = float(v)
+    return out
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Offline vendor stub for Luna AI")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--vendor-latency", default="", help="per-vendor mean latency, e.g. gt=250,cc=60")
+    ap.add_argument("--p429", type=float, default=0.0, help="fraction of requests answered with HTTP 429")
+    ap.add_argument("--ptimeout", type=float, default=0.0, help="fraction of requests that hang then 504")
+    ap.add_argument("--timeout-sec", type=float, default=25.0)
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--record", action="store_true", help="fetch + save fixtures from real vendors on miss")
+    a = ap.parse_args()
+    f = Faults(a.latency_ms, a.jitter_ms, a.p429, a.ptimeout, a.timeout_sec,
+               _parse_vendor_latency(a.vendor_latency), a.seed)
+    srv, url = start(a.port, f, a.record)
+    print(f"vendor stub on {url}  (set LUNA_STUB_URL={url})")
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.shutdown()
@@ -4,6 +4,8 @@ import argparse
 from pathlib import Path
 import pandas as pd
 
+import indicators as ind
+
 ROOT = Path(__file__).parent.resolve()
 DATA = ROOT / "luna_cache" / "data"
 FRAMES = DATA / "derived" / "frames"
@@ -38,27 +40,10 @@ def add_indicators(df: pd.DataFrame) -> pd.DataFrame:
     out = df.copy()
     out["price"] = out["close"].astype(float)
 
-    # RSI(14)
-    d = out["price"].diff()
-    up = d.clip(lower=0.0)
-    dn = -d.clip(upper=0.0).replace(0.0, 1e-9)
-    rsi = 100 - 100 / (1 + up.ewm(span=14, adjust=False).mean() / dn.ewm(span=14, adjust=False).mean())
-    out["rsi"] = rsi
-
-    # MACD 12/26/9
-    ema12 = out["price"].ewm(span=12, adjust=False).mean()
-    ema26 = out["price"].ewm(span=26, adjust=False).mean()
-    macd = ema12 - ema26
-    out["macd_line"] = macd
-    out["macd_signal"] = macd.ewm(span=9, adjust=False).mean()
-    out["macd_hist"] = out["macd_line"] - out["macd_signal"]
-
-    # Bollinger(20,2)
-    mid = out["price"].rolling(20, min_periods=5).mean()
-    std = out["price"].rolling(20, min_periods=5).std()
-    out["bb_lower"] = mid - 2*std
-    out["bb_middle"] = mid
-    out["bb_upper"] = mid + 2*std
+    # RSI(14), MACD 12/26/9, Bollinger(20,2)
+    out["rsi"] = ind.rsi(out["price"], 14)
+    out["macd_line"], out["macd_signal"], out["macd_hist"] = ind.macd(out["price"], 12, 26, 9)
+    out["bb_middle"], out["bb_upper"], out["bb_lower"] = ind.bollinger(out["price"], 20, 2.0, min_periods=5)
 
     # Volume trend & sentiment
     out["volume_trend"] = out["volume"].rolling(20, min_periods=5).mean()
@@ -0,0 +1,94 @@
+# conditional_http.py — strong ETags / 304s and gzip|br compression for the heavy routes
+from __future__ import annotations
+import gzip, hashlib
+from typing import Dict, Iterable, Optional
+
+from flask import Response, request
+
+import telemetry
+
+try:  # optional: `pip install brotli` enables Content-Encoding: br
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_SIZE = 1400  # below ~one packet compression doesn't pay
+COMPRESSIBLE = {"text/html", "application/json", "text/plain", "text/css", "application/javascript"}
+GZIP_LEVEL, BR_QUALITY = 6, 5
+
+def etag_for(*parts) -> str:
+    """Strong validator for a representation determined by `parts` (symbol, tf, data version, build...)."""
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:24]
+
+def _strip(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"): tag = tag[2:]
+    tag = tag.strip('"')
+    for suf in ("-br", "-gz"):
+        if tag.endswith(suf): return tag[: -len(suf)]
+    return tag
+
+def matching(etag: str) -> Optional[str]:
+    """The If-None-Match entry naming `etag` (in any of its encodings), if the request has one."""
+    inm = request.headers.get("If-None-Match")
+    if not inm: return None
+    if inm.strip() == "*": return f'"{etag}"'
+    return next((t.strip() for t in inm.split(",") if _strip(t) == etag), None)
+
+def not_modified(etag: str, cache_control: Optional[str] = None) -> Optional[Response]:
+    """A 304 if the client already holds `etag`, else None (render and tag the response)."""
+    held = matching(etag)
+    if held is None: return None
+    telemetry.inc("luna_http_not_modified_total", endpoint=request.endpoint or "unknown")
+    resp = Response(status=304)
+    resp.headers["ETag"] = held  # echo the representation the client has
+    if cache_control: resp.headers["Cache-Control"] = cache_control
+    return resp
+
+def tag(resp, etag: str):
+    if getattr(resp, "status_code", 200) == 200:
+        resp.set_etag(etag)
+    return resp
+
+def _encoding(accept: str) -> Optional[str]:
+    q: Dict[str, float] = {}
+    for part in accept.split(","):
+        name, _, params = part.strip().partition(";")
+        try:
+            q[name.strip().lower()] = float(params.strip()[2:]) if params.strip().startswith("q=") else 1.0
+        except ValueError:
+            q[name.strip().lower()] = 0.0
+    if brotli is not None and q.get("br", 0) > 0: return "br"
+    if q.get("gzip", 0) > 0: return "gzip"
+    return None
+
+def compress(resp: Response, min_size: int = MIN_SIZE) -> Response:
+    """Compress a buffered text/JSON body in place when the client accepts it and it's big enough."""
+    if (resp.status_code != 200 or resp.direct_passthrough or resp.is_streamed
+            or "Content-Encoding" in resp.headers or resp.mimetype not in COMPRESSIBLE):
+        return resp
+    resp.vary.add("Accept-Encoding")
+    enc = _encoding(request.headers.get("Accept-Encoding", ""))
+    if enc is None: return resp
+    body = resp.get_data()
+    if len(body) < min_size: return resp
+    out = brotli.compress(body, quality=BR_QUALITY) if enc == "br" else gzip.compress(body, GZIP_LEVEL, mtime=0)
+    resp.set_data(out)
+    resp.headers["Content-Encoding"] = enc
+    etag, weak = resp.get_etag()
+    if etag:  # a strong tag names one representation; suffix it per encoding
+        resp.set_etag(f"{etag}-{'br' if enc == 'br' else 'gz'}", weak=weak)
+    ep = request.endpoint or "unknown"
+    telemetry.inc("luna_http_body_bytes_total", len(body), endpoint=ep, stage="raw")
+    telemetry.inc("luna_http_body_bytes_total", len(out), endpoint=ep, stage="sent")
+    return resp
+
+def finalize(resp: Response, cache_control: Dict[str, str], compress_endpoints: Iterable[str]) -> Response:
+    """after_request hook: per-route Cache-Control, then compression for the listed endpoints."""
+    ep = request.endpoint or ""
+    cc = cache_control.get(ep)
+    if cc and "Cache-Control" not in resp.headers:
+        resp.headers["Cache-Control"] = cc
+    if ep in compress_endpoints:
+        compress(resp)
+    return resp
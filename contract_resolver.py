@@ -1,7 +1,9 @@
 # contract_resolver.py — improved resilient version (v2)
 # Resolves Coingecko ID, chain, and contract for each token safely.
 
-import json, time, os, requests, random
+import json, time, os, random
+
+import http_cache  # search/coin lookups are reused across reruns (LUNA_HTTP_CACHE=off to bypass)
 
 SEED_PATH = "luna_cache/contracts_seed.json"
 OUT_PATH  = "luna_cache/contracts.json"
@@ -12,11 +14,20 @@ DX_BASE = "https://api.dexscreener.io/latest/dex/search/?q="
 # --------------------------------------------------------
 # SAFE REQUEST HELPERS
 # --------------------------------------------------------
+network_calls = 0  # GETs that actually went out (cache hits don't count); main() paces on these
+
+def fetch(url, timeout):
+    global network_calls
+    r = http_cache.get(url, timeout=timeout)
+    if not http_cache.from_cache(r):
+        network_calls += 1
+    return r
+
 def safe_get(url, retries=6, backoff=5):
     """Call API with retries/back-off when body is empty, 429, or invalid JSON."""
     for attempt in range(retries):
         try:
-            r = requests.get(url, timeout=12)
+            r = fetch(url, timeout=12)
             if r.status_code == 429:  # Rate limit hit
                 wait = backoff * (attempt + 1)
                 print(f"[CG 429] Rate limit — sleeping {wait}s ...")
@@ -48,7 +59,7 @@ def cg_coin(id_):
 
 def dx_search(query):
     try:
-        r = requests.get(f"{DX_BASE}{query}", timeout=10)
+        r = fetch(f"{DX_BASE}{query}", timeout=10)
         return r.json().get("pairs", [])
     except Exception as e:
         print("[DX SEARCH ERR]", e)
@@ -129,6 +140,7 @@ def main():
             done += 1
             continue
 
+        before = network_calls
         cg_id, chain, contract, verified = resolve_one(t)
         t["id"] = cg_id
         t["chain"] = chain
@@ -138,12 +150,13 @@ def main():
         done += 1
         print(f"[{done}/{total}] {t['name']} ({t['symbol']}): id={cg_id} chain={chain} contract={contract} verified={t['verified']}")
 
-        # polite pacing with random jitter
-        time.sleep(1.5 + random.uniform(0, 1.0))
+        # polite pacing with random jitter, only if this token actually hit the network
+        if network_calls > before:
+            time.sleep(1.5 + random.uniform(0, 1.0))
 
     with open(OUT_PATH, "w", encoding="utf-8") as f:
         json.dump(seed, f, indent=2, ensure_ascii=False)
-    print(f"\n✅ Wrote resolved contracts → {OUT_PATH}")
+    print(f"\n✅ Wrote resolved contracts → {OUT_PATH} — {http_cache.summary()}")
 
 if __name__ == "__main__":
     main()
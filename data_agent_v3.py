@@ -13,6 +13,8 @@ import os, csv, math, time, json, logging, requests, urllib3, re
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
 
+from key_quota import QuotaPool
+
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 # ---------- Paths ----------
@@ -26,6 +28,8 @@ os.makedirs(DATA_DIR, exist_ok=True)
 
 # ---------- Keys ----------
 CC_KEY  = os.getenv("CRYPTOCOMPARE_KEY") or ""
+CC_KEYS = [k.strip() for k in re.split(r"[\s,;]+", os.getenv("CRYPTOCOMPARE_KEYS") or CC_KEY) if k.strip()]
+CC_QUOTA = QuotaPool("cc", CC_KEYS, priority="batch")  # shared budgets, see key_quota.py
 
 # ---------- Logger ----------
 logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(message)s")
@@ -163,14 +167,22 @@ def resolve_symbol(coin_id: str, csv_exists: bool) -> Optional[str]:
 CC_BASE = "https://min-api.cryptocompare.com/data/v2"
 
 def _cc_get(url: str, params: dict) -> Optional[dict]:
-    headers = {"authorization": f"Apikey {CC_KEY}"} if CC_KEY else {}
     for attempt in range(3):
+        key = CC_QUOTA.pick(wait=60)
+        if key is None:
+            logger.warning("CryptoCompare keys out of budget; skipping")
+            return None
+        headers = {"authorization": f"Apikey {key}"} if key else {}
         r = requests.get(url, headers=headers, params=params, timeout=20, verify=False)
         if r.status_code == 200:
-            return r.json()
+            js = r.json()
+            msg = js.get("Message", "") if isinstance(js, dict) and js.get("Response") == "Error" else ""
+            CC_QUOTA.report(key, 200, msg, r.headers, payload=js)
+            return js
+        CC_QUOTA.report(key, r.status_code, r.text[:400], r.headers)
         if r.status_code == 429:
-            logger.warning("CryptoCompare rate limit hit; waiting...")
-            time.sleep(5)
+            logger.warning("CryptoCompare rate limit hit; rotating key...")
+            time.sleep(1)
             continue
         logger.warning(f"[CryptoCompare] HTTP {r.status_code} at {url}")
         time.sleep(1)
@@ -12,20 +12,26 @@ keys = dotenv_values(ROOT / ".env").get("CRYPTOCOMPARE_KEYS", "").split(",")
 if not keys or not keys[0]:
     raise SystemExit("No CryptoCompare keys found in .env")
 
-key_index = 0
+# shared per-key budgets (key_quota.py); batch priority keeps headroom for the web app
+from key_quota import QuotaPool
+CC_QUOTA = QuotaPool("cc", [k.strip() for k in keys], priority="batch")
+
 def get_key():
-    global key_index
-    key = keys[key_index % len(keys)].strip()
-    key_index += 1
-    return key
+    return CC_QUOTA.pick(wait=120)
 
 def fetch_latest(symbol):
     url = f"https://min-api.cryptocompare.com/data/histoday"
-    params = {"fsym": symbol.upper(), "tsym": "USD", "limit": 1, "api_key": get_key()}
+    key = get_key()
+    if key is None:
+        print("No CryptoCompare key with budget left —", symbol, "skipped")
+        return None
+    params = {"fsym": symbol.upper(), "tsym": "USD", "limit": 1, "api_key": key or None}  # None: keyless
     try:
         r = requests.get(url, params=params, timeout=20)
         j = r.json()
-        if j.get("Response") != "Success":
+        ok = j.get("Response") == "Success"
+        CC_QUOTA.report(key, r.status_code, "" if ok else (j.get("Message") or ""), r.headers, payload=j)
+        if not ok:
             return None
         return j["Data"][-1]
     except Exception as e:
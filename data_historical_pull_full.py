@@ -7,7 +7,6 @@ import json
 import time
 import math
 import argparse
-import itertools
 import traceback
 from pathlib import Path
 from datetime import datetime, timezone
@@ -15,6 +14,8 @@ from datetime import datetime, timezone
 import requests
 from dotenv import load_dotenv
 
+from key_quota import QuotaPool
+
 # ---------- PATHS / ENV ----------
 ROOT = Path(r"C:\Users\jmpat\Desktop\Luna AI")
 load_dotenv(ROOT / ".env")
@@ -24,7 +25,9 @@ API_KEYS = [k.strip() for k in os.getenv("CRYPTOCOMPARE_KEYS", "").split(",") if
 if not API_KEYS:
     raise SystemExit("❌ No CryptoCompare keys found in .env (CRYPTOCOMPARE_KEYS).")
 
-api_cycle = itertools.cycle(API_KEYS)
+# budgets shared with the web app (key_quota.py): batch pulls leave headroom for interactive use
+CC_QUOTA = QuotaPool("cc", API_KEYS, priority="batch")
+QUOTA_WAIT = float(os.getenv("LUNA_QUOTA_WAIT", "120"))  # seconds to wait for a key with budget
 SESSION = requests.Session()
 
 # data sources
@@ -66,14 +69,13 @@ def append_bad(symbol: str) -> None:
 def fetch_hist(symbol: str, to_ts: int | None, verbose: bool=False):
     """
     Fetch one page (≈2001 daily bars) for symbol.
-    Uses rotating API keys and exponential backoff.
+    Draws a key with budget left per attempt (shared quota store) and backs off on errors.
     Returns list of bars (ascending by time) or [] on error.
     """
     params = {
         "fsym": symbol,
         "tsym": TSYM,
         "limit": LIMIT,
-        "api_key": next(api_cycle),
     }
     if to_ts is not None:
         params["toTs"] = to_ts
@@ -82,13 +84,22 @@ def fetch_hist(symbol: str, to_ts: int | None, verbose: bool=False):
         if verbose:
             log(f"[{symbol}] 🔵 Attempt {attempt}/{RETRIES_PER_CALL} — fetching history...")
 
+        key = CC_QUOTA.pick(wait=QUOTA_WAIT)
+        if key is None:
+            log(f"[{symbol}] ⏸️ No CryptoCompare key with budget left — giving up on this page.")
+            return []
+        if key:
+            params["api_key"] = key
+
         try:
             r = SESSION.get(BASE_URL, params=params, timeout=TIMEOUT)
             status = r.status_code
 
             if status == 200:
                 data = r.json()
-                if data.get("Response") == "Success":
+                ok = data.get("Response") == "Success"
+                CC_QUOTA.report(key, status, "" if ok else (data.get("Message") or ""), r.headers, payload=data)
+                if ok:
                     bars = data.get("Data", {}).get("Data", []) or []
                     # sometimes the API returns the last candle duplicated with zeroes — filter nonsense
                     cleaned = [b for b in bars if b.get("time") and isinstance(b.get("time"), int)]
@@ -104,11 +115,10 @@ def fetch_hist(symbol: str, to_ts: int | None, verbose: bool=False):
                     append_bad(symbol)
                     return []
                 if "limit" in message or "rate" in message:
-                    # rotate key + cooldown
+                    # the quota store has cooled this key down; next attempt draws another
                     if verbose:
                         log(f"[{symbol}] ⚠️ Rate limit — rotating key & backing off.")
                     time.sleep(0.8)
-                    params["api_key"] = next(api_cycle)
                     continue
 
                 # other API message
@@ -116,10 +126,10 @@ def fetch_hist(symbol: str, to_ts: int | None, verbose: bool=False):
                 time.sleep(2)
                 continue
 
+            CC_QUOTA.report(key, status, r.text[:400], r.headers)
             if status == 429:
                 log(f"[{symbol}] 🚫 429 Too Many Requests — rotating key & backing off.")
-                time.sleep(15)
-                params["api_key"] = next(api_cycle)
+                time.sleep(0.8)
                 continue
 
             # other HTTP codes
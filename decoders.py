@@ -0,0 +1,105 @@
+# decoders.py — vendor payloads -> typed OHLCV frames, column-at-a-time (no per-row parsing)
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+OHLCV = ["timestamp", "open", "high", "low", "close", "volume"]
+
+def floats(values: Sequence[Any]) -> np.ndarray:
+    """Bulk float64 conversion; numeric strings parse, anything else (None, junk) becomes NaN."""
+    try:
+        return np.asarray(values, dtype="float64")
+    except (TypeError, ValueError):
+        return pd.to_numeric(pd.Series(values, dtype="object"), errors="coerce").to_numpy(dtype="float64")
+
+def epoch_ns(values: Sequence[Any]) -> np.ndarray:
+    """
+    Epoch numbers in s, ms, us or ns (detected per value by magnitude) -> int64 ns.
+    Missing or non-positive values come back as NaT's int64 (check with `valid_ns`).
+    """
+    v = floats(values)
+    a = np.abs(v)
+    scale = np.select([a < 1e11, a < 1e14, a < 1e17], [1e9, 1e6, 1e3], 1.0)
+    ok = np.isfinite(v) & (v > 0)
+    out = np.full(len(v), np.iinfo(np.int64).min, dtype=np.int64)
+    out[ok] = np.round(v[ok] * scale[ok]).astype(np.int64)
+    return out
+
+def valid_ns(ns: np.ndarray) -> np.ndarray:
+    return ns != np.iinfo(np.int64).min
+
+def frame(ns: np.ndarray, cols: Dict[str, np.ndarray], mask: Optional[np.ndarray] = None,
+          columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Typed frame from columns: rows with a bad timestamp (or failing `mask`) dropped, sorted by time."""
+    keep = valid_ns(ns) if mask is None else (valid_ns(ns) & mask)
+    order = np.argsort(ns[keep], kind="stable")
+    data = {"timestamp": pd.DatetimeIndex(ns[keep][order]).tz_localize("UTC")}
+    for c, v in cols.items():
+        data[c] = v[keep][order]
+    df = pd.DataFrame(data)  # (passing columns= here would take pandas' slow object path)
+    return df[columns] if columns else df
+
+def rows_ohlcv(rows: Sequence[Any]) -> pd.DataFrame:
+    """[[t, o, h, l, c, v], ...] (GeckoTerminal ohlcv_list); short or non-list rows are skipped."""
+    if not rows: return pd.DataFrame()
+    try:
+        m = np.asarray(rows, dtype="float64")
+        if m.ndim != 2 or m.shape[1] < 6: raise ValueError
+    except (TypeError, ValueError):
+        good = [r[:6] for r in rows if isinstance(r, (list, tuple)) and len(r) >= 6]
+        if not good: return pd.DataFrame()
+        m = np.column_stack([floats(col) for col in zip(*good)])
+    ns = epoch_ns(m[:, 0])
+    return frame(ns, {c: m[:, i + 1] for i, c in enumerate(OHLCV[1:])})
+
+def columns_of(items: Sequence[dict], keys: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Float columns for `keys` from a list of dicts (pandas' C record reader, then bulk conversion)."""
+    raw = pd.DataFrame.from_records([it for it in items if isinstance(it, dict)], columns=list(dict.fromkeys(keys)))
+    return {k: floats(raw[k].to_numpy()) for k in raw.columns}
+
+def records_ohlcv(items: Sequence[dict], fields: Dict[str, str], time_key: str) -> pd.DataFrame:
+    """List of dicts -> OHLCV frame; `fields` maps output column -> payload key."""
+    if not items: return pd.DataFrame()
+    cols = columns_of(items, [time_key, *fields.values()])
+    return frame(epoch_ns(cols[time_key]), {c: cols[k] for c, k in fields.items()})
+
+def _pairs(seq: Sequence[Any]):
+    """[[t, v], ...] -> (epoch ns, float values); malformed pairs become invalid rows."""
+    try:
+        m = np.asarray(seq, dtype="float64")
+        if m.ndim != 2 or m.shape[1] < 2: raise ValueError
+        return epoch_ns(m[:, 0]), m[:, 1]
+    except (TypeError, ValueError):
+        m = np.asarray([r[:2] if isinstance(r, (list, tuple)) and len(r) >= 2 else (None, None) for r in seq],
+                       dtype=object).reshape(-1, 2)
+        return epoch_ns(m[:, 0]), floats(m[:, 1])
+
+def align(ts_ns: np.ndarray, other: Sequence[Any]) -> np.ndarray:
+    """
+    Values of `other` ([[t, v], ...]) at the exact timestamps `ts_ns`, NaN where absent:
+    one sort + searchsorted instead of a merge per series.
+    """
+    out = np.full(len(ts_ns), np.nan)
+    if not other: return out
+    ons, ov = _pairs(other)
+    ok = valid_ns(ons)
+    ons, ov = ons[ok], ov[ok]
+    order = np.argsort(ons, kind="stable")
+    ons, ov = ons[order], ov[order]
+    idx = np.searchsorted(ons, ts_ns)
+    hit = idx < len(ons)
+    hit[hit] = ons[idx[hit]] == ts_ns[hit]
+    out[hit] = ov[idx[hit]]
+    return out
+
+def cg_market_chart(js: dict) -> pd.DataFrame:
+    """CoinGecko market_chart {prices, total_volumes, market_caps} -> close/volume/market_cap frame."""
+    px = js.get("prices") or []
+    if not px: return pd.DataFrame()
+    ns, close = _pairs(px)
+    cols = {"close": close,
+            "volume": align(ns, js.get("total_volumes") or []),
+            "market_cap": align(ns, js.get("market_caps") or [])}
+    return frame(ns, cols)
@@ -0,0 +1,88 @@
+# downsample.py — shrink chart series to a point budget without losing their shape
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+def _xnum(x) -> np.ndarray:
+    if isinstance(x, np.ndarray) and x.dtype.kind == "f":
+        return x
+    if pd.api.types.is_datetime64_any_dtype(x):
+        i8 = pd.DatetimeIndex(x).asi8
+        return np.where(i8 == np.iinfo(np.int64).min, np.nan, i8.astype("float64"))  # NaT -> NaN
+    return pd.to_numeric(pd.Series(x), errors="coerce").to_numpy(dtype="float64")
+
+def lttb(x, y, n: int, keep_extremes: bool = True) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: positions of ~n points that best keep the line's shape.
+    First and last points are always kept; with keep_extremes the global max/min are too,
+    so an ATH or a one-bar spike can't fall between buckets. NaN points are never picked.
+    """
+    xs, ys = _xnum(x), np.asarray(y, dtype="float64")
+    valid = np.flatnonzero(np.isfinite(xs) & np.isfinite(ys))
+    if n <= 2 or len(valid) <= n:
+        return valid
+    vx, vy = xs[valid], ys[valid]
+    m = len(valid)
+    edges = np.linspace(1, m - 1, n - 1).astype(np.int64)  # n-2 buckets between first and last
+    lo, hi = edges[:-1], edges[1:]
+    # next-bucket averages (the last bucket's "next" is the final point)
+    sizes = np.append(hi[1:] - lo[1:], 1).astype("float64")
+    cx = np.append(np.add.reduceat(vx[:-1], lo[1:]) if len(lo) > 1 else [], 0.0)
+    cy = np.append(np.add.reduceat(vy[:-1], lo[1:]) if len(lo) > 1 else [], 0.0)
+    cx[-1], cy[-1] = vx[-1], vy[-1]
+    cx[:-1] /= sizes[:-1]; cy[:-1] /= sizes[:-1]
+    # buckets as rows of a matrix, short rows padded with their first point (argmax picks the first max)
+    w = int((hi - lo).max())
+    pos = lo[:, None] + np.arange(w)[None, :]
+    pos = np.where(pos < hi[:, None], pos, lo[:, None])
+    BX, BY = vx[pos], vy[pos]
+    out = np.empty(n, dtype=np.int64)
+    out[0], out[-1] = 0, m - 1
+    a = 0
+    for i in range(n - 2):
+        ax, ay = vx[a], vy[a]
+        area = np.abs((ax - cx[i]) * (BY[i] - ay) - (ax - BX[i]) * (cy[i] - ay))
+        a = int(pos[i, area.argmax()])
+        out[i + 1] = a
+    if keep_extremes:
+        out = np.union1d(out, [int(np.argmax(vy)), int(np.argmin(vy))])
+    return valid[out]
+
+def lttb_frame(df: pd.DataFrame, y: str, n: int, x: str = "timestamp") -> pd.DataFrame:
+    """Rows of `df` picked by lttb() on (x, y); `df` unchanged if it is already within budget."""
+    if df is None or len(df) <= n or y not in df.columns or x not in df.columns:
+        return df
+    return df.iloc[lttb(df[x], df[y], n)]
+
+def _bucket_starts(m: int, n: int) -> np.ndarray:
+    return np.unique(np.linspace(0, m, n, endpoint=False).astype(np.int64))
+
+def ohlc_buckets(df: pd.DataFrame, n: int, x: str = "timestamp") -> pd.DataFrame:
+    """
+    Candles merged into ~n equal-count buckets: first open, max high, min low, last close,
+    summed volume, stamped at the bucket's first bar. Highs/lows are kept exactly, so the
+    extremes (ATH, wicks) survive. Other columns take the bucket's last value.
+    """
+    if df is None or len(df) <= n:
+        return df
+    starts = _bucket_starts(len(df), n)
+    ends = np.append(starts[1:], len(df)) - 1
+    out = {x: df[x].iloc[starts].to_numpy()}
+    for c in df.columns:
+        if c == x: continue
+        v = df[c].to_numpy()
+        if c == "open":
+            out[c] = v[starts]
+        elif c in ("high", "low", "volume"):
+            f = v.astype("float64")
+            if c == "volume":
+                out[c] = np.add.reduceat(np.nan_to_num(f), starts)
+            else:
+                fill = -np.inf if c == "high" else np.inf
+                red = np.maximum if c == "high" else np.minimum
+                r = red.reduceat(np.where(np.isnan(f), fill, f), starts)
+                out[c] = np.where(np.isinf(r), np.nan, r)
+        else:
+            out[c] = v[ends]
+    return pd.DataFrame(out, columns=list(df.columns)).astype(df.dtypes.to_dict())
+
@@ -0,0 +1,101 @@
+# frame_schema.py — compact dtype layout for cached OHLCV + indicator frames
+from __future__ import annotations
+from typing import Dict, List
+
+import pandas as pd
+
+# Prices keep full precision (micro-caps trade at 1e-8); volumes and indicators only
+# feed charts/blurbs, so float32's ~7 significant digits are plenty.
+PRICE_COLS     = ["open", "high", "low", "close", "market_cap"]
+VOLUME_COLS    = ["volume"]
+INDICATOR_COLS = [
+    "rsi", "macd_line", "macd_signal", "macd_hist",
+    "bb_mid", "bb_upper", "bb_lower", "bb_width",
+    "adx14", "obv", "atr14", "alt_momentum",
+]
+SCHEMA: Dict[str, str] = {
+    "timestamp": "datetime64[ns, UTC]",
+    **{c: "float64" for c in PRICE_COLS},
+    **{c: "float32" for c in VOLUME_COLS},
+    **{c: "float32" for c in INDICATOR_COLS},
+}
+# extra columns that are allowed through untouched (e.g. source resolution tags)
+PASSTHROUGH: List[str] = ["src_res"]
+
+def conform(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    In-memory layout: known columns only, cast to SCHEMA.
+    Vendor leftovers (volumefrom/volumeto, time, ts, conversionType...) are dropped.
+    `timestamp` stays tz-aware datetime64 — already an int64 epoch (ns) underneath.
+    """
+    if df is None or df.empty:
+        return df
+    keep = [c for c in SCHEMA if c in df.columns] + [c for c in PASSTHROUGH if c in df.columns]
+    out = df[keep].copy()
+    if "timestamp" in out.columns and not isinstance(out["timestamp"].dtype, pd.DatetimeTZDtype):
+        out["timestamp"] = _ts_from_any(out["timestamp"])
+    for c in keep:
+        want = SCHEMA.get(c)
+        if want and c != "timestamp" and out[c].dtype != want:
+            out[c] = pd.to_numeric(out[c], errors="coerce").astype(want)
+    return out
+
+def to_storage(df: pd.DataFrame) -> pd.DataFrame:
+    """On-disk layout: conform() plus `timestamp` as int64 epoch milliseconds."""
+    out = conform(df)
+    if out is None or out.empty or "timestamp" not in out.columns:
+        return out
+    out = out.copy()
+    out["timestamp"] = out["timestamp"].astype("int64") // 1_000_000
+    return out
+
+def from_storage(df: pd.DataFrame) -> pd.DataFrame:
+    """Inverse of to_storage(); also accepts legacy files with datetime or ISO timestamps."""
+    if df is None or df.empty:
+        return df
+    out = df.copy()
+    if "timestamp" in out.columns:
+        out["timestamp"] = _ts_from_any(out["timestamp"])
+        out = out.dropna(subset=["timestamp"])
+    return conform(out)
+
+def _ts_from_any(s: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(s):
+        v = pd.to_numeric(s, errors="coerce")
+        unit = "ms" if v.dropna().abs().max() >= 1e11 else "s"
+        return pd.to_datetime(v, unit=unit, utc=True, errors="coerce")
+    return pd.to_datetime(s, utc=True, errors="coerce")
+
+# ---------- memory report ----------
+def frame_bytes(df: pd.DataFrame) -> int:
+    return 0 if df is None else int(df.memory_usage(index=True, deep=True).sum())
+
+def float64_baseline_bytes(df: pd.DataFrame, dropped_cols: int = 0) -> int:
+    """What the same frame costs with every column at 8 bytes (the pre-schema layout)."""
+    if df is None or df.empty:
+        return 0
+    return int(len(df) * 8 * (len(df.columns) + dropped_cols) + df.index.memory_usage())
+
+def memory_report(frames: Dict[str, pd.DataFrame], raw_widths: Dict[str, int] | None = None) -> dict:
+    """
+    Per-frame and total bytes under SCHEMA vs. the all-float64 baseline.
+    `raw_widths` optionally gives the column count a frame had before conform(),
+    so dropped vendor columns count towards the savings.
+    """
+    rows = []
+    for key, df in frames.items():
+        if df is None or df.empty: continue
+        dropped = max(0, (raw_widths or {}).get(key, len(df.columns)) - len(df.columns))
+        now_b  = frame_bytes(df)
+        base_b = float64_baseline_bytes(df, dropped)
+        rows.append({"key": key, "rows": int(len(df)), "bytes": now_b,
+                     "baseline_bytes": base_b, "saved_bytes": base_b - now_b})
+    total_now  = sum(r["bytes"] for r in rows)
+    total_base = sum(r["baseline_bytes"] for r in rows)
+    return {
+        "frames": rows,
+        "total_bytes": total_now,
+        "total_baseline_bytes": total_base,
+        "total_saved_bytes": total_base - total_now,
+        "saved_pct": round(100.0 * (total_base - total_now) / total_base, 1) if total_base else None,
+    }
@@ -0,0 +1,107 @@
+# frame_summary.py — small per-symbol summary (ATH, rollup anchors, last bar) kept next to cached frames
+from __future__ import annotations
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+ROLLUP_WINDOWS = [("1h", 1), ("4h", 4), ("8h", 8), ("12h", 12), ("24h", 24),
+                  ("7d", 24*7), ("30d", 24*30), ("1y", 24*365)]
+_HOUR_NS = 3600 * 10**9
+
+def _f(x) -> Optional[float]:
+    try:
+        v = float(x)
+        return None if (np.isnan(v) or np.isinf(v)) else v
+    except Exception:
+        return None
+
+def _ts_ns(df: pd.DataFrame) -> np.ndarray:
+    ts = df["timestamp"]
+    if not isinstance(ts.dtype, pd.DatetimeTZDtype):
+        ts = pd.to_datetime(ts, utc=True, errors="coerce")
+    return ts.to_numpy(dtype="datetime64[ns]").astype("int64")
+
+def _iso(ns: int) -> str:
+    return pd.Timestamp(int(ns), unit="ns", tz="UTC").isoformat()
+
+def rollup_anchors(df: pd.DataFrame, windows=ROLLUP_WINDOWS) -> Dict[str, Tuple[Optional[str], Optional[float]]]:
+    """
+    For each window, the last bar at or before (latest ts - window), found with one
+    searchsorted over the sorted timestamps. Falls back to the first bar, like
+    value_at_or_before() always did.
+    """
+    if df is None or df.empty: return {}
+    ts = _ts_ns(df)
+    close = df["close"].to_numpy(dtype="float64")
+    anchor = ts.max()
+    cutoffs = np.array([anchor - hrs * _HOUR_NS for _, hrs in windows], dtype="int64")
+    pos = np.searchsorted(ts, cutoffs, side="right") - 1
+    pos = np.where(pos < 0, 0, pos)
+    return {k: (_iso(ts[i]), _f(close[i])) for (k, _), i in zip(windows, pos)}
+
+def _perf(last: Optional[float], anchors) -> Tuple[Dict[str, Optional[float]], Dict[str, Optional[float]]]:
+    ch: Dict[str, Optional[float]] = {}
+    for k, (_, base) in anchors.items():
+        ch[k] = None if (base in (None, 0) or last in (None, 0)) else round((last/base-1)*100, 2)
+    inv = {k: (None if v is None else round(1000*(1+v/100.0), 2)) for k, v in ch.items()}
+    return ch, inv
+
+def rollups(df: pd.DataFrame) -> Tuple[Dict[str, Optional[float]], Dict[str, Optional[float]]]:
+    """Same output as server.compute_rollups: % change per window and $1000-invested value."""
+    if df is None or df.empty: return {}, {}
+    return _perf(_f(df["close"].iloc[-1]), rollup_anchors(df))
+
+def _ath(df: pd.DataFrame, ts: np.ndarray) -> Tuple[Optional[float], Optional[int]]:
+    if "high" not in df.columns: return None, None
+    hi = df["high"].to_numpy(dtype="float64")
+    if hi.size == 0 or np.isnan(hi).all(): return None, None
+    i = int(np.nanargmax(hi))
+    return float(hi[i]), int(ts[i])
+
+def build_summary(df: pd.DataFrame, prev: Optional[dict] = None) -> dict:
+    """
+    Summary record for a sorted frame. With `prev`, the ATH is carried forward and only
+    bars newer than prev's last bar are scanned, unless the frame now reaches further back.
+    """
+    if df is None or df.empty: return {}
+    ts = _ts_ns(df)
+    first_ns, last_ns = int(ts[0]), int(ts[-1])
+
+    ath, ath_ns = None, None
+    if prev and prev.get("first_ns") is not None and first_ns >= prev["first_ns"] and prev.get("ath") is not None:
+        ath, ath_ns = prev["ath"], prev.get("ath_ns")
+        start = int(np.searchsorted(ts, prev["last_ns"], side="right"))
+        if start < len(df):
+            new_ath, new_ns = _ath(df.iloc[start:], ts[start:])
+            if new_ath is not None and new_ath > ath:
+                ath, ath_ns = new_ath, new_ns
+    else:
+        ath, ath_ns = _ath(df, ts)
+
+    anchors = rollup_anchors(df)
+    last_close = _f(df["close"].iloc[-1])
+    perf, invest = _perf(last_close, anchors)
+    changed = (not prev) or prev.get("last_ns") != last_ns or prev.get("rows") != len(df)
+    return {
+        "version": (prev or {}).get("version", 0) + (1 if changed else 0),
+        "rows": int(len(df)),
+        "first_ns": first_ns,
+        "last_ns": last_ns,
+        "last_ts": _iso(last_ns),
+        "last_close": last_close,
+        "ath": ath,
+        "ath_ns": ath_ns,
+        "ath_ts": None if ath_ns is None else _iso(ath_ns),
+        "anchors": {k: {"ts": t, "close": c} for k, (t, c) in anchors.items()},
+        "perf": perf,
+        "invest": invest,
+    }
+
+def matches(summary: Optional[dict], df: pd.DataFrame) -> bool:
+    """Cheap check that `summary` describes `df` (same row count and last bar)."""
+    if not summary or df is None or df.empty: return False
+    try:
+        return summary.get("rows") == len(df) and summary.get("last_ns") == int(_ts_ns(df.tail(1))[0])
+    except Exception:
+        return False
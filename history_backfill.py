@@ -6,10 +6,12 @@
 #   luna_cache/history/daily/<coin>.csv   (ts, price, volume_usd, mcap?)
 # Safe to stop/restart — overwrites atomically.
 # ============================================================
-import os, time, json, math, csv, requests
+import os, time, json, math, csv
 from pathlib import Path
 from datetime import datetime, timezone
 
+import http_cache  # closed candles come from disk on reruns (LUNA_HTTP_CACHE=record|replay for offline runs)
+
 ROOT = Path(__file__).parent.resolve()
 DATA_DIR = ROOT / "luna_cache" / "data"
 COINS_DIR = DATA_DIR / "coins"
@@ -84,7 +86,7 @@ def cc_histohour_paged(symbol:str, needed:int=4320):  # 180d * 24h
         params = {"fsym":symbol,"tsym":"USD","limit":lim,"aggregate":1}
         if to_ts: params["toTs"]=to_ts
         if CC_KEY: params["api_key"]=CC_KEY
-        r = requests.get(CC_HISTO_HOUR, params=params, timeout=20)
+        r = http_cache.get(CC_HISTO_HOUR, params=params, timeout=20)
         r.raise_for_status()
         data = (r.json().get("Data") or {}).get("Data") or []
         if not data: break
@@ -102,7 +104,7 @@ def cc_histohour_paged(symbol:str, needed:int=4320):  # 180d * 24h
         if not batch: break
         rows = batch + rows
         to_ts = int(data[0]["time"]) - 3600  # step earlier
-        time.sleep(0.12)  # respect rate limits
+        if not http_cache.from_cache(r): time.sleep(0.12)  # respect rate limits
     return rows
 
 def cc_histoday_paged(symbol:str, days:int=5000):
@@ -112,7 +114,7 @@ def cc_histoday_paged(symbol:str, days:int=5000):
         params = {"fsym":symbol,"tsym":"USD","limit":lim,"aggregate":1}
         if to_ts: params["toTs"]=to_ts
         if CC_KEY: params["api_key"]=CC_KEY
-        r = requests.get(CC_HISTO_DAY, params=params, timeout=20)
+        r = http_cache.get(CC_HISTO_DAY, params=params, timeout=20)
         r.raise_for_status()
         data = (r.json().get("Data") or {}).get("Data") or []
         if not data: break
@@ -129,13 +131,13 @@ def cc_histoday_paged(symbol:str, days:int=5000):
         rows = batch + rows
         to_ts = int(data[0]["time"]) - 86400
         remaining -= len(batch)
-        time.sleep(0.12)
+        if not http_cache.from_cache(r): time.sleep(0.12)
     return rows
 
 # ----- CoinGecko fallback
 def gecko_chart(coin_id:str, days:str, interval:str):
     url = GECKO_CHART.format(id=coin_id)
-    r = requests.get(url, params={"vs_currency":"usd","days":days,"interval":interval}, timeout=20)
+    r = http_cache.get(url, params={"vs_currency":"usd","days":days,"interval":interval}, timeout=20)
     if r.status_code!=200: return []
     j = r.json()
     prices = j.get("prices") or []
@@ -212,7 +214,7 @@ def main():
         done += 1
         if done % 200 == 0:
             print(f"  …{done}/{total}")
-    print(f"[History] ✅ Done at {now_utc().strftime('UTC %Y-%m-%d %H:%M')}")
+    print(f"[History] ✅ Done at {now_utc().strftime('UTC %Y-%m-%d %H:%M')} — {http_cache.summary()}")
 
 if __name__ == "__main__":
     main()
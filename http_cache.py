@@ -0,0 +1,272 @@
+# http_cache.py — on-disk, content-addressed cache of vendor GETs for the batch scripts (with record/replay)
+# ============================================================
+# Drop-in for requests.get in scripts that refetch the same vendor URLs on every run:
+#
+#   import http_cache
+#   r = http_cache.get(url, params=params, timeout=20)     # a requests.Response either way
+#
+# Entries are keyed by vendor + normalized URL + params (api keys excluded, query order
+# ignored) and point at gzip'd bodies stored by their sha256, so identical payloads are
+# kept once. How long an entry is good for comes from POLICIES (first matching pattern):
+# CryptoCompare pages that end more than a day ago are immutable, live quotes last seconds.
+#
+# LUNA_HTTP_CACHE = on      serve fresh entries, fetch + store otherwise (default)
+#                   off     plain requests.get
+#                   record  always fetch, store every 200 (even TTL-0 endpoints)
+#                   replay  never touch the network: serve any stored entry, raise ReplayMiss if none
+# Store: LUNA_HTTP_CACHE_DIR, default <data dir>/http — the data dir is LUNA_CACHE_DIR or ./luna_cache/data,
+# as in server.py
+#
+# In "on" mode the store is swept at most every SWEEP_EVERY seconds (on the first store of a
+# process, in the background): entries more than LUNA_HTTP_CACHE_KEEP_SEC past their TTL are
+# dropped, then the oldest entries until the bodies fit LUNA_HTTP_CACHE_MAX_MB, then bodies no
+# entry points at. Record/replay stores are fixtures and are never swept.
+# ============================================================
+from __future__ import annotations
+import gzip, hashlib, json, os, re, threading, time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from write_behind import atomic_path
+
+MODE = (os.getenv("LUNA_HTTP_CACHE") or "on").strip().lower()
+CACHE_DIR = Path(os.getenv("LUNA_HTTP_CACHE_DIR") or
+                 Path(os.getenv("LUNA_CACHE_DIR") or Path(__file__).resolve().parent / "luna_cache" / "data") / "http")
+IMMUTABLE = float("inf")
+DAY = 86400
+MAX_BYTES = int(float(os.getenv("LUNA_HTTP_CACHE_MAX_MB", "1024")) * 1024 * 1024)
+KEEP_SEC = float(os.getenv("LUNA_HTTP_CACHE_KEEP_SEC", "0"))  # "on" mode never serves an expired entry
+SWEEP_EVERY = 6 * 3600
+
+# query params that authenticate rather than select data; never part of the key
+_SECRET_PARAMS = {"api_key", "apikey", "x_cg_demo_api_key", "x_cg_pro_api_key", "key", "token"}
+_KEEP_HEADERS = ("Content-Type", "Content-Encoding", "ETag", "Last-Modified", "Date")
+
+class ReplayMiss(requests.ConnectionError):
+    """Replay mode and nothing recorded for this request."""
+
+def _cc_page(q: Dict[str, str], live: float) -> float:
+    # a page that ends (toTs) more than a day ago only holds closed candles
+    try:
+        if "toTs" in q and float(q["toTs"]) < time.time() - DAY:
+            return IMMUTABLE
+    except ValueError:
+        pass
+    return live
+
+# (vendor, path regex, ttl seconds or fn(query) -> ttl); first match wins, no match = not cached
+Policy = Tuple[str, str, Any]
+POLICIES: List[Policy] = [
+    ("cc", r"/data/v2/histoday|/data/histoday", lambda q: _cc_page(q, 3600)),
+    ("cc", r"/data/v2/histohour|/data/histohour", lambda q: _cc_page(q, 300)),
+    ("cc", r"/data/v2/histominute", lambda q: _cc_page(q, 30)),
+    ("cc", r"/data/price", 15),
+    ("cg", r"/coins/list", DAY),
+    ("cg", r"/coins/[^/]+/market_chart", lambda q: 6 * 3600 if q.get("days") == "max" else 900),
+    ("cg", r"/simple/price", 15),
+    ("cg", r"/search", DAY),
+    ("cg", r"/coins/[^/]+$", DAY),
+    ("ds", r"/latest/dex/", 60),
+]
+_VENDOR_HOSTS = {"cryptocompare.com": "cc", "coingecko.com": "cg", "dexscreener": "ds"}
+
+_stats = {"hit": 0, "miss": 0, "stale": 0, "stored": 0, "bypass": 0, "replay_miss": 0, "pruned": 0}
+_lock = threading.Lock()
+_swept_pid: Optional[int] = None
+
+def _count(k: str) -> None:
+    with _lock:
+        _stats[k] += 1
+
+def stats() -> Dict[str, int]:
+    with _lock:
+        return dict(_stats)
+
+def vendor_of(url: str) -> str:
+    host = urlsplit(url).netloc.lower()
+    return next((v for needle, v in _VENDOR_HOSTS.items() if needle in host), host or "other")
+
+def normalize(url: str, params: Optional[Mapping[str, Any]] = None) -> Tuple[str, Dict[str, str]]:
+    """Canonical URL (lower-case host, sorted query, secrets dropped) and its query as a dict."""
+    p = urlsplit(url)
+    q = {k: v for k, v in parse_qsl(p.query, keep_blank_values=True)}
+    for k, v in (params or {}).items():
+        if v is not None:
+            q[k] = str(v)
+    q = {k: v for k, v in q.items() if k.lower() not in _SECRET_PARAMS}
+    path = p.path.rstrip("/") or "/"
+    return urlunsplit((p.scheme.lower(), p.netloc.lower(), path, urlencode(sorted(q.items())), "")), q
+
+def ttl_for(vendor: str, url: str, query: Mapping[str, str]) -> float:
+    path = urlsplit(url).path.rstrip("/")
+    for v, pat, ttl in POLICIES:
+        if v == vendor and re.search(pat, path):
+            return ttl(query) if callable(ttl) else float(ttl)
+    return 0.0
+
+def _key(vendor: str, norm: str) -> str:
+    return hashlib.sha256(f"{vendor} GET {norm}".encode("utf-8")).hexdigest()
+
+def _entry_path(key: str) -> Path:
+    return CACHE_DIR / "entries" / key[:2] / f"{key}.json"
+
+def _blob_path(digest: str) -> Path:
+    return CACHE_DIR / "blobs" / digest[:2] / f"{digest}.gz"
+
+def _cacheable(vendor: str, r: requests.Response) -> bool:
+    if r.status_code != 200 or not r.content:
+        return False
+    if vendor == "cc" and b'"Response":"Error"' in r.content[:400]:  # CC reports errors with HTTP 200
+        return False
+    return True
+
+def _store(key: str, vendor: str, norm: str, r: requests.Response) -> None:
+    body = r.content
+    digest = hashlib.sha256(body).hexdigest()
+    blob = _blob_path(digest)
+    if not blob.exists():
+        with atomic_path(blob) as tmp:
+            tmp.write_bytes(gzip.compress(body, 6, mtime=0))
+    meta = {"vendor": vendor, "url": norm, "status": r.status_code, "fetched_at": time.time(),
+            "encoding": r.encoding, "body": digest, "size": len(body),
+            "headers": {h: r.headers[h] for h in _KEEP_HEADERS if h in r.headers and h != "Content-Encoding"}}
+    with atomic_path(_entry_path(key)) as tmp:
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+    _count("stored")
+    _maybe_sweep()
+
+def _maybe_sweep() -> None:
+    global _swept_pid
+    if MODE != "on" or _swept_pid == os.getpid():
+        return
+    with _lock:
+        if _swept_pid == os.getpid(): return
+        _swept_pid = os.getpid()
+    marker = CACHE_DIR / ".swept"
+    try:
+        if time.time() - marker.stat().st_mtime < SWEEP_EVERY:
+            return
+    except OSError:
+        pass
+    threading.Thread(target=sweep, name="http-cache-sweep", daemon=True).start()
+
+def sweep(max_bytes: int = MAX_BYTES, keep_sec: float = KEEP_SEC) -> Dict[str, int]:
+    """Prune the store (see the header); safe to run while other processes read and write it."""
+    now = time.time()
+    marker = CACHE_DIR / ".swept"
+    try:
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        marker.touch()
+    except OSError:
+        pass
+    entries: List[Tuple[float, Path, str]] = []  # (fetched_at, path, body digest) of kept entries
+    dropped = 0
+    for path in (CACHE_DIR / "entries").glob("*/*.json"):
+        try:
+            meta = json.loads(path.read_text(encoding="utf-8"))
+            url, fetched = meta["url"], float(meta["fetched_at"])
+            life = ttl_for(meta.get("vendor", ""), url, dict(parse_qsl(urlsplit(url).query, keep_blank_values=True)))
+        except (OSError, ValueError, KeyError, TypeError):
+            life, fetched, meta = 0.0, 0.0, {}
+        if fetched + life + keep_sec < now:
+            dropped += _unlink(path)
+        else:
+            entries.append((fetched, path, meta.get("body", "")))
+
+    blobs: Dict[str, Tuple[Path, int, float]] = {}
+    for path in (CACHE_DIR / "blobs").glob("*/*.gz"):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        blobs[path.name[:-3]] = (path, st.st_size, st.st_mtime)
+    entries.sort()  # oldest first
+    refs: Dict[str, int] = {}
+    for _, _, d in entries:
+        refs[d] = refs.get(d, 0) + 1
+    total = sum(blobs[d][1] for d in refs if d in blobs)
+    kept = len(entries)
+    for _, path, digest in entries:
+        if total <= max_bytes: break
+        if not _unlink(path): continue
+        dropped, kept = dropped + 1, kept - 1
+        refs[digest] -= 1
+        if refs[digest] == 0:  # bodies are shared; one only frees space with its last entry
+            del refs[digest]
+            total -= blobs[digest][1] if digest in blobs else 0
+    freed = 0
+    for digest, (path, size, mtime) in blobs.items():
+        # a body written moments ago may belong to an entry another process is about to store
+        if digest not in refs and now - mtime > 3600:
+            freed += size * _unlink(path)
+    with _lock:
+        _stats["pruned"] += dropped
+    return {"entries_dropped": dropped, "entries_kept": kept, "bytes_freed": freed}
+
+def _unlink(path: Path) -> int:
+    try:
+        path.unlink()
+        return 1
+    except OSError:
+        return 0
+
+def _load(key: str) -> Optional[Tuple[dict, bytes]]:
+    try:
+        meta = json.loads(_entry_path(key).read_text(encoding="utf-8"))
+        return meta, gzip.decompress(_blob_path(meta["body"]).read_bytes())
+    except (OSError, ValueError, KeyError, EOFError):
+        return None
+
+def _response(meta: dict, body: bytes) -> requests.Response:
+    r = requests.Response()
+    r.status_code, r._content, r.url = meta["status"], body, meta["url"]
+    r.headers = CaseInsensitiveDict(meta.get("headers") or {})
+    r.headers["X-Luna-Cache"] = "hit"
+    r.encoding = meta.get("encoding") or "utf-8"
+    r.reason = "OK"
+    return r
+
+def get(url: str, params: Optional[Mapping[str, Any]] = None, *, vendor: Optional[str] = None,
+        ttl: Optional[float] = None, fetch: Callable[..., requests.Response] = requests.get,
+        **kw) -> requests.Response:
+    """requests.get through the cache; `ttl` overrides the policy (0 = don't cache)."""
+    if MODE == "off":
+        return fetch(url, params=params, **kw)
+    vendor = vendor or vendor_of(url)
+    norm, query = normalize(url, params)
+    life = ttl_for(vendor, url, query) if ttl is None else ttl
+    key = _key(vendor, norm)
+    if MODE == "replay":
+        hit = _load(key)
+        if hit is None:
+            _count("replay_miss")
+            raise ReplayMiss(f"http_cache replay: nothing recorded for {norm}")
+        _count("hit")
+        return _response(*hit)
+    if MODE != "record" and life > 0:
+        hit = _load(key)
+        if hit is not None and time.time() - hit[0]["fetched_at"] < life:
+            _count("hit")
+            return _response(*hit)
+        _count("stale" if hit is not None else "miss")
+    elif MODE != "record":
+        _count("bypass")
+    r = fetch(url, params=params, **kw)
+    if (MODE == "record" or life > 0) and _cacheable(vendor, r):
+        try:
+            _store(key, vendor, norm, r)
+        except OSError:
+            pass  # a full or read-only disk just means no caching
+    return r
+
+def from_cache(r: requests.Response) -> bool:
+    """True if `r` was served from disk (callers skip their politeness sleeps)."""
+    return r.headers.get("X-Luna-Cache") == "hit"
+
+def summary() -> str:
+    s = stats()
+    return f"http_cache[{MODE}] " + " ".join(f"{k}={v}" for k, v in s.items() if v)
@@ -0,0 +1,349 @@
+# indicators.py — shared NumPy indicator kernels + a column registry with dependencies
+# ============================================================
+# Kernels take/return float64 ndarrays and reproduce the pandas expressions they
+# replace (ewm(adjust=False), rolling(n, min_periods).mean()/std(), ...).
+#
+# The registry names the columns server.py charts (frame_schema.INDICATOR_COLS) plus
+# private intermediates ("_ema12", "_tr", ...). compute(df, cols) resolves only what the
+# requested columns depend on, and memoizes every resolved column per frame version,
+# so a second caller asking for "macd_hist" after "macd_line" only pays for the signal EMA.
+# ============================================================
+from __future__ import annotations
+import hashlib
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ttl_cache import TTLCache
+
+_BLOCK = 1 << 16          # rows per cumsum block in rolling sums (bounds float error)
+
+# ---------- kernels ----------
+def _f64(x) -> np.ndarray:
+    if isinstance(x, pd.Series):
+        x = pd.to_numeric(x, errors="coerce")
+    return np.asarray(x, dtype="float64")
+
+def diff(x) -> np.ndarray:
+    x = _f64(x)
+    out = np.empty_like(x)
+    if len(x):
+        out[0] = np.nan
+        np.subtract(x[1:], x[:-1], out=out[1:])
+    return out
+
+def shift1(x) -> np.ndarray:
+    x = _f64(x)
+    out = np.empty_like(x)
+    if len(x):
+        out[0] = np.nan
+        out[1:] = x[:-1]
+    return out
+
+def ema(x, span: int, min_periods: int = 0) -> np.ndarray:
+    """
+    Series.ewm(span=span, adjust=False, min_periods=...).mean().
+    y[t] = a*x[t] + (1-a)*y[t-1] is evaluated in closed form per block:
+    y[s+j] = r^(j+1) * (y[s-1] + a * sum_{k<=j} x[s+k] * r^-(k+1)), with blocks short
+    enough that r^-k stays finite. Interior NaNs fall back to pandas' gap weighting.
+    """
+    x = _f64(x)
+    n = len(x)
+    out = np.full(n, np.nan)
+    fin = np.isfinite(x)
+    if not fin.any():
+        return out
+    i0 = int(fin.argmax())
+    if not fin[i0:].all():
+        return pd.Series(x).ewm(span=span, adjust=False, min_periods=min_periods).mean().to_numpy()
+    a = 2.0 / (span + 1.0)
+    lr = -np.log1p(-a)                      # -ln(1-a) > 0
+    block = max(1, int(600.0 / lr))         # r^-block <= e^600, so x * r^-k stays finite
+    w = np.exp(np.arange(1, min(block, n) + 1) * lr)
+    out[i0] = prev = x[i0]
+    s = i0 + 1
+    while s < n:
+        e = min(n, s + block)
+        ww = w[:e - s]
+        seg = np.cumsum(x[s:e] * ww)
+        seg *= a
+        seg += prev
+        seg /= ww
+        out[s:e] = seg
+        prev = seg[-1]
+        s = e
+    if min_periods > 1:
+        out[i0:i0 + min_periods - 1] = np.nan
+    return out
+
+def _window_sums(x: np.ndarray, n: int, squares: bool):
+    """
+    Per row: count of finite values in the trailing n-window, their mean and (optionally)
+    sum of squared deviations. Cumsums restart every _BLOCK rows around a local reference
+    value; windows holding one repeated value are set exactly (a flat run of zero DM must
+    give 0, not cumsum residue, or ADX's ratio of two tiny means turns it into noise).
+    """
+    N = len(x)
+    fin = np.isfinite(x)
+    cnt = np.zeros(N)
+    mean = np.full(N, np.nan)
+    m2 = np.full(N, np.nan) if squares else None
+    pad = n - 1
+    for s in range(0, N, _BLOCK):
+        e = min(N, s + _BLOCK)
+        lo = s - pad
+        seg, f = x[max(lo, 0):e], fin[max(lo, 0):e]
+        if lo < 0:                          # first block: virtual empty rows before the start
+            seg = np.concatenate((np.zeros(-lo), seg))
+            f = np.concatenate((np.zeros(-lo, dtype=bool), f))
+        if not f.any():
+            continue
+        ref = seg[f.argmax()]
+        d = np.where(f, seg - ref, 0.0)
+        c0 = np.concatenate(([0], np.cumsum(f)))
+        c1 = np.concatenate(([0.0], np.cumsum(d)))
+        k = (c0[n:] - c0[:-n]).astype("float64")
+        s1 = c1[n:] - c1[:-n]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cnt[s:e] = k
+            mean[s:e] = ref + s1 / k
+            if squares:
+                c2 = np.concatenate(([0.0], np.cumsum(d * d)))
+                m2[s:e] = np.maximum((c2[n:] - c2[:-n]) - s1 * s1 / k, 0.0)
+    if N:
+        idx = np.arange(N)
+        chg = np.ones(N, dtype=bool)
+        chg[1:] = x[1:] != x[:-1]           # NaN != NaN, so gaps break runs
+        start = np.maximum.accumulate(np.where(chg, idx, 0))
+        flat = fin & (idx - start + 1 >= np.minimum(n, idx + 1))
+        mean[flat] = x[flat]
+        if squares:
+            m2[flat] = 0.0
+    return cnt, mean, m2
+
+def rolling_mean(x, n: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """Series.rolling(n, min_periods).mean()."""
+    x = _f64(x)
+    cnt, mean, _ = _window_sums(x, n, False)
+    mp = n if min_periods is None else max(1, min_periods)
+    mean[cnt < mp] = np.nan
+    return mean
+
+def rolling_std(x, n: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """Series.rolling(n, min_periods).std() (ddof=1)."""
+    x = _f64(x)
+    cnt, _, m2 = _window_sums(x, n, True)
+    mp = n if min_periods is None else max(1, min_periods)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = np.sqrt(m2 / (cnt - 1))
+    out[(cnt < mp) | (cnt < 2)] = np.nan
+    return out
+
+def rsi(close, period: int = 14, floor: str = "raw") -> np.ndarray:
+    """
+    EMA-smoothed RSI. Zero losses are floored at 1e-9 either per bar before smoothing
+    (floor="raw", the server's variant) or on the smoothed loss (floor="smoothed", as
+    luna_engine.features and on_demand_refresh always did). They differ a lot at
+    micro-cap prices, where real per-bar moves are far below 1e-9.
+    """
+    d = diff(close)
+    up = np.where(d > 0, d, np.where(np.isnan(d), np.nan, 0.0))
+    dn = np.where(d < 0, -d, np.where(np.isnan(d), np.nan, 1e-9 if floor == "raw" else 0.0))
+    avg_dn = ema(dn, period)
+    if floor != "raw":
+        avg_dn = np.where(avg_dn == 0, 1e-9, avg_dn)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = ema(up, period) / avg_dn
+    return 100.0 - 100.0 / (1.0 + rs)
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9, min_periods: int = 0):
+    line = ema(close, fast, min_periods) - ema(close, slow, min_periods)
+    sig = ema(line, signal, min_periods)
+    return line, sig, line - sig
+
+def bollinger(close, n: int = 20, k: float = 2.0, min_periods: Optional[int] = None):
+    mid = rolling_mean(close, n, min_periods)
+    sd = rolling_std(close, n, min_periods)
+    return mid, mid + k * sd, mid - k * sd
+
+def true_range(high, low, close) -> np.ndarray:
+    h, l = _f64(high), _f64(low)
+    pc = shift1(close)
+    return np.fmax(np.fmax(h - l, np.abs(h - pc)), np.abs(l - pc))
+
+def obv(close, volume) -> np.ndarray:
+    sgn = np.sign(diff(close))
+    sgn[np.isnan(sgn)] = 0.0
+    v = _f64(volume)
+    return np.cumsum(sgn * np.where(np.isnan(v), 0.0, v))
+
+def _nan0(x: np.ndarray) -> np.ndarray:
+    return np.where(x == 0, np.nan, x)
+
+# ---------- registry ----------
+Kernel = Callable[..., np.ndarray]
+_REGISTRY: Dict[str, Tuple[Tuple[str, ...], Kernel]] = {}
+INPUTS = ("close", "high", "low", "volume")
+
+def indicator(name: str, *deps: str):
+    """Register `fn(*dep_arrays) -> ndarray` as column `name`."""
+    def deco(fn: Kernel) -> Kernel:
+        _REGISTRY[name] = (deps, fn)
+        return fn
+    return deco
+
+def dependencies(name: str) -> List[str]:
+    """Transitive dependencies of `name` in evaluation order (inputs excluded)."""
+    seen: List[str] = []
+    def walk(n: str) -> None:
+        if n in INPUTS or n in seen: return
+        for d in _REGISTRY[n][0]:
+            walk(d)
+        seen.append(n)
+    walk(name)
+    return seen[:-1]
+
+# high/low fall back to close bar by bar, as compute_indicators always did
+@indicator("_high", "high", "close")
+def _k_high(h, c): return np.where(np.isnan(h), c, h)
+
+@indicator("_low", "low", "close")
+def _k_low(l, c): return np.where(np.isnan(l), c, l)
+
+@indicator("_ema10", "close")
+def _k_ema10(c): return ema(c, 10)
+
+@indicator("_ema12", "close")
+def _k_ema12(c): return ema(c, 12)
+
+@indicator("_ema26", "close")
+def _k_ema26(c): return ema(c, 26)
+
+@indicator("_ema30", "close")
+def _k_ema30(c): return ema(c, 30)
+
+@indicator("_std20", "close")
+def _k_std20(c): return rolling_std(c, 20)
+
+@indicator("_tr", "_high", "_low", "close")
+def _k_tr(h, l, c): return true_range(h, l, c)
+
+@indicator("rsi", "close")
+def _k_rsi(c): return rsi(c, 14)
+
+@indicator("macd_line", "_ema12", "_ema26")
+def _k_macd_line(e12, e26): return e12 - e26
+
+@indicator("macd_signal", "macd_line")
+def _k_macd_signal(m): return ema(m, 9)
+
+@indicator("macd_hist", "macd_line", "macd_signal")
+def _k_macd_hist(m, s): return m - s
+
+@indicator("bb_mid", "close")
+def _k_bb_mid(c): return rolling_mean(c, 20)
+
+@indicator("bb_upper", "bb_mid", "_std20")
+def _k_bb_upper(m, sd): return m + 2 * sd
+
+@indicator("bb_lower", "bb_mid", "_std20")
+def _k_bb_lower(m, sd): return m - 2 * sd
+
+@indicator("bb_width", "bb_upper", "bb_lower", "bb_mid")
+def _k_bb_width(u, l, m):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        w = (u - l) / _nan0(m) * 100
+    return np.where(np.isnan(w), 0.0, w)
+
+@indicator("adx14", "_high", "_low", "_tr")
+def _k_adx14(h, l, tr):
+    hd, ld = diff(h), diff(l)
+    plus_dm = np.maximum(np.where(hd > ld, hd, 0.0), 0.0)
+    minus_dm = np.maximum(np.where(ld > hd, ld, 0.0), 0.0)
+    atr = _nan0(rolling_mean(tr, 14))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = 100 * (rolling_mean(plus_dm, 14) / atr)
+        m = 100 * (rolling_mean(minus_dm, 14) / atr)
+        dx = 100 * np.abs(p - m) / _nan0(p + m)
+    return rolling_mean(np.where(np.isnan(dx), 0.0, dx), 14)
+
+@indicator("obv", "close", "volume")
+def _k_obv(c, v): return obv(c, v)
+
+@indicator("atr14", "_tr")
+def _k_atr14(tr): return rolling_mean(tr, 14, min_periods=1)
+
+@indicator("alt_momentum", "_ema10", "_ema30")
+def _k_alt(e10, e30): return e10 - e30
+
+COLUMNS = ["rsi", "macd_line", "macd_signal", "macd_hist",
+           "bb_mid", "bb_upper", "bb_lower", "bb_width",
+           "adx14", "obv", "atr14", "alt_momentum"]
+
+# ---------- evaluation + memo ----------
+MEMO = TTLCache("indicators", ttl=600, max_items=2048, max_bytes=128 * 1024 * 1024,
+                sizeof=lambda a: int(getattr(a, "nbytes", 0)))
+MEMO_MAX_ROWS = 250_000   # bigger frames (backfills, benchmarks) are computed but not kept
+
+def frame_key(df: pd.DataFrame, arrays: Optional[Dict[str, Optional[np.ndarray]]] = None) -> Hashable:
+    """
+    Content fingerprint: a digest of the timestamps and of every input column's bytes,
+    so any changed bar changes the key (it also serves as the routes' strong ETag).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    if "timestamp" in df.columns and len(df):
+        ts = df["timestamp"]
+        if ts.dtype.kind == "M" or isinstance(ts.dtype, pd.DatetimeTZDtype):
+            h.update(np.ascontiguousarray(ts.values.view("i8")).data)
+        else:
+            h.update(pd.util.hash_pandas_object(ts, index=False).to_numpy().data)
+    for c in INPUTS:
+        v = (arrays or {}).get(c) if arrays is not None else (_f64(df[c]) if c in df.columns else None)
+        if v is not None and len(v):
+            h.update(c.encode())
+            h.update(np.ascontiguousarray(v, dtype="float64").data)
+    return (len(df), h.hexdigest())
+
+def columns(df: pd.DataFrame, cols: Optional[Iterable[str]] = None,
+            key: Optional[Hashable] = None) -> Dict[str, np.ndarray]:
+    """
+    Arrays for `cols` (default COLUMNS), computing only their dependency closure.
+    A column whose inputs are missing comes back all-NaN.
+    """
+    want = list(cols) if cols is not None else COLUMNS
+    n = len(df)
+    vals: Dict[str, Optional[np.ndarray]] = {c: (_f64(df[c]) if c in df.columns else None) for c in INPUTS}
+    memo = n <= MEMO_MAX_ROWS
+    key = (frame_key(df, vals) if key is None else key) if memo else None
+
+    def get(name: str) -> Optional[np.ndarray]:
+        if name in vals:
+            return vals[name]
+        hit = MEMO.get((key, name)) if memo else None
+        if hit is not None:
+            vals[name] = hit
+            return hit
+        deps, fn = _REGISTRY[name]
+        args = [get(d) for d in deps]
+        out = None if any(a is None for a in args) else fn(*args)
+        if out is not None and memo:
+            out.setflags(write=False)
+            MEMO.put((key, name), out)
+        vals[name] = out
+        return out
+
+    res: Dict[str, np.ndarray] = {}
+    for c in want:
+        v = get(c)
+        res[c] = v if v is not None else np.full(n, np.nan)
+    return res
+
+def compute(df: pd.DataFrame, cols: Optional[Iterable[str]] = None,
+            key: Optional[Hashable] = None) -> pd.DataFrame:
+    """Copy of `df` with the requested indicator columns set (default: all of COLUMNS)."""
+    if df.empty: return df.copy()
+    out = df.copy()
+    for c, v in columns(df, cols, key).items():
+        out[c] = v.copy() if not v.flags.writeable else v   # memoized arrays are shared
+    return out
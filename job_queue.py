@@ -0,0 +1,107 @@
+# job_queue.py — small in-process job queue with de-duplication of identical in-flight jobs
+from __future__ import annotations
+import threading, time, uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import telemetry
+from ttl_cache import TTLCache
+
+class Job:
+    __slots__ = ("id", "key", "state", "created", "started", "finished", "result", "error", "_done")
+
+    def __init__(self, key: Hashable):
+        self.id = uuid.uuid4().hex[:16]
+        self.key = key
+        self.state = "queued"          # queued -> running -> done | error
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "id": self.id,
+            "state": self.state,
+            "queued_sec": round((self.started or now) - self.created, 3),
+            "run_sec": None if self.started is None else round((self.finished or now) - self.started, 3),
+            "error": self.error,
+        }
+
+class JobQueue:
+    """
+    Runs jobs on its own small thread pool, so slow work (vendor chains) never holds a
+    request thread. submit() with the key of a queued/running job returns that job
+    instead of starting another. Finished jobs stay visible by id for `keep_sec`.
+    """
+    def __init__(self, name: str, workers: int = 2, keep_sec: float = 600, max_jobs: int = 5000):
+        self.name = name
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=f"{name}-job")
+        self._jobs = TTLCache(f"jobs_{name}", ttl=keep_sec, max_items=max_jobs)
+        self._inflight: Dict[Hashable, Job] = {}
+        self._lock = threading.Lock()
+        self.submitted = self.deduped = self.failed = 0
+
+    def submit(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        with self._lock:
+            job = self._inflight.get(key)
+            if job is not None:
+                self.deduped += 1
+                telemetry.inc("luna_jobs_deduped_total", queue=self.name)
+                return job
+            job = Job(key)
+            self._inflight[key] = job
+            self._jobs.put(job.id, job)
+            self.submitted += 1
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def find(self, key: Hashable) -> Optional[Job]:
+        with self._lock:
+            return self._inflight.get(key)
+
+    def _run(self, job: Job, fn, args, kwargs) -> None:
+        job.state, job.started = "running", time.time()
+        telemetry.observe("luna_job_wait_seconds", job.started - job.created, queue=self.name)
+        try:
+            job.result = fn(*args, **kwargs)
+            job.state = "done"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.state = "error"
+            with self._lock:
+                self.failed += 1
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                if self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+            job._done.set()
+            telemetry.observe("luna_job_seconds", job.finished - job.started, queue=self.name)
+            telemetry.inc("luna_jobs_total", queue=self.name, state=job.state)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            running = sum(1 for j in self._inflight.values() if j.state == "running")
+            return {
+                "name": self.name,
+                "inflight": len(self._inflight),
+                "running": running,
+                "queued": len(self._inflight) - running,
+                "submitted": self.submitted,
+                "deduped": self.deduped,
+                "failed": self.failed,
+            }
@@ -0,0 +1,267 @@
+# key_quota.py — API-key call budgets shared by every process on the box (SQLite-backed)
+# ============================================================
+# The web server and the batch scripts draw CryptoCompare / CoinGecko keys from the same
+# store, so an overnight backfill can't spend the quota interactive requests need.
+#
+#   pool = QuotaPool("cc", keys, priority="batch")
+#   key = pool.pick(wait=60)          # None if every key is out of budget; ANON_KEY ("") = call keyless
+#   ... request ...
+#   pool.report(key, r.status_code, message, r.headers, payload=js)
+#
+# Budgets are per key and per window (minute / hour / month). Batch callers may only use
+# (1 - LUNA_QUOTA_RESERVE) of each budget; the rest is held for interactive traffic.
+# Limits start from DEFAULT_LIMITS (override: LUNA_QUOTA_CC="minute=250,hour=2500,month=100000").
+# A vendor's payload limits (CC's RateLimit block) replace them for good; a 429 lowers a window's
+# limit only when our own count had reached at least half of it, and only for LUNA_QUOTA_LEARN_TTL
+# seconds (default a day) — a stray 429 just cools the key down until the window resets.
+# The store (and its file) is opened on first use, never at import.
+# ============================================================
+from __future__ import annotations
+import hashlib, os, re, sqlite3, threading, time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+DB_PATH = Path(os.getenv("LUNA_QUOTA_DB") or  # default: the data dir's state/, next to server.py's fetch log
+               Path(os.getenv("LUNA_CACHE_DIR") or Path(__file__).resolve().parent / "luna_cache" / "data") / "state" / "quota.sqlite")
+RESERVE = float(os.getenv("LUNA_QUOTA_RESERVE", "0.3"))
+LEARN_TTL = float(os.getenv("LUNA_QUOTA_LEARN_TTL", str(86400)))  # life of a limit learned from a 429
+ANON_KEY = ""  # pick() result for a keyless pool with budget left (None still means "out of budget")
+
+WINDOWS = {"minute": 60, "hour": 3600, "month": None}
+DEFAULT_LIMITS: Dict[str, Dict[str, int]] = {
+    "cc": {"minute": 250, "hour": 2500, "month": 100_000},
+    "cg": {"minute": 30, "hour": 1500, "month": 10_000},
+}
+_RATE_MSG = re.compile(r"rate.?limit|over your .*limit|too many requests", re.I)
+
+def _env_limits(vendor: str) -> Dict[str, int]:
+    out = dict(DEFAULT_LIMITS.get(vendor, {}))
+    for part in (os.getenv(f"LUNA_QUOTA_{vendor.upper()}") or "").split(","):
+        k, _, v = part.partition("=")
+        if k.strip() in WINDOWS and v.strip().isdigit():
+            out[k.strip()] = int(v)
+    return out
+
+def key_id(key: Optional[str]) -> str:
+    """Keys are never stored; rows are keyed by a short hash ('anon' for keyless calls)."""
+    return hashlib.sha1(key.encode()).hexdigest()[:12] if key else "anon"
+
+def _bucket(window: str, now: float) -> int:
+    if window == "month":
+        d = datetime.fromtimestamp(now, tz=timezone.utc)
+        return d.year * 100 + d.month
+    return int(now // WINDOWS[window])
+
+def _window_end(window: str, now: float) -> float:
+    if window == "month":
+        d = datetime.fromtimestamp(now, tz=timezone.utc)
+        y, m = (d.year + 1, 1) if d.month == 12 else (d.year, d.month + 1)
+        return datetime(y, m, 1, tzinfo=timezone.utc).timestamp()
+    w = WINDOWS[window]
+    return (now // w + 1) * w
+
+class QuotaStore:
+    """Counters, learned limits and cool-downs in one SQLite file (WAL, so readers never block)."""
+    def __init__(self, path: Path = DB_PATH):
+        self.path = Path(path)
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db().executescript("""
+            CREATE TABLE IF NOT EXISTS usage (vendor TEXT, key_id TEXT, window TEXT, bucket INTEGER,
+                calls INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (vendor, key_id, window, bucket));
+            CREATE TABLE IF NOT EXISTS limits (vendor TEXT, key_id TEXT, window TEXT, max_calls INTEGER,
+                source TEXT, learned_at REAL, PRIMARY KEY (vendor, key_id, window));
+            CREATE TABLE IF NOT EXISTS cooldown (vendor TEXT, key_id TEXT, until REAL, reason TEXT,
+                PRIMARY KEY (vendor, key_id));
+        """)
+        self.prune()
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    class _Tx:
+        def __init__(self, db): self.db = db
+        def __enter__(self):
+            self.db.execute("BEGIN IMMEDIATE")  # one writer at a time across processes
+            return self.db
+        def __exit__(self, et, ev, tb):
+            self.db.execute("ROLLBACK" if et else "COMMIT")
+
+    def _tx(self) -> "_Tx":
+        return self._Tx(self._db())
+
+    def acquire(self, vendor: str, kids: List[str], defaults: Mapping[str, int], share: float) -> Optional[str]:
+        """Charge one call to the key with the most headroom within `share` of its budgets."""
+        now = time.time()
+        with self._tx() as db:
+            best, best_room = None, -1.0
+            for kid in kids:
+                row = db.execute("SELECT until FROM cooldown WHERE vendor=? AND key_id=?", (vendor, kid)).fetchone()
+                if row and row[0] > now:
+                    continue
+                learned = self._learned(db, vendor, kid, now)
+                room = float("inf")
+                for w in WINDOWS:
+                    cap = learned.get(w, defaults.get(w))
+                    if cap is None: continue
+                    used = db.execute("SELECT calls FROM usage WHERE vendor=? AND key_id=? AND window=? AND bucket=?",
+                                      (vendor, kid, w, _bucket(w, now))).fetchone()
+                    room = min(room, cap * share - (used[0] if used else 0))
+                if room >= 1 and room > best_room:
+                    best, best_room = kid, room
+            if best is None:
+                return None
+            for w in WINDOWS:
+                db.execute("INSERT INTO usage (vendor, key_id, window, bucket, calls) VALUES (?,?,?,?,1) "
+                           "ON CONFLICT(vendor, key_id, window, bucket) DO UPDATE SET calls = calls + 1",
+                           (vendor, best, w, _bucket(w, now)))
+            return best
+
+    @staticmethod
+    def _learned(db: sqlite3.Connection, vendor: str, kid: str, now: float) -> Dict[str, int]:
+        """Learned limits by window; 429-derived ones only while younger than LEARN_TTL."""
+        return dict(db.execute("SELECT window, max_calls FROM limits WHERE vendor=? AND key_id=? "
+                               "AND (source != '429' OR learned_at > ?)", (vendor, kid, now - LEARN_TTL)).fetchall())
+
+    def learn(self, vendor: str, kid: str, window: str, max_calls: int, source: str) -> None:
+        with self._tx() as db:
+            db.execute("INSERT OR REPLACE INTO limits VALUES (?,?,?,?,?,?)",
+                       (vendor, kid, window, int(max_calls), source, time.time()))
+
+    def cool_down(self, vendor: str, kid: str, until: float, reason: str) -> None:
+        with self._tx() as db:
+            db.execute("INSERT INTO cooldown VALUES (?,?,?,?) ON CONFLICT(vendor, key_id) "
+                       "DO UPDATE SET until = max(until, excluded.until), reason = excluded.reason",
+                       (vendor, kid, until, reason))
+
+    def used(self, vendor: str, kid: str, window: str) -> int:
+        row = self._db().execute("SELECT calls FROM usage WHERE vendor=? AND key_id=? AND window=? AND bucket=?",
+                                 (vendor, kid, window, _bucket(window, time.time()))).fetchone()
+        return row[0] if row else 0
+
+    def snapshot(self, vendor: Optional[str] = None) -> List[dict]:
+        now = time.time()
+        db = self._db()
+        kids = db.execute("SELECT DISTINCT vendor, key_id FROM usage" + (" WHERE vendor=?" if vendor else ""),
+                          (vendor,) if vendor else ()).fetchall()
+        out = []
+        for v, kid in kids:
+            learned = self._learned(db, v, kid, now)
+            cd = db.execute("SELECT until, reason FROM cooldown WHERE vendor=? AND key_id=?", (v, kid)).fetchone()
+            out.append({
+                "vendor": v, "key": kid,
+                "used": {w: self.used(v, kid, w) for w in WINDOWS},
+                "limits": {w: learned.get(w, _env_limits(v).get(w)) for w in WINDOWS},
+                "learned": sorted(learned),
+                "cooldown_sec": round(cd[0] - now, 1) if cd and cd[0] > now else 0,
+                "cooldown_reason": cd[1] if cd and cd[0] > now else None,
+            })
+        return out
+
+    def prune(self, keep_sec: float = 3 * 86400) -> None:
+        now = time.time()
+        with self._tx() as db:
+            for w, sec in WINDOWS.items():
+                if sec: db.execute("DELETE FROM usage WHERE window=? AND bucket < ?", (w, _bucket(w, now - keep_sec)))
+
+_STORES: Dict[str, QuotaStore] = {}
+_STORES_LOCK = threading.Lock()
+
+def store(path: Path = DB_PATH) -> QuotaStore:
+    with _STORES_LOCK:
+        s = _STORES.get(str(path))
+        if s is None:
+            s = _STORES[str(path)] = QuotaStore(path)
+        return s
+
+class QuotaPool:
+    """A vendor's keys as seen by one caller class ("interactive" or "batch")."""
+    def __init__(self, vendor: str, keys: Iterable[str], priority: str = "interactive",
+                 store_: Optional[QuotaStore] = None):
+        self.vendor = vendor
+        self.keys = [k for k in keys if k] or [""]  # keyless still gets counted (as 'anon')
+        self._by_id = {key_id(k): k for k in self.keys}
+        self.priority = priority
+        self.share = 1.0 if priority == "interactive" else max(0.0, 1.0 - RESERVE)
+        self.limits = _env_limits(vendor)
+        self._store = store_
+
+    @property
+    def store(self) -> QuotaStore:
+        if self._store is None:
+            self._store = store()  # first pick / report, not import: creates the DB file
+        return self._store
+
+    def pick(self, wait: float = 0.0) -> Optional[str]:
+        """
+        A key with budget left (charged one call), ANON_KEY for a keyless pool with budget left,
+        or None when out of budget; with `wait`, poll until one frees up.
+        """
+        deadline = time.time() + wait
+        while True:
+            try:
+                kid = self.store.acquire(self.vendor, list(self._by_id), self.limits, self.share)
+            except sqlite3.Error:
+                return self.keys[0]  # a broken store must not take the app down
+            if kid is not None:
+                return self._by_id[kid]
+            if time.time() >= deadline:
+                return None
+            time.sleep(min(5.0, max(0.2, deadline - time.time())))
+
+    def report(self, key: Optional[str], status: int, message: str = "",
+               headers: Optional[Mapping[str, str]] = None, payload: Any = None) -> bool:
+        """
+        Learn from a response: `message` is the vendor's error text (payload Message / HTTP body
+        on failure), `payload` the decoded JSON if any. Returns True on a rate-limit signal,
+        after cooling the key down until its window resets (or Retry-After).
+        """
+        kid = key_id(key)
+        limited = status == 429 or bool(message and _RATE_MSG.search(message[:2000]))
+        try:
+            self._learn_from_payload(kid, payload)
+            if not limited:
+                return False
+            now = time.time()
+            retry = _retry_after(headers)
+            used = {w: self.store.used(self.vendor, kid, w) for w in WINDOWS}
+            # the window that ran out: the smallest one we've spent at least half of by our own count.
+            # None of them: our counts don't explain the 429 (shared IP, vendor hiccup), so learn nothing.
+            window = next((w for w in WINDOWS if w in self.limits and used[w] >= self.limits[w] * 0.5), None)
+            if status == 429 and window is not None:
+                self.store.learn(self.vendor, kid, window, used[window] - 1, "429")  # expires after LEARN_TTL
+            window = window or "minute"
+            until = now + retry if retry is not None else _window_end(window, now)
+            self.store.cool_down(self.vendor, kid, until, f"{status} {window}")
+        except sqlite3.Error:
+            pass
+        return limited
+
+    def _learn_from_payload(self, kid: str, payload: Any) -> None:
+        # CryptoCompare: {"RateLimit": {"calls_made": {...}, "max_calls": {"minute": .., "hour": .., "month": ..}}}
+        rl = payload.get("RateLimit") if isinstance(payload, dict) else None
+        mx = rl.get("max_calls") if isinstance(rl, dict) else None
+        if not isinstance(mx, dict): return
+        for w in WINDOWS:
+            v = mx.get(w)
+            if isinstance(v, (int, float)) and v > 0:
+                self.store.learn(self.vendor, kid, w, int(v), "payload")
+
+    def snapshot(self) -> List[dict]:
+        ids = set(self._by_id)
+        return [r for r in self.store.snapshot(self.vendor) if r["key"] in ids]
+
+def _retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    if not headers: return None
+    v = headers.get("Retry-After") or headers.get("retry-after")
+    try:
+        return float(v) if v is not None else None
+    except ValueError:
+        return None
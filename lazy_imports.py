@@ -0,0 +1,134 @@
+# lazy_imports.py — defer heavy imports to first use, and report where startup time goes
+from __future__ import annotations
+import importlib, json, re, subprocess, sys, threading, time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+_LOCK = threading.Lock()
+LOAD_TIMES: Dict[str, float] = {}    # module -> seconds spent in its first (deferred) import
+
+def _load(name: str):
+    mod = sys.modules.get(name)
+    if mod is not None:
+        return mod
+    with _LOCK:
+        mod = sys.modules.get(name)
+        if mod is None:
+            t0 = time.perf_counter()
+            mod = importlib.import_module(name)
+            LOAD_TIMES[name] = time.perf_counter() - t0
+    return mod
+
+class LazyModule:
+    """Stand-in for `import name as x`; the real import happens on first attribute access."""
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(_load(self._name), attr)
+
+    @property
+    def loaded(self) -> bool:
+        return self._name in sys.modules
+
+    def __repr__(self) -> str:
+        return f"<lazy module {self._name!r}{' (loaded)' if self.loaded else ''}>"
+
+class LazyAttr:
+    """Stand-in for `from name import attr`, for callables; resolved on first call."""
+    def __init__(self, name: str, attr: str):
+        self._name, self._attr = name, attr
+        self._obj = None
+
+    def __call__(self, *a, **kw):
+        if self._obj is None:
+            self._obj = getattr(_load(self._name), self._attr)
+        return self._obj(*a, **kw)
+
+    def __repr__(self) -> str:
+        return f"<lazy {self._name}.{self._attr}>"
+
+def lazy(name: str) -> LazyModule:
+    return LazyModule(name)
+
+def lazy_attr(name: str, attr: str) -> LazyAttr:
+    return LazyAttr(name, attr)
+
+def warm(names: Iterable[str], extra=None) -> Dict[str, float]:
+    """Import `names` now (then run `extra()`, e.g. a first figure build); returns per-module seconds."""
+    out: Dict[str, float] = {}
+    for n in names:
+        t0 = time.perf_counter()
+        try:
+            _load(n)
+        except Exception:
+            continue
+        out[n] = time.perf_counter() - t0
+    if extra is not None:
+        t0 = time.perf_counter()
+        try:
+            extra()
+        except Exception:
+            pass
+        out["<first use>"] = time.perf_counter() - t0
+    return out
+
+def warm_in_background(names: Iterable[str], extra=None) -> threading.Thread:
+    """Start warm() on a daemon thread. Call it after fork (i.e. in a worker), never at import under --preload."""
+    names = list(names)
+    t = threading.Thread(target=warm, args=(names, extra), name="lazy-warmup", daemon=True)
+    t.start()
+    return t
+
+# ---------- startup report ----------
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+def importtime_breakdown(module: str, cwd: Optional[str] = None) -> Tuple[float, List[Tuple[str, float, float]]]:
+    """
+    Import `module` in a fresh interpreter under `-X importtime`.
+    Returns (wall seconds, [(direct import, self s, cumulative s)]) for `module`'s direct imports.
+    """
+    code = f"import time; t0 = time.perf_counter(); import {module}; print('WALL', time.perf_counter() - t0)"
+    p = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=cwd,
+                       capture_output=True, text=True)
+    wall = 0.0
+    for line in p.stdout.splitlines():
+        if line.startswith("WALL "):
+            wall = float(line.split()[1])
+    rows: List[Tuple[str, float, float]] = []
+    for line in p.stderr.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        if not m: continue
+        self_us, cum_us, indent, name = int(m.group(1)), int(m.group(2)), len(m.group(3)), m.group(4)
+        # the `module` line itself has indent 1; its direct imports sit at indent 3
+        if indent == 3:
+            rows.append((name, self_us / 1e6, cum_us / 1e6))
+    if p.returncode != 0:
+        raise RuntimeError(p.stderr.strip().splitlines()[-1] if p.stderr.strip() else f"exit {p.returncode}")
+    return wall, rows
+
+def startup_report(module: str, deferred: Iterable[str], top: int = 15, cwd: Optional[str] = None) -> str:
+    wall, rows = importtime_breakdown(module, cwd)
+    rows.sort(key=lambda r: r[2], reverse=True)
+    lines = [f"import {module}: {wall * 1000:.0f} ms wall", "",
+             f"{'direct import':<32} {'cumulative ms':>14} {'self ms':>9}"]
+    for name, self_s, cum_s in rows[:top]:
+        lines.append(f"{name:<32} {cum_s * 1000:>14.1f} {self_s * 1000:>9.1f}")
+    # what the deferred imports would have added at startup (measured after `module` is loaded)
+    code = (f"import json, time; import {module}; r = {{}}\n"
+            f"for n in {list(deferred)!r}:\n"
+            f"    t0 = time.perf_counter()\n"
+            f"    try: __import__(n)\n"
+            f"    except Exception: continue\n"
+            f"    r[n] = time.perf_counter() - t0\n"
+            f"print(json.dumps(r))")
+    p = subprocess.run([sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True)
+    deferred_times: Dict[str, float] = {}
+    try:
+        deferred_times = json.loads(p.stdout.strip().splitlines()[-1])
+    except Exception:
+        pass
+    if deferred_times:
+        lines += ["", f"{'deferred to first use':<32} {'ms':>14}"]
+        for n, s in sorted(deferred_times.items(), key=lambda kv: -kv[1]):
+            lines.append(f"{n:<32} {s * 1000:>14.1f}")
+    return "\n".join(lines)
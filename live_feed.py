@@ -0,0 +1,124 @@
+# live_feed.py — one publisher thread per topic, fanning its events out to every subscriber
+from __future__ import annotations
+import queue, threading
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+import telemetry
+
+class Subscription:
+    def __init__(self, hub: "LiveHub", key: Hashable, maxsize: int):
+        self.hub, self.key = hub, key
+        self.q: "queue.Queue[dict]" = queue.Queue(maxsize)
+        self.closed = False
+
+    def get(self, timeout: float) -> Optional[dict]:
+        """Next event, or None after `timeout` (caller sends a keep-alive)."""
+        try:
+            return self.q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.hub._unsubscribe(self)
+
+class _Topic:
+    __slots__ = ("key", "subs", "wake", "cursor", "last", "seq")
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.subs: Set[Subscription] = set()
+        self.wake = threading.Event()
+        self.cursor: Any = None
+        self.last: Optional[dict] = None
+        self.seq = 0
+
+class LiveHub:
+    """
+    Topics are created by the first subscriber and dropped with the last. Each topic has a
+    single publisher thread that calls `poll(key, cursor) -> (event | None, cursor)` every
+    `interval` seconds, or sooner after notify(); the event goes to all subscribers, so
+    N watchers of one topic cost one poll. New subscribers get the latest event at once.
+    A subscriber whose queue fills up (a stalled client) is dropped; it can reconnect.
+    With `max_subs`, subscribe() returns None once that many subscriptions are open
+    (checked and taken under one lock, so concurrent requests can't overshoot it).
+    """
+    def __init__(self, name: str, poll: Callable[[Hashable, Any], Tuple[Optional[dict], Any]],
+                 interval: float = 30.0, queue_size: int = 64, max_subs: Optional[int] = None):
+        self.name, self.poll, self.interval, self.queue_size = name, poll, interval, queue_size
+        self.max_subs = max_subs
+        self._topics: Dict[Hashable, _Topic] = {}
+        self._nsubs = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, key: Hashable) -> Optional[Subscription]:
+        sub = Subscription(self, key, self.queue_size)
+        with self._lock:
+            if self.max_subs is not None and self._nsubs >= self.max_subs:
+                telemetry.inc("luna_live_rejected_total", hub=self.name)
+                return None
+            self._nsubs += 1
+            topic = self._topics.get(key)
+            start = topic is None
+            if start:
+                topic = self._topics[key] = _Topic(key)
+            topic.subs.add(sub)
+            if topic.last is not None:
+                sub.q.put_nowait(topic.last)
+        if start:
+            threading.Thread(target=self._publish, args=(topic,), name=f"{self.name}-pub", daemon=True).start()
+        return sub
+
+    def _unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            topic = self._topics.get(sub.key)
+            if topic is not None and sub in topic.subs:
+                topic.subs.discard(sub)
+                self._nsubs -= 1
+                if not topic.subs:
+                    topic.wake.set()  # let the publisher notice and exit
+
+    def notify(self, match: Callable[[Hashable], bool]) -> int:
+        """Wake the publishers of topics whose key satisfies `match` (e.g. new bars were saved)."""
+        with self._lock:
+            topics = [t for k, t in self._topics.items() if match(k)]
+        for t in topics:
+            t.wake.set()
+        return len(topics)
+
+    def _publish(self, topic: _Topic) -> None:
+        first = True
+        while True:
+            if not first:
+                topic.wake.wait(self.interval)
+                topic.wake.clear()
+            first = False
+            with self._lock:
+                if not topic.subs:
+                    if self._topics.get(topic.key) is topic:
+                        del self._topics[topic.key]
+                    return
+            try:
+                event, topic.cursor = self.poll(topic.key, topic.cursor)
+            except Exception:
+                telemetry.inc("luna_live_errors_total", hub=self.name)
+                continue
+            if event is None:
+                continue
+            with self._lock:
+                topic.seq += 1
+                event["seq"] = topic.seq
+                topic.last = event
+                subs = list(topic.subs)
+            for s in subs:
+                try:
+                    s.q.put_nowait(event)
+                except queue.Full:
+                    s.close()
+            telemetry.inc("luna_live_events_total", hub=self.name)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"name": self.name, "topics": len(self._topics),
+                    "subscribers": self._nsubs, "max_subs": self.max_subs}
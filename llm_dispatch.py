@@ -0,0 +1,132 @@
+# llm_dispatch.py — concurrent chat-completion calls under request/token-per-minute budgets
+# ============================================================
+#   llm = Dispatcher(client.chat.completions.create, rpm=300, tpm=150_000, inflight=8)
+#   resp = llm(model=..., messages=[...])        # thread-safe; call from many workers
+#
+# Every call takes one request token and an estimated number of LLM tokens from two
+# buckets (refilled continuously); the estimate is corrected from resp.usage afterwards.
+# At most `inflight` calls are on the wire at once. A failed call backs off *outside*
+# its in-flight slot, so one coin's retries never hold up the others; a 429 with
+# Retry-After also pauses the buckets, since that limit is shared by every caller.
+# ============================================================
+from __future__ import annotations
+import random, threading, time
+from typing import Any, Callable, Dict, Optional
+
+class TokenBucket:
+    """`per_min` units per minute, bursting up to `burst` (defaults to one second's worth, min 1)."""
+    def __init__(self, per_min: float, burst: Optional[float] = None):
+        self.rate = max(per_min, 1e-9) / 60.0
+        self.capacity = burst if burst is not None else max(1.0, self.rate)
+        self.level = self.capacity
+        self.stamp = time.monotonic()
+        self.paused_until = 0.0
+        self.cond = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def take(self, n: float = 1.0) -> float:
+        """Block until `n` units are available and take them; returns seconds waited."""
+        n = min(n, self.capacity)  # a request bigger than the bucket still goes, at the bucket's pace
+        t0 = time.monotonic()
+        with self.cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.level >= n:
+                    self.level -= n
+                    return now - t0
+                need = max(self.paused_until - now, (n - self.level) / self.rate)
+                self.cond.wait(min(max(need, 0.005), 5.0))
+
+    def adjust(self, n: float) -> None:
+        """Give back (n > 0) or charge extra (n < 0) once the real cost is known; may go negative."""
+        with self.cond:
+            self._refill(time.monotonic())
+            self.level = min(self.capacity, self.level + n)
+            self.cond.notify_all()
+
+    def pause(self, sec: float) -> None:
+        with self.cond:
+            self.paused_until = max(self.paused_until, time.monotonic() + sec)
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait (Retry-After / retry-after-ms on the error's response)."""
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+def status_of(exc: BaseException) -> Optional[int]:
+    s = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    return int(s) if isinstance(s, int) else None
+
+def estimate_tokens(kwargs: Dict[str, Any], completion: int = 700) -> int:
+    """~4 chars per token over the messages, plus the expected completion."""
+    chars = sum(len(str(m.get("content") or "")) for m in kwargs.get("messages") or [])
+    return chars // 4 + int(kwargs.get("max_tokens") or completion)
+
+class Dispatcher:
+    def __init__(self, create: Callable[..., Any], rpm: float = 300, tpm: float = 0, inflight: int = 8,
+                 retries: int = 5, backoff: float = 2.0, backoff_cap: float = 30.0,
+                 log: Callable[[str], None] = print):
+        self.create = create
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm, burst=tpm / 6.0) if tpm else None  # ~10 s of tokens up front
+        self.slots = threading.BoundedSemaphore(max(1, inflight))
+        self.retries, self.backoff, self.backoff_cap = retries, backoff, backoff_cap
+        self.log = log
+        self.lock = threading.Lock()
+        self.counts = {"calls": 0, "ok": 0, "retries": 0, "rate_limited": 0, "failed": 0,
+                       "tokens": 0, "wait_sec": 0.0, "call_sec": 0.0}
+
+    def _bump(self, **kw) -> None:
+        with self.lock:
+            for k, v in kw.items(): self.counts[k] += v
+
+    def __call__(self, **kwargs) -> Any:
+        est = estimate_tokens(kwargs)
+        delay = self.backoff
+        for attempt in range(self.retries):
+            waited = self.requests.take(1)
+            if self.tokens: waited += self.tokens.take(est)
+            t0 = time.perf_counter()
+            try:
+                with self.slots:
+                    resp = self.create(**kwargs)
+            except Exception as e:
+                self._bump(calls=1, wait_sec=waited, call_sec=time.perf_counter() - t0)
+                status, ra = status_of(e), retry_after(e)
+                if status is not None and 400 <= status < 500 and status not in (408, 409, 429):
+                    self._bump(failed=1)
+                    raise  # bad request / auth: retrying won't help
+                if status == 429:
+                    self._bump(rate_limited=1)
+                    if ra:
+                        for b in (self.requests, self.tokens):
+                            if b: b.pause(ra)
+                if attempt == self.retries - 1:
+                    self._bump(failed=1)
+                    raise
+                sleep = ra if ra is not None else delay * (0.5 + random.random())
+                self.log(f"[llm] {type(e).__name__} ({attempt + 1}/{self.retries}); retry in {sleep:.1f}s")
+                self._bump(retries=1)
+                time.sleep(sleep)  # slot already released: other coins keep going
+                delay = min(delay * 1.8, self.backoff_cap)
+                continue
+            used = getattr(getattr(resp, "usage", None), "total_tokens", None)
+            if self.tokens and used: self.tokens.adjust(est - used)
+            self._bump(calls=1, ok=1, tokens=int(used or est), wait_sec=waited, call_sec=time.perf_counter() - t0)
+            return resp
+        raise RuntimeError("unreachable")
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return dict(self.counts)
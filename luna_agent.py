@@ -239,6 +239,12 @@ def _snapshot(v: pd.DataFrame) -> Dict[str, float]:
     }
 
 def _perf_line(v: pd.DataFrame) -> str:
+    # precomputed by the server at hydrate time (frame_summary) when available
+    perf = (v.attrs.get("summary") or {}).get("perf")
+    if perf:
+        def fmt(k: str) -> str:
+            return "n/a" if perf.get(k) is None else f"{perf[k]:+.2f}%"
+        return f"Recent: 1h {fmt('1h')}, 4h {fmt('4h')}, 12h {fmt('12h')}, 24h {fmt('24h')}."
     # approximate performance windows
     def pct(nh: int) -> str:
         base = _value_at_or_before(v, nh)
@@ -7,6 +7,8 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 
+import indicators as ind
+
 try:
     import pandas_ta as ta
     HAS_PTA = True
@@ -58,13 +60,13 @@ def enrich_with_metrics(df: pd.DataFrame) -> pd.DataFrame:
         if HAS_PTA:
             out[f"sma_{L}"] = ta.sma(close, length=L)
         else:
-            out[f"sma_{L}"] = _roll(close, L).mean()
+            out[f"sma_{L}"] = ind.rolling_mean(close, L, max(2, L // 2))
 
     for L in (9, 21, 55, 144):
         if HAS_PTA:
             out[f"ema_{L}"] = ta.ema(close, length=L)
         else:
-            out[f"ema_{L}"] = close.ewm(span=L, adjust=False).mean()
+            out[f"ema_{L}"] = ind.ema(close, L)
 
     # ------------ Stochastic (14,3) ------------
     if HAS_PTA:
@@ -88,11 +90,7 @@ def enrich_with_metrics(df: pd.DataFrame) -> pd.DataFrame:
     elif HAS_PTA:
         out["rsi7"] = ta.rsi(close, length=7)
     else:
-        delta = close.diff()
-        up = delta.clip(lower=0.0)
-        dn = -delta.clip(upper=0.0)
-        rs = up.ewm(span=7, adjust=False).mean() / dn.replace(0, 1e-9).ewm(span=7, adjust=False).mean()
-        out["rsi7"] = 100 - (100 / (1 + rs))
+        out["rsi7"] = ind.rsi(close, 7)
 
     # ------------ ROC ------------
     for L in (5, 14, 30):
@@ -106,8 +104,8 @@ def enrich_with_metrics(df: pd.DataFrame) -> pd.DataFrame:
     out["donchian_l20"] = _roll(low, 20).min()
 
     # ------------ Volatility measures ------------
-    out["std14"] = _roll(close, 14).std()
-    out["cv14"]  = _safe_div(out["std14"], _roll(close, 14).mean())
+    out["std14"] = ind.rolling_std(close, 14, 7)
+    out["cv14"]  = _safe_div(out["std14"], pd.Series(ind.rolling_mean(close, 14, 7), index=out.index))
 
     # Rough HV over last 30 days of returns (constant across index for speed)
     ts = pd.to_datetime(out["timestamp"], utc=True, errors="coerce")
@@ -121,14 +119,13 @@ def enrich_with_metrics(df: pd.DataFrame) -> pd.DataFrame:
     out["hv30"] = hv30
 
     # ------------ Volume / Liquidity ------------
-    out["vol_ma20"] = _roll(vol, 20).mean()
+    out["vol_ma20"] = ind.rolling_mean(vol, 20, 10)
     out["vol_ratio"] = _safe_div(vol, out["vol_ma20"]).replace([np.inf, -np.inf], np.nan)
     # OBV slope (5)
     if "obv" in out.columns and not out["obv"].isna().all():
         obv = out["obv"].fillna(0.0)
     else:
-        direction = np.sign(close.diff()).fillna(0.0)
-        obv = (direction * vol).cumsum()
+        obv = pd.Series(ind.obv(close, vol), index=out.index)
         out["obv"] = obv
     out["obv_slope_5"] = np.sign(obv - obv.shift(5)).fillna(0.0)
 
@@ -149,12 +146,8 @@ def enrich_with_metrics(df: pd.DataFrame) -> pd.DataFrame:
         out["pat_pin_bear"] = ((upper_shadow / rng) > 0.6).astype(int)
 
     # ------------ MA alignment (20-50-200) ------------
-    def _ma_align(row):
-        pos = 0
-        if row.get("sma_20", np.nan) > row.get("sma_50", np.nan):  pos += 1
-        if row.get("sma_50", np.nan) > row.get("sma_200", np.nan): pos += 1
-        return pos  # 0..2
-    out["ma_align_score"] = out.apply(_ma_align, axis=1)
+    sma = {L: pd.to_numeric(out.get(f"sma_{L}"), errors="coerce") for L in (20, 50, 200)}
+    out["ma_align_score"] = ((sma[20] > sma[50]).astype(int) + (sma[50] > sma[200]).astype(int))  # 0..2
 
     # Breakouts vs Donchian
     out["breakout_up20"] = (close > out["donchian_h20"]).astype(int)
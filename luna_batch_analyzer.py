@@ -3,10 +3,20 @@
 # Writes analysis to luna_cache/data/analysis/<coin>.json
 # ============================================================
 
-import os, json, time, math, argparse, pathlib, sys, random
+import os, json, time, math, argparse, pathlib, sys, random, threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timezone, timedelta
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
+try:
+    from pandas.tseries.api import guess_datetime_format  # pandas >= 2.2
+except ImportError:
+    from pandas._libs.tslibs.parsing import guess_datetime_format
+
+from llm_dispatch import Dispatcher
+from analysis_fingerprint import fingerprint, moved, steps_from_env
+from work_queue import WorkQueue, owner_id
 
 # find .env in project root or alongside this file
 env_path = pathlib.Path(__file__).parent / ".env"
@@ -15,7 +25,7 @@ if not env_path.exists():
 load_dotenv(dotenv_path=env_path)
 
 ROOT = pathlib.Path(__file__).parent.resolve()
-DATA_DIR = ROOT / "luna_cache" / "data"
+DATA_DIR = pathlib.Path(os.getenv("LUNA_CACHE_DIR") or (ROOT / "luna_cache" / "data"))
 COINS_DIR = DATA_DIR / "coins"
 ANALYSIS_DIR = DATA_DIR / "analysis"
 STATE_DIR = DATA_DIR / "state"
@@ -24,7 +34,7 @@ ANALYSIS_DIR.mkdir(parents=True, exist_ok=True)
 STATE_DIR.mkdir(parents=True, exist_ok=True)
 LOGS_DIR.mkdir(parents=True, exist_ok=True)
 
-STATE_FILE = STATE_DIR / "analyze_progress.json"
+QUEUE_DB = STATE_DIR / "work_queue.sqlite"
 
 # ---------- tiny utils ----------
 def utcnow(): return datetime.now(timezone.utc)
@@ -55,6 +65,11 @@ def safe_print(*args, **kwargs):
         except Exception: pass
 
 # ---------- CSV loader ----------
+NUM_COLS = ["price","open","high","low","close","volume","volume_24h","market_cap","fdv","liquidity",
+            "rsi","macd_line","macd_signal","macd_hist",
+            "bb_lower","bb_middle","bb_upper","bb_width",
+            "volume_trend","sentiment","fear_greed","whale_txn_count","adx14","obv","stoch_k","stoch_d"]
+
 def load_csv(coin_id: str) -> pd.DataFrame:
     p = COINS_DIR / f"{coin_id}.csv"
     if not p.exists(): return pd.DataFrame()
@@ -63,11 +78,11 @@ def load_csv(coin_id: str) -> pd.DataFrame:
         df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, errors="coerce")
         df = df.dropna(subset=["timestamp"]).sort_values("timestamp")
     # normalize numbers
-    for c in ["price","open","high","low","close","volume","volume_24h","market_cap","fdv","liquidity",
-              "rsi","macd_line","macd_signal","macd_hist",
-              "bb_lower","bb_middle","bb_upper","bb_width",
-              "volume_trend","sentiment","fear_greed","whale_txn_count","adx14","obv","stoch_k","stoch_d"]:
+    for c in NUM_COLS:
         if c in df.columns: df[c] = pd.to_numeric(df[c], errors="coerce")
+    return alias_columns(df)
+
+def alias_columns(df):
     if "close" not in df.columns and "price" in df.columns:
         df["close"] = df["price"]
     if "volume" not in df.columns and "volume_24h" in df.columns:
@@ -75,6 +90,8 @@ def load_csv(coin_id: str) -> pd.DataFrame:
     return df
 
 # ---------- ROI rollups ----------
+ROLLUP_HOURS = [("1h",1),("4h",4),("8h",8),("12h",12),("24h",24),("7d",24*7),("30d",24*30),("1y",24*365)]
+
 def value_at_or_before(df: pd.DataFrame, hours_back: int):
     if df.empty or "timestamp" not in df.columns or "close" not in df.columns:
         return None
@@ -91,29 +108,25 @@ def compute_rollups(df):
     if df.empty or "close" not in df.columns: return {}, {}
     ch = {}
     latest = last(df, "close")
-    for label, hrs in [("1h",1),("4h",4),("8h",8),("12h",12),("24h",24),("7d",24*7),("30d",24*30),("1y",24*365)]:
+    for label, hrs in ROLLUP_HOURS:
         base = value_at_or_before(df, hrs)
         ch[label] = pct(latest, base)
     ch["all"] = pct(latest, to_float(df["close"].iloc[0]) if len(df)>0 else None)
-    inv = {k: (round(1000*(1+(v or 0)/100),2) if v is not None else None) for k,v in ch.items()}
-    return ch, inv
+    return ch, invest(ch)
+
+def invest(ch):
+    return {k: (round(1000*(1+(v or 0)/100),2) if v is not None else None) for k,v in ch.items()}
 
 # ---------- rule-based fallback ----------
+RULE_INPUTS = dict(RSI="rsi", MACD="macd_line", MS="macd_signal", MH="macd_hist", BBU="bb_upper", BBL="bb_lower",
+                   VOLT="volume_trend", LIQ="liquidity", MCAP="market_cap", SENT="sentiment", FG="fear_greed",
+                   WHALE="whale_txn_count")
+
 def fallback_tool_texts(df):
-    v = dict(
-        RSI=last(df,"rsi"),
-        MACD=last(df,"macd_line"),
-        MS=last(df,"macd_signal"),
-        MH=last(df,"macd_hist"),
-        BBU=last(df,"bb_upper"),
-        BBL=last(df,"bb_lower"),
-        VOLT=last(df,"volume_trend"),
-        LIQ=last(df,"liquidity"),
-        MCAP=last(df,"market_cap"),
-        SENT=last(df,"sentiment"),
-        FG=last(df,"fear_greed"),
-        WHALE=last(df,"whale_txn_count"),
-    )
+    return rule_texts({k: last(df, c) for k, c in RULE_INPUTS.items()})
+
+def rule_texts(v):
+    """(blurbs, details, overview) from the last bar's values (RULE_INPUTS keys, None = missing)."""
     blurbs, details = {}, {}
 
     rsi=v["RSI"]
@@ -185,93 +198,157 @@ def fallback_tool_texts(df):
     return blurbs, details, overview
 
 # ---------- OpenAI client (optional) ----------
+# OPENAI_BASE_URL (read by the SDK) points this at a local stand-in, e.g. bench/vendor_stub.py's /openai/v1
 def openai_client():
     key = os.getenv("OPENAI_API_KEY")
     if not key: return None
     try:
         from openai import OpenAI
-        return OpenAI(api_key=key)
+        return OpenAI(api_key=key, max_retries=0)  # retries/backoff are the dispatcher's job
     except Exception:
         return None
 
-def ai_analysis(df, coin_id, symbol, model="gpt-4o-mini"):
-    client = openai_client()
-    if client is None or df.empty:
-        return fallback_tool_texts(df)
+_LLM = None
+_LLM_LOCK = threading.Lock()
 
-    ch,_ = compute_rollups(df)
-    snap = {
-        "symbol": symbol,
-        "latest": {
-            "price": last(df,"close"),
-            "rsi": last(df,"rsi"),
-            "macd_line": last(df,"macd_line"),
-            "macd_signal": last(df,"macd_signal"),
-            "macd_hist": last(df,"macd_hist"),
-            "bb_upper": last(df,"bb_upper"),
-            "bb_lower": last(df,"bb_lower"),
-            "bb_width": last(df,"bb_width"),
-            "volume_trend": last(df,"volume_trend"),
-            "market_cap": last(df,"market_cap"),
-            "liquidity": last(df,"liquidity"),
-            "sentiment_24h": last(df,"sentiment"),
-            "fear_greed": last(df,"fear_greed"),
-            "obv": last(df,"obv"),
-            "adx14": last(df,"adx14"),
-            "stoch_k": last(df,"stoch_k"),
-            "stoch_d": last(df,"stoch_d"),
-        },
-        "roi": ch
+# spend stays at the old sequential loop's 30 calls/min unless the operator raises it
+# (--rpm 300 --tpm 150000 --concurrency 8 for a paid tier with headroom)
+DEFAULT_RPM = 30
+DEFAULT_TPM = 0          # 0 = no token budget; --rpm alone bounds spend
+DEFAULT_CONCURRENCY = 2
+
+def configure_llm(rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, inflight=DEFAULT_CONCURRENCY):
+    """Shared dispatcher (request/token buckets + in-flight cap) for every ai_analysis call."""
+    global _LLM
+    client = openai_client()
+    with _LLM_LOCK:
+        _LLM = Dispatcher(client.chat.completions.create, rpm=rpm, tpm=tpm, inflight=inflight,
+                          log=safe_print) if client else None
+    return _LLM
+
+def llm():
+    with _LLM_LOCK:
+        ready = _LLM is not None
+    return _LLM if ready else configure_llm()
+
+SNAPSHOT_INPUTS = {"price": "close", "rsi": "rsi", "macd_line": "macd_line", "macd_signal": "macd_signal",
+                   "macd_hist": "macd_hist", "bb_upper": "bb_upper", "bb_lower": "bb_lower", "bb_width": "bb_width",
+                   "volume_trend": "volume_trend", "market_cap": "market_cap", "liquidity": "liquidity",
+                   "sentiment_24h": "sentiment", "fear_greed": "fear_greed", "obv": "obv", "adx14": "adx14",
+                   "stoch_k": "stoch_k", "stoch_d": "stoch_d"}
+
+def metric_snapshot(df, symbol, ch=None):
+    """The metrics an analysis is written from (the LLM prompt, and the fingerprint's input)."""
+    if ch is None: ch,_ = compute_rollups(df)
+    return {"symbol": symbol, "latest": {k: last(df, c) for k, c in SNAPSHOT_INPUTS.items()}, "roi": ch}
+
+SYSTEM_PROMPT = ("You are Luna, a crypto technical analyst. Precise, non‑hype, no advice. "
+                 "Use only the provided metrics.")
+TOOLS = ["RSI", "MACD", "BANDS", "VOL", "MCAP", "LIQUIDITY", "SENTIMENT", "FEAR_GREED", "WHALE_ACTIVITY"]
+_TOOL_SPEC = "{" + ", ".join(f"{t}:str" for t in TOOLS) + "}"
+ANALYSIS_SPEC = (
+    "{"
+    ' "overview": {"summary": str, "bullets": [str], "regime": "bullish|bearish|sideways"},'
+    f' "tool_blurbs": {_TOOL_SPEC},'
+    f' "tool_details": {_TOOL_SPEC}'
+    "}"
+)
+STYLE_RULES = "Tile blurbs must be 8–12 words. Details: 2–4 compact sentences."
+
+def _texts(data, strict=False):
+    """(blurbs, details, overview) from one coin's JSON; strict (batched replies) demands every field."""
+    if not isinstance(data, dict): return None
+    tb, td, ov = data.get("tool_blurbs"), data.get("tool_details"), data.get("overview")
+    if strict and not (isinstance(tb, dict) and isinstance(td, dict) and isinstance(ov, dict)
+                       and all(str(tb.get(t) or "").strip() and str(td.get(t) or "").strip() for t in TOOLS)
+                       and str(ov.get("summary") or "").strip()):
+        return None
+    blurbs = {k:str(v) for k,v in (tb or {}).items()}
+    details= {k:str(v) for k,v in (td or {}).items()}
+    ov = ov or {}
+    overview = {
+        "summary": str(ov.get("summary","")).strip() or "Analysis generated.",
+        "bullets": [str(x) for x in (ov.get("bullets") or [])][:6],
+        "regime": str(ov.get("regime","sideways"))
     }
+    return blurbs, details, overview
+
+def ai_analysis(df, coin_id, symbol, model="gpt-4o-mini", snap=None):
+    return _llm_texts(df, coin_id, symbol, model, snap) or fallback_tool_texts(df)
+
+def _llm_texts(df, coin_id, symbol, model="gpt-4o-mini", snap=None):
+    """(blurbs, details, overview) from the LLM, or None if it's unavailable or failed."""
+    call = llm()
+    if call is None or df.empty:
+        return None
+    snap = snap or metric_snapshot(df, symbol)
 
-    sys = ("You are Luna, a crypto technical analyst. Precise, non‑hype, no advice. "
-           "Use only the provided metrics.")
     user = (
-        "Return STRICT JSON:\n"
-        "{"
-        ' "overview": {"summary": str, "bullets": [str], "regime": "bullish|bearish|sideways"},'
-        ' "tool_blurbs": {RSI:str, MACD:str, BANDS:str, VOL:str, MCAP:str, LIQUIDITY:str, SENTIMENT:str, FEAR_GREED:str, WHALE_ACTIVITY:str},'
-        ' "tool_details": {RSI:str, MACD:str, BANDS:str, VOL:str, MCAP:str, LIQUIDITY:str, SENTIMENT:str, FEAR_GREED:str, WHALE_ACTIVITY:str}'
-        "}\n"
-        "Tile blurbs must be 8–12 words. Details: 2–4 compact sentences.\n\n"
+        f"Return STRICT JSON:\n{ANALYSIS_SPEC}\n{STYLE_RULES}\n\n"
         f"Metrics:\n```json\n{json.dumps(snap, default=lambda x: None)}\n```"
     )
 
-    backoff = 2.0
-    for attempt in range(5):
-        try:
-            resp = client.chat.completions.create(
-                model=model, temperature=0.2,
-                response_format={"type":"json_object"},
-                messages=[{"role":"system","content":sys},{"role":"user","content":user}],
-            )
-            data = json.loads(resp.choices[0].message.content)
-            blurbs = {k:str(v) for k,v in (data.get("tool_blurbs") or {}).items()}
-            details= {k:str(v) for k,v in (data.get("tool_details") or {}).items()}
-            ov = data.get("overview") or {}
-            overview = {
-                "summary": str(ov.get("summary","")).strip() or "Analysis generated.",
-                "bullets": [str(x) for x in (ov.get("bullets") or [])][:6],
-                "regime": str(ov.get("regime","sideways"))
-            }
-            return blurbs, details, overview
-        except Exception as e:
-            safe_print(f"[Luna] OpenAI error ({attempt+1}/5): {e}")
-            time.sleep(backoff); backoff = min(backoff*1.8, 30)
-    return fallback_tool_texts(df)
+    try:
+        resp = call(
+            model=model, temperature=0.2,
+            response_format={"type":"json_object"},
+            messages=[{"role":"system","content":SYSTEM_PROMPT},{"role":"user","content":user}],
+        )
+        return _texts(json.loads(resp.choices[0].message.content))
+    except Exception as e:
+        safe_print(f"[Luna] OpenAI error for {coin_id}: {e}")
+    return None
+
+def llm_texts_batch(snaps, model="gpt-4o-mini"):
+    """
+    One request for several coins: {coin_id: snapshot} in, {coin_id: (blurbs, details, overview)}
+    out for every coin whose part of the reply validates. Missing ones are the caller's to retry.
+    """
+    call = llm()
+    if call is None or not snaps:
+        return {}
+    user = (
+        "Analyze each coin independently. Return STRICT JSON: an object keyed by the exact coin ids "
+        f"below, each value:\n{ANALYSIS_SPEC}\n{STYLE_RULES}\n\n"
+        f"Metrics by coin id:\n```json\n{json.dumps({'coins': snaps}, default=lambda x: None)}\n```"
+    )
+    try:
+        resp = call(
+            model=model, temperature=0.2, max_tokens=900 * len(snaps),
+            response_format={"type":"json_object"},
+            messages=[{"role":"system","content":SYSTEM_PROMPT},{"role":"user","content":user}],
+        )
+        data = json.loads(resp.choices[0].message.content)
+    except Exception as e:
+        safe_print(f"[Luna] OpenAI batch error ({len(snaps)} coins): {e}")
+        return {}
+    if isinstance(data, dict) and isinstance(data.get("coins"), dict):
+        data = data["coins"]  # some replies echo the wrapper
+    out = {}
+    for cid in snaps:
+        t = _texts(data.get(cid), strict=True) if isinstance(data, dict) else None
+        if t: out[cid] = t
+    return out
 
 # ---------- short narrative ----------
+PARAGRAPH_INPUTS = ["rsi", "adx14", "macd_line", "macd_signal", "bb_width"]
+
 def compose_short_paragraph(symbol: str, df: pd.DataFrame, ch: dict) -> str:
     if df.empty: return f"{symbol}: not enough data."
     def val(col):
         s = df.get(col)
         s = s.dropna() if isinstance(s, pd.Series) else pd.Series(dtype=float)
         return float(s.iloc[-1]) if not s.empty else None
-    rsi = val("rsi"); adx = val("adx14")
-    ml, ms, mh = val("macd_line"), val("macd_signal"), val("macd_hist")
-    bbw = val("bb_width")
+    vals = {c: val(c) for c in PARAGRAPH_INPUTS}
+    bbw_q20 = pd.Series(df["bb_width"]).dropna().quantile(0.2) if vals["bb_width"] is not None else None
+    return short_paragraph(symbol, pd.to_datetime(df["timestamp"].iloc[-1]), ch, vals, bbw_q20)
+
+def short_paragraph(symbol, last_ts, ch, vals, bbw_q20):
+    """`vals`: last non-missing value per PARAGRAPH_INPUTS column; `bbw_q20`: 20th pct of bb_width."""
+    rsi, adx = vals["rsi"], vals["adx14"]
+    ml, ms = vals["macd_line"], vals["macd_signal"]
+    bbw = vals["bb_width"]
 
-    last_ts = pd.to_datetime(df["timestamp"].iloc[-1])
     age_min = int((utcnow() - last_ts).total_seconds()//60)
     age = "live now" if age_min<1 else f"~{age_min} min old"
 
@@ -287,37 +364,109 @@ def compose_short_paragraph(symbol: str, df: pd.DataFrame, ch: dict) -> str:
         label = "strong" if adx>=40 else "firm" if adx>=25 else "weak"
         bits.append(f"ADX {adx:.1f} {label}")
     if bbw is not None:
-        bits.append("bands tight" if bbw <= (pd.Series(df["bb_width"]).dropna().quantile(0.2) if "bb_width" in df else bbw) else "bands normal")
+        bits.append("bands tight" if bbw <= bbw_q20 else "bands normal")
 
     return f"Data current (UTC, {age}). {symbol} — {score}. " + "; ".join(bits) + "."
 
 # ---------- per‑coin writer ----------
-def build_payload(df, coin_id, symbol):
+def build_payload(df, coin_id, symbol, use_openai=True, snap=None, reuse=None, texts=None):
+    """
+    Full analysis JSON. With `reuse` (a previous payload whose fingerprint still matches) the
+    texts are carried over and only the numbers are recomputed: no LLM call. `texts` are
+    LLM texts already fetched (batched mode).
+    """
     price_change, inv = compute_rollups(df)
-    blurbs, details, overview = ai_analysis(df, coin_id, symbol)
+    snap = snap or metric_snapshot(df, symbol, price_change)
+    if reuse is not None:
+        blurbs, details, overview = reuse["tool_blurbs"], reuse["tool_details"], reuse["overview"]
+        fp = dict(reuse["fingerprint"])  # still the values the texts were written from
+    else:
+        if texts is None and use_openai:
+            texts = _llm_texts(df, coin_id, symbol, snap=snap)
+        blurbs, details, overview = texts or fallback_tool_texts(df)
+        fp = fingerprint(snap, FP_STEPS)
+        fp["source"], fp["analyzed_at"] = ("llm" if texts else "rules"), now_iso()
     luna_paragraph = compose_short_paragraph(symbol, df, price_change)
-    payload = {
+    return assemble_payload(coin_id, symbol, {c: last(df, c) for c in PAYLOAD_INPUTS}, price_change, inv,
+                            (blurbs, details, overview), luna_paragraph, fp)
+
+PAYLOAD_INPUTS = ["close", "market_cap", "volume", "liquidity", "fdv"]
+
+def assemble_payload(coin_id, symbol, lastv, price_change, inv, texts, luna_paragraph, fp):
+    blurbs, details, overview = texts
+    return {
         "coin_id": coin_id,
         "symbol": symbol,
         "name": coin_id.capitalize(),
         "last_updated": now_iso(),
         "overview": overview,
         "metrics": {
-            "price_usd": last(df,"close"),
-            "market_cap_usd": last(df,"market_cap"),
-            "volume_24h_usd": last(df,"volume"),
-            "liquidity_usd": last(df,"liquidity"),
-            "fdv_usd": last(df,"fdv"),
+            "price_usd": lastv["close"],
+            "market_cap_usd": lastv["market_cap"],
+            "volume_24h_usd": lastv["volume"],
+            "liquidity_usd": lastv["liquidity"],
+            "fdv_usd": lastv["fdv"],
             "price_change": {k:(None if v is None else float(v)) for k,v in price_change.items()},
         },
         "investment_model": {"hypothetical_1000_usd": {k:(None if v is None else float(v)) for k,v in inv.items()}},
         "tool_blurbs": blurbs,
         "tool_details": details,
-        "luna_paragraph": luna_paragraph
+        "luna_paragraph": luna_paragraph,
+        "fingerprint": fp
     }
-    return payload
 
-def analyze_coin(coin_id, force=False, stale_hours=None, use_openai=True):
+def write_payload(out, payload):
+    out.write_text(json.dumps(payload, indent=2, ensure_ascii=False, default=lambda o: None), encoding="utf-8")
+
+# ---------- change detection ----------
+FP_STEPS = steps_from_env()
+FP_MAX_CYCLES = 3  # default --fp-max-age: texts survive this many --stale refresh cycles unchanged
+
+def reusable(prev, snap, use_openai, max_age_hours=None):
+    """Previous payload if its texts still describe `snap` (no metric moved past its tolerance
+    since they were written, same source, young enough)."""
+    if not prev or not isinstance(prev.get("fingerprint"), dict): return None
+    old = prev["fingerprint"]
+    if moved(old, fingerprint(snap, FP_STEPS), FP_STEPS): return None
+    if old.get("source") != ("llm" if use_openai and llm() is not None else "rules"): return None
+    if not all(isinstance(prev.get(k), dict) for k in ("tool_blurbs", "tool_details", "overview")): return None
+    if max_age_hours is not None:
+        try:
+            age = utcnow() - datetime.fromisoformat(old["analyzed_at"])
+        except Exception:
+            return None
+        if age.total_seconds() >= max_age_hours * 3600: return None
+    return prev
+
+def previous(out, force=False, stale_hours=None):
+    """(previous payload or None, its age in seconds if younger than `stale_hours` else None)."""
+    prev = None
+    if out.exists() and not force:
+        try:
+            prev = json.loads(out.read_text(encoding="utf-8"))
+        except Exception:
+            prev = None
+    if prev and stale_hours is not None:
+        try:
+            ts = prev.get("last_updated")
+            if ts:
+                age = (utcnow() - datetime.fromisoformat(ts)).total_seconds()
+                if age < stale_hours*3600:
+                    return prev, age
+        except Exception:
+            pass
+    return prev, None
+
+def analyze_coin(coin_id, force=False, stale_hours=None, use_openai=True, unchanged="refresh", fp_max_age=None):
+    """
+    Returns "fresh" (left alone), "unchanged" (fingerprint matched, skipped), "refresh"
+    (fingerprint matched, numbers rewritten), "full" (texts regenerated) or False on failure.
+    """
+    job = prepare_coin(coin_id, force, stale_hours, use_openai, unchanged, fp_max_age)
+    return finish_coin(job) if isinstance(job, dict) else job
+
+def prepare_coin(coin_id, force=False, stale_hours=None, use_openai=True, unchanged="refresh", fp_max_age=None):
+    """Everything up to the LLM call: a job dict for finish_coin(), or analyze_coin's result if there's nothing to do."""
     coin_id = coin_id.lower().strip()
     csv_path = COINS_DIR / f"{coin_id}.csv"
     if not csv_path.exists():
@@ -325,126 +474,373 @@ def analyze_coin(coin_id, force=False, stale_hours=None, use_openai=True):
         return False
 
     out = ANALYSIS_DIR / f"{coin_id}.json"
-    if out.exists() and not force and stale_hours is not None:
-        try:
-            j = json.loads(out.read_text(encoding="utf-8"))
-            ts = j.get("last_updated")
-            if ts:
-                age = utcnow() - datetime.fromisoformat(ts)
-                if age.total_seconds() < stale_hours*3600:
-                    safe_print(f"[Luna] ⏭  Skip fresh: {coin_id} ({age.total_seconds()/3600:.1f}h old)")
-                    return True
-        except Exception:
-            pass
+    prev, age = previous(out, force, stale_hours)
+    if age is not None:
+        safe_print(f"[Luna] ⏭  Skip fresh: {coin_id} ({age/3600:.1f}h old)")
+        return "fresh"
 
     df = load_csv(coin_id)
     if df.empty:
         safe_print(f"[Luna] ❌ Empty CSV for {coin_id}")
         return False
 
-    if not use_openai:
-        def no_ai(df, cid, sym): return fallback_tool_texts(df)
-        globals()["ai_analysis"] = lambda *a, **k: no_ai(*a, **k)
-
     symbol = coin_id[:4].upper()
-    payload = build_payload(df, coin_id, symbol)
-    out.write_text(json.dumps(payload, indent=2, ensure_ascii=False, default=lambda o: None), encoding="utf-8")
-    safe_print(f"[Luna] ✅ Saved analysis for {coin_id} → {out}")
-    return True
+    snap = metric_snapshot(df, symbol)
+    reuse = reusable(prev, snap, use_openai, fp_max_age) if unchanged != "off" else None
+    if reuse is not None and unchanged == "skip":
+        safe_print(f"[Luna] ⏭  Unchanged: {coin_id} (fingerprint {reuse['fingerprint']['hash']})")
+        return "unchanged"
+    return {"coin_id": coin_id, "out": out, "df": df, "symbol": symbol, "snap": snap,
+            "reuse": reuse, "use_openai": use_openai}
+
+def needs_llm(job):
+    return isinstance(job, dict) and job["reuse"] is None and job["use_openai"] and not job["df"].empty
+
+def finish_coin(job, texts=None):
+    """Build and write the payload; `texts` come from a batched request (else fetched per coin)."""
+    payload = build_payload(job["df"], job["coin_id"], job["symbol"], use_openai=job["use_openai"],
+                            snap=job["snap"], reuse=job["reuse"], texts=texts)
+    out = job["out"]
+    write_payload(out, payload)
+    kind = "refresh" if job["reuse"] is not None else "full"
+    safe_print(f"[Luna] ✅ Saved analysis for {job['coin_id']} ({kind}) → {out}")
+    return kind
+
+def finish_group(jobs, model="gpt-4o-mini"):
+    """K coins in one LLM request; coins whose part of the reply doesn't validate get their own request.
+    Returns one finish_coin() result per job, or the exception that job raised."""
+    got = llm_texts_batch({j["coin_id"]: j["snap"] for j in jobs}, model=model)
+    if len(got) < len(jobs):
+        safe_print(f"[Luna] ↩  Batch of {len(jobs)}: {len(jobs) - len(got)} coin(s) retried one by one")
+    out = []
+    for j in jobs:
+        try:
+            out.append(finish_coin(j, got.get(j["coin_id"])))
+        except Exception as e:
+            out.append(e)  # per coin, so the queue can retry just that one
+    return out
 
 # ---------- batch driver ----------
-def save_state(idx):
-    try:
-        STATE_FILE.write_text(json.dumps({"index":idx, "at":now_iso()}, indent=2), encoding="utf-8")
-    except Exception:
-        pass
-
-def load_state():
-    try:
-        j = json.loads(STATE_FILE.read_text(encoding="utf-8"))
-        return int(j.get("index", 0))
-    except Exception:
-        return 0
-
 def coin_universe():
     coins = sorted(p.stem for p in COINS_DIR.glob("*.csv"))
     return coins
 
-def run_batch(args):
+def open_queue(args):
+    """The run's coin queue; a new run (no --resume) replaces it with the selected coins."""
+    q = WorkQueue(args.queue, QUEUE_DB, lease_sec=args.lease_sec, max_attempts=args.max_attempts)
+    if q.reclaim_orphans():
+        safe_print("[Luna] ♻️  Re-queued coins leased by a crashed run")
+    if args.resume and q.progress()["total"]:
+        if args.retry_failed:
+            safe_print(f"[Luna] ♻️  {q.retry_failed()} failed coin(s) back in the queue")
+        return q
+    q.reset()
+    q.enqueue(select_coins(args))  # priority follows list order
+    return q
+
+def select_coins(args):
     coins = coin_universe()
     if args.shuffle:
         random.shuffle(coins)
+    return coins[args.start:args.start+args.max] if args.max > 0 else coins[args.start:]
+
+COST_PER_COIN = 0.00075
+
+def progress_message(q):
+    """Progress / cost from queue state, so it covers every worker on the queue."""
+    p = q.progress()
+    finished, left = p["done"] + p["failed"], p["pending"] + p["leased"]
+    pct = finished / p["total"] * 100 if p["total"] else 100.0
+    eta = f"{left / p['per_min'] / 60:.1f} h" if p["per_min"] else "?"
+    cost = p["results"].get("full", 0) * COST_PER_COIN  # only full analyses call the LLM
+    est_cost = cost / finished * p["total"] if finished else 0.0
+    return (f"[Luna] ⏱ Progress: {finished}/{p['total']} coins ({pct:.2f}%) | failed={p['failed']} "
+            f"in-progress={p['leased']} workers={p['workers']} {p['results']}\n"
+            f"[Luna] 💰 Est. cost so far: ${cost:.2f} (of ≈${est_cost:.2f}) "
+            f"| {p['per_min']}/min, est {eta} left\n")
 
-    start = args.start
-    if args.resume:
-        start = max(start, load_state())
-
-    if args.max > 0:
-        coins = coins[start:start+args.max]
-    else:
-        coins = coins[start:]
-
-    total = len(coins)
-    COST_PER_COIN = 0.00075
+def run_batch(args):
+    if args.no_openai and not args.no_panel:
+        return run_panel(args)
+    q = open_queue(args)
+    owner = owner_id()
     LOG_INTERVAL = 900
     last_log = time.time()
 
-    safe_print(f"[Luna] 🧠 Starting analysis for {total} coins (start={start})...")
-    rpm = max(1, args.rpm)
-    per_call_sleep = 60.0 / rpm
+    # LLM calls are paced by the dispatcher's buckets, not by sleeping between coins;
+    # coin workers outnumber in-flight slots so CSV work overlaps the network wait.
+    dispatcher = None if args.no_openai else configure_llm(args.rpm, args.tpm, args.concurrency)
+    workers = max(1, args.workers or 2 * args.concurrency)
+    safe_print(f"[Luna] 🧠 Worker {owner} on queue '{args.queue}' ({q.progress()['pending']} coins pending, "
+               f"workers={workers}, rpm={args.rpm}, tpm={args.tpm}, in-flight={args.concurrency}, batch={args.batch_size})...")
 
-    ok = fail = 0
-    last_tick = time.perf_counter()
     t0 = time.time()
+    group_size = max(1, args.batch_size) if dispatcher else 1
+
+    def work(cid):
+        opts = dict(force=args.force, stale_hours=args.stale if not args.force else None,
+                    use_openai=not args.no_openai, unchanged=args.unchanged, fp_max_age=args.fp_max_age)
+        if group_size == 1:
+            return analyze_coin(cid, **opts)
+        job = prepare_coin(cid, **opts)  # the LLM part is batched by the loop below
+        return job if needs_llm(job) else (finish_coin(job) if isinstance(job, dict) else job)
+
+    def record(cid, res, err=None):
+        if isinstance(res, Exception):
+            res, err = False, res
+        if res:
+            q.complete(cid, owner, res)
+            return
+        if err is not None:
+            safe_print(f"[Luna] ⚠️ Error on {cid}: {err}")
+        # exceptions are retried; False (missing / empty CSV) won't get better on a retry
+        q.fail(cid, owner, repr(err) if err is not None else "no usable data", retry=err is not None)
+
+    def maybe_log():
+        nonlocal last_log
+        if time.time() - last_log < LOG_INTERVAL: return
+        msg = progress_message(q)
+        if dispatcher: msg += f"[Luna] 📡 LLM {dispatcher.stats()}\n"
+        safe_print(msg)
+        log_path = LOGS_DIR / f"progress_{datetime.now().strftime('%Y-%m-%d')}.log"
+        with open(log_path, "a", encoding="utf-8") as lf:
+            lf.write(f"{datetime.now().isoformat()} {msg}\n")
+        last_log = time.time()
+
+    stop = threading.Event()
+    def heartbeat():
+        while not stop.wait(max(1.0, args.lease_sec / 3)):
+            try:
+                q.heartbeat(owner)
+            except Exception as e:
+                safe_print(f"[Luna] ⚠️ Lease heartbeat failed: {e}")
+    threading.Thread(target=heartbeat, name="analyze-lease", daemon=True).start()
+
+    ex = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analyze")
+    futs = {}  # future -> coin ids
+    group_futs = set()
+    preparing = 0
+    group = []  # (coin id, job) waiting for a batched LLM request
+    try:
+        while True:
+            if preparing < workers:
+                for item in q.claim(owner, workers - preparing):
+                    futs[ex.submit(work, item.key)] = [item.key]
+                    preparing += 1
+            # send full groups, and whatever is left once nothing else can join it
+            while len(group) >= group_size or (group and preparing == 0):
+                batch, group = group[:group_size], group[group_size:]
+                f = ex.submit(finish_group, [j for _, j in batch])
+                futs[f] = [c for c, _ in batch]
+                group_futs.add(f)
+            if not futs:
+                p = q.progress()
+                if not p["pending"] and not p["leased"]: break
+                q.reclaim_orphans()  # a worker on this host died; else its leases are taken over when they expire
+                time.sleep(2.0)  # delayed retries, or coins other workers are still on
+                maybe_log()
+                continue
+            done, _ = wait(futs, return_when=FIRST_COMPLETED)
+            for fut in done:
+                cids = futs.pop(fut)
+                is_group = fut in group_futs
+                group_futs.discard(fut)
+                if not is_group: preparing -= 1
+                try:
+                    res = fut.result()
+                except Exception as e:
+                    for c in cids: record(c, False, e)
+                    continue
+                if is_group:
+                    for c, r in zip(cids, res): record(c, r)
+                elif isinstance(res, dict):
+                    group.append((cids[0], res))
+                else:
+                    record(cids[0], res)
+            maybe_log()
+    except KeyboardInterrupt:
+        safe_print("\n[Luna] ⛔ Interrupted by user.")
+        ex.shutdown(wait=False, cancel_futures=True)
+        safe_print(f"[Luna] ↩  {q.release(owner)} coin(s) handed back to the queue")
+    else:
+        ex.shutdown()
+    finally:
+        stop.set()
 
-    for i, cid in enumerate(coins, start=start):
-        now = time.perf_counter()
-        elapsed = now - last_tick
-        if elapsed < per_call_sleep:
-            time.sleep(per_call_sleep - elapsed)
-        last_tick = time.perf_counter()
-
+    elapsed_total = (time.time() - t0) / 3600
+    safe_print(f"[Luna] ✅ Batch done in {elapsed_total:.1f} h.\n" + progress_message(q))
+    for f in q.failures(10):
+        safe_print(f"[Luna] ❌ {f['key']} (attempts={f['attempts']}): {f['error']}")
+    if dispatcher:
+        safe_print(f"[Luna] 📡 LLM {dispatcher.stats()}")
+
+# ---------- panel mode (--no-openai) ----------
+# Rule-based texts need only each coin's last bar, a few "close at or before T" lookups and one
+# quantile, so a chunk of coins goes into one table sorted by (coin, timestamp) and those are
+# computed for every coin at once with reductions over the coin segments. Only the string
+# assembly (shared with the per-coin path, so the output is identical) is left per coin.
+PANEL_COLS = {"timestamp"} | set(NUM_COLS)
+_HOUR_NS = 3600 * 10**9
+PANEL_IO_THREADS = min(16, 2 * (os.cpu_count() or 1))  # read_csv's tokenizer runs without the GIL
+
+def _read_coin(cid):
+    """(raw frame, the timestamp format to_datetime would infer for this file), or the error."""
+    try:
+        df = alias_columns(pd.read_csv(COINS_DIR / f"{cid}.csv", usecols=lambda c: c in PANEL_COLS))
+        fmt = None
+        if "timestamp" in df.columns:
+            first = df["timestamp"].dropna()
+            first = first.iloc[0] if len(first) else None
+            fmt = guess_datetime_format(first) if isinstance(first, str) else None
+            if fmt is None:  # epoch numbers, odd strings: exactly what load_csv does
+                df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, errors="coerce")
+        return df, fmt
+    except Exception as e:
+        return e
+
+def _parse_timestamps(frames):
+    """Parse the raw timestamps of all (frame, fmt) pairs sharing a format, each distinct string once."""
+    by_fmt = {}
+    for df, fmt in frames:
+        if fmt: by_fmt.setdefault(fmt, []).append(df)
+    for fmt, dfs in by_fmt.items():
+        codes, uniq = pd.factorize(pd.concat([d["timestamp"] for d in dfs], ignore_index=True))
+        parsed = pd.Series(pd.to_datetime(uniq, format=fmt, utc=True, errors="coerce")).reindex(codes).array  # -1 -> NaT
+        off = 0
+        for d in dfs:
+            d["timestamp"] = parsed[off:off + len(d)]
+            off += len(d)
+
+def _last_valid(x, starts):
+    """Per segment, the last non-NaN value of x (NaN if there is none)."""
+    pos = np.maximum.reduceat(np.where(np.isnan(x), -1, np.arange(len(x))), starts)
+    out = np.full(len(starts), np.nan)
+    ok = pos >= starts
+    out[ok] = x[pos[ok]]
+    return out
+
+def _nf(x):
+    return None if np.isnan(x) else float(x)
+
+def _pct(latest, base):
+    """Vectorized pct(): unrounded % change, NaN where pct() gives None."""
+    ok = ~np.isnan(latest) & ~np.isnan(base) & (base != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(ok, (latest / base - 1) * 100, np.nan)
+
+def panel_metrics(frames):
+    """
+    {coin: frame} -> (coin ids, per-coin columns) for everything the rule-based payload needs:
+    last-bar values, last non-missing paragraph inputs, bb_width 20th percentile, ROI rollups.
+    """
+    panel = pd.concat([df.assign(coin=i) for i, df in enumerate(frames.values())], ignore_index=True)
+    for c in NUM_COLS:
+        if c in panel.columns: panel[c] = pd.to_numeric(panel[c], errors="coerce")
+    panel = panel.dropna(subset=["timestamp"]).sort_values(["coin", "timestamp"], kind="stable", ignore_index=True)
+    names = list(frames)
+    if panel.empty: return [], {}
+    code = panel["coin"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, code[1:] != code[:-1]])
+    ends = np.r_[starts[1:], len(code)]
+    last_i = ends - 1
+    col = lambda c: panel[c].to_numpy(dtype="float64") if c in panel.columns else np.full(len(panel), np.nan)
+
+    out = {"last_ts": panel["timestamp"].iloc[last_i].tolist()}
+    for c in set(RULE_INPUTS.values()) | set(SNAPSHOT_INPUTS.values()) | set(PAYLOAD_INPUTS):
+        out[c] = col(c)[last_i]
+    out["valid"] = {c: _last_valid(col(c), starts) for c in PARAGRAPH_INPUTS}
+    out["bbw_q20"] = (panel.groupby("coin", sort=True)["bb_width"].quantile(0.2).to_numpy()
+                      if "bb_width" in panel.columns else np.full(len(starts), np.nan))
+
+    ts = panel["timestamp"].to_numpy(dtype="datetime64[ns]").astype("int64")
+    close, size = col("close"), ends - starts
+    now_ns = pd.Timestamp(utcnow()).value
+    roi = {}
+    for label, hrs in ROLLUP_HOURS:
+        n_older = np.add.reduceat((ts <= now_ns - hrs * _HOUR_NS).astype(np.int64), starts)
+        # last bar at/before the cutoff, else value_at_or_before's positional fallback (iloc[-hrs])
+        idx = np.where(n_older > 0, starts + n_older - 1, ends - hrs)
+        ok = (n_older > 0) | (hrs <= size)
+        roi[label] = _pct(out["close"], np.where(ok, close[np.clip(idx, 0, len(close) - 1)], np.nan))
+    roi["all"] = _pct(out["close"], close[starts])
+    out["roi"] = roi
+    return [names[i] for i in code[starts]], out
+
+def panel_chunk(cids, args):
+    """Analyze `cids` rule-based in one pass; {coin: analyze_coin-style result}."""
+    stale = args.stale if not args.force else None
+    results, prevs, outs = {}, {}, {}
+    for cid in cids:
+        outs[cid] = ANALYSIS_DIR / f"{cid}.json"
+        prevs[cid], age = previous(outs[cid], args.force, stale)
+        if age is not None: results[cid] = "fresh"
+    todo = [c for c in cids if c not in results]
+    with ThreadPoolExecutor(max_workers=PANEL_IO_THREADS, thread_name_prefix="panel-io") as ex:
+        raw = dict(zip(todo, ex.map(_read_coin, todo)))
+
+    frames = {}
+    for cid, r in raw.items():
+        df = r if isinstance(r, Exception) else r[0]
+        if isinstance(df, Exception) or "timestamp" not in df.columns or "close" not in df.columns:
+            # unreadable / unusual layout: the per-coin path reports it the usual way
+            try:
+                results[cid] = analyze_coin(cid, force=args.force, stale_hours=stale, use_openai=False,
+                                            unchanged=args.unchanged, fp_max_age=args.fp_max_age)
+            except Exception as e:
+                safe_print(f"[Luna] ⚠️ Error on {cid}: {e}")
+                results[cid] = False
+        elif len(df):
+            frames[cid] = r
+    _parse_timestamps(frames.values())
+    ids, m = panel_metrics({cid: df for cid, (df, _) in frames.items()}) if frames else ([], {})
+
+    writes = []
+    for j, cid in enumerate(ids):
         try:
-            done = analyze_coin(
-                cid,
-                force=args.force,
-                stale_hours=args.stale if not args.force else None,
-                use_openai=not args.no_openai
-            )
-            if done: ok += 1
-            else: fail += 1
-        except KeyboardInterrupt:
-            safe_print("\n[Luna] ⛔ Interrupted by user.")
-            break
+            lastv = {c: _nf(m[c][j]) for c in m if c not in ("last_ts", "valid", "bbw_q20", "roi")}
+            ch = {k: (None if np.isnan(v[j]) else round(float(v[j]), 2)) for k, v in m["roi"].items()}
+            symbol = cid[:4].upper()
+            snap = {"symbol": symbol, "latest": {k: lastv[c] for k, c in SNAPSHOT_INPUTS.items()}, "roi": ch}
+            reuse = reusable(prevs[cid], snap, False, args.fp_max_age) if args.unchanged != "off" else None
+            if reuse is not None and args.unchanged == "skip":
+                results[cid] = "unchanged"
+                continue
+            if reuse is not None:
+                texts = reuse["tool_blurbs"], reuse["tool_details"], reuse["overview"]
+                fp = dict(reuse["fingerprint"])
+            else:
+                texts = rule_texts({k: lastv[c] for k, c in RULE_INPUTS.items()})
+                fp = fingerprint(snap, FP_STEPS)
+                fp["source"], fp["analyzed_at"] = "rules", now_iso()
+            vals = {c: _nf(m["valid"][c][j]) for c in PARAGRAPH_INPUTS}
+            paragraph = short_paragraph(symbol, m["last_ts"][j], ch, vals,
+                                        _nf(m["bbw_q20"][j]) if vals["bb_width"] is not None else None)
+            writes.append((outs[cid], assemble_payload(cid, symbol, lastv, ch, invest(ch), texts, paragraph, fp)))
+            results[cid] = "refresh" if reuse is not None else "full"
         except Exception as e:
             safe_print(f"[Luna] ⚠️ Error on {cid}: {e}")
-            fail += 1
-
-        if args.resume:
-            save_state(i+1)
-
-        if time.time() - last_log >= LOG_INTERVAL:
-            pct_done = (i+1) / total * 100
-            elapsed_h = (time.time() - t0) / 3600
-            est_total_h = (elapsed_h / pct_done * 100) if pct_done > 0 else 0
-            remaining_h = max(0, est_total_h - elapsed_h)
-            cost_so_far = (i+1) * COST_PER_COIN
-            est_total_cost = total * COST_PER_COIN
-            msg = (
-                f"[Luna] ⏱ Progress: {i+1}/{total} coins ({pct_done:.2f}%) "
-                f"| ok={ok} fail={fail}\n"
-                f"[Luna] 💰 Est. cost so far: ${cost_so_far:.2f} "
-                f"(of ≈${est_total_cost:.2f}) | est {remaining_h:.1f} h left\n"
-            )
-            safe_print(msg)
-            log_path = LOGS_DIR / f"progress_{datetime.now().strftime('%Y-%m-%d')}.log"
-            with open(log_path, "a", encoding="utf-8") as lf:
-                lf.write(f"{datetime.now().isoformat()} {msg}\n")
-            last_log = time.time()
-
-    elapsed_total = (time.time() - t0) / 3600
-    cost_total = ok * COST_PER_COIN
-    safe_print(f"[Luna] ✅ Batch done. ok={ok} fail={fail} | time={elapsed_total:.1f} h | est cost=${cost_total:.2f}")
+            results[cid] = False
+    for cid in raw:
+        if cid not in results:
+            safe_print(f"[Luna] ❌ Empty CSV for {cid}")
+            results[cid] = False
+    with ThreadPoolExecutor(max_workers=PANEL_IO_THREADS, thread_name_prefix="panel-io") as ex:
+        list(ex.map(lambda w: write_payload(*w), writes))
+    return results
+
+def run_panel(args):
+    """--no-openai runs: the selected coins in chunks of --panel-chunk, no queue needed."""
+    coins = select_coins(args)
+    chunk = max(1, args.panel_chunk)
+    safe_print(f"[Luna] 🧮 Rule-based panel analysis for {len(coins)} coins (chunks of {chunk})...")
+    t0 = time.time()
+    kinds = {}
+    for i in range(0, len(coins), chunk):
+        for res in panel_chunk(coins[i:i+chunk], args).values():
+            kinds[res or "failed"] = kinds.get(res or "failed", 0) + 1
+        safe_print(f"[Luna] ⏱ Panel: {min(i + chunk, len(coins))}/{len(coins)} coins in {time.time() - t0:.1f}s {kinds}")
+    safe_print(f"[Luna] ✅ Panel done in {time.time() - t0:.1f}s. {kinds}")
+    return kinds
 
 # ---------- CLI ----------
 def parse_args():
@@ -452,19 +848,47 @@ def parse_args():
     g = ap.add_mutually_exclusive_group()
     g.add_argument("--coin", help="single coin id (e.g., solana)")
     g.add_argument("--all", action="store_true", help="process all CSVs in coins dir (default)")
-    ap.add_argument("--rpm", type=int, default=30, help="target analyses per minute (default 30)")
+    ap.add_argument("--rpm", type=int, default=DEFAULT_RPM, help=f"LLM requests per minute (default {DEFAULT_RPM})")
+    ap.add_argument("--tpm", type=int, default=DEFAULT_TPM, help="LLM tokens per minute, 0 = unlimited (default 0)")
+    ap.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                    help=f"max LLM calls in flight (default {DEFAULT_CONCURRENCY})")
+    ap.add_argument("--workers", type=int, default=0, help="coin worker threads (default 2x concurrency)")
+    ap.add_argument("--batch-size", type=int, default=1,
+                    help="coins per LLM request (default 1; 6-10 amortizes the prompt preamble)")
     ap.add_argument("--force", action="store_true", help="force re-analyze even if fresh")
     ap.add_argument("--stale", type=int, default=24*30, help="re-analyze if older than N hours (default 30 days)")
-    ap.add_argument("--resume", action="store_true", help="resume from last saved index")
-    ap.add_argument("--start", type=int, default=0, help="start index when not resuming")
+    ap.add_argument("--resume", action="store_true",
+                    help="continue the existing queue instead of starting a new run (also: join a run as an extra worker)")
+    ap.add_argument("--retry-failed", action="store_true", help="with --resume, put failed coins back in the queue")
+    ap.add_argument("--queue", default="analyze", help="queue name in state/work_queue.sqlite (default analyze)")
+    ap.add_argument("--lease-sec", type=float, default=600, help="a coin not finished or heartbeated in N s is re-queued")
+    ap.add_argument("--max-attempts", type=int, default=3, help="tries per coin before it is marked failed")
+    ap.add_argument("--start", type=int, default=0, help="start index when starting a new run")
     ap.add_argument("--max", type=int, default=0, help="limit number of coins")
     ap.add_argument("--shuffle", action="store_true", help="randomize order")
     ap.add_argument("--no-openai", action="store_true", help="disable OpenAI, use rule-based fallback only")
-    return ap.parse_args()
+    ap.add_argument("--no-panel", action="store_true",
+                    help="with --no-openai, go coin by coin through the work queue instead of the vectorized panel")
+    ap.add_argument("--panel-chunk", type=int, default=500, help="coins per panel table in --no-openai runs (default 500)")
+    ap.add_argument("--unchanged", choices=["refresh", "skip", "off"], default="refresh",
+                    help="coins whose metric fingerprint hasn't moved: rewrite numbers only (default), skip, or re-analyze")
+    ap.add_argument("--fp-max-age", type=float, default=None,
+                    help=f"regenerate texts older than N hours even if unchanged (default {FP_MAX_CYCLES}x --stale)")
+    ap.add_argument("--fp-steps", default="", help="fingerprint tolerances, e.g. rsi=10,roi_24h=5 (see analysis_fingerprint.py)")
+    args = ap.parse_args()
+    if args.fp_max_age is None:
+        args.fp_max_age = FP_MAX_CYCLES * args.stale
+    elif args.fp_max_age <= args.stale:
+        # a coin is only re-checked once it is --stale old, so its texts are at least that old by then
+        safe_print(f"[Luna] ⚠️ --fp-max-age {args.fp_max_age:g}h <= --stale {args.stale}h: texts will always be regenerated")
+    return args
 
 if __name__ == "__main__":
     args = parse_args()
+    if args.fp_steps:
+        FP_STEPS = steps_from_env(args.fp_steps)
     if args.coin:
-        analyze_coin(args.coin, force=args.force, stale_hours=args.stale, use_openai=not args.no_openai)
+        analyze_coin(args.coin, force=args.force, stale_hours=args.stale, use_openai=not args.no_openai,
+                     unchanged=args.unchanged, fp_max_age=args.fp_max_age)
     else:
         run_batch(args)
@@ -2,15 +2,10 @@
 import numpy as np
 import pandas as pd
 
-def _ema(s: pd.Series, span: int) -> pd.Series:
-    return s.ewm(span=span, adjust=False, min_periods=max(3, span//3)).mean()
+import indicators as ind
 
-def _rsi(close: pd.Series, period: int = 14) -> pd.Series:
-    d = close.diff()
-    up = d.clip(lower=0.0)
-    dn = -d.clip(upper=0.0)
-    rs = up.ewm(span=period, adjust=False).mean() / (dn.ewm(span=period, adjust=False).mean().replace(0, 1e-9))
-    return 100 - (100 / (1 + rs))
+def _ema(s, span: int) -> np.ndarray:
+    return ind.ema(s, span, min_periods=max(3, span//3))
 
 def compute_features(df: pd.DataFrame):
     out = df.copy().sort_values("timestamp")
@@ -32,25 +27,23 @@ def compute_features(df: pd.DataFrame):
     out["ema200"] = _ema(close, 200)
 
     # Bollinger
-    mid = close.rolling(20, min_periods=5).mean()
-    sd  = close.rolling(20, min_periods=5).std()
+    mid, upper, lower = ind.bollinger(close, 20, 2.0, min_periods=5)
     if "bb_upper" not in out.columns:
-        out["bb_upper"] = mid + 2*sd
+        out["bb_upper"] = upper
     if "bb_lower" not in out.columns:
-        out["bb_lower"] = mid - 2*sd
+        out["bb_lower"] = lower
     out["bb_mid"]   = mid
-    out["bb_width"] = (out["bb_upper"] - out["bb_lower"]).abs() / mid.replace(0, np.nan)
+    out["bb_width"] = (out["bb_upper"] - out["bb_lower"]).abs() / pd.Series(mid, index=out.index).replace(0, np.nan)
 
     # MACD
-    ema12 = _ema(close, 12)
-    ema26 = _ema(close, 26)
-    out["macd_line"]   = ema12 - ema26
-    out["macd_signal"] = _ema(out["macd_line"], 9)
+    line = _ema(close, 12) - _ema(close, 26)
+    out["macd_line"]   = line
+    out["macd_signal"] = _ema(line, 9)
     out["macd_hist"]   = out["macd_line"] - out["macd_signal"]
 
     # RSI
     if "rsi" not in out.columns:
-        out["rsi"] = _rsi(close, 14)
+        out["rsi"] = ind.rsi(close, 14, floor="smoothed")
 
     # Volume z-score
     if "volume" in out.columns:
@@ -4,24 +4,34 @@ metrics_builder.py — bulletproof, quiet version
 Scans historical JSONs, computes KPIs,
 writes metrics JSON + Parquet.
 Skips any bad files, no spam output.
+
+Incremental and parallel: a manifest (derived/metrics_manifest.json) records each
+source's size, mtime and content hash; only files whose content changed (or whose
+outputs are missing) are rebuilt, in a process pool sized to the cores. Outputs are
+written atomically, and every rebuilt file reports its parse / KPI / write times.
+
+    python metrics_builder.py                  # incremental, one worker per core
+    python metrics_builder.py --force          # rebuild everything
+    python metrics_builder.py --workers 1      # in-process, no pool
 """
 
-import json, numpy as np, pandas as pd, warnings
+import argparse, hashlib, json, os, sys, time, numpy as np, pandas as pd, warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime, timezone
 
+from write_behind import atomic_path, atomic_write_text
+
 # Silence all runtime and future warnings
 warnings.filterwarnings("ignore")
 
 # === paths ===
-ROOT = Path(r"C:\Users\jmpat\Desktop\Luna AI\luna_cache\data")
+ROOT = Path(os.getenv("LUNA_CACHE_DIR") or (Path(__file__).resolve().parent / "luna_cache" / "data"))
 SRC  = ROOT / "historical"
 DST  = ROOT / "derived"
 FRAMES = DST / "frames"
-DST.mkdir(parents=True, exist_ok=True)
-FRAMES.mkdir(parents=True, exist_ok=True)
-
-print("📊 Starting metrics build...")
+MANIFEST = DST / "metrics_manifest.json"
+BUILD_VERSION = 1  # bump when kpi() or the output layout changes: everything rebuilds once
 
 # === make sure Parquet engine exists ===
 try:
@@ -32,7 +42,7 @@ except ImportError:
         import fastparquet  # noqa
         PARQ_ENGINE = "fastparquet"
     except ImportError:
-        raise SystemExit("❌ Install a Parquet engine first:  pip install pyarrow")
+        PARQ_ENGINE = None
 
 # === KPI calculator ===
 def kpi(series: pd.Series):
@@ -50,49 +60,149 @@ def kpi(series: pd.Series):
         "max_drawdown": float(dd) if np.isfinite(dd) else None,
     }
 
-# === Main loop ===
-files = list(SRC.glob("*.json"))
-for i, f in enumerate(files, 1):
+def outputs(stem: str):
+    return DST / f"{stem}_metrics.json", FRAMES / f"{stem}.parquet"
+
+# === one file (runs in a pool worker) ===
+def build_one(path: str, prev: dict, force: bool = False) -> tuple:
+    """
+    Rebuild `path` unless its content hash matches `prev` (a manifest entry) and the outputs exist.
+    Returns (outcome: built / same / bad, the file's new manifest entry).
+    """
+    f = Path(path)
+    t0 = time.perf_counter()
+    try:
+        st = f.stat()
+        raw = f.read_bytes()
+    except OSError as e:  # removed / locked mid-run: no size or mtime recorded, so it's retried next run
+        return "bad", {"status": "bad", "error": f"{type(e).__name__}: {e}", "version": BUILD_VERSION}
+    entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": hashlib.sha1(raw).hexdigest(),
+             "version": BUILD_VERSION}
+    prev = prev or {}
+    if (not force and prev.get("sha1") == entry["sha1"] and prev.get("version") == BUILD_VERSION
+            and (prev.get("status") == "bad" or all(p.exists() for p in outputs(f.stem)))):
+        return "same", {**prev, **entry}  # touched, not changed
+
+    def bad(why):
+        return "bad", {**entry, "status": "bad", "error": why,
+                       "ms": {"total": round((time.perf_counter() - t0) * 1000, 1)}}
+    try:
+        j = json.loads(raw)
+    except Exception:
+        return bad("unreadable JSON")
+    data = j.get("data") if isinstance(j, dict) else None
+    if not data or not isinstance(data, list):
+        return bad("no data")
+    df = pd.DataFrame(data)
+    if "close" not in df.columns or df["close"].empty:
+        return bad("no close")
     try:
-        # Load JSON safely
-        try:
-            j = json.loads(Path(f).read_text(encoding="utf-8"))
-        except Exception:
-            print(f"[{i}/{len(files)}] ⚠️  {f.stem} - unreadable JSON, skipped.")
-            continue
-
-        data = j.get("data")
-        if not data or not isinstance(data, list):
-            continue
-
-        df = pd.DataFrame(data)
-        if "close" not in df.columns or df["close"].empty:
-            continue
-
         df["time"] = pd.to_datetime(df["time"], unit="s", utc=True)
         df.set_index("time", inplace=True)
         df["close"] = pd.to_numeric(df["close"], errors="coerce").ffill()
+        t1 = time.perf_counter()
 
         metrics = kpi(df["close"])
         metrics["records"] = int(len(df))
         metrics["last_close"] = float(df["close"].iloc[-1])
         metrics["last_updated"] = datetime.now(timezone.utc).isoformat()
+        t2 = time.perf_counter()
+
+        metrics_path, frame_path = outputs(f.stem)
+        atomic_write_text(metrics_path, json.dumps(metrics, indent=2))
+        with atomic_path(frame_path) as tmp:
+            df.to_parquet(tmp, engine=PARQ_ENGINE, index=True)
+        t3 = time.perf_counter()
+    except Exception as e:
+        return bad(f"{type(e).__name__}: {e}")
+    ms = lambda a, b: round((b - a) * 1000, 1)
+    return "built", {**entry, "status": "built", "records": metrics["records"],
+                     "ms": {"parse": ms(t0, t1), "kpi": ms(t1, t2), "write": ms(t2, t3), "total": ms(t0, t3)}}
+
+# === manifest ===
+def load_manifest() -> dict:
+    try:
+        return json.loads(MANIFEST.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
 
-        # Write metrics JSON
-        (DST / f"{f.stem}_metrics.json").write_text(json.dumps(metrics, indent=2))
-
-        # Write Parquet (quiet fail allowed)
-        try:
-            df.to_parquet(FRAMES / f"{f.stem}.parquet", engine=PARQ_ENGINE, index=True)
-        except Exception:
-            continue
-
-        print(f"[{i}/{len(files)}] ✅  {f.stem}")
+def save_manifest(man: dict) -> None:
+    atomic_write_text(MANIFEST, json.dumps(man, indent=1, sort_keys=True))
 
-    except Exception:
-        # Catch-all: keep going even if something unexpected happens
-        continue
+def unchanged(f: Path, prev: dict) -> bool:
+    """Same size + mtime as last build and outputs present: skip without even reading it."""
+    if not prev or prev.get("version") != BUILD_VERSION: return False
+    try:
+        st = f.stat()
+    except OSError:
+        return False
+    if (st.st_size, st.st_mtime_ns) != (prev.get("size"), prev.get("mtime_ns")): return False
+    return prev.get("status") == "bad" or all(p.exists() for p in outputs(f.stem))
 
-print("\n✅ Metrics build finished.")
-print(f"Processed {len(files)} files.")
-print(f"Output → {DST}")
+# === Main loop ===
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Build per-symbol KPI JSON + Parquet frames from historical JSONs")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes (default: one per core)")
+    ap.add_argument("--force", action="store_true", help="rebuild every file regardless of the manifest")
+    ap.add_argument("--slowest", type=int, default=5, help="list the N slowest rebuilt files at the end")
+    args = ap.parse_args()
+
+    if PARQ_ENGINE is None:
+        raise SystemExit("❌ Install a Parquet engine first:  pip install pyarrow")
+    DST.mkdir(parents=True, exist_ok=True)
+    FRAMES.mkdir(parents=True, exist_ok=True)
+    print("📊 Starting metrics build...")
+
+    t0 = time.perf_counter()
+    man = load_manifest()
+    files = sorted(SRC.glob("*.json"))
+    todo = [f for f in files if args.force or not unchanged(f, man.get(f.stem))]
+    print(f"{len(files)} files, {len(files) - len(todo)} unchanged, {len(todo)} to check "
+          f"({min(args.workers, len(todo)) or 1} worker(s))")
+
+    counts = {"unchanged": len(files) - len(todo), "same": 0, "built": 0, "bad": 0, "error": 0}
+    timings = []  # (total ms, stem) of files rebuilt this run
+    def record(i, f, outcome, entry):
+        counts[outcome] += 1
+        man[f.stem] = entry
+        if outcome == "built":
+            ms = entry["ms"]
+            timings.append((ms["total"], f.stem))
+            print(f"[{i}/{len(todo)}] ✅  {f.stem}  {ms['total']:.0f} ms "
+                  f"(parse {ms['parse']:.0f}, kpi {ms['kpi']:.0f}, write {ms['write']:.0f})")
+        elif outcome == "bad":
+            print(f"[{i}/{len(todo)}] ⚠️  {f.stem} - {entry['error']}, skipped.")
+        if i % 200 == 0: save_manifest(man)  # a killed run keeps most of its progress
+
+    if args.workers <= 1 or len(todo) <= 1:
+        for i, f in enumerate(todo, 1):
+            record(i, f, *build_one(str(f), man.get(f.stem), args.force))
+    else:
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(todo))) as ex:
+            futs = {ex.submit(build_one, str(f), man.get(f.stem), args.force): f for f in todo}
+            for i, fut in enumerate(as_completed(futs), 1):
+                f = futs[fut]
+                try:
+                    outcome, entry = fut.result()
+                except Exception as e:  # worker died / unpicklable result: retry next run
+                    counts["error"] += 1
+                    man.pop(f.stem, None)
+                    print(f"[{i}/{len(todo)}] ⚠️  {f.stem} - {type(e).__name__}: {e}")
+                    continue
+                record(i, f, outcome, entry)
+
+    live = {f.stem for f in files}
+    for stem in [s for s in man if s not in live]:
+        del man[stem]  # source gone
+    save_manifest(man)
+
+    print("\n✅ Metrics build finished.")
+    print(f"Processed {len(files)} files in {time.perf_counter() - t0:.1f}s: " +
+          ", ".join(f"{k} {v}" for k, v in counts.items() if v))
+    if timings and args.slowest:
+        print("Slowest: " + ", ".join(f"{s} {ms:.0f} ms" for ms, s in sorted(timings, reverse=True)[:args.slowest]))
+    print(f"Output → {DST}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,8 @@ import os, json, time, math, pathlib, requests
 from datetime import datetime, timezone
 import pandas as pd
 
+import indicators as ind
+
 ROOT = pathlib.Path(__file__).parent.resolve()
 DATA_DIR = ROOT / "luna_cache" / "data"
 COINS_DIR = DATA_DIR / "coins"
@@ -70,28 +72,10 @@ def _compute_indicators(df: pd.DataFrame) -> pd.DataFrame:
     out = df.copy().sort_values("timestamp")
     close = out["price"].astype(float)
 
-    # RSI(14)
-    d = close.diff()
-    up = d.clip(lower=0.0)
-    dn = -d.clip(upper=0.0)
-    ru = up.ewm(span=14, adjust=False).mean()
-    rd = dn.ewm(span=14, adjust=False).mean().replace(0, 1e-9)
-    rs = ru / rd
-    out["rsi"] = 100 - (100 / (1 + rs))
-
-    # MACD (12,26,9)
-    ema12 = close.ewm(span=12, adjust=False).mean()
-    ema26 = close.ewm(span=26, adjust=False).mean()
-    macd_line = ema12 - ema26
-    out["macd_line"] = macd_line
-    out["macd_signal"] = macd_line.ewm(span=9, adjust=False).mean()
-    out["macd_hist"] = out["macd_line"] - out["macd_signal"]
-
-    # Bollinger (20,2)
-    mid = close.rolling(20, min_periods=5).mean()
-    sd = close.rolling(20, min_periods=5).std()
-    out["bb_upper"] = mid + 2 * sd
-    out["bb_lower"] = mid - 2 * sd
+    # RSI(14), MACD (12,26,9), Bollinger (20,2)
+    out["rsi"] = ind.rsi(close, 14, floor="smoothed")
+    out["macd_line"], out["macd_signal"], out["macd_hist"] = ind.macd(close, 12, 26, 9)
+    _, out["bb_upper"], out["bb_lower"] = ind.bollinger(close, 20, 2.0, min_periods=5)
 
     # Volume trend (24h MA on "volume")
     if "volume" in out.columns:
@@ -0,0 +1,125 @@
+# sampling_profiler.py — low-overhead stack sampler for individual live requests
+# Output is collapsed-stack text ("a;b;c 42" per line), ready for flamegraph.pl / speedscope.
+from __future__ import annotations
+import os, sys, time, random, threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+INTERVAL_SEC = float(os.getenv("LUNA_PROFILE_INTERVAL_MS", "5")) / 1000.0
+SAMPLE_RATE  = float(os.getenv("LUNA_PROFILE_RATE", "0"))       # fraction of requests profiled at random
+ADMIN_TOKEN  = os.getenv("LUNA_PROFILE_TOKEN", "").strip()      # header/query flag must match this
+KEEP_FILES   = int(os.getenv("LUNA_PROFILE_KEEP", "200"))        # newest N .folded files kept, older ones pruned
+MAX_DEPTH    = 128
+
+class Session:
+    def __init__(self, thread_id: int, label: str):
+        self.thread_id = thread_id
+        self.label = label
+        self.started = time.time()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.path: Optional[Path] = None
+
+class SamplingProfiler:
+    """
+    One background thread samples sys._current_frames() every INTERVAL_SEC, but only
+    while at least one session is active, and only for the threads being profiled.
+    The same thread writes finished sessions (never the request thread) and keeps
+    only the newest `keep` files in out_dir.
+    """
+    def __init__(self, out_dir: Path, interval: float = INTERVAL_SEC, keep: int = KEEP_FILES):
+        self.out_dir = Path(out_dir)
+        self.interval = interval
+        self.keep = keep
+        self._sessions: Dict[int, Session] = {}
+        self._finished: List[Session] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def should_profile(self, flag: Optional[str]) -> bool:
+        if flag and ADMIN_TOKEN and flag == ADMIN_TOKEN:
+            return True
+        return SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE
+
+    def start(self, label: str) -> Session:
+        s = Session(threading.get_ident(), label)
+        with self._lock:
+            self._sessions[s.thread_id] = s
+            self._ensure_thread()
+            self._wake.set()
+        return s
+
+    def stop(self, s: Session) -> Optional[Path]:
+        """End a session; its file is written shortly after by the sampler thread."""
+        with self._lock:
+            if self._sessions.pop(s.thread_id, None) is None or not s.samples:
+                return None
+            s.path = self._path_for(s)
+            self._finished.append(s)
+            self._ensure_thread()
+            self._wake.set()
+        return s.path
+
+    # ---- internals ----
+    def _ensure_thread(self) -> None:
+        # caller holds self._lock
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                finished, self._finished = self._finished, []
+            if finished:
+                self._flush(finished)
+            with self._lock:
+                if self._finished:
+                    continue
+                if self._sessions:
+                    frames = sys._current_frames()
+                    for tid, sess in self._sessions.items():
+                        f = frames.get(tid)
+                        if f is None or tid == me: continue
+                        sess.stacks[_collapse(f)] += 1
+                        sess.samples += 1
+                    del frames
+                    idle = False
+                else:
+                    self._wake.clear()  # under the lock so a concurrent start() can't be missed
+                    idle = True
+            if idle:
+                self._wake.wait(60)
+                continue
+            time.sleep(self.interval)
+
+    def _path_for(self, s: Session) -> Path:
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime(s.started))
+        safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in s.label)[:80]
+        return self.out_dir / f"{stamp}_{safe}_{s.thread_id % 100000}.folded"
+
+    def _flush(self, finished: List[Session]) -> None:
+        try:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            for s in finished:
+                with s.path.open("w", encoding="utf-8") as f:
+                    for stack, n in s.stacks.most_common():
+                        f.write(f"{stack} {n}\n")
+            files = sorted(self.out_dir.glob("*.folded"), key=lambda p: p.stat().st_mtime)
+            for p in files[:max(0, len(files) - self.keep)]:
+                p.unlink(missing_ok=True)
+        except OSError:
+            pass  # profiling must never take the sampler (or a request) down
+
+def _collapse(frame) -> str:
+    parts = []
+    depth = 0
+    while frame is not None and depth < MAX_DEPTH:
+        co = frame.f_code
+        parts.append(f"{co.co_name} ({os.path.basename(co.co_filename)}:{co.co_firstlineno})")
+        frame = frame.f_back
+        depth += 1
+    return ";".join(reversed(parts))
@@ -1,22 +1,43 @@
 from __future__ import annotations
-import os, re, json, time, random, logging, math
+import time
+_T_IMPORT = time.perf_counter()
+import os, re, json, random, logging, math, threading, sys
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import Dict, Any, Tuple, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Tuple, Optional, List
 
 import numpy as np
 import pandas as pd
 import requests
 from dotenv import load_dotenv
 
-from flask import Flask, jsonify, render_template, request, Response
+from flask import Flask, jsonify, render_template, request, Response, g
 from flask.json.provider import DefaultJSONProvider
 
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import plotly.io as pio
-
-from luna_voice_engine import synth_to_wav_base64
+# plotly, the voice engine and openai load on first use (see lazy_imports / warmup below)
+from lazy_imports import lazy, lazy_attr, warm, warm_in_background, startup_report, LOAD_TIMES
+go = lazy("plotly.graph_objects")
+pio = lazy("plotly.io")
+make_subplots = lazy_attr("plotly.subplots", "make_subplots")
+synth_to_wav_base64 = lazy_attr("luna_voice_engine", "synth_to_wav_base64")
+OpenAI = lazy_attr("openai", "OpenAI")
+DEFERRED_IMPORTS = ["plotly.graph_objects", "plotly.io", "plotly.subplots", "luna_voice_engine", "openai"]
+
+from ttl_cache import TTLCache, cache_stats
+from write_behind import WriteBehind, atomic_path, atomic_write_text
+from frame_schema import conform, to_storage, from_storage, memory_report
+from frame_summary import build_summary, rollups, matches as summary_matches
+import indicators
+import telemetry
+from telemetry import span, vendor_request
+from sampling_profiler import SamplingProfiler
+from job_queue import Job, JobQueue
+from key_quota import QuotaPool
+from live_feed import LiveHub
+from downsample import lttb_frame, ohlc_buckets
+import decoders
+from conditional_http import etag_for, not_modified, tag, finalize as finalize_response
 
 import pytz
 USER_TZ = pytz.timezone(os.getenv("LUNA_TZ", "America/Chicago"))
@@ -37,15 +58,14 @@ ROOT = Path(__file__).parent.resolve()
 TEMPLATES_DIR = ROOT / "templates"
 STATIC_DIR    = ROOT / "static"
 
-DATA_DIR   = ROOT / "luna_cache" / "data"
+DATA_DIR   = Path(os.getenv("LUNA_CACHE_DIR") or (ROOT / "luna_cache" / "data"))
 DERIVED    = DATA_DIR / "derived"
 FRAMES_DIR = DERIVED / "frames"
 STATE_DIR  = DATA_DIR / "state"
 SESS_DIR   = DATA_DIR / "sessions"
 COINS_DIR  = DATA_DIR / "coins"
 
-for d in (FRAMES_DIR, STATE_DIR, SESS_DIR):
-    d.mkdir(parents=True, exist_ok=True)
+PROFILES_DIR = ROOT / "luna_cache" / "profiles"
 
 FETCH_LOG = STATE_DIR / "fetch_log.json"
 HOTSET    = STATE_DIR / "hotset.txt"
@@ -67,6 +87,13 @@ CC_KEYS = _parse_keys(os.getenv("CRYPTOCOMPARE_KEYS") or os.getenv("CRYPTOCOMPAR
 CG_KEY  = (os.getenv("COINGECKO_API_KEY") or os.getenv("CG_API_KEY") or "").strip()
 BIRDEYE_KEY = (os.getenv("BIRDEYE_KEY") or "public").strip()
 
+# Point every vendor at a local stub (bench/vendor_stub.py) for offline benchmarking:
+#   LUNA_STUB_URL=http://127.0.0.1:8765  ->  <stub>/cc/..., <stub>/gt/..., <stub>/rpc/<chain>, ...
+STUB_URL = (os.getenv("LUNA_STUB_URL") or "").rstrip("/")
+
+def _vendor_base(prefix: str, real: str) -> str:
+    return f"{STUB_URL}/{prefix}" if STUB_URL else real
+
 # ---------- Flask JSON for Plotly ----------
 class PlotlyJSON(DefaultJSONProvider):
     def dumps(self, obj, **kwargs):
@@ -76,20 +103,40 @@ class PlotlyJSON(DefaultJSONProvider):
 app = Flask(__name__, template_folder=str(TEMPLATES_DIR), static_folder=str(STATIC_DIR))
 app.json = PlotlyJSON(app)
 
+# ---------- write-behind (frames, fetch log, hotset) ----------
+# Disk writes run on one writer thread so hydrate latency excludes encoding/IO.
+WRITER = WriteBehind("cache", max_pending=int(os.getenv("LUNA_WRITE_QUEUE", "256")))
+_FETCH_LOG_LOCK = threading.Lock()
+
 # ---------- misc utils ----------
 def utcnow() -> datetime: return datetime.now(timezone.utc)
 def _to_iso(dt: datetime) -> str: return dt.astimezone(timezone.utc).replace(microsecond=0).isoformat()
 
 def _fetch_log() -> dict:
+    pending = WRITER.peek("fetch_log")
+    if pending is not None:
+        return dict(pending)
     try:
         return json.loads(FETCH_LOG.read_text(encoding="utf-8"))
     except Exception:
         return {}
 
+def _write_fetch_log(st: dict) -> None:
+    atomic_write_text(FETCH_LOG, json.dumps(st, indent=2))
+
 def _touch_fetch(symbol: str) -> None:
-    st = _fetch_log()
-    st[symbol] = _to_iso(utcnow())
-    FETCH_LOG.write_text(json.dumps(st, indent=2), encoding="utf-8")
+    with _FETCH_LOG_LOCK:
+        st = _fetch_log()
+        st[symbol] = _to_iso(utcnow())
+        WRITER.submit("fetch_log", st, _write_fetch_log)
+
+def _append_hotset(lines: List[str]) -> None:
+    HOTSET.parent.mkdir(parents=True, exist_ok=True)
+    with HOTSET.open("a", encoding="utf-8") as f:
+        f.write("".join(x + "\n" for x in lines))
+
+def _log_hotset(symbol: str) -> None:
+    WRITER.submit("hotset", [symbol], _append_hotset, merge=lambda a, b: a + b)
 
 def _fresh_enough(symbol: str, ttl_min: int = TTL_MINUTES) -> bool:
     st = _fetch_log()
@@ -202,14 +249,19 @@ def is_address(q: str) -> bool:
     if re.fullmatch(r"(?i)^(eq|uf)[a-z0-9_-]{46}$", s): return True  # TON-ish
     return False
 
+# Base58 / TON canonical case, by lowercased address (a DexScreener round trip otherwise)
+CANON_CACHE = TTLCache("canon", ttl=24*3600, negative_ttl=600, max_items=20_000)
+
 def canonicalize_address(raw: str) -> str:
     s = (raw or "").strip()
     if s.startswith("0X"): s = "0x" + s[2:]
     if s.lower().startswith("0x"):
         return s.lower()
+    hit = CANON_CACHE.get(s.lower())
+    if hit is not None: return hit
     # Base58 / TON: ask DexScreener search for canonical case
     try:
-        r = requests.get("https://api.dexscreener.com/latest/dex/search", params={"q": s}, timeout=10)
+        r = vendor_request("ds", "GET", f"{DS_BASE}/latest/dex/search", params={"q": s}, timeout=10)
         if r.ok:
             js = r.json() or {}
             pairs = js.get("pairs") or []
@@ -217,8 +269,11 @@ def canonicalize_address(raw: str) -> str:
             for p in pairs:
                 bt = (((p.get("baseToken") or {}).get("address")) or "")
                 qt = (((p.get("quoteToken") or {}).get("address")) or "")
-                if bt and bt.lower() == ql: return bt
-                if qt and qt.lower() == ql: return qt
+                for a in (bt, qt):
+                    if a and a.lower() == ql:
+                        CANON_CACHE.put(ql, a)
+                        return a
+            CANON_CACHE.put(ql, s, negative=True)
     except Exception as e:
         LOG.warning("[Canon] DS search failed: %s", e)
     return s
@@ -227,6 +282,13 @@ def canonicalize_query(q: str) -> str:
     s = (q or "").strip()
     return canonicalize_address(s) if is_address(s) else s
 
+def known_canonical(q: str) -> Optional[str]:
+    """canonicalize_query without vendor calls: None while an address's canonical case is unknown."""
+    s = (q or "").strip()
+    if not is_address(s) or s.lower().startswith("0x"):
+        return canonicalize_query(s)
+    return CANON_CACHE.get(s.lower())
+
 def _norm_for_cache(s: str) -> str:
     s = (s or "").strip()
     if s.lower().startswith("0x"): return s.lower()
@@ -237,84 +299,280 @@ def _disp_symbol(s: str) -> str:
     return s if is_address(s) else s.upper().strip()
 
 # ---------- cache io ----------
-def _frame_path(symbol: str, ext: str) -> Path:
-    return FRAMES_DIR / f"{_norm_for_cache(symbol)}.{ext}"
+# Frames are cached per (symbol, source resolution):
+#   FRAMES_DIR/<SYM>/<res>.parquet   bars at that resolution (merged on write)
+#   FRAMES_DIR/<SYM>/<res>.json      coverage {res, bar_seconds, start, end, rows, head, fetched_at}
+# `head` means a full-window fetch came back short, i.e. we hold the pair's whole history.
+RES_SECONDS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600, "4h": 4*3600, "1d": 86400}
+TF_RES = {
+    "1h": "1m", "4h": "5m", "8h": "5m", "12h": "15m", "24h": "15m",
+    "7d": "1h", "30d": "4h", "1y": "1d", "all": "1d",
+}
+BASE_COLS = ["timestamp", "open", "high", "low", "close", "volume", "market_cap"]
+
+def _cache_name(symbol: str) -> str:
+    """File-system-safe cache key: no separators, no leading dots (so never '.' / '..')."""
+    return re.sub(r"[^A-Za-z0-9_.\-]", "_", _norm_for_cache(symbol)).lstrip(".") or "_"
+
+def _under_frames(p: Path) -> Path:
+    if not p.resolve().is_relative_to(FRAMES_DIR.resolve()):
+        raise ValueError(f"cache path escapes {FRAMES_DIR}: {p}")
+    return p
+
+def _sym_dir(symbol: str) -> Path:
+    return _under_frames(FRAMES_DIR / _cache_name(symbol))
+
+def _frame_path(symbol: str, ext: str, res: Optional[str] = None) -> Path:
+    if res is None:  # legacy single-file layout
+        return _under_frames(FRAMES_DIR / f"{_cache_name(symbol)}.{ext}")
+    return _sym_dir(symbol) / f"{res}.{ext}"
+
+def _infer_res(df: pd.DataFrame) -> str:
+    """Nearest known resolution to the median bar spacing."""
+    try:
+        ts = pd.to_datetime(df["timestamp"], utc=True, errors="coerce").dropna().sort_values()
+        step = float(ts.diff().dt.total_seconds().median())
+    except Exception:
+        return "1d"
+    if not np.isfinite(step) or step <= 0: return "1d"
+    return min(RES_SECONDS, key=lambda r: abs(math.log(RES_SECONDS[r] / step)))
+
+def _read_frame_file(p_parq: Path, p_csv: Path) -> pd.DataFrame:
+    for p, reader in ((p_parq, pd.read_parquet), (p_csv, pd.read_csv)):
+        if not p.exists(): continue
+        try:
+            df = from_storage(reader(p))
+            return df.sort_values("timestamp").reset_index(drop=True)
+        except Exception:
+            pass
+    return pd.DataFrame()
 
-def save_frame(symbol: str, df: pd.DataFrame) -> None:
-    if df is None or df.empty: return
-    p_parq = _frame_path(symbol, "parquet")
-    p_csv  = _frame_path(symbol, "csv")
+def _write_frame_file(df: pd.DataFrame, p_parq: Path, p_csv: Path) -> None:
     try:
-        df.to_parquet(p_parq, index=False)
+        with atomic_path(p_parq) as tmp:
+            to_storage(df).to_parquet(tmp, index=False)
         return
     except Exception as e:
         LOG.warning("[Cache] Parquet save failed (%s), fallback CSV.", e)
     try:
-        df.to_csv(p_csv, index=False)
+        with atomic_path(p_csv) as tmp:
+            to_storage(df).to_csv(tmp, index=False)
     except Exception as e:
         LOG.warning("[Cache] CSV save failed: %s", e)
 
-def load_cached_frame(symbol: str) -> pd.DataFrame:
-    p_parq = _frame_path(symbol, "parquet")
-    p_csv  = _frame_path(symbol, "csv")
-    if p_parq.exists():
-        try:
-            df = pd.read_parquet(p_parq)
-            df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, errors="coerce")
-            return df.dropna(subset=["timestamp"]).sort_values("timestamp").reset_index(drop=True)
-        except Exception:
-            pass
-    if p_csv.exists():
-        try:
-            df = pd.read_csv(p_csv)
-            df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, errors="coerce")
-            return df.dropna(subset=["timestamp"]).sort_values("timestamp").reset_index(drop=True)
-        except Exception:
-            pass
-    return pd.DataFrame()
+def _frame_job_key(symbol: str, res: str) -> str:
+    return f"frame:{_norm_for_cache(symbol)}:{res}"
+
+def _write_frame_job(job: Tuple[str, str, pd.DataFrame, dict]) -> None:
+    symbol, res, df, cov = job
+    _write_frame_file(df, _frame_path(symbol, "parquet", res), _frame_path(symbol, "csv", res))
+    atomic_write_text(_frame_path(symbol, "json", res), json.dumps(cov))
+
+def load_coverage(symbol: str, res: str) -> dict:
+    pending = WRITER.peek(_frame_job_key(symbol, res))
+    if pending is not None:
+        return dict(pending[3])
+    try:
+        return json.loads(_frame_path(symbol, "json", res).read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+def cached_resolutions(symbol: str) -> List[str]:
+    d = _sym_dir(symbol)
+    have = {r for r in RES_SECONDS if WRITER.peek(_frame_job_key(symbol, r)) is not None}
+    if d.is_dir():
+        have |= {p.stem for p in d.glob("*.parquet")} | {p.stem for p in d.glob("*.csv")}
+    return [r for r in RES_SECONDS if r in have]
+
+def load_frame_res(symbol: str, res: str) -> pd.DataFrame:
+    pending = WRITER.peek(_frame_job_key(symbol, res))
+    if pending is not None:
+        return pending[2]
+    return _read_frame_file(_frame_path(symbol, "parquet", res), _frame_path(symbol, "csv", res))
+
+def save_frame(symbol: str, df: pd.DataFrame, res: Optional[str] = None, head: bool = False) -> pd.DataFrame:
+    """
+    Merge `df` into the (symbol, res) cache and queue a rewrite with fresh coverage metadata.
+    Newer rows win on timestamp collisions; indicators are recomputed over the merged bars.
+    Returns the merged frame right away; the file is written by the write-behind thread.
+    """
+    if df is None or df.empty: return df
+    res = res or _infer_res(df)
+    old = load_frame_res(symbol, res)
+    new = df.copy()
+    new["timestamp"] = pd.to_datetime(new["timestamp"], utc=True, errors="coerce")
+    cols = [c for c in BASE_COLS if c in new.columns or c in old.columns]
+    parts = [x.reindex(columns=cols) for x in (old, new) if not x.empty]
+    merged = (pd.concat(parts, ignore_index=True)
+                .dropna(subset=["timestamp"])
+                .drop_duplicates(subset=["timestamp"], keep="last")
+                .sort_values("timestamp").reset_index(drop=True))
+    merged = conform(compute_indicators(merged))
+
+    prev = load_coverage(symbol, res)
+    cov = {
+        "res": res,
+        "bar_seconds": RES_SECONDS.get(res),
+        "start": _to_iso(merged["timestamp"].iloc[0].to_pydatetime()),
+        "end": _to_iso(merged["timestamp"].iloc[-1].to_pydatetime()),
+        "rows": int(len(merged)),
+        "head": bool(head or prev.get("head")),
+        "fetched_at": _to_iso(utcnow()),
+    }
+    WRITER.submit(_frame_job_key(symbol, res), (symbol, res, merged, cov), _write_frame_job)
+    sym = _norm_for_cache(symbol)
+    LIVE.notify(lambda k: k[0] == sym)  # push the new bars to anyone watching this symbol
+    return merged
+
+def bars_missing(symbol: str, res: str, span_sec: Optional[float], full_limit: int,
+                 ttl_sec: int = TTL_SECONDS) -> Optional[int]:
+    """
+    How many trailing bars at `res` must be fetched so the cache covers `span_sec` up to now.
+      0     -> covered and fresh, nothing to fetch
+      n     -> only the newest n bars are missing (incremental fetch)
+      None  -> not cached / not deep enough; fetch the full window
+    """
+    cov = load_coverage(symbol, res)
+    if not cov: return None
+    try:
+        start = datetime.fromisoformat(cov["start"]).timestamp()
+        end = datetime.fromisoformat(cov["end"]).timestamp()
+        fetched = datetime.fromisoformat(cov["fetched_at"]).timestamp()
+    except Exception:
+        return None
+    now = time.time()
+    bar = RES_SECONDS.get(res, 60)
+    span = span_sec if span_sec is not None else full_limit * bar
+    if not cov.get("head") and start > (now - span + bar):
+        return None
+    if (now - fetched) < ttl_sec:
+        return 0
+    n = int((now - end) // bar) + 2
+    return None if n >= full_limit else n
+
+def merge_resolutions(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Stitch per-resolution frames into one monotonic frame. Finer bars take precedence,
+    but only over the range they actually cover (first to last bar): a coarser frame
+    still contributes rows before, after and between finer ranges, so a stale 15m frame
+    can't hide newer daily bars. Each row keeps the resolution it came from in `src_res`.
+    """
+    out: List[pd.DataFrame] = []
+    claimed: List[Tuple[pd.Timestamp, pd.Timestamp]] = []  # (first, last) of every finer frame
+    for res in sorted((r for r in frames if frames[r] is not None and not frames[r].empty),
+                      key=lambda r: RES_SECONDS.get(r, 0)):
+        f = frames[res]
+        ts = f["timestamp"]
+        span = (ts.min(), ts.max())
+        if claimed:
+            taken = np.zeros(len(f), dtype=bool)
+            for lo, hi in claimed:
+                taken |= ((ts >= lo) & (ts <= hi)).to_numpy()
+            f = f[~taken]
+        claimed.append(span)
+        if f.empty: continue
+        out.append(f.assign(src_res=res))
+    if not out: return pd.DataFrame()
+    if len(out) == 1:
+        one = out[0].reset_index(drop=True)
+        one["src_res"] = one["src_res"].astype("category")
+        return one
+    cols = [c for c in BASE_COLS + ["src_res"] if any(c in f.columns for f in out)]
+    merged = pd.concat([f.reindex(columns=cols) for f in out], ignore_index=True)
+    merged["src_res"] = merged["src_res"].astype("category")
+    return conform(compute_indicators(merged.sort_values("timestamp").reset_index(drop=True)))
+
+# ---------- per-symbol summary sidecar ----------
+# FRAMES_DIR/<SYM>/summary.json: running ATH, rollup anchors, last close, data version.
+SUMMARY_CACHE = TTLCache("summary", ttl=24*3600, max_items=5000)
+
+def _summary_key(symbol: str) -> str:
+    return f"summary:{_norm_for_cache(symbol)}"
+
+def load_summary(symbol: str) -> dict:
+    key = _summary_key(symbol)
+    hit = SUMMARY_CACHE.get(key)
+    if hit is not None: return hit
+    pending = WRITER.peek(key)
+    if pending is not None: return pending[1]
+    try:
+        summ = json.loads((_sym_dir(symbol) / "summary.json").read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    SUMMARY_CACHE.put(key, summ)
+    return summ
+
+def _write_summary_job(job: Tuple[str, dict]) -> None:
+    symbol, summ = job
+    atomic_write_text(_sym_dir(symbol) / "summary.json", json.dumps(summ))
+
+def update_summary(symbol: str, df: pd.DataFrame) -> dict:
+    """Summary for `df`; O(1) when the stored one already matches its last bar."""
+    prev = load_summary(symbol)
+    if summary_matches(prev, df): return prev
+    summ = build_summary(df, prev)
+    if not summ: return {}
+    key = _summary_key(symbol)
+    SUMMARY_CACHE.put(key, summ)
+    WRITER.submit(key, (symbol, summ), _write_summary_job)
+    return summ
+
+def data_version(symbol: str, df: pd.DataFrame, persist: bool = False) -> Any:
+    """
+    ETag input for `df` without a pass over its rows: the summary's version, last bar and row
+    count, plus the last bar's values (an in-place update of the live bar keeps the row count).
+    Falls back to hashing the frame when no stored summary matches and `persist` is off.
+    """
+    if df is None or df.empty: return "empty"
+    summ = update_summary(symbol, df) if persist else load_summary(symbol)
+    if not summary_matches(summ, df):
+        return indicators.frame_key(df)
+    return (summ.get("version"), summ.get("last_ns"), summ.get("rows"), repr(df.iloc[-1].tolist()))
+
+def load_cached_frame(symbol: str, overrides: Optional[Dict[str, pd.DataFrame]] = None) -> pd.DataFrame:
+    """Combined view across every cached resolution (falls back to the legacy single file)."""
+    frames = {r: load_frame_res(symbol, r) for r in cached_resolutions(symbol)}
+    frames.update(overrides or {})
+    if frames:
+        return merge_resolutions(frames)
+    return _read_frame_file(_frame_path(symbol, "parquet"), _frame_path(symbol, "csv"))
 
 # ---------- CryptoCompare (symbols only) ----------
-CC_BASE = "https://min-api.cryptocompare.com/data"
-
-class CCKeyPool:
-    def __init__(self, keys: List[str]):
-        self.keys = keys or []
-        self.bans: Dict[str, float] = {}
-    def pick(self) -> Optional[str]:
-        if not self.keys: return None
-        now = time.time()
-        ok = [k for k in self.keys if self.bans.get(k, 0) <= now]
-        return random.choice(ok) if ok else None
-    def ban(self, k: str, minutes: int = 30):
-        self.bans[k] = time.time() + minutes*60
-
-CC_POOL = CCKeyPool(CC_KEYS)
+CC_BASE = _vendor_base("cc", "https://min-api.cryptocompare.com") + "/data"
+
+# keys come from the shared quota store (key_quota.py); batch scripts only get what we leave over
+CC_POOL = QuotaPool("cc", CC_KEYS, priority="interactive")
 
 def cc_get(path: str, params: Dict[str, Any]) -> Optional[dict]:
     last_err = None
     tries = max(1, len(CC_KEYS)) + 1
     for _ in range(tries):
         k = CC_POOL.pick()
+        if k is None:
+            last_err = "all CC keys out of quota" if CC_KEYS else "keyless CC budget spent"
+            break
         headers = {"Apikey": k} if k else {}
         try:
-            r = requests.get(f"{CC_BASE}/{path}", params=params, headers=headers, timeout=15)
+            r = vendor_request("cc", "GET", f"{CC_BASE}/{path}", params=params, headers=headers, timeout=15)
             if r.status_code == 200:
                 js = r.json()
-                if isinstance(js, dict) and (js.get("Response") in (None, "Success")):
+                ok = isinstance(js, dict) and (js.get("Response") in (None, "Success"))
+                CC_POOL.report(k, 200, "" if ok else str(js.get("Message") if isinstance(js, dict) else js),
+                               r.headers, payload=js)
+                if ok:
                     return js
                 last_err = f"bad CC payload {str(js)[:180]}"
-                if "limit" in str(js).lower() and k:
-                    CC_POOL.ban(k)
             else:
                 txt = (r.text or "")[:160]
                 last_err = f"HTTP {r.status_code} {txt}"
-                if "limit" in txt.lower() and k:
-                    CC_POOL.ban(k)
+                CC_POOL.report(k, r.status_code, txt, r.headers)
         except Exception as e:
             last_err = str(e)
     LOG.warning("[CC] %s", last_err or "unknown error")
     return None
 
+CC_FIELDS = {"open": "open", "high": "high", "low": "low", "close": "close", "volume": "volumeto"}
+
 def cc_hist(symbol: str, kind: str, limit: int, aggregate: int = 1) -> pd.DataFrame:
     if is_address(symbol):  # never hit CC for addresses
         return pd.DataFrame()
@@ -324,23 +582,23 @@ def cc_hist(symbol: str, kind: str, limit: int, aggregate: int = 1) -> pd.DataFr
     if not js: return pd.DataFrame()
     raw = (js.get("Data") or {}).get("Data") or []
     if not raw: return pd.DataFrame()
-    df = pd.DataFrame(raw)
-    if "time" in df.columns:
-        df["timestamp"] = pd.to_datetime(df["time"], unit="s", utc=True, errors="coerce")
-    for c in ["open","high","low","close","volumefrom","volumeto"]:
-        if c in df.columns: df[c] = pd.to_numeric(df[c], errors="coerce")
-    df["volume"] = df["volumeto"] if "volumeto" in df.columns else pd.NA
-    cols = ["timestamp","open","high","low","close","volume"]
-    return df[cols].dropna(subset=["timestamp"]).sort_values("timestamp")
+    return decoders.records_ohlcv(raw, CC_FIELDS, "time")
 
 # ---------- CoinGecko ----------
-CG_BASE = "https://api.coingecko.com/api/v3"
-def cg_headers() -> dict:
-    return {"x-cg-demo-api-key": CG_KEY} if CG_KEY else {}
+CG_BASE = _vendor_base("cg", "https://api.coingecko.com") + "/api/v3"
+CG_POOL = QuotaPool("cg", [CG_KEY], priority="interactive")
+
+def cg_headers(key: Optional[str] = CG_KEY) -> dict:
+    return {"x-cg-demo-api-key": key} if key else {}
 
 def cg_get(path: str, params: dict) -> Optional[dict]:
+    k = CG_POOL.pick()
+    if k is None:
+        LOG.warning("[CG] %s out of quota", "key" if CG_KEY else "keyless budget")
+        return None
     try:
-        r = requests.get(f"{CG_BASE}/{path}", params=params, headers=cg_headers(), timeout=20)
+        r = vendor_request("cg", "GET", f"{CG_BASE}/{path}", params=params, headers=cg_headers(k), timeout=20)
+        CG_POOL.report(k, r.status_code, "" if r.status_code == 200 else r.text[:400], r.headers)
         if r.status_code == 200:
             return r.json()
         LOG.warning("[CG] %s %s", r.status_code, r.text[:160])
@@ -355,10 +613,10 @@ def cg_fetch_coin_list() -> list:
             if age < COIN_LIST_TTL:
                 return json.loads(COIN_LIST_PATH.read_text(encoding="utf-8"))
         LOG.info("[CG] fetching /coins/list?include_platform=true")
-        r = requests.get(f"{CG_BASE}/coins/list", params={"include_platform": "true"}, headers=cg_headers(), timeout=30)
+        r = vendor_request("cg", "GET", f"{CG_BASE}/coins/list", params={"include_platform": "true"}, headers=cg_headers(), timeout=30)
         if r.status_code == 200:
             coins = r.json()
-            COIN_LIST_PATH.write_text(json.dumps(coins), encoding="utf-8")
+            atomic_write_text(COIN_LIST_PATH, json.dumps(coins))
             return coins
         LOG.warning("[CG] list HTTP %s", r.status_code)
     except Exception as e:
@@ -423,36 +681,20 @@ def cg_series(symbol_or_contract: str, days: int = 30) -> pd.DataFrame:
     js = cg_get(f"coins/{cg_id}/market_chart", {"vs_currency":"usd","days":days}) \
         or cg_get(f"coins/{cg_id}/market_chart", {"vs_currency":"usd","days":max(7,days//2)})
     if not js: return pd.DataFrame()
-    px   = js.get("prices") or []
-    vols = js.get("total_volumes") or []
-    caps = js.get("market_caps") or []
-
-    if not px: return pd.DataFrame()
-    dp = pd.DataFrame(px, columns=["ts","close"])
-    dp["timestamp"] = pd.to_datetime(dp["ts"], unit="ms", utc=True, errors="coerce")
-    dp["close"] = pd.to_numeric(dp["close"], errors="coerce")
-
-    if vols:
-        dv = pd.DataFrame(vols, columns=["ts","v"])
-        dv["timestamp"] = pd.to_datetime(dv["ts"], unit="ms", utc=True, errors="coerce")
-        dv["volume"] = pd.to_numeric(dv["v"], errors="coerce")
-        dp = dp.merge(dv[["timestamp","volume"]], on="timestamp", how="left")
-
-    if caps:
-        dc = pd.DataFrame(caps, columns=["ts","mc"])
-        dc["timestamp"] = pd.to_datetime(dc["ts"], unit="ms", utc=True, errors="coerce")
-        dc["market_cap"] = pd.to_numeric(dc["mc"], errors="coerce")
-        dp = dp.merge(dc[["timestamp","market_cap"]], on="timestamp", how="left")
+    dp = decoders.cg_market_chart(js)
+    if dp.empty: return dp
 
     # synth OHLC for indicators (price)
     dp["open"] = dp["close"].shift(1)
     dp["high"] = dp["close"].rolling(3, min_periods=1).max()
     dp["low"]  = dp["close"].rolling(3, min_periods=1).min()
-    return dp[["timestamp","open","high","low","close","volume","market_cap"]].dropna(subset=["timestamp"]).sort_values("timestamp")
+    return dp[["timestamp","open","high","low","close","volume","market_cap"]]
 
 # ---------- DexScreener + GeckoTerminal + Birdeye ----------
-DS_BASE = "https://api.dexscreener.com"
-GT_BASE = "https://api.geckoterminal.com/api/v2"
+DS_BASE = _vendor_base("ds", "https://api.dexscreener.com")
+GT_BASE = _vendor_base("gt", "https://api.geckoterminal.com") + "/api/v2"
+BIRDEYE_BASE = _vendor_base("birdeye", "https://public-api.birdeye.so")
+SOLSCAN_BASE = _vendor_base("solscan", "https://api.solscan.io")
 
 # authoritative mapping
 DS_TO_GT = {
@@ -477,10 +719,21 @@ DS_TO_GT = {
 
 PREFERRED_QUOTES = {"USDC","USDT","SOL","ETH","WETH","USD"}
 
+_VENDOR_HOSTS = [("dexscreener", "ds"), ("geckoterminal", "gt"), ("birdeye", "birdeye"),
+                 ("solscan", "solscan"), ("cryptocompare", "cc"), ("coingecko", "cg")]
+
+def _vendor_for(url: str) -> str:
+    if STUB_URL and url.startswith(STUB_URL + "/"):
+        return url[len(STUB_URL) + 1:].split("/", 1)[0]
+    for needle, name in _VENDOR_HOSTS:
+        if needle in url: return name
+    return "other"
+
 def safe_fetch(url: str, params: dict | None = None, retries: int = 3, timeout: int = 12) -> Optional[requests.Response]:
+    vendor = _vendor_for(url)
     for attempt in range(retries):
         try:
-            r = requests.get(url, params=params or {}, timeout=timeout, headers={"Accept":"application/json"})
+            r = vendor_request(vendor, "GET", url, params=params or {}, timeout=timeout, headers={"Accept":"application/json"})
             if r.status_code == 429:
                 sleep = [1,4,16][min(attempt,2)]
                 time.sleep(sleep)
@@ -625,18 +878,7 @@ def gt_ohlcv_by_pool(network: str, pool_id: str, timeframe: str, aggregate: int
     elif isinstance(data, list) and data:
         attrs = data[0].get("attributes") or {}
     rows = (attrs or {}).get("ohlcv_list") or []
-    recs = []
-    for row in rows:
-        if not isinstance(row, (list,tuple)) or len(row) < 6: continue
-        ts_raw = int(row[0])
-        ts = pd.to_datetime(ts_raw if ts_raw < 10**12 else ts_raw/1000, unit="s", utc=True, errors="coerce")
-        recs.append({
-            "timestamp": ts,
-            "open": float(row[1]), "high": float(row[2]), "low": float(row[3]), "close": float(row[4]),
-            "volume": float(row[5]),
-        })
-    if not recs: return pd.DataFrame()
-    return pd.DataFrame.from_records(recs).dropna(subset=["timestamp"]).sort_values("timestamp")
+    return decoders.rows_ohlcv(rows)
 
 def gt_find_token_pools(network: str, addr: str) -> List[str]:
     js = gt_get(f"/networks/{network}/tokens/{addr}/pools", params={"include":"base_token,quote_token"})
@@ -664,7 +906,7 @@ def birdeye_ohlc_solana(addr: str, tf: str) -> pd.DataFrame:
     elif birdeye_tf == "1h": start = now - 7*24*3600
     elif birdeye_tf == "4h": start = now - 30*24*3600
     else: start = now - 365*24*3600
-    url = "https://public-api.birdeye.so/defi/history_price"
+    url = f"{BIRDEYE_BASE}/defi/history_price"
     headers = {"X-API-KEY": BIRDEYE_KEY, "accept": "application/json"}
     params  = {"address": addr, "address_type":"token", "type": birdeye_tf, "time_from": start, "time_to": now}
     r = safe_fetch(url, params=params, timeout=12)
@@ -672,82 +914,16 @@ def birdeye_ohlc_solana(addr: str, tf: str) -> pd.DataFrame:
     js = r.json() or {}
     items = (js.get("data") or {}).get("items") or []
     if not items: return pd.DataFrame()
-    recs = []
-    for it in items:
-        ts = pd.to_datetime(int(it.get("unixTime") or 0), unit="s", utc=True, errors="coerce")
-        close = float(it.get("value") or 0)
-        if not ts or close <= 0: continue
-        recs.append({"timestamp": ts, "open": close, "high": close, "low": close, "close": close, "volume": 0.0})
-    return pd.DataFrame.from_records(recs).dropna(subset=["timestamp"]).sort_values("timestamp")
+    cols = decoders.columns_of(items, ["unixTime", "value"])
+    ns, close = decoders.epoch_ns(cols["unixTime"]), cols["value"]
+    ok = np.isfinite(close) & (close > 0)
+    return decoders.frame(ns, {"open": close, "high": close, "low": close, "close": close,
+                               "volume": np.zeros(len(close))}, mask=ok)
 
 # ---------- indicators ----------
-def ema(s: pd.Series, span: int) -> pd.Series:
-    return s.ewm(span=span, adjust=False).mean()
-
-def compute_indicators(df: pd.DataFrame) -> pd.DataFrame:
-    if df.empty: return df.copy()
-    out = df.copy()
-
-    # RSI(14)
-    delta = out["close"].diff()
-    up = delta.clip(lower=0.0)
-    dn = -delta.clip(upper=0.0)
-    rs = up.ewm(span=14, adjust=False).mean() / dn.replace(0,1e-9).ewm(span=14, adjust=False).mean()
-    out["rsi"] = 100 - (100/(1+rs))
-
-    # MACD (12,26,9)
-    ema12 = ema(out["close"], 12); ema26 = ema(out["close"], 26)
-    out["macd_line"]   = ema12 - ema26
-    out["macd_signal"] = ema(out["macd_line"], 9)
-    out["macd_hist"]   = out["macd_line"] - out["macd_signal"]
-
-    # Bollinger (20,2) + width
-    ma20  = out["close"].rolling(20).mean()
-    std20 = out["close"].rolling(20).std()
-    out["bb_mid"]   = ma20
-    out["bb_upper"] = ma20 + 2*std20
-    out["bb_lower"] = ma20 - 2*std20
-    out["bb_width"] = ((out["bb_upper"] - out["bb_lower"]) / ma20.replace(0,np.nan) * 100).fillna(0)
-
-    # ADX(14)
-    try:
-        hi, lo, cl = out["high"].fillna(out["close"]), out["low"].fillna(out["close"]), out["close"]
-        plus_dm  = (hi.diff().where(hi.diff() > lo.diff(), 0.0)).clip(lower=0)
-        minus_dm = (lo.diff().where(lo.diff() > hi.diff(), 0.0)).clip(lower=0).abs()
-        tr  = pd.concat([(hi-lo),(hi-cl.shift()).abs(),(lo-cl.shift()).abs()], axis=1).max(axis=1)
-        atr = tr.rolling(14).mean()
-        plus_di  = 100 * (plus_dm.rolling(14).mean()  / atr.replace(0,np.nan))
-        minus_di = 100 * (minus_dm.rolling(14).mean() / atr.replace(0,np.nan))
-        dx  = (100 * (plus_di - minus_di).abs() / (plus_di+minus_di).replace(0,np.nan)).fillna(0)
-        out["adx14"] = dx.rolling(14).mean()
-    except Exception:
-        out["adx14"] = np.nan
-
-    # OBV
-    try:
-        vol = out["volume"].fillna(0)
-        direction = np.sign(out["close"].diff()).fillna(0)
-        out["obv"] = (direction * vol).cumsum()
-    except Exception:
-        out["obv"] = np.nan
-
-    # ATR(14)
-    try:
-        high = out["high"].fillna(out["close"])
-        low  = out["low"].fillna(out["close"])
-        close= out["close"]
-        tr = pd.concat([(high-low), (high-close.shift()).abs(), (low-close.shift()).abs()], axis=1).max(axis=1)
-        out["atr14"] = tr.rolling(14, min_periods=1).mean()
-    except Exception:
-        out["atr14"] = np.nan
-
-    # ALT momentum (simple EMA spread surrogate)
-    try:
-        out["alt_momentum"] = (ema(out["close"], 10) - ema(out["close"], 30))
-    except Exception:
-        out["alt_momentum"] = np.nan
-
-    return out
+def compute_indicators(df: pd.DataFrame, cols: Optional[List[str]] = None) -> pd.DataFrame:
+    """Indicator columns from the shared library; `cols` limits work to what a caller reads."""
+    return indicators.compute(df, cols)
 
 # ---------- timeframe windows & resample ----------
 LOOKBACK = {
@@ -851,14 +1027,7 @@ def value_at_or_before(df: pd.DataFrame, hours: int, anchor: Optional[datetime]=
 
 def compute_rollups(df: pd.DataFrame) -> Tuple[Dict[str, Optional[float]], Dict[str, Optional[float]]]:
     if df.empty: return {}, {}
-    ch = {}
-    anchor = pd.to_datetime(df["timestamp"]).max().to_pydatetime() if not df.empty else utcnow()
-    last = to_float(df["close"].iloc[-1])
-    for k, hrs in [("1h",1),("4h",4),("8h",8),("12h",12),("24h",24),("7d",24*7),("30d",24*30),("1y",24*365)]:
-        base = value_at_or_before(df, hrs, anchor)
-        ch[k] = None if (base in (None,0) or last in (None,0)) else round((last/base-1)*100, 2)
-    inv = {k: (None if v is None else round(1000*(1+v/100.0),2)) for k,v in ch.items()}
-    return ch, inv
+    return rollups(df)  # one searchsorted for all windows instead of a mask scan per window
 
 # ---------- DS/GT hydrate for addresses ----------
 def _tf_to_gt(tf: str) -> Tuple[str, int]:
@@ -872,7 +1041,7 @@ def _tf_to_gt(tf: str) -> Tuple[str, int]:
     if tf == "30d":        return ("hour", 4)
     return ("day", 1)      # 1y/all
 
-def ds_series_via_gt(addr: str, tf: str) -> Tuple[pd.DataFrame, Optional[dict]]:
+def ds_series_via_gt(addr: str, tf: str, limit: int = 500) -> Tuple[pd.DataFrame, Optional[dict]]:
     pairs = ds_pairs_for_token(addr)
     best = pick_best_pair(pairs)
     if not best:
@@ -886,13 +1055,13 @@ def ds_series_via_gt(addr: str, tf: str) -> Tuple[pd.DataFrame, Optional[dict]]:
         return pd.DataFrame(), best
     gt_tf, agg = _tf_to_gt(tf)
     LOG.info("[DS→GT] GT OHLCV net=%s pair=%s %s agg=%s", net, pair, gt_tf, agg)
-    df = gt_ohlcv_by_pool(net, pair, gt_tf, aggregate=agg, limit=500)
+    df = gt_ohlcv_by_pool(net, pair, gt_tf, aggregate=agg, limit=limit)
     if (df is None or df.empty):
         # Try GT token pools (limit 3), then Birdeye (Solana only)
         pools = gt_find_token_pools(net, addr)
         for pid in pools:
             LOG.info("[DS→GT] trying token pool id %s", pid)
-            df = gt_ohlcv_by_pool(net, pid, gt_tf, aggregate=agg, limit=500)
+            df = gt_ohlcv_by_pool(net, pid, gt_tf, aggregate=agg, limit=limit)
             if not df.empty: break
         if (df is None or df.empty) and chain == "solana":
             tf_resample = RESAMPLE_BY_TF.get(tf, "1H")
@@ -903,19 +1072,16 @@ def ds_series_via_gt(addr: str, tf: str) -> Tuple[pd.DataFrame, Optional[dict]]:
     return df, best
 
 # ---------- supply / decimals (cap mode) ----------
-_SUPPLY_CACHE: Dict[str, dict] = {}  # key: f"{chain}:{addr}" -> {"ts":..., "decimals":..., "supply":...}
+# key: f"{chain}:{addr}" -> {"ts":..., "decimals":..., "supply":...}
+# 1h TTL; failed lookups (supply=None) are retried after 10 min
+_SUPPLY_CACHE = TTLCache("supply", ttl=3600, negative_ttl=600, max_items=5000)
 
 def _cache_supply_get(chain: str, addr: str) -> Optional[dict]:
-    k = f"{chain}:{addr}"
-    item = _SUPPLY_CACHE.get(k)
-    if not item: return None
-    if time.time() - item["ts"] > 3600:  # 1h TTL
-        return None
-    return item
+    return _SUPPLY_CACHE.get(f"{chain}:{addr}")
 
 def _cache_supply_put(chain: str, addr: str, dec: Optional[int], supply: Optional[float]):
     k = f"{chain}:{addr}"
-    _SUPPLY_CACHE[k] = {"ts": time.time(), "decimals": dec, "supply": supply}
+    _SUPPLY_CACHE.put(k, {"ts": time.time(), "decimals": dec, "supply": supply}, negative=(supply is None))
 
 def get_evm_supply_decimals(addr: str, chain: str) -> Tuple[int, Optional[float]]:
     cached = _cache_supply_get(chain, addr)
@@ -936,17 +1102,19 @@ def get_evm_supply_decimals(addr: str, chain: str) -> Tuple[int, Optional[float]
         "pulsechain":"https://rpc.pulsechain.com"
     }
     rpc = rpc_map.get(chain)
+    if rpc and STUB_URL:
+        rpc = f"{STUB_URL}/rpc/{chain}"
     if not rpc:
         _cache_supply_put(chain, addr, 18, None)
         return 18, None
     try:
         payload = {"jsonrpc":"2.0","method":"eth_call","params":[{"to":addr,"data":"0x313ce567"}, "latest"],"id":1}  # decimals
-        r = requests.post(rpc, json=payload, timeout=12)
+        r = vendor_request("rpc", "POST", rpc, json=payload, timeout=12)
         dec = 18
         if r.ok and isinstance(r.json(), dict) and r.json().get("result"):
             dec = int(r.json()["result"], 16)
         payload["params"][0]["data"] = "0x18160ddd"  # totalSupply
-        r2 = requests.post(rpc, json=payload, timeout=12)
+        r2 = vendor_request("rpc", "POST", rpc, json=payload, timeout=12)
         supply = None
         if r2.ok and isinstance(r2.json(), dict) and r2.json().get("result"):
             raw = int(r2.json()["result"], 16)
@@ -962,7 +1130,7 @@ def get_solana_supply_decimals(addr: str) -> Tuple[int, Optional[float]]:
     cached = _cache_supply_get("solana", addr)
     if cached: return cached["decimals"] or 9, cached["supply"]
     try:
-        r = safe_fetch("https://api.solscan.io/token/meta", params={"token": addr}, timeout=12)
+        r = safe_fetch(f"{SOLSCAN_BASE}/token/meta", params={"token": addr}, timeout=12)
         if r and r.ok:
             js = r.json() or {}
             data = js.get("data") or {}
@@ -984,7 +1152,11 @@ def derive_cap_or_fdv_from_meta(meta: dict) -> Optional[float]:
     return None
 
 # ---------- master hydrate ----------
-META_CACHE: Dict[str, dict] = {}  # normalized key -> meta
+# normalized key -> meta; unresolved lookups ("UNK") expire quickly so garbage queries don't pile up
+META_CACHE = TTLCache("meta", ttl=6*3600, negative_ttl=300, max_items=5000, max_bytes=16*1024*1024)
+
+def _meta_put(key: str, meta: dict) -> None:
+    META_CACHE.put(key, meta, negative=(not meta or meta.get("symbol") in (None, "UNK")))
 # --- helpers for odd contract-like inputs (Hyperliquid/Sui/Aptos etc.)
 _CONTRACTISH = re.compile(r"^(0x[a-fA-F0-9]{8,64}|[A-Za-z0-9]{32,}|.+::.+)$")
 
@@ -1076,38 +1248,114 @@ def fmt_sig(x, default="0.00"):
     except Exception:
         return default
 
+GT_FULL_LIMIT = 500
+# CryptoCompare resolutions for tickers: (res, endpoint kind, full window in bars)
+CC_PLAN = [("1m", "minute", 360), ("1h", "hour", 24*30), ("1d", "day", 365)]
+CC_FULL = {res: full for res, _, full in CC_PLAN}
+
+def _tf_span_sec(tf: str) -> Optional[float]:
+    win = LOOKBACK.get(tf, timedelta(hours=4))
+    return None if win is None else win.total_seconds()
+
+# The CC_PLAN resolutions are independent requests, so a cold ticker fetches them side by
+# side: one round-trip instead of three. The pool is shared by all hydrates and sized to
+# the key pool, so concurrent cold symbols queue here instead of tripping the rate limits.
+CC_FETCH_WORKERS = int(os.getenv("LUNA_CC_FETCH_WORKERS", str(min(8, 3 * max(1, len(CC_KEYS))))))
+CC_FETCH = ThreadPoolExecutor(max_workers=CC_FETCH_WORKERS, thread_name_prefix="cc-fetch")
+
+def _cc_part(symbol: str, res: str, kind: str, limit: int) -> pd.DataFrame:
+    with span("fetch_cc_res", res=res):
+        return cc_hist(symbol, kind, limit=limit)
+
+def cc_fetch_all(s_for_cache: str, force: bool) -> Tuple[Dict[str, Tuple[pd.DataFrame, bool]], bool]:
+    """
+    Fetch every CC_PLAN resolution that isn't fresh, concurrently.
+    Returns ({res: (bars, reached head)}, whether CC has this symbol at all).
+    """
+    jobs = {}
+    cc_any = False
+    for res, kind, full in CC_PLAN:
+        n = None if force else bars_missing(s_for_cache, res, None, full)
+        if n == 0:
+            cc_any = True
+            continue
+        jobs[res] = (CC_FETCH.submit(_cc_part, s_for_cache, res, kind, full if n is None else max(n, 2)), n, full)
+    out: Dict[str, Tuple[pd.DataFrame, bool]] = {}
+    for res, (fut, n, full) in jobs.items():
+        try:
+            part = fut.result()
+        except Exception as e:
+            LOG.warning("[CC] %s %s failed: %s", s_for_cache, res, e)
+            continue
+        if part is not None and not part.empty:
+            cc_any = True
+            out[res] = (part, n is None and len(part) < int(full * 0.9))
+    return out, cc_any
+
 def hydrate_symbol(query: str, force: bool=False, tf_for_fetch: str="12h") -> pd.DataFrame:
+    with span("hydrate"):
+        return _hydrate_symbol(query, force, tf_for_fetch)
+
+def cached_if_fresh(s_for_cache: str, tf_for_fetch: str) -> Optional[pd.DataFrame]:
+    """The cached frame if nothing is missing for this timeframe, else None. Disk only, no vendor calls."""
+    if looks_contractish(s_for_cache):
+        fresh = bars_missing(s_for_cache, TF_RES.get(tf_for_fetch, "15m"), _tf_span_sec(tf_for_fetch), GT_FULL_LIMIT) == 0
+    else:
+        have = cached_resolutions(s_for_cache)
+        fresh = bool(have) and all(
+            bars_missing(s_for_cache, r, None, CC_FULL.get(r, GT_FULL_LIMIT)) == 0 for r in have)
+    if not fresh:
+        return None
+    with span("cache_load"):
+        cached = load_cached_frame(s_for_cache)
+    return None if cached.empty else cached
+
+def _hydrate_symbol(query: str, force: bool, tf_for_fetch: str) -> pd.DataFrame:
     raw_in = (query or "").strip()
-    raw = canonicalize_query(raw_in)
+    with span("canonicalize"):
+        raw = canonicalize_query(raw_in)
     s_for_cache = _norm_for_cache(raw)
+    gt_res = TF_RES.get(tf_for_fetch, "15m")
+    win_sec = _tf_span_sec(tf_for_fetch)
 
-    if (not force) and _fresh_enough(s_for_cache):
-        cached = load_cached_frame(s_for_cache)
-        if not cached.empty:
+    if not force:
+        cached = cached_if_fresh(s_for_cache, tf_for_fetch)
+        if cached is not None:
+            telemetry.cache_event("frames", "hit")
             LOG.info("[Hydrate] %s served from fresh cache", s_for_cache)
             return cached
 
-    LOG.info("[Hydrate] %s (force=%s, ttl=%ss)", s_for_cache, force, TTL_SECONDS)
+    telemetry.cache_event("frames", "refresh" if force else "miss")
+    LOG.info("[Hydrate] %s (force=%s, tf=%s, ttl=%ss)", s_for_cache, force, tf_for_fetch, TTL_SECONDS)
 
     is_addr = is_address(s_for_cache)
     df = pd.DataFrame()
+    fetched: Dict[str, Tuple[pd.DataFrame, bool]] = {}  # res -> (bars, reached head)
 
-    meta = token_meta_for(raw) if is_addr else {}
-    META_CACHE[s_for_cache] = meta
+    # GT: full window unless only the newest bars are missing
+    need = None if force else bars_missing(s_for_cache, gt_res, win_sec, GT_FULL_LIMIT)
+    gt_limit = GT_FULL_LIMIT if need is None else max(need, 2)
+
+    with span("fetch_meta"):
+        meta = token_meta_for(raw) if is_addr else {}
+    _meta_put(s_for_cache, meta)
 
     if (not is_addr) and looks_contractish(raw):
         meta_guess = token_meta_for(raw)
         addr_guess = (meta_guess or {}).get("tokenAddress")
         if addr_guess:
             LOG.info("[Hydrate] contract-like '%s' resolved to %s on %s", raw, addr_guess, meta_guess.get("chain"))
-            META_CACHE[s_for_cache] = meta_guess
-            df, _ = ds_series_via_gt(addr_guess, tf_for_fetch)
+            _meta_put(s_for_cache, meta_guess)
+            with span("fetch_gt"):
+                df, _ = ds_series_via_gt(addr_guess, tf_for_fetch, limit=gt_limit)
             if df is not None and not df.empty:
                 is_addr = True  # we have a real address now
                 meta = meta_guess
 
     if is_addr:
-        df, best_pair = ds_series_via_gt(raw, tf_for_fetch)
+        if df is None or df.empty:
+            with span("fetch_gt"):
+                df, best_pair = ds_series_via_gt(raw, tf_for_fetch, limit=gt_limit)
         if (df is None or df.empty):
             LOG.info("[Hydrate] DS/GT empty for %s → continuing to CC", raw)
         else:
@@ -1127,42 +1375,39 @@ def hydrate_symbol(query: str, force: bool=False, tf_for_fetch: str="12h") -> pd
                 pass
             if supply and "close" in df.columns:
                 df["market_cap"] = df["close"] * float(supply)
+            fetched[gt_res] = (df, need is None and len(df) < int(GT_FULL_LIMIT * 0.9))
 
-    if df.empty:  # ticker path or address fallback
-        m = cc_hist(s_for_cache, "minute", limit=360)
-        h = cc_hist(s_for_cache, "hour",   limit=24*30)
-        d = cc_hist(s_for_cache, "day",    limit=365)
-        if (m is None or m.empty) and (h is None or h.empty) and (d is None or d.empty):
+    if df is None or df.empty:  # ticker path or address fallback
+        with span("fetch_cc"):
+            cc_parts, cc_any = cc_fetch_all(s_for_cache, force)
+        fetched.update(cc_parts)
+        if not cc_any:
             LOG.info("[Hydrate] CC empty → CG fallback for %s", s_for_cache)
-            df365 = cg_series(raw, days=365)
-            df = df365 if (df365 is not None and not df365.empty) else cg_series(raw, days=30)
-        else:
-            parts = [x for x in (d,h,m) if x is not None and not x.empty]
-            df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+            with span("fetch_cg"):
+                df365 = cg_series(raw, days=365)
+                df = df365 if (df365 is not None and not df365.empty) else cg_series(raw, days=30)
+            if df is not None and not df.empty:
+                fetched[_infer_res(df)] = (df, False)
 
-    if df is None or df.empty:
+    if not fetched:
         cached = load_cached_frame(s_for_cache)
         if not cached.empty:
             _touch_fetch(s_for_cache)
             LOG.info("[Hydrate] %s returning from older cache", s_for_cache)
             return cached
-    if df is None or df.empty:
         LOG.warning("[Hydrate] %s no data after routing", s_for_cache)
         return pd.DataFrame()
 
-    df = compute_indicators(df)
-
-    save_frame(s_for_cache, df)
+    with span("merge_save"):
+        merged = {res: save_frame(s_for_cache, part, res=res, head=head) for res, (part, head) in fetched.items()}
     _touch_fetch(s_for_cache)
+    _log_hotset(s_for_cache)
 
-    try:
-        HOTSET.parent.mkdir(parents=True, exist_ok=True)
-        with HOTSET.open("a", encoding="utf-8") as f:
-            f.write(s_for_cache + "\n")
-    except Exception:
-        pass
-
-    return df
+    with span("cache_load"):
+        out = load_cached_frame(s_for_cache, overrides=merged)
+    with span("summary"):
+        update_summary(s_for_cache, out)
+    return out
 
 def _directional_tilt(view: pd.DataFrame) -> tuple[str, int]:
     """
@@ -1241,40 +1486,51 @@ def _apply_time_axis(fig: go.Figure) -> None:
         tickfont=dict(size=10, color="#9eb3c9"),
     )
 
-def fig_price(df: pd.DataFrame, symbol: str) -> go.Figure:
+# ---------- chart point budgets ----------
+# Series longer than the budget are downsampled before figure construction: LTTB for lines
+# (global max/min always kept), equal-count OHLC buckets for candles (exact highs/lows).
+TILE_POINTS = int(os.getenv("LUNA_TILE_POINTS", "300"))      # mini tiles
+PRICE_POINTS = int(os.getenv("LUNA_PRICE_POINTS", "800"))    # price tile
+EXPAND_POINTS = int(os.getenv("LUNA_EXPAND_POINTS", "1500")) # expanded modal
+
+def _local_ts(s: pd.Series) -> pd.Series:
+    return pd.to_datetime(s, utc=True, errors="coerce").dt.tz_convert(USER_TZ)
+
+def fig_price(df: pd.DataFrame, symbol: str, max_points: int = PRICE_POINTS) -> go.Figure:
     """Builds the main candlestick + MACD chart and localizes timestamps."""
     fig = make_subplots(
         rows=2, cols=1, shared_xaxes=True,
         row_heights=[0.78, 0.22], vertical_spacing=0.04
     )
 
-    # --- timezone localization ---
-    if not df.empty:
-        if "timestamp" in df.columns:
-            df = df.copy()
-            df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, errors="coerce").dt.tz_convert(USER_TZ)
+    def line(col: str):
+        d = lttb_frame(df, col, max_points)
+        return _local_ts(d["timestamp"]), d[col]
 
+    if not df.empty:
+        bars = ohlc_buckets(df[[c for c in ("timestamp", "open", "high", "low", "close") if c in df.columns]], max_points)
         fig.add_trace(go.Candlestick(
-            x=df["timestamp"], open=df["open"], high=df["high"], low=df["low"], close=df["close"],
+            x=_local_ts(bars["timestamp"]), open=bars["open"], high=bars["high"], low=bars["low"], close=bars["close"],
             name=f"{symbol} OHLC", increasing_line_color="#36d399", decreasing_line_color="#f87272", opacity=0.95
         ), row=1, col=1)
 
         if "bb_upper" in df.columns:
-            fig.add_trace(go.Scatter(x=df["timestamp"], y=df["bb_upper"],
-                                     name="BB upper", line=dict(width=1)), row=1, col=1)
+            x, y = line("bb_upper")
+            fig.add_trace(go.Scatter(x=x, y=y, name="BB upper", line=dict(width=1)), row=1, col=1)
         if "bb_mid" in df.columns:
-            fig.add_trace(go.Scatter(x=df["timestamp"], y=df["bb_mid"],
-                                     name="BB mid", line=dict(width=1, dash="dot")), row=1, col=1)
+            x, y = line("bb_mid")
+            fig.add_trace(go.Scatter(x=x, y=y, name="BB mid", line=dict(width=1, dash="dot")), row=1, col=1)
         if "bb_lower" in df.columns:
-            fig.add_trace(go.Scatter(x=df["timestamp"], y=df["bb_lower"],
-                                     name="BB lower", line=dict(width=1)), row=1, col=1)
+            x, y = line("bb_lower")
+            fig.add_trace(go.Scatter(x=x, y=y, name="BB lower", line=dict(width=1)), row=1, col=1)
         if "macd_line" in df.columns and "macd_signal" in df.columns:
-            fig.add_trace(go.Scatter(x=df["timestamp"], y=df["macd_line"],
-                                     name="MACD", line=dict(width=1.1)), row=2, col=1)
-            fig.add_trace(go.Scatter(x=df["timestamp"], y=df["macd_signal"],
-                                     name="Signal", line=dict(width=1, dash="dot")), row=2, col=1)
+            x, y = line("macd_line")
+            fig.add_trace(go.Scatter(x=x, y=y, name="MACD", line=dict(width=1.1)), row=2, col=1)
+            x, y = line("macd_signal")
+            fig.add_trace(go.Scatter(x=x, y=y, name="Signal", line=dict(width=1, dash="dot")), row=2, col=1)
         if "macd_hist" in df.columns:
-            fig.add_trace(go.Bar(x=df["timestamp"], y=df["macd_hist"], name="MACD Hist"), row=2, col=1)
+            x, y = line("macd_hist")
+            fig.add_trace(go.Bar(x=x, y=y, name="MACD Hist"), row=2, col=1)
 
     fig.update_layout(
         template="plotly_dark",
@@ -1286,14 +1542,14 @@ def fig_price(df: pd.DataFrame, symbol: str) -> go.Figure:
     _apply_time_axis(fig)
     return fig
 
-def fig_line(df: pd.DataFrame, y: str, name: str, h: int = 155) -> go.Figure:
+def fig_line(df: pd.DataFrame, y: str, name: str, h: int = 155, max_points: int = TILE_POINTS) -> go.Figure:
     """Builds mini line charts for indicators with timezone conversion."""
     fig = go.Figure()
 
     if not df.empty and y in df.columns and not pd.isna(df[y]).all():
-        df = df.copy()
+        df = lttb_frame(df, y, max_points).copy()
         if "timestamp" in df.columns:
-            df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, errors="coerce").dt.tz_convert(USER_TZ)
+            df["timestamp"] = _local_ts(df["timestamp"])
 
         y_data = df[y].astype(float)
         fig.add_trace(go.Scatter(x=df["timestamp"], y=y_data, name=name, line=dict(width=1.6)))
@@ -1368,7 +1624,6 @@ def build_header_facts(meta: dict) -> str:
         parts.append(f"Pair: https://dexscreener.com/{meta['chain']}/{meta['pairAddress']}")
     return " | ".join(parts)
 
-from openai import OpenAI
 
 def make_conversational(text: str, symbol: str, question: str = "") -> str:
     """
@@ -1638,6 +1893,87 @@ def safe_tile(html_block, label="No data for this timeframe."):
         return f"<div class='chart-missing'>{label}</div>"
     return html_block
 
+def _render_tile(key: str, build) -> str:
+    """Build one tile figure and serialize it, timing both stages."""
+    with span("figure", tile=key):
+        fig = build()
+    with span("to_html", tile=key):
+        html = pio.to_html(fig, include_plotlyjs=False, full_html=False)
+    return safe_tile(html)
+
+# ---------- request timing / on-demand profiling ----------
+# Profile one request with header "X-Luna-Profile: $LUNA_PROFILE_TOKEN" (or ?_profile=...),
+# or a random LUNA_PROFILE_RATE fraction of them. Collapsed stacks land in luna_cache/profiles/
+# (written by the sampler thread; only the newest LUNA_PROFILE_KEEP files are kept).
+PROFILER = SamplingProfiler(PROFILES_DIR)
+PROFILED_ENDPOINTS = {"analyze", "expand_json", "api_luna"}
+
+# ---------- warmup ----------
+# The first /analyze pays for importing plotly and building its validators. With
+# LUNA_WARMUP on (default) the first request in each worker starts a daemon thread that
+# does this in the background; it runs post-fork, so it is safe under gunicorn --preload.
+WARMUP = os.getenv("LUNA_WARMUP", "1") != "0"
+_warm_lock = threading.Lock()
+_warm_started = False
+
+def _warm_figures() -> None:
+    now = utcnow()
+    df = pd.DataFrame({"timestamp": [now - timedelta(minutes=1), now], "open": [1.0, 1.0], "high": [1.0, 1.0],
+                       "low": [1.0, 1.0], "close": [1.0, 1.0], "volume": [0.0, 0.0]})
+    pio.to_html(fig_price(df, "warmup"), include_plotlyjs=False, full_html=False)
+    pio.to_html(fig_line(df, "close", "warmup"), include_plotlyjs=False, full_html=False)
+
+def start_warmup() -> None:
+    global _warm_started
+    with _warm_lock:
+        if _warm_started: return
+        _warm_started = True
+    warm_in_background(DEFERRED_IMPORTS, _warm_figures)
+
+@app.before_request
+def _req_start():
+    g._t0 = time.perf_counter()
+    if WARMUP and not _warm_started:
+        start_warmup()
+    if request.endpoint in PROFILED_ENDPOINTS:
+        flag = request.headers.get("X-Luna-Profile") or request.args.get("_profile")
+        if PROFILER.should_profile(flag):
+            sym = request.args.get("symbol") or request.args.get("query") or ""
+            g._prof = PROFILER.start(f"{request.endpoint}_{sym}")
+
+# ---------- caching headers / compression ----------
+# /analyze and /expand_json carry strong ETags over (symbol, tf, frame fingerprint, build),
+# so a revalidation (browser or static/pwa/sw.js) costs a frame load and a 304, not a render.
+CACHE_CONTROL = {
+    "analyze": "private, no-cache",
+    "expand_json": "private, no-cache",
+    "analyze_result": "no-store",
+    "metrics": "no-store",
+    "diag_caches": "no-store",
+    "live_poll": "no-store",
+}
+COMPRESSED_ENDPOINTS = {"analyze", "analyze_result", "expand_json", "metrics", "diag_caches"}
+
+@app.after_request
+def _req_done(resp):
+    finalize_response(resp, CACHE_CONTROL, COMPRESSED_ENDPOINTS)
+    t0 = getattr(g, "_t0", None)
+    if t0 is not None:
+        telemetry.observe("luna_http_request_seconds", time.perf_counter() - t0,
+                          endpoint=request.endpoint or "unknown", status=str(resp.status_code))
+    prof = g.pop("_prof", None)
+    if prof is not None:
+        path = PROFILER.stop(prof)
+        if path is not None:
+            resp.headers["X-Luna-Profile-File"] = path.name
+    return resp
+
+@app.teardown_request
+def _req_teardown(exc):
+    prof = g.pop("_prof", None)  # request died before after_request
+    if prof is not None:
+        PROFILER.stop(prof)
+
 # ---------- routes ----------
 @app.get("/")
 def home():
@@ -1648,54 +1984,69 @@ def sanitize_query(q: str) -> str:
     if len(q) > 100: return q[:100]
     return re.sub(r'[^a-zA-Z0-9_:/.\- ]', '', q)
 
-@app.get("/analyze")
-def analyze():
-    symbol_raw = (request.args.get("query") or request.args.get("symbol") or "ETH").strip()
-    symbol_raw = sanitize_query(symbol_raw)
-    tf = (request.args.get("tf") or "12h")
+# ---------- async hydrate ----------
+# A cold symbol can spend seconds in the vendor chain. /analyze hands the hydrate to
+# HYDRATE_JOBS, waits up to LUNA_HYDRATE_GRACE_SEC, and otherwise returns the page shell
+# with a job id; control_panel.js polls /analyze_result and fills the tiles in.
+# Requests for the same (symbol, resolution) share one in-flight job.
+ASYNC_HYDRATE = os.getenv("LUNA_ASYNC_HYDRATE", "1") != "0"
+HYDRATE_GRACE_SEC = float(os.getenv("LUNA_HYDRATE_GRACE_SEC", "1.5"))
+HYDRATE_JOBS = JobQueue("hydrate", workers=int(os.getenv("LUNA_HYDRATE_WORKERS", "2")))
+
+def _hydrate_job(symbol_raw: str, tf: str) -> Dict[str, Any]:
+    canon = canonicalize_query(symbol_raw)
+    df = hydrate_symbol(canon, force=False, tf_for_fetch=tf)
+    return {"symbol": _norm_for_cache(canon), "rows": int(len(df))}
+
+def submit_hydrate(symbol_raw: str, tf: str) -> Job:
+    key = ("hydrate", _norm_for_cache(known_canonical(symbol_raw) or symbol_raw), TF_RES.get(tf, "15m"))
+    return HYDRATE_JOBS.submit(key, _hydrate_job, symbol_raw, tf)
+
+def _job_frame(job: Job) -> pd.DataFrame:
+    res = job.result if job.state == "done" else None
+    if not res or not res.get("rows"):
+        return pd.DataFrame()
+    return load_cached_frame(res["symbol"])
+
+def _job_problem(job: Job) -> Optional[str]:
+    """What to tell the user when a finished hydrate job has nothing to draw."""
+    if job.state == "error":
+        return f"Market data fetch failed: {job.error or 'unknown error'}"
+    if job.state == "done" and not (job.result or {}).get("rows"):
+        return "No market data found for this symbol."
+    return None
 
-    # --- hydrate main dataframe ---
-    df_full = hydrate_symbol(symbol_raw, force=False, tf_for_fetch=tf)
-    if df_full.empty:
+def _placeholder_frame() -> pd.DataFrame:
+    now = utcnow()
+    return pd.DataFrame({
+        "timestamp": [now - timedelta(minutes=1), now],
+        "open":[0,0],"high":[0,0],"low":[0,0],"close":[0,0],"volume":[0,0]
+    })
+
+def _analyze_view(symbol_raw: str, tf: str, df_full: pd.DataFrame, problem: Optional[str] = None) -> Dict[str, Any]:
+    """Everything the control panel shows except the tile figures themselves.
+    `problem` (e.g. a failed hydrate job) replaces the TL;DR when there is no data."""
+    placeholder = df_full.empty
+    if placeholder:
         LOG.warning("[Analyze] %s returned empty frame — rendering placeholder.", symbol_raw)
-        now = utcnow()
-        df_full = pd.DataFrame({
-            "timestamp": [now - timedelta(minutes=1), now],
-            "open":[0,0],"high":[0,0],"low":[0,0],"close":[0,0],"volume":[0,0]
-        })
+        df_full = _placeholder_frame()
 
     # --- slice & resample for the visible charts ---
-    df_view = slice_df(df_full, tf)
-    df_view = resample_for_tf(df_view, tf)
-    df_view = compute_indicators(df_view)
+    with span("resample"):
+        df_view = slice_df(df_full, tf)
+        df_view = resample_for_tf(df_view, tf)
+    with span("compute_indicators"):
+        df_view = compute_indicators(df_view)
 
     # --- symbol display label ---
-    meta = META_CACHE.get(_norm_for_cache(canonicalize_query(symbol_raw))) or {}
+    s_key = _norm_for_cache(canonicalize_query(symbol_raw))
+    meta = META_CACHE.get(s_key) or {}
     name_sym = meta.get("label")
     symbol_disp = name_sym if (name_sym and is_address(symbol_raw)) else _disp_symbol(symbol_raw)
 
-    # --- performance/investment rollups ---
-    perf, invest = compute_rollups(df_full)
-
-    # --- build tiles for grid ---
-    tiles: Dict[str, str] = {
-        "PRICE": safe_tile(pio.to_html(
-            fig_price(df_view if not df_view.empty else df_full, symbol_disp),
-            include_plotlyjs=False, full_html=False)),
-        "RSI":   safe_tile(pio.to_html(fig_line(df_view, "rsi", "RSI"), include_plotlyjs=False, full_html=False)),
-        "MCAP":  safe_tile(pio.to_html(
-                    fig_line(df_view if "market_cap" in df_view.columns else df_full,
-                             "market_cap", "Market Cap"),
-                    include_plotlyjs=False, full_html=False)),
-        "MACD":  safe_tile(pio.to_html(fig_line(df_view, "macd_line", "MACD"), include_plotlyjs=False, full_html=False)),
-        "OBV":   safe_tile(pio.to_html(fig_line(df_view, "obv", "OBV"), include_plotlyjs=False, full_html=False)),
-        "ATR":   safe_tile(pio.to_html(fig_line(df_view, "atr14", "ATR 14"), include_plotlyjs=False, full_html=False)),
-        "BANDS": safe_tile(pio.to_html(fig_line(df_view, "bb_width", "Bands Width"), include_plotlyjs=False, full_html=False)),
-        "VOL":   safe_tile(pio.to_html(fig_line(df_view, "volume", "Volume Trend"), include_plotlyjs=False, full_html=False)),
-        "LIQ":   safe_tile(pio.to_html(fig_line(df_view, "volume", "Liquidity"), include_plotlyjs=False, full_html=False)),
-        "ADX":   safe_tile(pio.to_html(fig_line(df_view, "adx14", "ADX 14"), include_plotlyjs=False, full_html=False)),
-        "ALT":   safe_tile(pio.to_html(fig_line(df_view, "alt_momentum", "ALT (Momentum)"), include_plotlyjs=False, full_html=False)),
-    }
+    # --- performance/investment rollups (precomputed summary; O(1) on cache hits) ---
+    summ = {} if placeholder else update_summary(s_key, df_full)  # never persist placeholder bars
+    perf, invest = summ.get("perf") or {}, summ.get("invest") or {}
 
     # --- TL;DR block ---
     def pct(v): return ("n/a" if v is None else f"{v:+.2f}%")
@@ -1703,47 +2054,251 @@ def analyze():
     facts = build_header_facts(meta)
     if facts:
         tldr_line = f"{facts} — " + tldr_line
+    if problem:
+        tldr_line = f"⚠️ {problem}"
 
     # --- last updated timestamp ---
     updated = (
-        pd.to_datetime(df_full["timestamp"]).max().strftime("UTC %Y-%m-%d %H:%M")
-        if not df_full.empty else _to_iso(utcnow())
+        pd.Timestamp(summ["last_ts"]).strftime("UTC %Y-%m-%d %H:%M")
+        if summ.get("last_ts") else _to_iso(utcnow())
     )
 
-    # ==========================================================================
-    #                         ATH CALCULATIONS (NEW)
-    # ==========================================================================
-    ath_price, ath_date = calculate_all_time_high(df_full)
+    # --- ATH ---
+    ath_price, ath_date = summ.get("ath"), summ.get("ath_ts")
     pct_from_ath = None
     try:
         if ath_price:
-            last_close = float(df_full.iloc[-1]["close"])
-            pct_from_ath = percent_from_ath(last_close, ath_price)
+            pct_from_ath = percent_from_ath(summ.get("last_close"), ath_price)
     except Exception:
         pct_from_ath = None
-    # ==========================================================================
-
-    # --- render page (ATH now included in template context) ---
-    return render_template(
-        "control_panel.html",
-        symbol=symbol_disp,
-        symbol_raw=symbol_raw,
-        tf=tf,
-        updated=updated,
-
-        tiles=tiles,
-        performance=perf,
-        investment=invest,
-        tldr_line=tldr_line,
-        build=BUILD_TAG,
-
-        # ---------------------------
-        # NEW ATH CONTEXT VARIABLES
-        # ---------------------------
-        ath_price=ath_price,
-        ath_date=ath_date,
-        pct_from_ath=pct_from_ath
-    )
+
+    return {"df_full": df_full, "df_view": df_view, "symbol": symbol_disp, "performance": perf,
+            "investment": invest, "tldr_line": tldr_line, "updated": updated,
+            "ath_price": ath_price, "ath_date": ath_date, "pct_from_ath": pct_from_ath}
+
+def _tile_builders(view: Dict[str, Any]) -> Dict[str, Callable[[], Any]]:
+    df_view, df_full, symbol_disp = view["df_view"], view["df_full"], view["symbol"]
+    return {
+        "PRICE": lambda: fig_price(df_view if not df_view.empty else df_full, symbol_disp),
+        "RSI":   lambda: fig_line(df_view, "rsi", "RSI"),
+        "MCAP":  lambda: fig_line(df_view if "market_cap" in df_view.columns else df_full, "market_cap", "Market Cap"),
+        "MACD":  lambda: fig_line(df_view, "macd_line", "MACD"),
+        "OBV":   lambda: fig_line(df_view, "obv", "OBV"),
+        "ATR":   lambda: fig_line(df_view, "atr14", "ATR 14"),
+        "BANDS": lambda: fig_line(df_view, "bb_width", "Bands Width"),
+        "VOL":   lambda: fig_line(df_view, "volume", "Volume Trend"),
+        "LIQ":   lambda: fig_line(df_view, "volume", "Liquidity"),
+        "ADX":   lambda: fig_line(df_view, "adx14", "ADX 14"),
+        "ALT":   lambda: fig_line(df_view, "alt_momentum", "ALT (Momentum)"),
+    }
+
+TILE_KEYS = ["PRICE", "RSI", "MCAP", "MACD", "OBV", "ATR", "BANDS", "VOL", "LIQ", "ADX", "ALT"]
+
+def _render_pending(symbol_raw: str, tf: str, job: Job) -> Response:
+    pending = "<div class='chart-missing tile__pending'>Loading market data…</div>"
+    with span("template"):
+        html = render_template(
+            "control_panel.html",
+            symbol=_disp_symbol(symbol_raw), symbol_raw=symbol_raw, tf=tf, updated="— loading",
+            tiles={k: pending for k in TILE_KEYS}, performance={}, investment={},
+            tldr_line="Fetching market data…", build=BUILD_TAG,
+            ath_price=None, ath_date=None, pct_from_ath=None, job_id=job.id,
+        )
+    return Response(html, mimetype="text/html", headers={"Cache-Control": "no-store"})
+
+@app.get("/analyze")
+def analyze():
+    symbol_raw = (request.args.get("query") or request.args.get("symbol") or "ETH").strip()
+    symbol_raw = sanitize_query(symbol_raw)
+    tf = (request.args.get("tf") or "12h")
+
+    # --- hydrate main dataframe (in the background when the cache can't answer) ---
+    problem = None
+    if ASYNC_HYDRATE:
+        canon = known_canonical(symbol_raw)  # unknown address case: the job canonicalizes it
+        s_key = _norm_for_cache(canon if canon is not None else symbol_raw)
+        df_full = cached_if_fresh(s_key, tf) if canon is not None else None
+        if df_full is None:
+            job = submit_hydrate(symbol_raw, tf)
+            if not job.wait(HYDRATE_GRACE_SEC):
+                return _render_pending(symbol_raw, tf, job)
+            df_full, problem = _job_frame(job), _job_problem(job)
+            s_key = (job.result or {}).get("symbol") or s_key
+    else:
+        s_key = _norm_for_cache(canonicalize_query(symbol_raw))
+        df_full = hydrate_symbol(symbol_raw, force=False, tf_for_fetch=tf)
+
+    if problem is None:
+        meta = META_CACHE.get(s_key) or {}  # label + header facts are rendered into the page too
+        etag = etag_for("analyze", s_key, tf, data_version(s_key, df_full, persist=True),
+                        meta.get("label"), build_header_facts(meta), BUILD_TAG)
+        cached = not_modified(etag, CACHE_CONTROL["analyze"])
+        if cached is not None:
+            return cached
+
+    view = _analyze_view(symbol_raw, tf, df_full, problem)
+    tiles = {k: _render_tile(k, build) for k, build in _tile_builders(view).items()}
+
+    with span("template"):
+        html = render_template(
+            "control_panel.html",
+            symbol=view["symbol"],
+            symbol_raw=symbol_raw,
+            tf=tf,
+            updated=view["updated"],
+
+            tiles=tiles,
+            performance=view["performance"],
+            investment=view["investment"],
+            tldr_line=view["tldr_line"],
+            build=BUILD_TAG,
+
+            ath_price=view["ath_price"],
+            ath_date=view["ath_date"],
+            pct_from_ath=view["pct_from_ath"],
+        )
+    if problem is not None:
+        return Response(html, mimetype="text/html", headers={"Cache-Control": "no-store"})
+    return tag(Response(html, mimetype="text/html"), etag)
+
+@app.get("/analyze_result")
+def analyze_result():
+    """Poll target for a pending /analyze: 202 + job status until done, then tiles as figure JSON."""
+    job = HYDRATE_JOBS.get(request.args.get("job") or "")
+    if job is None:
+        return jsonify({"state": "unknown"}), 404
+    if not job.done:
+        return jsonify(job.to_dict()), 202
+    symbol_raw = sanitize_query(request.args.get("symbol") or (job.result or {}).get("symbol") or "ETH")
+    tf = (request.args.get("tf") or "12h")
+    problem = _job_problem(job)
+    view = _analyze_view(symbol_raw, tf, _job_frame(job), problem)
+    tiles = {}
+    if problem is None:  # nothing to draw otherwise; the page says why instead
+        for k, build in _tile_builders(view).items():
+            with span("figure", tile=k):
+                tiles[k] = build().to_plotly_json()
+    out = {k: view[k] for k in ("symbol", "performance", "investment", "tldr_line", "updated",
+                                "ath_price", "ath_date", "pct_from_ath")}
+    out.update(job.to_dict(), tiles=tiles, problem=problem)
+    return jsonify(out)
+
+# ---------- live updates (SSE) ----------
+# GET /live?symbol=&tf= streams `bars` events: the newest bars of the visible window with
+# the indicator values the tiles draw. One LIVE publisher per (symbol, tf) refreshes every
+# LUNA_LIVE_POLL_SEC (through HYDRATE_JOBS, and only when the cache is stale) and is also
+# woken by save_frame(); every watcher of that pair gets the same event.
+# Each open stream holds a server thread, so at most LUNA_LIVE_MAX_SUBS streams are open
+# (default: half of LUNA_HTTP_THREADS, which should match gunicorn --threads). Past that,
+# /live answers 503 and the page short-polls GET /live_poll, which never blocks a thread.
+LIVE_POLL_SEC = float(os.getenv("LUNA_LIVE_POLL_SEC", "30"))
+LIVE_MAX_SEC = float(os.getenv("LUNA_LIVE_MAX_SEC", "300"))
+HTTP_THREADS = int(os.getenv("LUNA_HTTP_THREADS", "4"))
+LIVE_MAX_SUBS = int(os.getenv("LUNA_LIVE_MAX_SUBS", str(HTTP_THREADS // 2)))
+LIVE_TAIL = 3  # bars sent to a new topic's first subscribers; the page already has the rest
+LIVE_COLS = ["open", "high", "low", "close", "volume", "market_cap",
+             "rsi", "macd_line", "macd_signal", "macd_hist", "obv", "atr14", "adx14", "alt_momentum",
+             "bb_width", "bb_upper", "bb_mid", "bb_lower"]
+
+def _live_frame(symbol: str, tf: str, wait: float) -> pd.DataFrame:
+    """The cached frame; when it is stale, refresh through HYDRATE_JOBS (waiting up to `wait`)."""
+    df = cached_if_fresh(symbol, tf)
+    if df is not None:
+        return df
+    job = submit_hydrate(symbol, tf)
+    if wait > 0:
+        job.wait(wait)
+    return load_cached_frame(symbol)
+
+def _live_poll(key: Tuple[str, str], cursor: Optional[dict], wait: float = LIVE_POLL_SEC) -> Tuple[Optional[dict], dict]:
+    """Publisher step for one (symbol, tf): refresh, then return bars from the last sent one on."""
+    symbol, tf = key
+    cursor = cursor or {"symbol": _norm_for_cache(canonicalize_query(symbol)), "last": None, "sig": None}
+    df = _live_frame(cursor["symbol"], tf, wait)
+    if df.empty:
+        return None, cursor
+    with span("resample"):
+        dfv = resample_for_tf(slice_df(df, tf), tf)
+    with span("compute_indicators"):
+        dfv = compute_indicators(dfv, [c for c in LIVE_COLS if c in indicators.COLUMNS])
+    if dfv.empty:
+        return None, cursor
+    ts = pd.to_datetime(dfv["timestamp"], utc=True)
+    tail = dfv[ts >= cursor["last"]] if cursor["last"] is not None else dfv.tail(LIVE_TAIL)
+    cols = [c for c in LIVE_COLS if c in tail.columns]
+    sig = (ts.iloc[-1], tuple(tail[cols].iloc[-1].tolist()))
+    if sig == cursor["sig"]:
+        return None, cursor  # nothing new, last bar unchanged
+    cursor.update(last=ts.iloc[-1], sig=sig)
+    vals = tail[cols].astype("float64")
+    event = {
+        "symbol": symbol, "tf": tf, "start": ts.iloc[0].tz_convert(USER_TZ).isoformat(),
+        "x": [t.isoformat() for t in ts.loc[tail.index].dt.tz_convert(USER_TZ)],
+        "cols": {c: [None if not np.isfinite(v) else float(v) for v in vals[c].to_numpy()] for c in cols},
+    }
+    return event, cursor
+
+LIVE = LiveHub("live", _live_poll, interval=LIVE_POLL_SEC, max_subs=LIVE_MAX_SUBS)
+
+@app.get("/live")
+def live():
+    ip = request.headers.get("X-Forwarded-For", request.remote_addr or "na").split(",")[0].strip()
+    if not allow_rate(ip, "/live", limit=30, window_sec=60):
+        return jsonify({"error": "rate limited"}), 429
+    symbol_raw = sanitize_query(request.args.get("symbol") or "ETH")
+    tf = (request.args.get("tf") or "12h")
+    # keyed like save_frame()'s notify: canonical symbol, so new bars wake this topic
+    sub = LIVE.subscribe((_norm_for_cache(known_canonical(symbol_raw) or symbol_raw), tf))
+    if sub is None:
+        return jsonify({"error": "too many live streams"}), 503
+
+    def stream():
+        try:
+            yield "retry: 5000\n\n"
+            deadline = time.monotonic() + LIVE_MAX_SEC
+            while not sub.closed and time.monotonic() < deadline:
+                ev = sub.get(timeout=15)
+                if ev is None:
+                    yield ": ping\n\n"
+                    continue
+                yield f"id: {ev['seq']}\nevent: bars\ndata: {json.dumps(ev)}\n\n"
+        finally:
+            sub.close()
+
+    return Response(stream(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/live_poll")
+def live_poll():
+    """Short-poll fallback for /live: bars from `since` (the newest x the page has) on, or 204."""
+    ip = request.headers.get("X-Forwarded-For", request.remote_addr or "na").split(",")[0].strip()
+    if not allow_rate(ip, "/live_poll", limit=30, window_sec=60):
+        return jsonify({"error": "rate limited"}), 429
+    symbol_raw = sanitize_query(request.args.get("symbol") or "ETH")
+    tf = (request.args.get("tf") or "12h")
+    try:
+        since = pd.Timestamp(request.args["since"]).tz_convert("UTC") if request.args.get("since") else None
+    except Exception:
+        since = None
+    cursor = {"symbol": _norm_for_cache(known_canonical(symbol_raw) or symbol_raw), "last": since, "sig": None}
+    event, _ = _live_poll((cursor["symbol"], tf), cursor, wait=0)  # stale: refresh in the background
+    if event is None:
+        return Response(status=204, headers={"X-Live-Poll-Sec": str(int(LIVE_POLL_SEC))})
+    event["next_sec"] = LIVE_POLL_SEC
+    return jsonify(event)
+
+# indicator columns each expanded tile reads (figure + talk_for_key); unknown keys get all
+EXPAND_COLS: Dict[str, List[str]] = {
+    "PRICE": ["bb_mid", "bb_upper", "bb_lower"],
+    "RSI":   ["rsi"],
+    "MACD":  ["macd_line", "macd_signal", "macd_hist"],
+    "BANDS": ["bb_width"],
+    "OBV":   ["obv"],
+    "ADX":   ["adx14"],
+    "ATR":   ["atr14"],
+    "ALT":   ["alt_momentum"],
+    "MCAP":  [], "VOL": [], "LIQ": [],
+}
 
 @app.get("/expand_json")
 def expand_json():
@@ -1763,26 +2318,34 @@ def expand_json():
         if df.empty:
             df = hydrate_symbol(symbol_raw, force=False, tf_for_fetch=tf)
 
-        dfv = slice_df(df, tf)
-        dfv = resample_for_tf(dfv, tf)
-        dfv = compute_indicators(dfv)  # ensure tiles have their values
+        s_key = _norm_for_cache(symbol_raw)
+        etag = etag_for("expand", s_key, tf, key, data_version(s_key, df), BUILD_TAG)
+        cached = not_modified(etag, CACHE_CONTROL["expand_json"])
+        if cached is not None:
+            return cached
+
+        with span("resample"):
+            dfv = slice_df(df, tf)
+            dfv = resample_for_tf(dfv, tf)
+        with span("compute_indicators"):
+            dfv = compute_indicators(dfv, EXPAND_COLS.get(key))  # only what this tile draws + talks about
 
         # choose figure
-        if   key == "PRICE":  fig = fig_price(dfv if not dfv.empty else df, _disp_symbol(symbol_raw))
-        elif key == "RSI":    fig = fig_line(dfv, "rsi", "RSI", h=360)
-        elif key == "MACD":   fig = fig_line(dfv, "macd_line", "MACD", h=360)
-        elif key == "MCAP":   fig = fig_line(dfv if "market_cap" in dfv.columns else df, "market_cap", "Market Cap", h=360)
-        elif key == "BANDS":  fig = fig_line(dfv, "bb_width", "Bollinger Width", h=360)
-        elif key == "VOL":    fig = fig_line(dfv, "volume", "Volume Trend", h=360)
-        elif key == "LIQ":    fig = fig_line(dfv, "volume", "Liquidity", h=360)
-        elif key == "OBV":    fig = fig_line(dfv, "obv", "OBV", h=360)
-        elif key == "ADX":    fig = fig_line(dfv, "adx14", "ADX 14", h=360)
-        elif key == "ATR":    fig = fig_line(dfv, "atr14", "ATR 14", h=360)
-        elif key == "ALT":    fig = fig_line(dfv, "alt_momentum", "ALT momentum", h=360)
-        else:                 fig = fig_line(dfv, "close", key, h=360)
+        if   key == "PRICE":  fig = fig_price(dfv if not dfv.empty else df, _disp_symbol(symbol_raw), EXPAND_POINTS)
+        elif key == "RSI":    fig = fig_line(dfv, "rsi", "RSI", h=360, max_points=EXPAND_POINTS)
+        elif key == "MACD":   fig = fig_line(dfv, "macd_line", "MACD", h=360, max_points=EXPAND_POINTS)
+        elif key == "MCAP":   fig = fig_line(dfv if "market_cap" in dfv.columns else df, "market_cap", "Market Cap", h=360, max_points=EXPAND_POINTS)
+        elif key == "BANDS":  fig = fig_line(dfv, "bb_width", "Bollinger Width", h=360, max_points=EXPAND_POINTS)
+        elif key == "VOL":    fig = fig_line(dfv, "volume", "Volume Trend", h=360, max_points=EXPAND_POINTS)
+        elif key == "LIQ":    fig = fig_line(dfv, "volume", "Liquidity", h=360, max_points=EXPAND_POINTS)
+        elif key == "OBV":    fig = fig_line(dfv, "obv", "OBV", h=360, max_points=EXPAND_POINTS)
+        elif key == "ADX":    fig = fig_line(dfv, "adx14", "ADX 14", h=360, max_points=EXPAND_POINTS)
+        elif key == "ATR":    fig = fig_line(dfv, "atr14", "ATR 14", h=360, max_points=EXPAND_POINTS)
+        elif key == "ALT":    fig = fig_line(dfv, "alt_momentum", "ALT momentum", h=360, max_points=EXPAND_POINTS)
+        else:                 fig = fig_line(dfv, "close", key, h=360, max_points=EXPAND_POINTS)
 
         talk = f"{key} — " + talk_for_key(key, dfv if not dfv.empty else df)
-        return jsonify({"fig": fig.to_plotly_json(), "talk": talk, "tf": tf, "key": key})
+        return tag(jsonify({"fig": fig.to_plotly_json(), "talk": talk, "tf": tf, "key": key}), etag)
 
     except Exception as e:
         LOG.exception("[expand_json] failed: %s", e)
@@ -1895,16 +2458,15 @@ def api_luna():
     if df.empty:
         df = hydrate_symbol(symbol, force=False, tf_for_fetch=tf)
 
-    meta = META_CACHE.get(_norm_for_cache(canonicalize_query(symbol))) or {}
+    s_key = _norm_for_cache(canonicalize_query(symbol))
+    meta = META_CACHE.get(s_key) or {}
     disp = meta.get("label") if (meta.get("label") and is_address(symbol)) else _disp_symbol(symbol)
 
-    # --- ATH calc ---
-    ath_price, ath_date = calculate_all_time_high(df)
-    try:
-        last_close = float(df.iloc[-1]["close"])
-    except Exception:
-        last_close = None
-    pct_from_ath = percent_from_ath(last_close, ath_price)
+    # --- ATH calc (from the precomputed summary) ---
+    summ = update_summary(s_key, df)
+    ath_price, ath_date = summ.get("ath"), summ.get("ath_ts")
+    pct_from_ath = percent_from_ath(summ.get("last_close"), ath_price)
+    df.attrs["summary"] = summ
 
     # Attach for downstream logic
     df._ath_price = ath_price
@@ -1915,7 +2477,8 @@ def api_luna():
     from luna_agent import answer_question
     from luna_agent import answer_question
     try:
-        reply = answer_question(disp, df, tf, text)
+        with span("answer"):
+            reply = answer_question(disp, df, tf, text)
         if not reply or not isinstance(reply, str):
             reply = f"{disp}: I couldn't form an answer from the data."
     except Exception as e:
@@ -1941,21 +2504,69 @@ def healthz():
             return "ok" if (r and r.ok) else "down"
         except Exception: return "down"
     vendors = {
-        "cc": ping("https://min-api.cryptocompare.com/data/price", {"fsym":"ETH","tsyms":"USD"}),
-        "cg": ping("https://api.coingecko.com/api/v3/ping"),
-        "ds": ping("https://api.dexscreener.com/latest/dex/search", {"q":"eth"}),
-        "gt": ping("https://api.geckoterminal.com/api/v2/networks/eth/tokens/0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee"),
+        "cc": ping(f"{CC_BASE}/price", {"fsym":"ETH","tsyms":"USD"}),
+        "cg": ping(f"{CG_BASE}/ping"),
+        "ds": ping(f"{DS_BASE}/latest/dex/search", {"q":"eth"}),
+        "gt": ping(f"{GT_BASE}/networks/eth/tokens/0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee"),
     }
     st = _fetch_log()
     return jsonify({
         "vendors": vendors,
         "cache": {
-            "frames_files": len(list(FRAMES_DIR.glob("*.*"))),
+            "frames_files": len(list(FRAMES_DIR.rglob("*.parquet"))),
         },
         "last_fetches": st,
         "build": BUILD_TAG
     })
 
+def _hotset_symbols(limit: int = 50) -> List[str]:
+    try:
+        lines = HOTSET.read_text(encoding="utf-8").splitlines()
+    except Exception:
+        lines = []
+    lines += WRITER.peek("hotset") or []
+    seen: List[str] = []
+    for s in reversed(lines):
+        s = s.strip()
+        if s and s not in seen:
+            seen.append(s)
+        if len(seen) >= limit: break
+    return seen
+
+@app.get("/diag/memory")
+def diag_memory():
+    frames = {f"{sym}@{res}": load_frame_res(sym, res)
+              for sym in _hotset_symbols() for res in cached_resolutions(sym)}
+    return jsonify(memory_report(frames))
+
+@app.get("/metrics")
+def metrics():
+    gauges: Dict[str, Dict[tuple, float]] = {"luna_cache_hit_ratio": {}, "luna_cache_items": {}}
+    for name, st in cache_stats().items():
+        gauges["luna_cache_items"][telemetry.labels(cache=name)] = st["items"]
+        if st["hit_ratio"] is not None:
+            gauges["luna_cache_hit_ratio"][telemetry.labels(cache=name)] = st["hit_ratio"]
+    gauges["luna_write_queue_pending"] = {(): WRITER.pending()}
+    gauges["luna_jobs_inflight"] = {telemetry.labels(queue="hydrate"): HYDRATE_JOBS.stats()["inflight"]}
+    live = LIVE.stats()
+    gauges["luna_live_topics"] = {(): live["topics"]}
+    gauges["luna_live_subscribers"] = {(): live["subscribers"]}
+    gauges["luna_startup_seconds"] = {(): STARTUP_SECONDS}
+    gauges["luna_deferred_import_seconds"] = {telemetry.labels(module=m): t for m, t in LOAD_TIMES.items()}
+    return Response(telemetry.render(gauges), mimetype="text/plain; version=0.0.4")
+
+@app.get("/diag/caches")
+def diag_caches():
+    return jsonify({"caches": cache_stats(), "writer": WRITER.snapshot(), "jobs": HYDRATE_JOBS.stats(),
+                    "live": LIVE.stats(), "quota": CC_POOL.snapshot() + CG_POOL.snapshot(),
+                    "build": BUILD_TAG})
+
 # ---------- run ----------
+STARTUP_SECONDS = time.perf_counter() - _T_IMPORT
+
 if __name__ == "__main__":
+    if "--startup-report" in sys.argv:
+        # import-time breakdown of a fresh `import server`, plus what the deferred imports cost
+        print(startup_report("server", DEFERRED_IMPORTS, cwd=str(ROOT)))
+        sys.exit(0)
     app.run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
\ No newline at end of file
@@ -13,6 +13,8 @@ from flask import Flask, jsonify, render_template, request, Response
 import plotly.graph_objects as go
 import plotly.io as pio
 
+import indicators as ind
+
 # ===== PATHS =====
 FRAMES_DIR = Path(r"C:\Users\jmpat\Desktop\Luna AI\luna_cache\data\derived\frames")
 DERIVED_DIR = FRAMES_DIR.parent
@@ -83,26 +85,9 @@ def ensure_derived(df: pd.DataFrame) -> pd.DataFrame:
     out = df.copy()
     price = out["close"].astype(float)
 
-    # RSI
-    d = price.diff()
-    up = d.clip(lower=0)
-    dn = -d.clip(upper=0).replace(0, 1e-9)
-    roll_up = up.ewm(span=14, adjust=False).mean()
-    roll_dn = dn.ewm(span=14, adjust=False).mean()
-    rs = roll_up / roll_dn
-    out["rsi"] = 100 - (100 / (1 + rs))
-
-    # MACD
-    ema12 = price.ewm(span=12, adjust=False).mean()
-    ema26 = price.ewm(span=26, adjust=False).mean()
-    out["macd_line"] = ema12 - ema26
-    out["macd_signal"] = out["macd_line"].ewm(span=9, adjust=False).mean()
-
-    # Bollinger
-    mid = price.rolling(20, min_periods=5).mean()
-    std = price.rolling(20, min_periods=5).std()
-    out["bb_upper"] = mid + 2 * std
-    out["bb_lower"] = mid - 2 * std
+    out["rsi"] = ind.rsi(price, 14)
+    out["macd_line"], out["macd_signal"], _ = ind.macd(price, 12, 26, 9)
+    _, out["bb_upper"], out["bb_lower"] = ind.bollinger(price, 20, 2.0, min_periods=5)
     return out
 
 # ===== ROI =====
@@ -1,33 +1,32 @@
 # session_manager.py — in-memory 21 Questions sessions + transcript
-import uuid, time
+import os, uuid, time
 from typing import Dict, Any, List, Tuple, Optional
 
+from ttl_cache import TTLCache
+
+MAX_SESSIONS = int(os.getenv("LUNA_MAX_SESSIONS", "5000"))
+
 class SessionManager:
-    def __init__(self):
-        # sid -> record
-        self.sessions: Dict[str, Dict[str, Any]] = {}
+    def __init__(self, max_sessions: int = MAX_SESSIONS):
+        # sid -> record; idle sessions are reaped in the background, oldest evicted past max_sessions
+        self.sessions = TTLCache("sessions", ttl=1800, max_items=max_sessions)
 
     def start(self, ttl_seconds: int = 1800) -> str:
         sid = str(uuid.uuid4())
-        self.sessions[sid] = {
+        self.sessions.put(sid, {
             "questions_left": 21,
             "history": [],                 # list of {"role": "user|assistant|system", "text": str}
             "ttl": ttl_seconds,
             "last_touch": time.time(),
             "cache": {}                    # (chain, contract) -> snapshot
-        }
+        }, ttl=ttl_seconds)
         return sid
 
     def _expired(self, sid: str) -> bool:
-        s = self.sessions.get(sid)
-        if not s: return True
-        return (time.time() - s["last_touch"]) > s["ttl"]
+        return sid not in self.sessions
 
     def touch(self, sid: str) -> bool:
-        if sid not in self.sessions: return False
-        if self._expired(sid):
-            self.sessions.pop(sid, None)
-            return False
+        if not self.sessions.touch(sid): return False
         self.sessions[sid]["last_touch"] = time.time()
         return True
 
@@ -47,6 +46,7 @@ class SessionManager:
         if not s: return
         s["history"].append({"role": role, "text": (text or "").strip()[:5000]})
         s["last_touch"] = time.time()
+        self.sessions.touch(sid)
 
     def dump_history_text(self, sid: str) -> str:
         s = self.sessions.get(sid)
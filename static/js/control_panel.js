@@ -27,6 +27,10 @@
     return document.body.getAttribute("data-symbol") || symbolSel?.value || "BTC";
   }
 
+  function rawSymbol() {
+    return window.__SYMBOL_RAW__ || currentSymbol();
+  }
+
   function currentTF() {
     return document.body.getAttribute("data-tf-default") || tfSel?.value || "12h";
   }
@@ -117,6 +121,156 @@
     });
   }
 
+  /* Pending page: poll the hydrate job, then draw tiles + rollups in place */
+  function fmtPct(v)    { return v == null ? "n/a" : (v >= 0 ? "+" : "") + v.toFixed(2) + "%"; }
+  function fmtDollar(v) { return v == null ? "$—" : "$" + v.toFixed(2); }
+
+  function fmtAth(j) {
+    if (!j.ath_price) return "ATH: n/a";
+    return `ATH: $${parseFloat(Number(j.ath_price).toPrecision(6))} (${(j.ath_date || "").slice(0, 10)}, ${fmtPct(j.pct_from_ath)})`;
+  }
+
+  function fillFromResult(j) {
+    if (j.problem) {  // failed / empty hydrate: say so instead of drawing placeholders
+      $$(".tile__pending").forEach(el => { el.textContent = "Market data unavailable."; });
+    }
+    Object.entries(j.tiles || {}).forEach(([key, fig]) => {
+      const body = $(`.tile[data-key="${key}"] .tile__body`);
+      if (!body) return;
+      body.innerHTML = "";
+      Plotly.newPlot(body, fig.data, fig.layout || {}, {responsive:true, displayModeBar:false});
+    });
+    $$("[data-perf]").forEach(el => {
+      const k = el.dataset.perf;
+      el.textContent = `${k}: ${fmtPct((j.performance || {})[k])}`;
+    });
+    $$("[data-invest]").forEach(el => {
+      const k = el.dataset.invest;
+      el.textContent = `${k}: ${fmtDollar((j.investment || {})[k])}`;
+    });
+    if ($('#tldr') && j.tldr_line) $('#tldr').textContent = j.tldr_line;
+    if ($('#updated') && j.updated) $('#updated').textContent = j.updated;
+    if ($('#ath')) $('#ath').textContent = fmtAth(j);
+  }
+
+  // A 404 means this worker doesn't know the job: it expired, or another worker holds it
+  // (workers don't share HYDRATE_JOBS). Re-ask a few times, then reload at most once per
+  // symbol/tf within a minute, so pages can't bounce between workers forever.
+  const MAX_MISSES = 4;
+  function reloadOnce() {
+    const k = `luna_reload:${rawSymbol()}:${currentTF()}`;
+    const last = Number(sessionStorage.getItem(k) || 0);
+    if (Date.now() - last < 60000) return false;
+    sessionStorage.setItem(k, String(Date.now()));
+    window.location.reload();
+    return true;
+  }
+
+  function pollJob(job, delay, misses = 0) {
+    fetch(`/analyze_result?job=${encodeURIComponent(job)}&symbol=${encodeURIComponent(rawSymbol())}&tf=${encodeURIComponent(currentTF())}`)
+      .then(r => {
+        if (r.status === 202) { setTimeout(() => pollJob(job, Math.min(delay * 1.5, 5000)), delay); return null; }
+        if (r.status === 404) {
+          if (misses < MAX_MISSES) setTimeout(() => pollJob(job, delay, misses + 1), 1000);
+          else if (!reloadOnce() && $('#tldr')) $('#tldr').textContent = "Market data is taking a while — refresh to retry.";
+          return null;
+        }
+        return r.json();
+      })
+      .then(j => { if (j) { fillFromResult(j); if (!j.problem) startLive(); } })
+      .catch(() => setTimeout(() => pollJob(job, 5000, misses), 5000));
+  }
+
+  /* Live updates: merge streamed bars into the tiles' existing traces */
+  const TILE_COL = {RSI:"rsi", MCAP:"market_cap", MACD:"macd_line", OBV:"obv", ATR:"atr14",
+                    BANDS:"bb_width", VOL:"volume", LIQ:"volume", ADX:"adx14", ALT:"alt_momentum"};
+  const PRICE_COL = {"BB upper":"bb_upper", "BB mid":"bb_mid", "BB lower":"bb_lower",
+                     "MACD":"macd_line", "Signal":"macd_signal", "MACD Hist":"macd_hist"};
+
+  // replace points with the same timestamp, append newer ones, drop those before `start`
+  // (tiles are downsampled server-side, so trim by time rather than by point count)
+  function mergeSeries(trace, fields, xs, cols, start) {
+    const x = Array.from(trace.x || []);
+    const ys = {};
+    Object.keys(fields).forEach(f => { ys[f] = Array.from(trace[f] || []); });
+    xs.forEach((xi, i) => {
+      const t = Date.parse(xi);
+      let j = x.length - 1;
+      while (j >= 0 && Date.parse(x[j]) > t) j--;
+      if (j >= 0 && Date.parse(x[j]) === t) {
+        Object.entries(fields).forEach(([f, c]) => { ys[f][j] = cols[c][i]; });
+      } else if (j === x.length - 1) {
+        x.push(xi);
+        Object.entries(fields).forEach(([f, c]) => { ys[f].push(cols[c][i]); });
+      }
+    });
+    const t0 = Date.parse(start);
+    let cut = 0;
+    while (cut < x.length && Date.parse(x[cut]) < t0) cut++;
+    trace.x = x.slice(cut);
+    Object.keys(fields).forEach(f => { trace[f] = ys[f].slice(cut); });
+  }
+
+  function applyBars(ev) {
+    $$(".tile[data-key]").forEach(tile => {
+      const gd = $(".js-plotly-plot", tile);
+      if (!gd || !gd.data || !gd.data.length) return;
+      const key = tile.dataset.key;
+      gd.data.forEach(tr => {
+        let fields = null;
+        if (key === "PRICE") {
+          fields = tr.type === "candlestick"
+            ? {open:"open", high:"high", low:"low", close:"close"}
+            : (PRICE_COL[tr.name] ? {y: PRICE_COL[tr.name]} : null);
+        } else if (TILE_COL[key]) {
+          fields = {y: TILE_COL[key]};
+        }
+        if (!fields || !Object.values(fields).every(c => ev.cols[c])) return;
+        mergeSeries(tr, fields, ev.x, ev.cols, ev.start);
+      });
+      if (key !== "PRICE" && gd.layout && gd.layout.yaxis) gd.layout.yaxis.autorange = true;
+      Plotly.react(gd, gd.data, gd.layout);
+    });
+    if ($('#updated')) $('#updated').textContent = "live " + new Date().toLocaleTimeString();
+  }
+
+  // SSE while the server has a stream slot; once /live refuses (503 closes the EventSource
+  // for good) fall back to short polls, which don't hold a server thread between updates.
+  let live = null, polling = false, lastX = null;
+  function onBars(ev) {
+    applyBars(ev);
+    if (ev.x && ev.x.length) lastX = ev.x[ev.x.length - 1];
+  }
+
+  function pollLive(delay) {
+    const since = lastX ? `&since=${encodeURIComponent(lastX)}` : "";
+    fetch(`/live_poll?symbol=${encodeURIComponent(rawSymbol())}&tf=${encodeURIComponent(currentTF())}${since}`)
+      .then(r => r.status === 200 ? r.json() : null)
+      .then(ev => {
+        if (ev) { onBars(ev); delay = (ev.next_sec || 30) * 1000; }
+        setTimeout(() => pollLive(delay), delay);
+      })
+      .catch(() => setTimeout(() => pollLive(60000), 60000));
+  }
+
+  function startLive() {
+    if (live || polling) return;
+    if (!window.EventSource) { polling = true; pollLive(30000); return; }
+    live = new EventSource(`/live?symbol=${encodeURIComponent(rawSymbol())}&tf=${encodeURIComponent(currentTF())}`);
+    live.addEventListener("bars", e => {
+      try { onBars(JSON.parse(e.data)); } catch (err) { /* keep the static page */ }
+    });
+    live.onerror = () => {
+      if (live.readyState !== EventSource.CLOSED) return;  // plain reconnect after the stream's time limit
+      live = null;
+      polling = true;
+      setTimeout(() => pollLive(30000), 30000);
+    };
+  }
+
+  if (window.__JOB__) pollJob(window.__JOB__, 700);
+  else startLive();
+
   /* ASK LUNA — FULL FIXED VERSION */
   if (askSend && askBox) {
     askSend.addEventListener("click", () => {
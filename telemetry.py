@@ -0,0 +1,127 @@
+# telemetry.py — in-process counters/histograms + timing spans, rendered in Prometheus text format
+from __future__ import annotations
+import time, threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_LOCK = threading.Lock()
+_Labels = Tuple[Tuple[str, str], ...]
+_COUNTERS: Dict[str, Dict[_Labels, float]] = {}
+_HISTS: Dict[str, Dict[_Labels, List[float]]] = {}   # buckets..., +Inf count, sum
+_HELP: Dict[str, Tuple[str, str]] = {}                 # name -> (type, help)
+
+def _key(labels: Dict[str, str]) -> _Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def describe(name: str, kind: str, help_text: str) -> None:
+    _HELP[name] = (kind, help_text)
+
+def inc(name: str, value: float = 1.0, **labels) -> None:
+    k = _key(labels)
+    with _LOCK:
+        series = _COUNTERS.setdefault(name, {})
+        series[k] = series.get(k, 0.0) + value
+
+def observe(name: str, value: float, buckets=LATENCY_BUCKETS, **labels) -> None:
+    k = _key(labels)
+    with _LOCK:
+        series = _HISTS.setdefault(name, {})
+        h = series.get(k)
+        if h is None:
+            h = series[k] = [0.0] * (len(buckets) + 2)
+        for i, b in enumerate(buckets):
+            if value <= b:
+                h[i] += 1
+        h[-2] += 1
+        h[-1] += value
+
+@contextmanager
+def span(stage: str, **labels) -> Iterator[None]:
+    """Time a block into luna_stage_seconds{stage=...}."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("luna_stage_seconds", time.perf_counter() - t0, stage=stage, **labels)
+
+def vendor_request(vendor: str, method: str, url: str, **kwargs) -> requests.Response:
+    """requests.request() that records latency, status and bytes per vendor."""
+    t0 = time.perf_counter()
+    status = "error"
+    try:
+        r = requests.request(method, url, **kwargs)
+        status = str(r.status_code)
+        inc("luna_vendor_bytes_total", len(r.content or b""), vendor=vendor)
+        return r
+    except requests.Timeout:
+        status = "timeout"
+        raise
+    finally:
+        dt = time.perf_counter() - t0
+        observe("luna_vendor_request_seconds", dt, vendor=vendor)
+        inc("luna_vendor_requests_total", vendor=vendor, status=status)
+
+def cache_event(cache: str, result: str) -> None:
+    inc("luna_cache_lookups_total", cache=cache, result=result)
+
+# ---------- exposition ----------
+def _fmt_labels(k: _Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(k) + ([extra] if extra else [])
+    if not items: return ""
+    esc = lambda v: v.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+    return "{" + ",".join(f'{a}="{esc(b)}"' for a, b in items) + "}"
+
+def render(gauges: Optional[Dict[str, Dict[_Labels, float]]] = None, buckets=LATENCY_BUCKETS) -> str:
+    """Prometheus text exposition (v0.0.4). `gauges` are point-in-time values supplied by the caller."""
+    lines: List[str] = []
+    with _LOCK:
+        counters = {n: dict(s) for n, s in _COUNTERS.items()}
+        hists = {n: {k: list(v) for k, v in s.items()} for n, s in _HISTS.items()}
+    for name, series in sorted(counters.items()):
+        kind, help_text = _HELP.get(name, ("counter", name))
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        lines += [f"{name}{_fmt_labels(k)} {v:g}" for k, v in sorted(series.items())]
+    for name, series in sorted(hists.items()):
+        _, help_text = _HELP.get(name, ("histogram", name))
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for k, h in sorted(series.items()):
+            for i, b in enumerate(buckets):
+                lines.append(f"{name}_bucket{_fmt_labels(k, ('le', f'{b:g}'))} {h[i]:g}")
+            lines.append(f"{name}_bucket{_fmt_labels(k, ('le', '+Inf'))} {h[-2]:g}")
+            lines.append(f"{name}_count{_fmt_labels(k)} {h[-2]:g}")
+            lines.append(f"{name}_sum{_fmt_labels(k)} {h[-1]:.6f}")
+    for name, series in sorted((gauges or {}).items()):
+        _, help_text = _HELP.get(name, ("gauge", name))
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        lines += [f"{name}{_fmt_labels(k)} {v:g}" for k, v in sorted(series.items())]
+    return "\n".join(lines) + "\n"
+
+def labels(**kw) -> _Labels:
+    return _key(kw)
+
+describe("luna_stage_seconds", "histogram", "Wall time per hydrate/render stage.")
+describe("luna_vendor_request_seconds", "histogram", "Upstream vendor HTTP latency.")
+describe("luna_vendor_requests_total", "counter", "Upstream vendor HTTP requests by status.")
+describe("luna_vendor_bytes_total", "counter", "Upstream vendor response bytes.")
+describe("luna_cache_lookups_total", "counter", "Cache lookups by result (hit/miss/partial).")
+describe("luna_http_request_seconds", "histogram", "Flask request latency by endpoint.")
+describe("luna_cache_hit_ratio", "gauge", "Hit ratio of in-process TTL caches.")
+describe("luna_cache_items", "gauge", "Entries held by in-process TTL caches.")
+describe("luna_write_queue_pending", "gauge", "Pending write-behind jobs.")
+describe("luna_startup_seconds", "gauge", "Time spent importing server.py.")
+describe("luna_deferred_import_seconds", "gauge", "First-use import time of modules deferred at startup.")
+describe("luna_jobs_inflight", "gauge", "Background jobs queued or running, by queue.")
+describe("luna_jobs_total", "counter", "Background jobs finished, by queue and state.")
+describe("luna_jobs_deduped_total", "counter", "Job submissions folded into an identical in-flight job.")
+describe("luna_job_seconds", "histogram", "Background job run time.")
+describe("luna_job_wait_seconds", "histogram", "Time a job spent queued before running.")
+describe("luna_live_topics", "gauge", "Live (symbol, tf) topics with a running publisher.")
+describe("luna_live_subscribers", "gauge", "Open live update streams.")
+describe("luna_live_events_total", "counter", "Live update events published (once per topic, not per subscriber).")
+describe("luna_live_errors_total", "counter", "Live publisher polls that raised.")
+describe("luna_http_not_modified_total", "counter", "Requests answered 304 from a matching ETag.")
+describe("luna_http_body_bytes_total", "counter", "Response body bytes of compressed routes, before (raw) and after (sent) encoding.")
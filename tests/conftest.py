@@ -0,0 +1,13 @@
+# tests/conftest.py — run from the repo root with `python -m pytest -q`
+# ============================================================
+# Modules live flat at the repo root; make them importable and keep anything that
+# writes under LUNA_CACHE_DIR away from the real luna_cache/.
+# ============================================================
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("LUNA_CACHE_DIR", tempfile.mkdtemp(prefix="luna_test_"))
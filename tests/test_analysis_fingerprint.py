@@ -0,0 +1,37 @@
+# tests/test_analysis_fingerprint.py — per-metric tolerances decide when an analysis is stale
+import analysis_fingerprint as fp
+
+
+def _snap(**latest):
+    roi = {"24h": latest.pop("roi_24h", 1.0), "7d": 3.0, "30d": 10.0}
+    base = {"rsi": 50.0, "macd_line": 1.0, "macd_signal": 0.5, "macd_hist": 0.5,
+            "bb_width": 0.1, "market_cap": 1e8}
+    return {"latest": {**base, **latest}, "roi": roi}
+
+
+def test_small_drift_does_not_move():
+    old = fp.fingerprint(_snap())
+    # many tiny steps in the same direction still compare against the analysis-time values
+    assert fp.moved(old, fp.fingerprint(_snap(rsi=54.9, roi_24h=2.9, market_cap=1.2e8))) == []
+
+
+def test_tolerances_and_sign_crossings():
+    old = fp.fingerprint(_snap())
+    assert fp.moved(old, fp.fingerprint(_snap(rsi=55.0))) == ["rsi"]
+    assert fp.moved(old, fp.fingerprint(_snap(macd_signal=1.5))) == ["macd_cross"]
+    assert fp.moved(old, fp.fingerprint(_snap(market_cap=1.3e8))) == ["market_cap"]
+    assert "bb_width" in fp.moved(old, fp.fingerprint(_snap(bb_width=None)))   # disappearing counts
+
+
+def test_incomparable_fingerprints_move_everything():
+    new = fp.fingerprint(_snap())
+    assert fp.moved(None, new) == ["*"]
+    assert fp.moved(dict(new, version=1), new) == ["*"]
+    steps = fp.steps_from_env("rsi=10")
+    assert fp.moved(new, fp.fingerprint(_snap(), steps), steps) == ["*"]
+
+
+def test_steps_from_env():
+    steps = fp.steps_from_env("rsi=10, market_cap=log:0.3, bogus")
+    assert steps["rsi"] == 10.0 and steps["market_cap"] == "log:0.3"
+    assert steps["roi_24h"] == fp.DEFAULT_STEPS["roi_24h"]
@@ -0,0 +1,60 @@
+# tests/test_analyze_etag.py — /analyze revalidation follows the data version and header meta
+import numpy as np
+import pandas as pd
+import pytest
+
+import server
+
+
+def _frame(n=300):
+    ts = pd.date_range("2025-01-01", periods=n, freq="h", tz="UTC")
+    p = np.linspace(1.0, 2.0, n)
+    return pd.DataFrame({"timestamp": ts, "open": p, "high": p, "low": p, "close": p, "volume": np.ones(n)})
+
+
+@pytest.fixture
+def client(monkeypatch):
+    frame = {"df": _frame()}
+    monkeypatch.setattr(server, "ASYNC_HYDRATE", True)
+    monkeypatch.setattr(server, "cached_if_fresh", lambda s_key, tf: frame["df"])
+    server.META_CACHE.pop("ETAGT")
+    return server.app.test_client(), frame
+
+
+def _get(c, etag=None):
+    return c.get("/analyze?query=ETAGT&tf=12h", headers={"If-None-Match": etag} if etag else {})
+
+
+def test_unchanged_frame_revalidates(client):
+    c, _ = client
+    etag = _get(c).headers["ETag"]
+    assert _get(c, etag).status_code == 304
+
+
+def test_new_bar_or_live_bar_update_changes_etag(client):
+    c, frame = client
+    etag = _get(c).headers["ETag"]
+    df = frame["df"].copy()
+    df.loc[df.index[-1], "close"] *= 1.1            # same rows, same last timestamp
+    frame["df"] = df
+    r = _get(c, etag)
+    assert r.status_code == 200 and r.headers["ETag"] != etag
+    frame["df"] = pd.concat([df, _frame(301).tail(1)], ignore_index=True)
+    assert _get(c, r.headers["ETag"]).status_code == 200
+
+
+def test_header_meta_changes_etag(client):
+    c, _ = client
+    etag = _get(c).headers["ETag"]
+    server.META_CACHE.put("ETAGT", {"label": "Etag Token", "marketCap": 1e9})
+    r = _get(c, etag)
+    assert r.status_code == 200 and r.headers["ETag"] != etag
+    assert _get(c, r.headers["ETag"]).status_code == 304
+
+
+def test_data_version_avoids_frame_hash_once_summarized(monkeypatch):
+    df = _frame()
+    server.update_summary("ETAGV", df)
+    monkeypatch.setattr(server.indicators, "frame_key", lambda *a, **k: pytest.fail("hashed the frame"))
+    assert server.data_version("ETAGV", df) == server.data_version("ETAGV", df.copy())
+    assert server.data_version("ETAGV", df.iloc[:0]) == "empty"
@@ -0,0 +1,42 @@
+# tests/test_decoders.py — column-at-a-time vendor decoders
+import numpy as np
+import pandas as pd
+
+import decoders as dec
+
+
+def test_epoch_units_are_detected_per_value():
+    s = 1_700_000_000
+    ns = dec.epoch_ns([s, s * 1000, s * 10**6, s * 10**9, None, -5, "junk"])
+    assert list(ns[:4]) == [s * 10**9] * 4
+    assert not dec.valid_ns(ns[4:]).any()
+
+
+def test_rows_ohlcv_skips_malformed_rows_and_sorts():
+    rows = [[1_700_000_060, 2, 3, 1, 2.5, 10], "bad", [1_700_000_000, "1", 2, 0.5, 1.5, 5], [1]]
+    df = dec.rows_ohlcv(rows)
+    assert list(df.columns) == dec.OHLCV and len(df) == 2
+    assert df["timestamp"].is_monotonic_increasing and str(df["timestamp"].dt.tz) == "UTC"
+    assert df["open"].tolist() == [1.0, 2.0] and df["close"].dtype == "float64"
+    assert dec.rows_ohlcv([]).empty
+
+
+def test_records_ohlcv_maps_fields():
+    items = [{"t": 1_700_000_000_000, "o": "1", "c": 2}, {"t": None, "o": 1, "c": 1}, {"t": 1_700_000_060_000, "o": 3}]
+    df = dec.records_ohlcv(items, {"open": "o", "close": "c"}, "t")
+    assert len(df) == 2
+    assert df["open"].tolist() == [1.0, 3.0]
+    assert np.isnan(df["close"].iloc[1])
+
+
+def test_cg_market_chart_aligns_side_series():
+    t0 = 1_700_000_000_000
+    js = {"prices": [[t0 + 60_000, 2.0], [t0, 1.0]],
+          "total_volumes": [[t0, 10.0], [t0 + 30_000, 99.0]],
+          "market_caps": [[t0 + 60_000, 200.0], ["x", 1]]}
+    df = dec.cg_market_chart(js)
+    assert df["close"].tolist() == [1.0, 2.0]
+    assert df["volume"].iloc[0] == 10.0 and np.isnan(df["volume"].iloc[1])
+    assert np.isnan(df["market_cap"].iloc[0]) and df["market_cap"].iloc[1] == 200.0
+    assert df["timestamp"].iloc[0] == pd.Timestamp(t0, unit="ms", tz="UTC")
+    assert dec.cg_market_chart({}).empty
@@ -0,0 +1,62 @@
+# tests/test_downsample.py — LTTB point picking and OHLC bucketing keep the extremes
+import numpy as np
+import pandas as pd
+
+from downsample import lttb, lttb_frame, ohlc_buckets
+
+
+def _walk(n=10_000, seed=3):
+    rng = np.random.default_rng(seed)
+    return np.arange(n, dtype="float64"), 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+
+
+def test_lttb_keeps_endpoints_and_budget():
+    x, y = _walk()
+    idx = lttb(x, y, 500)
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert 500 <= len(idx) <= 502                       # n, plus the max/min if LTTB missed them
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_lttb_keeps_a_one_bar_spike_and_global_extremes():
+    x, y = _walk()
+    y[4321] = y.max() * 3                                # ATH wick between bucket centres
+    y[777] = y.min() / 3
+    idx = lttb(x, y, 200)
+    assert 4321 in idx and 777 in idx
+
+
+def test_lttb_skips_nan_and_short_inputs():
+    x, y = _walk(50)
+    y[[0, 10, 49]] = np.nan
+    idx = lttb(x, y, 10)
+    assert not np.isnan(y[idx]).any()
+    assert idx[0] == 1 and idx[-1] == 48
+    assert np.array_equal(lttb(x[:5], y[:5], 10), np.array([1, 2, 3, 4]))
+
+
+def test_lttb_frame_uses_timestamps():
+    n = 3000
+    x, y = _walk(n)
+    df = pd.DataFrame({"timestamp": pd.date_range("2025-01-01", periods=n, freq="min", tz="UTC"), "close": y})
+    out = lttb_frame(df, "close", 300)
+    assert out["timestamp"].is_monotonic_increasing
+    assert out["close"].max() == df["close"].max() and out["close"].min() == df["close"].min()
+    small = df.head(100)
+    assert lttb_frame(small, "close", 300) is small    # within budget: returned as is
+
+
+def test_ohlc_buckets_preserve_highs_lows_and_volume():
+    n = 1000
+    x, c = _walk(n)
+    df = pd.DataFrame({
+        "timestamp": pd.date_range("2025-01-01", periods=n, freq="min", tz="UTC"),
+        "open": np.r_[c[0], c[:-1]], "high": c * 1.01, "low": c * 0.99, "close": c,
+        "volume": np.ones(n),
+    })
+    out = ohlc_buckets(df, 100)
+    assert len(out) == 100
+    assert out["high"].max() == df["high"].max() and out["low"].min() == df["low"].min()
+    assert out["volume"].sum() == n
+    assert out["open"].iloc[0] == df["open"].iloc[0] and out["close"].iloc[-1] == df["close"].iloc[-1]
+    assert list(out.dtypes) == list(df.dtypes)
@@ -0,0 +1,130 @@
+# tests/test_http_cache.py — keys, TTL policies, hits and the store sweep
+import hashlib
+import json
+import os
+import time
+
+import pytest
+import requests
+
+import http_cache
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(http_cache, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(http_cache, "MODE", "on")
+    monkeypatch.setattr(http_cache, "_swept_pid", os.getpid())    # no background sweep mid-test
+    return tmp_path
+
+
+def _fetcher(body=b'{"ok":1}'):
+    calls = []
+
+    def fetch(url, params=None, **kw):
+        calls.append((url, params))
+        r = requests.Response()
+        r.status_code, r._content, r.encoding = 200, body if isinstance(body, bytes) else body(len(calls)), "utf-8"
+        return r
+    return fetch, calls
+
+
+def test_normalize_drops_secrets_and_sorts():
+    a, _ = http_cache.normalize("https://API.coingecko.com/x/?b=2&a=1", {"x_cg_demo_api_key": "s"})
+    b, _ = http_cache.normalize("https://api.coingecko.com/x?a=1", {"b": 2})
+    assert a == b and "api_key" not in a
+
+
+def test_fresh_entries_hit_and_ttl_zero_bypasses(store):
+    fetch, calls = _fetcher()
+    url = "https://api.coingecko.com/api/v3/coins/list"
+    assert not http_cache.from_cache(http_cache.get(url, fetch=fetch))
+    r = http_cache.get(url, fetch=fetch)
+    assert http_cache.from_cache(r) and r.json() == {"ok": 1} and len(calls) == 1
+    http_cache.get("https://api.coingecko.com/api/v3/unknown", fetch=fetch)
+    http_cache.get("https://api.coingecko.com/api/v3/unknown", fetch=fetch)
+    assert len(calls) == 3
+
+
+def _age(key, seconds):
+    p = http_cache._entry_path(key)
+    meta = json.loads(p.read_text())
+    meta["fetched_at"] -= seconds
+    p.write_text(json.dumps(meta))
+
+
+def _old_blob(digest):
+    p = http_cache._blob_path(digest)
+    t = time.time() - 7200
+    os.utime(p, (t, t))
+
+
+def test_sweep_drops_expired_entries_and_orphaned_bodies(store):
+    fetch, _ = _fetcher(lambda n: b'{"n":%d}' % n)
+    quote = "https://api.coingecko.com/api/v3/simple/price?ids=btc"      # 15 s policy
+    listing = "https://api.coingecko.com/api/v3/coins/list"              # a day
+    http_cache.get(quote, fetch=fetch)
+    http_cache.get(listing, fetch=fetch)
+    qkey = http_cache._key("cg", http_cache.normalize(quote)[0])
+    qbody = json.loads(http_cache._entry_path(qkey).read_text())["body"]
+    _age(qkey, 60)
+    _old_blob(qbody)
+    res = http_cache.sweep()
+    assert res["entries_dropped"] == 1 and res["entries_kept"] == 1
+    assert not http_cache._entry_path(qkey).exists() and not http_cache._blob_path(qbody).exists()
+    assert http_cache.from_cache(http_cache.get(listing, fetch=fetch))
+
+
+def _fill(urls, bodies):
+    keys = []
+    for i, (u, b) in enumerate(zip(urls, bodies)):
+        http_cache.get(u, fetch=_fetcher(b)[0])
+        keys.append(http_cache._key("cg", http_cache.normalize(u)[0]))
+        _age(keys[-1], 100 - i)                                         # urls[0] is the oldest
+    return keys
+
+
+def _body(key):
+    return json.loads(http_cache._entry_path(key).read_text())["body"]
+
+
+def test_sweep_size_cap_drops_oldest_first(store):
+    urls = [f"https://api.coingecko.com/api/v3/coins/c{i}" for i in range(3)]
+    keys = _fill(urls, [os.urandom(5000) for _ in urls])               # incompressible: ~5 KB each
+    sizes = [http_cache._blob_path(_body(k)).stat().st_size for k in keys]
+    oldest = _body(keys[0])
+    _old_blob(oldest)
+    res = http_cache.sweep(max_bytes=sizes[1] + sizes[2])
+    assert res["entries_dropped"] == 1 and res["bytes_freed"] == sizes[0]
+    assert not http_cache._entry_path(keys[0]).exists() and not http_cache._blob_path(oldest).exists()
+    assert all(http_cache._entry_path(k).exists() for k in keys[1:])
+
+
+def test_sweep_only_frees_a_shared_body_with_its_last_entry(store):
+    shared = os.urandom(5000)
+    urls = [f"https://api.coingecko.com/api/v3/coins/s{i}" for i in range(3)]
+    keys = _fill(urls, [shared, shared, os.urandom(5000)])
+    cap = http_cache._blob_path(_body(keys[2])).stat().st_size
+    res = http_cache.sweep(max_bytes=cap)
+    assert res["entries_dropped"] == 2                                   # both users of the shared body
+    assert http_cache._entry_path(keys[2]).exists()
+    assert http_cache._blob_path(_body(keys[2])).exists()
+    assert http_cache._blob_path(hashlib.sha256(shared).hexdigest()).exists()        # orphaned, but written < 1 h ago
+
+
+def test_sweep_runs_only_in_on_mode(store, monkeypatch):
+    started = []
+    monkeypatch.setattr(http_cache, "_swept_pid", None)
+    monkeypatch.setattr(http_cache.threading, "Thread", lambda **kw: started.append(kw) or _NoThread())
+    monkeypatch.setattr(http_cache, "MODE", "record")
+    http_cache._maybe_sweep()
+    assert started == []
+    monkeypatch.setattr(http_cache, "MODE", "on")
+    http_cache._maybe_sweep()
+    http_cache._maybe_sweep()                                            # once per process
+    assert len(started) == 1
+
+
+class _NoThread:
+    def start(self):
+        pass
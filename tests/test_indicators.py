@@ -0,0 +1,101 @@
+# tests/test_indicators.py — indicators.py kernels vs the pandas expressions they replaced
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicators as ind
+
+WARMUP = 60
+PRICES = [100.0, 2e-8]      # normal and micro-cap: the RSI loss floor only matters at the latter
+
+
+def _frame(price: float, n: int = 2000, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = price * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        "timestamp": pd.date_range("2025-01-01", periods=n, freq="h", tz="UTC"),
+        "price": close,
+        "close": close,
+        "volume": rng.lognormal(10, 1, n),
+    })
+
+
+def _rsi_floor_raw(close: pd.Series) -> pd.Series:
+    """server.py / build_coin_csv before indicators.py: every zero loss floored, then smoothed."""
+    d = close.diff()
+    up, dn = d.clip(lower=0.0), -d.clip(upper=0.0)
+    rs = up.ewm(span=14, adjust=False).mean() / dn.replace(0, 1e-9).ewm(span=14, adjust=False).mean()
+    return 100 - 100 / (1 + rs)
+
+
+def _rsi_floor_smoothed(close: pd.Series) -> pd.Series:
+    """luna_engine.features / on_demand_refresh before indicators.py: floor the smoothed loss."""
+    d = close.diff()
+    up, dn = d.clip(lower=0.0), -d.clip(upper=0.0)
+    rs = up.ewm(span=14, adjust=False).mean() / dn.ewm(span=14, adjust=False).mean().replace(0, 1e-9)
+    return 100 - 100 / (1 + rs)
+
+
+def _close(a, b, rtol=1e-9):
+    a = np.asarray(a, dtype="float64")[WARMUP:]
+    b = np.asarray(b, dtype="float64")[WARMUP:]
+    np.testing.assert_array_equal(np.isfinite(a), np.isfinite(b))
+    np.testing.assert_allclose(a, b, rtol=rtol, atol=0)
+
+
+@pytest.mark.parametrize("price", PRICES)
+def test_rsi_raw_floor_matches_server_formula(price):
+    close = _frame(price)["close"]
+    _close(ind.rsi(close, 14), _rsi_floor_raw(close))
+
+
+@pytest.mark.parametrize("price", PRICES)
+def test_rsi_smoothed_floor_matches_feature_formula(price):
+    close = _frame(price)["close"]
+    _close(ind.rsi(close, 14, floor="smoothed"), _rsi_floor_smoothed(close))
+
+
+def test_floor_modes_diverge_at_micro_cap():
+    close = _frame(2e-8)["close"]
+    raw, smoothed = ind.rsi(close, 14), ind.rsi(close, 14, floor="smoothed")
+    # per-bar losses are ~1e-10 here, so flooring them at 1e-9 swamps the real moves
+    assert np.nanmean(raw[WARMUP:]) < 30 < np.nanmean(smoothed[WARMUP:])
+
+
+@pytest.mark.parametrize("price", PRICES)
+def test_feature_callers_keep_their_rsi(price):
+    import luna_engine.features as features
+    import on_demand_refresh
+
+    df = _frame(price)
+    want = _rsi_floor_smoothed(df["price"])
+    _close(features.compute_features(df)[1]["rsi"], want)
+    _close(on_demand_refresh._compute_indicators(df)["rsi"], want)
+
+
+@pytest.mark.parametrize("price", PRICES)
+def test_macd_and_bollinger_match_pandas(price):
+    close = _frame(price)["close"]
+    e = lambda s, span: s.ewm(span=span, adjust=False).mean()
+    line = e(close, 12) - e(close, 26)
+    got_line, got_sig, got_hist = ind.macd(close, 12, 26, 9)
+    _close(got_line, line, rtol=1e-7)
+    _close(got_sig, e(line, 9), rtol=1e-7)
+    _close(got_hist, line - e(line, 9), rtol=1e-5)
+
+    mid, upper, lower = ind.bollinger(close, 20, 2.0)
+    ma, sd = close.rolling(20).mean(), close.rolling(20).std()
+    _close(mid, ma, rtol=1e-9)
+    _close(upper, ma + 2 * sd, rtol=1e-9)
+    _close(lower, ma - 2 * sd, rtol=1e-9)
+
+
+def test_compute_memo_is_keyed_by_content():
+    ind.MEMO.clear()
+    df = _frame(100.0, n=300)
+    a = ind.compute(df, ["rsi"])["rsi"].to_numpy()
+    df2 = df.copy()
+    df2.loc[df2.index[-1], "close"] *= 1.5
+    b = ind.compute(df2, ["rsi"])["rsi"].to_numpy()
+    assert a[-1] != b[-1]
+    np.testing.assert_array_equal(a[:-1], b[:-1])
@@ -0,0 +1,87 @@
+# tests/test_key_quota.py — budget accounting, batch reserve and 429 learning
+import time
+
+import pytest
+
+import key_quota as kq
+
+
+@pytest.fixture
+def store(tmp_path):
+    # counts are per minute bucket; don't start a test right before the bucket rolls over
+    if time.time() % 60 > 55:
+        time.sleep(60 - time.time() % 60 + 0.1)
+    return kq.QuotaStore(tmp_path / "quota.sqlite")
+
+
+def _pool(store, keys, priority="interactive", minute=10):
+    p = kq.QuotaPool("cc", keys, priority=priority, store_=store)
+    p.limits = {"minute": minute, "hour": 1000, "month": 100_000}
+    return p
+
+
+def test_pick_charges_the_key_with_most_headroom(store):
+    p = _pool(store, ["a", "b"])
+    picks = [p.pick() for _ in range(9)]
+    used = {k: store.used("cc", kq.key_id(k), "minute") for k in ("a", "b")}
+    assert sum(used.values()) == 9
+    assert abs(used["a"] - used["b"]) <= 1          # spread evenly
+    assert set(picks) == {"a", "b"}
+
+
+def test_out_of_budget_returns_none(store):
+    p = _pool(store, ["a"], minute=3)
+    assert [p.pick() for _ in range(3)] == ["a"] * 3
+    assert p.pick() is None
+
+
+def test_batch_leaves_the_reserve_for_interactive(store):
+    batch = _pool(store, ["a"], priority="batch", minute=10)
+    inter = _pool(store, ["a"], priority="interactive", minute=10)
+    n = 0
+    while batch.pick() is not None:
+        n += 1
+    assert n == int(10 * (1 - kq.RESERVE))
+    assert inter.pick() == "a"
+
+
+def test_keyless_pool_returns_anon_key(store):
+    p = _pool(store, [])
+    assert p.pick() == kq.ANON_KEY
+    assert store.used("cc", "anon", "minute") == 1
+
+
+def test_spurious_429_cools_down_but_learns_nothing(store):
+    p = _pool(store, ["a"], minute=10)
+    assert p.pick() == "a"                            # 1 of 10: our count can't explain a 429
+    assert p.report("a", 429) is True
+    assert store._learned(store._db(), "cc", kq.key_id("a"), time.time()) == {}
+    assert p.pick() is None                           # cooling down until the window resets
+
+
+def test_genuine_429_learns_a_lower_limit_that_expires(store, monkeypatch):
+    p = _pool(store, ["a"], minute=10)
+    for _ in range(6):
+        assert p.pick() == "a"
+    assert p.report("a", 429, headers={"Retry-After": "0"}) is True
+    kid = kq.key_id("a")
+    assert store._learned(store._db(), "cc", kid, time.time()) == {"minute": 5}
+    assert p.pick() is None                           # learned cap 5, already used 6
+
+    monkeypatch.setattr(kq, "LEARN_TTL", 0.0)         # learned 429 limits are temporary
+    assert store._learned(store._db(), "cc", kid, time.time() + 1) == {}
+    assert p.pick() == "a"
+
+
+def test_payload_limits_are_learned_for_good(store, monkeypatch):
+    p = _pool(store, ["a"], minute=10)
+    p.report("a", 200, payload={"RateLimit": {"max_calls": {"minute": 2, "hour": 50}}})
+    monkeypatch.setattr(kq, "LEARN_TTL", 0.0)
+    assert store._learned(store._db(), "cc", kq.key_id("a"), time.time() + 1) == {"minute": 2, "hour": 50}
+    assert [p.pick() for _ in range(3)] == ["a", "a", None]
+
+
+def test_retry_after_header():
+    assert kq._retry_after({"Retry-After": "12"}) == 12.0
+    assert kq._retry_after({"retry-after": "soon"}) is None
+    assert kq._retry_after(None) is None
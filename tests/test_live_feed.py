@@ -0,0 +1,52 @@
+# tests/test_live_feed.py — LiveHub fan-out, the subscriber cap, and topic keys for /live
+import threading
+
+import server
+from live_feed import LiveHub
+
+
+def _hub(max_subs=None, interval=60.0):
+    calls = []
+
+    def poll(key, cursor):
+        calls.append(key)
+        n = (cursor or 0) + 1
+        return {"key": key, "n": n}, n
+    return LiveHub("t", poll, interval=interval, max_subs=max_subs), calls
+
+
+def test_one_poll_fans_out_to_every_subscriber():
+    hub, calls = _hub()
+    a, b = hub.subscribe("k"), hub.subscribe("k")
+    assert a.get(2)["n"] == 1
+    assert b.get(2)["n"] == 1
+    assert calls == ["k"]
+    assert hub.notify(lambda k: k == "k") == 1
+    assert a.get(2)["n"] == 2 and b.get(2)["n"] == 2
+    a.close(); b.close()
+    assert hub.stats()["subscribers"] == 0
+
+
+def test_cap_is_atomic_under_concurrent_subscribes():
+    hub, _ = _hub(max_subs=3)
+    got, go = [], threading.Barrier(20)
+
+    def sub():
+        go.wait()
+        got.append(hub.subscribe("k"))
+    threads = [threading.Thread(target=sub) for _ in range(20)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    subs = [s for s in got if s is not None]
+    assert len(subs) == 3 and hub.stats()["subscribers"] == 3
+    subs[0].close()
+    subs[0].close()                                     # closing twice frees one slot, not two
+    assert hub.subscribe("k") is not None and hub.subscribe("k") is None
+
+
+def test_live_topics_use_the_canonical_symbol(monkeypatch):
+    seen = []
+    monkeypatch.setattr(server.LIVE, "subscribe", lambda key: seen.append(key))   # None: "full"
+    r = server.app.test_client().get("/live?symbol=eth&tf=1h")
+    assert r.status_code == 503
+    assert seen == [("ETH", "1h")]                     # what save_frame() notifies for "eth"
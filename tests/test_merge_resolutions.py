@@ -0,0 +1,53 @@
+# tests/test_merge_resolutions.py — finer bars win only over the span they cover
+import numpy as np
+import pandas as pd
+
+import server
+
+
+def _bars(start: str, periods: int, freq: str, price: float) -> pd.DataFrame:
+    ts = pd.date_range(start, periods=periods, freq=freq, tz="UTC")
+    p = np.full(periods, price)
+    return pd.DataFrame({"timestamp": ts, "open": p, "high": p, "low": p, "close": p,
+                         "price": p, "volume": np.ones(periods)})
+
+
+def test_finer_frame_wins_only_inside_its_span():
+    daily = _bars("2025-01-01", 30, "D", 1.0)
+    hourly = _bars("2025-01-10", 48, "h", 2.0)          # covers Jan 10 00:00 .. Jan 11 23:00
+    m = server.merge_resolutions({"1d": daily, "1h": hourly})
+
+    lo, hi = hourly["timestamp"].min(), hourly["timestamp"].max()
+    inside = m[(m["timestamp"] >= lo) & (m["timestamp"] <= hi)]
+    assert (inside["src_res"] == "1h").all() and len(inside) == 48
+    outside = m[(m["timestamp"] < lo) | (m["timestamp"] > hi)]
+    assert (outside["src_res"] == "1d").all()
+    assert len(outside) == 30 - 2                       # Jan 10 and Jan 11 daily bars replaced
+    assert (m.loc[m["src_res"] == "1h", "close"] == 2.0).all()
+
+
+def test_stale_fine_frame_does_not_hide_newer_coarse_bars():
+    daily = _bars("2025-01-01", 60, "D", 1.0)
+    stale_15m = _bars("2025-01-05", 96, "15min", 3.0)   # stopped updating on Jan 5
+    m = server.merge_resolutions({"15m": stale_15m, "1d": daily})
+    assert m["timestamp"].max() == daily["timestamp"].max()
+    assert m["src_res"].iloc[-1] == "1d"
+
+
+def test_merged_frame_is_monotonic_and_unique():
+    frames = {
+        "1d": _bars("2025-01-01", 40, "D", 1.0),
+        "1h": _bars("2025-01-20", 72, "h", 2.0),
+        "5m": _bars("2025-01-21", 100, "5min", 3.0),
+    }
+    m = server.merge_resolutions(frames)
+    assert m["timestamp"].is_monotonic_increasing
+    assert not m["timestamp"].duplicated().any()
+    # the 5m span sits inside the 1h span; it takes precedence there
+    five = frames["5m"]["timestamp"]
+    assert (m.loc[m["timestamp"].between(five.min(), five.max()), "src_res"] == "5m").all()
+
+
+def test_empty_inputs():
+    assert server.merge_resolutions({}).empty
+    assert server.merge_resolutions({"1h": pd.DataFrame(), "1d": None}).empty
@@ -0,0 +1,71 @@
+# tests/test_ttl_cache.py — expiry, LRU bounds, stats and the per-process reaper
+import os
+import time
+
+import pytest
+
+import ttl_cache
+from ttl_cache import TTLCache
+
+
+def test_expiry_and_negative_ttl():
+    c = TTLCache("t-exp", ttl=60, negative_ttl=0.05)
+    c.put("hit", 1)
+    c.put("miss", None, negative=True)
+    assert c.get("hit") == 1 and "miss" in c
+    time.sleep(0.06)
+    assert c.get("miss", "gone") == "gone" and c.get("hit") == 1
+    assert c.stats()["expirations"] == 1
+
+
+def test_lru_eviction_by_items_and_bytes():
+    c = TTLCache("t-lru", max_items=2)
+    c["a"], c["b"] = 1, 2
+    c.get("a")                                  # b is now least recently used
+    c["c"] = 3
+    assert "a" in c and "b" not in c and c.stats()["evictions"] == 1
+
+    sized = TTLCache("t-bytes", max_bytes=100, sizeof=lambda v: v)
+    sized.put("x", 60)
+    sized.put("y", 60)
+    assert "x" not in sized and sized.stats()["bytes"] == 60
+
+
+def test_touch_slides_expiry():
+    c = TTLCache("t-touch", ttl=0.1)
+    c.put("k", 1)
+    time.sleep(0.06)
+    assert c.touch("k")
+    time.sleep(0.06)
+    assert c.get("k") == 1
+    assert not c.touch("absent")
+
+
+def test_dict_sugar_and_stats_names():
+    c = TTLCache("t-dup")
+    d = TTLCache("t-dup")
+    c["k"] = 1
+    assert c["k"] == 1
+    del c["k"]
+    with pytest.raises(KeyError):
+        c["k"]
+    names = ttl_cache.cache_stats()
+    assert "t-dup" in names and "t-dup#2" in names
+    assert d.stats()["items"] == 0
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_reaper_restarts_in_forked_child():
+    c = TTLCache("t-fork")
+    c.put("k", 1)                               # starts the parent's reaper
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            c.put("k2", 2)
+            r = ttl_cache._REAPER
+            code = 0 if ttl_cache._REAPER_PID == os.getpid() and r is not None and r.is_alive() else 2
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
@@ -0,0 +1,109 @@
+# tests/test_work_queue.py — leases, reclaim, retries and progress
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from work_queue import WorkQueue, DONE, FAILED, LEASED, PENDING
+
+
+@pytest.fixture
+def q(tmp_path):
+    return WorkQueue("t", tmp_path / "wq.sqlite", lease_sec=60, max_attempts=2, retry_delay=0)
+
+
+def _state(q, key):
+    return q._db().execute("SELECT state, attempts FROM items WHERE queue=? AND key=?", (q.name, key)).fetchone()
+
+
+def test_claims_follow_priority_and_are_exclusive(q):
+    assert q.enqueue(["a", "b", "c"]) == 3
+    assert q.enqueue(["a"]) == 0                      # existing keys are left alone
+    first = q.claim("w1", n=2)
+    assert [i.key for i in first] == ["a", "b"] and all(i.attempts == 1 for i in first)
+    assert [i.key for i in q.claim("w2", n=5)] == ["c"]
+    assert q.claim("w3") == []
+
+
+def test_expired_lease_is_reclaimed_and_counts_as_attempt(q):
+    q.enqueue(["a"])
+    q.claim("w1")
+    q._db().execute("UPDATE items SET lease_until=? WHERE key='a'", (time.time() - 1,))
+    again = q.claim("w2")
+    assert [(i.key, i.attempts) for i in again] == [("a", 2)]
+    assert q.complete("a", "w1") is False             # the old owner lost the lease
+    assert q.complete("a", "w2", "full") is True
+    assert _state(q, "a") == (DONE, 2)
+
+
+def test_lease_expiring_on_last_attempt_fails_the_item(q):
+    q.enqueue(["a"])
+    for owner in ("w1", "w2"):
+        assert q.claim(owner)
+        q._db().execute("UPDATE items SET lease_until=0 WHERE key='a'")
+    assert q.claim("w3") == []
+    assert _state(q, "a")[0] == FAILED
+    assert q.failures()[0]["error"] == "lease expired"
+
+
+def test_heartbeat_keeps_the_lease(q):
+    q.enqueue(["a"])
+    q.claim("w1")
+    q._db().execute("UPDATE items SET lease_until=? WHERE key='a'", (time.time() + 0.5,))
+    assert q.heartbeat("w1") == 1
+    time.sleep(0.6)
+    assert q.claim("w2") == []
+
+
+def test_fail_retries_then_gives_up(q):
+    q.enqueue(["a"])
+    q.claim("w1")
+    assert q.fail("a", "w1", "boom") == PENDING
+    assert q.claim("w1")[0].attempts == 2
+    assert q.fail("a", "w1", "boom again") == FAILED
+    assert q.claim("w1") == []
+    assert q.retry_failed() == 1
+    assert [(i.key, i.attempts) for i in q.claim("w1")] == [("a", 1)]
+
+
+def test_fail_without_retry_and_retry_delay(tmp_path):
+    q = WorkQueue("t", tmp_path / "wq.sqlite", max_attempts=5, retry_delay=60)
+    q.enqueue(["a", "b"])
+    q.claim("w1", n=2)
+    assert q.fail("a", "w1", "bad input", retry=False) == FAILED
+    assert q.fail("b", "w1", "timeout") == PENDING
+    assert q.claim("w1") == []                        # b waits retry_delay * attempts
+    assert q.fail("b", "not-the-owner", "x") == ""
+
+
+def test_release_hands_back_without_counting(q):
+    q.enqueue(["a"])
+    q.claim("w1")
+    assert q.release("w1") == 1
+    assert _state(q, "a") == (PENDING, 0)
+
+
+def test_reclaim_orphans_expires_dead_local_owners(q):
+    p = subprocess.Popen([sys.executable, "-c", "pass"])
+    p.wait()
+    dead = f"{socket.gethostname()}:{p.pid}"
+    alive = f"{socket.gethostname()}:{os.getpid()}"
+    q.enqueue(["a", "b"])
+    q.claim(dead)
+    q.claim(alive)
+    assert q.reclaim_orphans() == 1
+    got = q.claim("w2", n=2)
+    assert [i.key for i in got] == ["a"]
+    assert _state(q, "b")[0] == LEASED
+
+
+def test_progress_counts(q):
+    q.enqueue(["a", "b", "c"])
+    q.claim("w1", n=2)
+    q.complete("a", "w1", "full")
+    p = q.progress()
+    assert (p["total"], p[PENDING], p[LEASED], p[DONE], p[FAILED]) == (3, 1, 1, 1, 0)
+    assert p["results"] == {"full": 1} and p["workers"] == 1
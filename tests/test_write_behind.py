@@ -0,0 +1,71 @@
+# tests/test_write_behind.py — coalescing, draining, and the writer thread across fork()
+import os
+import threading
+
+import pytest
+
+from write_behind import WriteBehind, atomic_write_text
+
+
+def test_pending_key_is_coalesced_and_merged():
+    wb = WriteBehind("t-merge")
+    gate, out = threading.Event(), []
+    wb.submit("block", None, lambda _: gate.wait(5))    # hold the writer so the next jobs queue up
+    wb.submit("k", [1], out.append, merge=lambda a, b: a + b)
+    wb.submit("k", [2], out.append, merge=lambda a, b: a + b)
+    assert wb.peek("k") == [1, 2]
+    gate.set()
+    assert wb.flush(5)
+    assert out == [[1, 2]]
+    assert wb.snapshot()["coalesced"] == 1
+    wb.stop()
+
+
+def test_stop_drains_without_a_writer_thread():
+    wb = WriteBehind("t-drain")
+    out = []
+    wb._jobs["k"] = ("v", out.append)        # queued, but no thread was ever started here
+    wb.stop()
+    assert out == ["v"]
+    wb.submit("late", "x", out.append)        # after stop, writes happen inline
+    assert out == ["v", "x"]
+
+
+def test_failed_write_is_counted_not_raised():
+    wb = WriteBehind("t-err")
+    wb.submit("k", 1, lambda _: 1 / 0)
+    assert wb.flush(5)
+    assert wb.snapshot()["errors"] == 1
+    wb.stop()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork()")
+def test_forked_child_restarts_writer_and_drains(tmp_path):
+    wb = WriteBehind("t-fork")
+    gate = threading.Event()
+    wb.submit("parent", None, lambda _: gate.wait(5))   # parent's writer is busy across fork
+    child_out = tmp_path / "child.txt"
+    pid = os.fork()
+    if pid == 0:  # child
+        code = 1
+        try:
+            assert wb.pending() == 0                         # parent's queue stays in the parent
+            wb.submit("child", "ok", lambda v: child_out.write_text(v))
+            code = 0 if wb.flush(5) and wb._thread is not None and wb._thread.is_alive() else 2
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    gate.set()
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert child_out.read_text() == "ok"
+    assert wb.flush(5)
+    wb.stop()
+
+
+def test_atomic_write_leaves_no_temp_on_failure(tmp_path):
+    target = tmp_path / "a.json"
+    atomic_write_text(target, "one")
+    with pytest.raises(TypeError):
+        atomic_write_text(target, None)
+    assert target.read_text() == "one"
+    assert [p.name for p in tmp_path.iterdir()] == ["a.json"]
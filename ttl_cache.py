@@ -0,0 +1,201 @@
+# ttl_cache.py — bounded, thread-safe TTL + LRU cache with hit/miss stats
+from __future__ import annotations
+import os, sys, time, threading, weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# id(cache) -> cache, for the diagnostics endpoint (names need not be unique)
+_REGISTRY: "weakref.WeakValueDictionary[int, TTLCache]" = weakref.WeakValueDictionary()
+_REAPER_LOCK = threading.Lock()
+_REAPER: Optional[threading.Thread] = None
+_REAPER_PID: Optional[int] = None  # threads don't survive fork (gunicorn --preload): restart per process
+REAP_INTERVAL_SEC = 30
+
+_MISSING = object()
+
+def approx_size(value: Any) -> int:
+    """Cheap byte estimate: frames report their own usage, containers go one level deep."""
+    try:
+        mu = getattr(value, "memory_usage", None)
+        if callable(mu):
+            n = mu(deep=True)
+            return int(n.sum()) if hasattr(n, "sum") else int(n)
+        size = sys.getsizeof(value)
+        if isinstance(value, dict):
+            size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+        elif isinstance(value, (list, tuple, set)):
+            size += sum(sys.getsizeof(v) for v in value)
+        return int(size)
+    except Exception:
+        return 0
+
+class _Entry:
+    __slots__ = ("value", "expires", "ttl", "size", "negative")
+    def __init__(self, value, expires, ttl, size, negative):
+        self.value = value
+        self.expires = expires
+        self.ttl = ttl
+        self.size = size
+        self.negative = negative
+
+class TTLCache:
+    """
+    Dict-like cache with:
+      - per-entry TTL (and a shorter TTL for negative/"not found" entries)
+      - LRU eviction once max_items or max_bytes is exceeded
+      - background expiry via one shared reaper thread, started on the first put()
+        in each process (so a cache built at import before a fork still gets one)
+      - hit/miss/eviction/expiry counters (see stats())
+    """
+    def __init__(self, name: str, ttl: float = 3600, max_items: int = 10_000,
+                 max_bytes: Optional[int] = None, negative_ttl: Optional[float] = None,
+                 sizeof: Callable[[Any], int] = approx_size):
+        self.name = name
+        self.ttl = float(ttl)
+        self.negative_ttl = float(negative_ttl) if negative_ttl is not None else self.ttl
+        self.max_items = int(max_items)
+        self.max_bytes = int(max_bytes) if max_bytes else None
+        self._sizeof = sizeof
+        self._data: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        _REGISTRY[id(self)] = self
+
+    # ---- core ----
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            e = self._data.get(key)
+            if e is None:
+                self.misses += 1
+                return default
+            if e.expires <= time.time():
+                self._drop(key, e)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return e.value
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None, negative: bool = False) -> None:
+        if ttl is None:
+            ttl = self.negative_ttl if negative else self.ttl
+        if _REAPER_PID != os.getpid():
+            _ensure_reaper()
+        size = self._sizeof(value)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._data[key] = _Entry(value, time.time() + ttl, ttl, size, negative)
+            self._bytes += size
+            self._enforce_bounds()
+
+    def touch(self, key: Hashable) -> bool:
+        """Slide an entry's expiry forward by its own TTL. False if absent or already expired."""
+        with self._lock:
+            e = self._data.get(key)
+            if e is None: return False
+            now = time.time()
+            if e.expires <= now:
+                self._drop(key, e)
+                self.expirations += 1
+                return False
+            e.expires = now + e.ttl
+            self._data.move_to_end(key)
+            return True
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            e = self._data.get(key)
+            if e is None: return default
+            self._drop(key, e)
+            return e.value if e.expires > time.time() else default
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            dead = [k for k, e in self._data.items() if e.expires <= now]
+            for k in dead:
+                self._drop(k, self._data[k])
+            self.expirations += len(dead)
+        return len(dead)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    # ---- dict-style sugar (keeps call sites like META_CACHE[k] = v working) ----
+    def __setitem__(self, key, value): self.put(key, value)
+    def __getitem__(self, key):
+        v = self.get(key, _MISSING)
+        if v is _MISSING: raise KeyError(key)
+        return v
+    def __delitem__(self, key):
+        if self.pop(key, _MISSING) is _MISSING: raise KeyError(key)
+    def __contains__(self, key):
+        with self._lock:
+            e = self._data.get(key)
+            return e is not None and e.expires > time.time()
+    def __len__(self):
+        now = time.time()
+        with self._lock:
+            return sum(1 for e in self._data.values() if e.expires > now)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "items": len(self._data),
+                "bytes": self._bytes,
+                "max_items": self.max_items,
+                "max_bytes": self.max_bytes,
+                "negative": sum(1 for e in self._data.values() if e.negative),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    # ---- internals ----
+    def _drop(self, key, e: _Entry) -> None:
+        self._data.pop(key, None)
+        self._bytes -= e.size
+
+    def _enforce_bounds(self) -> None:
+        while self._data and (len(self._data) > self.max_items or
+                              (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            k, e = self._data.popitem(last=False)
+            self._bytes -= e.size
+            self.evictions += 1
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats by cache name; caches sharing a name are told apart as name#2, name#3, ..."""
+    out: Dict[str, Dict[str, Any]] = {}
+    for c in list(_REGISTRY.values()):  # registration order
+        label, n = c.name, 1
+        while label in out:
+            n += 1
+            label = f"{c.name}#{n}"
+        out[label] = c.stats()
+    return out
+
+def _reap_loop() -> None:
+    while True:
+        time.sleep(REAP_INTERVAL_SEC)
+        for c in list(_REGISTRY.values()):
+            try:
+                c.purge_expired()
+            except Exception:
+                pass
+
+def _ensure_reaper() -> None:
+    global _REAPER, _REAPER_PID
+    with _REAPER_LOCK:
+        if _REAPER_PID != os.getpid() or _REAPER is None or not _REAPER.is_alive():
+            _REAPER = threading.Thread(target=_reap_loop, name="ttl-cache-reaper", daemon=True)
+            _REAPER.start()
+            _REAPER_PID = os.getpid()
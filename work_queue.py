@@ -0,0 +1,177 @@
+# work_queue.py — durable SQLite queue of batch items with leases, retries and priority
+# ============================================================
+# Several processes (or threads) can drain one queue; each claim is a lease that the
+# owner keeps alive with heartbeat(). Leases that expire (crashed / killed worker) go
+# back to pending on the next claim; an item that keeps failing ends up "failed".
+#
+#   q = WorkQueue("analyze", STATE_DIR / "work_queue.sqlite")
+#   q.enqueue(coins)                                  # new run: q.reset() first
+#   for item in q.claim(owner, n=8): ... q.complete(item.key, owner, "full")
+#   q.progress()                                      # counts by state / result, rate
+# ============================================================
+from __future__ import annotations
+import json, os, socket, sqlite3, threading, time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+PENDING, LEASED, DONE, FAILED = "pending", "leased", "done", "failed"
+
+@dataclass
+class Item:
+    key: str
+    priority: int
+    attempts: int
+
+def owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _alive(pid: str) -> bool:
+    if os.name == "nt" or not pid.isdigit(): return True  # os.kill(pid, 0) would terminate it on Windows
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+class WorkQueue:
+    def __init__(self, name: str, path: Path, lease_sec: float = 600.0, max_attempts: int = 3,
+                 retry_delay: float = 60.0):
+        self.name, self.path = name, Path(path)
+        self.lease_sec, self.max_attempts, self.retry_delay = lease_sec, max_attempts, retry_delay
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db().executescript("""
+            CREATE TABLE IF NOT EXISTS items (
+                queue TEXT, key TEXT, state TEXT NOT NULL, priority INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0, available_at REAL NOT NULL DEFAULT 0,
+                owner TEXT, lease_until REAL, result TEXT, error TEXT,
+                created_at REAL, started_at REAL, finished_at REAL,
+                PRIMARY KEY (queue, key));
+            CREATE INDEX IF NOT EXISTS items_ready ON items (queue, state, priority DESC, available_at);
+        """)
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    class _Tx:
+        def __init__(self, db): self.db = db
+        def __enter__(self):
+            self.db.execute("BEGIN IMMEDIATE")  # claims are atomic across processes
+            return self.db
+        def __exit__(self, et, ev, tb):
+            self.db.execute("ROLLBACK" if et else "COMMIT")
+
+    def _tx(self) -> "_Tx":
+        return self._Tx(self._db())
+
+    # ---------- producers ----------
+    def reset(self) -> None:
+        """Drop every item of this queue (start a new run)."""
+        with self._tx() as db:
+            db.execute("DELETE FROM items WHERE queue=?", (self.name,))
+
+    def enqueue(self, keys: Iterable[str], priority: Optional[Iterable[int]] = None) -> int:
+        """Add items (existing keys are left as they are); default priority keeps the given order."""
+        keys = list(keys)
+        prios = list(priority) if priority is not None else [len(keys) - i for i in range(len(keys))]
+        now = time.time()
+        with self._tx() as db:
+            before = db.total_changes
+            db.executemany("INSERT OR IGNORE INTO items (queue, key, state, priority, created_at) VALUES (?,?,?,?,?)",
+                           [(self.name, k, PENDING, p, now) for k, p in zip(keys, prios)])
+            return db.total_changes - before
+
+    def retry_failed(self) -> int:
+        with self._tx() as db:
+            return db.execute("UPDATE items SET state=?, attempts=0, available_at=0, error=NULL "
+                              "WHERE queue=? AND state=?", (PENDING, self.name, FAILED)).rowcount
+
+    # ---------- workers ----------
+    def _reclaim(self, db: sqlite3.Connection, now: float) -> None:
+        # expired leases: the worker died mid-item; it counts as an attempt
+        db.execute("UPDATE items SET state=CASE WHEN attempts >= ? THEN ? ELSE ? END, owner=NULL, "
+                   "error=COALESCE(error, 'lease expired'), available_at=? "
+                   "WHERE queue=? AND state=? AND lease_until < ?",
+                   (self.max_attempts, FAILED, PENDING, now, self.name, LEASED, now))
+
+    def claim(self, owner: str, n: int = 1) -> List[Item]:
+        now = time.time()
+        with self._tx() as db:
+            self._reclaim(db, now)
+            rows = db.execute("SELECT key, priority, attempts FROM items WHERE queue=? AND state=? AND available_at <= ? "
+                              "ORDER BY priority DESC, rowid LIMIT ?", (self.name, PENDING, now, n)).fetchall()
+            db.executemany("UPDATE items SET state=?, owner=?, lease_until=?, attempts=attempts+1, started_at=? "
+                           "WHERE queue=? AND key=?",
+                           [(LEASED, owner, now + self.lease_sec, now, self.name, k) for k, _, _ in rows])
+        return [Item(k, p, a + 1) for k, p, a in rows]
+
+    def heartbeat(self, owner: str) -> int:
+        """Extend every lease `owner` holds."""
+        with self._tx() as db:
+            return db.execute("UPDATE items SET lease_until=? WHERE queue=? AND state=? AND owner=?",
+                              (time.time() + self.lease_sec, self.name, LEASED, owner)).rowcount
+
+    def complete(self, key: str, owner: str, result: Any = None) -> bool:
+        with self._tx() as db:
+            return db.execute("UPDATE items SET state=?, result=?, error=NULL, owner=NULL, finished_at=? "
+                              "WHERE queue=? AND key=? AND owner=? AND state=?",
+                              (DONE, json.dumps(result), time.time(), self.name, key, owner, LEASED)).rowcount == 1
+
+    def fail(self, key: str, owner: str, error: str, retry: bool = True) -> str:
+        """Record a failure; back to pending (after retry_delay * attempts) unless out of attempts."""
+        now = time.time()
+        with self._tx() as db:
+            row = db.execute("SELECT attempts FROM items WHERE queue=? AND key=? AND owner=? AND state=?",
+                             (self.name, key, owner, LEASED)).fetchone()
+            if row is None: return ""
+            state = PENDING if retry and row[0] < self.max_attempts else FAILED
+            db.execute("UPDATE items SET state=?, error=?, owner=NULL, available_at=?, finished_at=? "
+                       "WHERE queue=? AND key=?",
+                       (state, str(error)[:500], now + self.retry_delay * row[0], now, self.name, key))
+            return state
+
+    def reclaim_orphans(self) -> int:
+        """Expire leases held by processes on this host that no longer exist (restart after a crash)."""
+        host = socket.gethostname()
+        owners = [o for (o,) in self._db().execute("SELECT DISTINCT owner FROM items WHERE queue=? AND state=?",
+                                                   (self.name, LEASED)).fetchall() if o]
+        dead = [o for o in owners if o.rpartition(":")[0] == host and not _alive(o.rpartition(":")[2])]
+        with self._tx() as db:
+            for o in dead:
+                db.execute("UPDATE items SET lease_until=0 WHERE queue=? AND state=? AND owner=?", (self.name, LEASED, o))
+        return len(dead)
+
+    def release(self, owner: str) -> int:
+        """Hand back `owner`'s leases untouched (clean shutdown); the attempt isn't counted."""
+        with self._tx() as db:
+            return db.execute("UPDATE items SET state=?, owner=NULL, attempts=MAX(attempts-1, 0) "
+                              "WHERE queue=? AND state=? AND owner=?", (PENDING, self.name, LEASED, owner)).rowcount
+
+    # ---------- reporting ----------
+    def progress(self, window_sec: float = 600.0) -> Dict[str, Any]:
+        """Counts by state and result, plus the recent completion rate (items/min, all workers)."""
+        db, now = self._db(), time.time()
+        states = dict(db.execute("SELECT state, COUNT(*) FROM items WHERE queue=? GROUP BY state", (self.name,)).fetchall())
+        results = {json.loads(r) if r else None: c for r, c in db.execute(
+            "SELECT result, COUNT(*) FROM items WHERE queue=? AND state=? GROUP BY result", (self.name, DONE)).fetchall()}
+        recent = db.execute("SELECT COUNT(*) FROM items WHERE queue=? AND state IN (?,?) AND finished_at >= ?",
+                            (self.name, DONE, FAILED, now - window_sec)).fetchone()[0]
+        workers = db.execute("SELECT COUNT(DISTINCT owner) FROM items WHERE queue=? AND state=?",
+                             (self.name, LEASED)).fetchone()[0]
+        total = sum(states.values())
+        return {"total": total, **{s: states.get(s, 0) for s in (PENDING, LEASED, DONE, FAILED)},
+                "results": results, "workers": workers, "per_min": round(recent / (window_sec / 60.0), 2)}
+
+    def failures(self, limit: int = 20) -> List[Dict[str, Any]]:
+        return [{"key": k, "attempts": a, "error": e} for k, a, e in self._db().execute(
+            "SELECT key, attempts, error FROM items WHERE queue=? AND state=? ORDER BY finished_at DESC LIMIT ?",
+            (self.name, FAILED, limit)).fetchall()]
@@ -0,0 +1,160 @@
+# write_behind.py — coalescing write-behind queue with one dedicated writer thread
+from __future__ import annotations
+import os, time, atexit, logging, tempfile, threading, weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+LOG = logging.getLogger("luna")
+
+_INSTANCES: "weakref.WeakSet[WriteBehind]" = weakref.WeakSet()
+
+@contextmanager
+def atomic_path(path: Path) -> Iterator[Path]:
+    """Yield a temp path next to `path`; it replaces `path` only if the block succeeds."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+    os.close(fd)
+    try:
+        yield Path(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+def atomic_write_text(path: Path, text: str) -> None:
+    with atomic_path(path) as tmp:
+        tmp.write_text(text, encoding="utf-8")
+
+class WriteBehind:
+    """
+    Jobs are keyed; submitting a key that is still pending replaces its value
+    (or folds it in via `merge`), so bursts for one symbol cost one write.
+    When `max_pending` distinct keys are queued, submit() waits up to `block_sec`
+    for room and then writes inline on the caller's thread (backpressure).
+    The writer thread starts on the first submit() in each process: threads don't
+    survive fork, so a writer built at import under gunicorn --preload restarts in
+    every worker. stop() always drains, inline if there is no live writer thread.
+    """
+    def __init__(self, name: str = "writer", max_pending: int = 256, block_sec: float = 2.0):
+        self.name = name
+        self.max_pending = max_pending
+        self.block_sec = block_sec
+        self._jobs: Dict[str, Tuple[Any, Callable[[Any], None]]] = {}
+        self._inflight: Dict[str, Any] = {}   # popped, being written; still visible to peek()
+        self._cv = threading.Condition()
+        self._stopped = False
+        self.stats = {"submitted": 0, "coalesced": 0, "written": 0, "inline": 0, "errors": 0}
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        _INSTANCES.add(self)
+        atexit.register(self.stop)
+
+    def _ensure_thread(self) -> None:
+        # caller holds self._cv
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.name}", daemon=True)
+        self._thread.start()
+        self._pid = os.getpid()
+
+    def _after_fork_in_child(self) -> None:
+        # the parent still owns (and writes) what it had queued; the child starts empty
+        self._cv = threading.Condition()
+        self._jobs, self._inflight = {}, {}
+        self._thread, self._pid = None, None
+
+    def submit(self, key: str, value: Any, write_fn: Callable[[Any], None],
+               merge: Optional[Callable[[Any, Any], Any]] = None) -> None:
+        with self._cv:
+            self.stats["submitted"] += 1
+            if key in self._jobs:
+                old, _ = self._jobs[key]
+                self._jobs[key] = (merge(old, value) if merge else value, write_fn)
+                self.stats["coalesced"] += 1
+                return
+            deadline = time.time() + self.block_sec
+            while len(self._jobs) >= self.max_pending and not self._stopped:
+                left = deadline - time.time()
+                if left <= 0: break
+                self._cv.wait(left)
+            if self._stopped or len(self._jobs) >= self.max_pending:
+                self.stats["inline"] += 1
+                inline = True
+            else:
+                self._jobs[key] = (value, write_fn)
+                self._ensure_thread()
+                self._cv.notify_all()
+                inline = False
+        if inline:
+            self._write(key, value, write_fn)
+
+    def peek(self, key: str) -> Any:
+        """Pending (not yet written) value for `key`, or None."""
+        with self._cv:
+            job = self._jobs.get(key)
+            return job[0] if job else self._inflight.get(key)
+
+    def pending(self) -> int:
+        with self._cv:
+            return len(self._jobs) + len(self._inflight)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cv:
+            while self._jobs or self._inflight:
+                left = None if deadline is None else deadline - time.time()
+                if left is not None and left <= 0: return False
+                self._cv.wait(left)
+        return True
+
+    def stop(self, timeout: float = 30.0) -> None:
+        with self._cv:
+            live = self._pid == os.getpid() and self._thread is not None and self._thread.is_alive()
+        if live:
+            self.flush(timeout)
+        with self._cv:
+            self._stopped = True
+            left, self._jobs = self._jobs, {}
+            self._cv.notify_all()
+        for key, (value, write_fn) in left.items():  # no writer thread (or it timed out): drain here
+            self._write(key, value, write_fn)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._cv:
+            return dict(self.stats, pending=len(self._jobs) + len(self._inflight))
+
+    # ---- writer thread ----
+    def _run(self) -> None:
+        while True:
+            with self._cv:
+                while not self._jobs and not self._stopped:
+                    self._cv.wait()
+                if not self._jobs and self._stopped:
+                    return
+                key = next(iter(self._jobs))
+                value, write_fn = self._jobs.pop(key)
+                self._inflight[key] = value
+                self._cv.notify_all()
+            try:
+                self._write(key, value, write_fn)
+            finally:
+                with self._cv:
+                    self._inflight.pop(key, None)
+                    self._cv.notify_all()
+
+    def _write(self, key: str, value: Any, write_fn: Callable[[Any], None]) -> None:
+        try:
+            write_fn(value)
+            self.stats["written"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            LOG.warning("[WriteBehind] %s write failed for %s: %s", self.name, key, e)
+
+def _reset_after_fork() -> None:
+    for wb in list(_INSTANCES):
+        wb._after_fork_in_child()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)